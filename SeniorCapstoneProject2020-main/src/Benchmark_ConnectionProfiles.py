@@ -0,0 +1,57 @@
+"""Benchmark comparing read and write throughput of the local cache database under each
+connection profile in NewBotCache.CONNECTION_PROFILES.
+
+Usage: python Benchmark_ConnectionProfiles.py [operationCount]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import discord
+import NewBotCache
+
+GUILD_ID = 798358551230677042
+CHANNEL_COUNT = 50
+
+async def benchmarkProfile(profile: str, dbFile: str, operationCount: int):
+    """Runs operationCount permission overwrite writes followed by operationCount reads against a new
+    db file using the given connection profile. Returns a tuple of write and read operations per second.
+    """
+    cache = NewBotCache.Cache(dbFile, useDBExecutor=True, connectionProfile=profile)
+    await cache.addServer(GUILD_ID)
+    await cache.flushWrites()
+
+    overwrite = discord.PermissionOverwrite.from_pair(discord.Permissions.none(), discord.Permissions(send_messages=True))
+
+    # writes are issued in groups of concurrent callers, the way a lock or unlock command issues them
+    start = time.perf_counter()
+    for groupStart in range(0, operationCount, 100):
+        await asyncio.gather(*[cache.addPermOverwrite(GUILD_ID, i % CHANNEL_COUNT, i, overwrite)
+            for i in range(groupStart, min(groupStart + 100, operationCount))])
+    await cache.flushWrites()
+    writeTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(operationCount):
+        await cache.getPermOverwrite(GUILD_ID, i % CHANNEL_COUNT, i)
+    readTime = time.perf_counter() - start
+
+    cache.closeDBExecutor()
+    cache.dbConnection.close()
+    return (operationCount / writeTime, operationCount / readTime)
+
+async def main(operationCount: int):
+    print(f"{operationCount} writes and reads per profile")
+    print(f"{'profile':<10}{'writes/s':>12}{'reads/s':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in NewBotCache.CONNECTION_PROFILES:
+            dbFile = os.path.join(directory, f"{profile}.db")
+            writeRate, readRate = await benchmarkProfile(profile, dbFile, operationCount)
+            print(f"{profile:<10}{writeRate:>12.0f}{readRate:>12.0f}")
+
+if __name__ == "__main__":
+    operationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    asyncio.run(main(operationCount))
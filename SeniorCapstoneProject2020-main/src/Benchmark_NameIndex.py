@@ -0,0 +1,77 @@
+"""Benchmark measuring wildcard member lookups per second against the shared name index on a guild with 10k
+members, compared with the previous scan compiling the pattern and matching every member's name and nickname.
+
+Usage: python Benchmark_NameIndex.py [memberCount]
+"""
+
+import re
+import sys
+import time
+from types import SimpleNamespace
+import NameIndex
+
+PATTERNS = ["student1*", "*smith", "Group 4*", "*ta*", "s*7"]
+
+# the linear scan is measured over fewer lookups, since each lookup matches every member
+LOOKUP_COUNT = 2000
+LINEAR_SCAN_LOOKUP_COUNT = 50
+
+class FakeGuild():
+    def __init__(self, members: list):
+        self.id = 798358551230677042
+        self.members = members
+        self.roles = []
+        self.memberDict = {member.id: member for member in members}
+
+    def get_member(self, memberID: int):
+        return self.memberDict.get(memberID)
+
+def generateMembers(memberCount: int) -> list:
+    """Generates members named like a class server: students, group members, and a few TAs with nicknames.
+    """
+    members = []
+    for i in range(memberCount):
+        if (i % 50 == 0):
+            name, nick = f"ta{i}", f"TA {i} smith"
+        elif (i % 3 == 0):
+            name, nick = f"student{i}", f"Group {i % 40} - {i}"
+        else:
+            name, nick = f"student{i}", None
+        members.append(SimpleNamespace(id=i, name=name, nick=nick))
+
+    return members
+
+def linearScan(members: list, pattern: str) -> list:
+    """Matches members the way the wildcard commands did before the name index.
+    """
+    for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
+        pattern = pattern.replace(i, "\\" + i)
+    pattern = pattern.replace("*", ".*")
+    nameMatch = lambda name: (re.fullmatch(pattern, name.name) is not None) or (re.fullmatch(pattern, str(name.nick)) is not None)
+    return list(filter(nameMatch, members))
+
+def main(memberCount: int):
+    guild = FakeGuild(generateMembers(memberCount))
+    indexes = NameIndex.GuildNameIndexes()
+
+    start = time.perf_counter()
+    indexes.getMemberIndex(guild)
+    print(f"index build for {memberCount} members: {time.perf_counter() - start:.3f}s")
+
+    print(f"{'pattern':>12}{'matches':>10}{'indexed (ms)':>15}{'linear (ms)':>14}")
+    for pattern in PATTERNS:
+        start = time.perf_counter()
+        for _ in range(LOOKUP_COUNT):
+            results = indexes.matchMembers(guild, pattern)
+        indexedTime = (time.perf_counter() - start) / LOOKUP_COUNT
+
+        start = time.perf_counter()
+        for _ in range(LINEAR_SCAN_LOOKUP_COUNT):
+            linearScan(guild.members, pattern)
+        linearTime = (time.perf_counter() - start) / LINEAR_SCAN_LOOKUP_COUNT
+
+        print(f"{pattern:>12}{len(results):>10}{indexedTime * 1000:>15.3f}{linearTime * 1000:>14.3f}")
+
+if __name__ == "__main__":
+    memberCount = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    main(memberCount)
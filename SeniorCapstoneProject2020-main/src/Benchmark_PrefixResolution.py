@@ -0,0 +1,62 @@
+"""Benchmark comparing the per-message cost of resolving the bot's command prefix through the async
+cached settings lookup against the synchronous prefix map lookup used by EduBot.get_prefix.
+
+Usage: python Benchmark_PrefixResolution.py [messageCount]
+"""
+
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+import NewBotCache
+
+GUILD_COUNT = 1000
+
+async def resolveAsync(cache: NewBotCache.Cache, message):
+    # the prefix lookup made for each message before the prefix map
+    return await cache.getServerCommandPrefix(message.guild.id)
+
+def resolveSync(cache: NewBotCache.Cache, message):
+    if (message.guild is None):
+        return NewBotCache.DEFAULT_COMMAND_PREFIX
+    return cache.getCachedCommandPrefix(message.guild.id)
+
+async def main(messageCount: int):
+    cache = NewBotCache.Cache(':memory:')
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().executemany(insertStatement, [(guildID, '!', False) for guildID in range(GUILD_COUNT)])
+    await cache.loadPrefixMap()
+
+    messages = [SimpleNamespace(guild=SimpleNamespace(id=i % GUILD_COUNT)) for i in range(messageCount)]
+    directMessages = [SimpleNamespace(guild=None) for _ in range(messageCount)]
+
+    # warm the settings cache so the async path is measured at its best case
+    for message in messages[:GUILD_COUNT]:
+        await resolveAsync(cache, message)
+
+    start = time.perf_counter()
+    for message in messages:
+        await resolveAsync(cache, message)
+    asyncTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for message in messages:
+        resolveSync(cache, message)
+    syncTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for message in directMessages:
+        resolveSync(cache, message)
+    directTime = time.perf_counter() - start
+
+    print(f"{messageCount} messages across {GUILD_COUNT} servers")
+    print(f"{'lookup':<24}{'ns/message':>12}")
+    print(f"{'async settings cache':<24}{asyncTime / messageCount * 1e9:>12.0f}")
+    print(f"{'sync prefix map':<24}{syncTime / messageCount * 1e9:>12.0f}")
+    print(f"{'sync direct message':<24}{directTime / messageCount * 1e9:>12.0f}")
+
+    cache.dbConnection.close()
+
+if __name__ == "__main__":
+    messageCount = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    asyncio.run(main(messageCount))
@@ -0,0 +1,66 @@
+"""Benchmark comparing the compiled ProfanityMatcher with better_profanity's contains_profanity on a corpus
+of classroom chat messages, reporting messages per second and how often the two verdicts agree.
+
+Usage: python Benchmark_ProfanityFilter.py [messageCount]
+"""
+
+import random
+import sys
+import time
+import ProfanityFilter
+from better_profanity import profanity
+
+# message templates and fill words for the generated corpus, roughly one message in ten is profane
+TEMPLATES = [
+    "does anyone have the notes from {0}'s lecture?",
+    "when is the {0} assignment due",
+    "I think question {1} on the {0} homework is wrong",
+    "can someone explain {0} again? I'm lost",
+    "ok",
+    "thanks!!",
+    "the {0} quiz was so hard lol",
+    "https://docs.google.com/document/d/{1}/edit",
+    "meeting in the {0} breakout room in {1} minutes",
+    "this {2} {0} project is taking forever",
+]
+TOPICS = ["monday", "calculus", "biology", "history", "data structures", "chemistry", "english", "physics"]
+FILLERS = ["stupid", "great", "long", "shitty", "f*cking", "boring", "hard", "b1tch of a", "fun", "weird"]
+
+def generateCorpus(messageCount: int) -> list:
+    """Generates message contents from the templates with random fill words.
+    """
+    random.seed(2020)
+    corpus = []
+    for _ in range(messageCount):
+        template = random.choice(TEMPLATES)
+        corpus.append(template.format(random.choice(TOPICS), random.randrange(1, 100), random.choice(FILLERS)))
+
+    return corpus
+
+def main(messageCount: int):
+    corpus = generateCorpus(messageCount)
+    words = ProfanityFilter.loadDefaultWords()
+
+    start = time.perf_counter()
+    matcher = ProfanityFilter.ProfanityMatcher(words)
+    compileTime = time.perf_counter() - start
+    profanity.load_censor_words(words)
+
+    start = time.perf_counter()
+    matcherVerdicts = [matcher.containsProfanity(content) for content in corpus]
+    matcherRate = messageCount / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    profanityVerdicts = [profanity.contains_profanity(content) for content in corpus]
+    profanityRate = messageCount / (time.perf_counter() - start)
+
+    agreement = sum(a == b for a, b in zip(matcherVerdicts, profanityVerdicts)) / messageCount
+    print(f"{messageCount} messages, {len(words)} filtered words, {sum(matcherVerdicts)} flagged by ProfanityMatcher")
+    print(f"ProfanityMatcher compile time: {compileTime:.2f}s")
+    print(f"{'ProfanityMatcher':<20}{matcherRate:>10.0f} msgs/s")
+    print(f"{'better_profanity':<20}{profanityRate:>10.0f} msgs/s")
+    print(f"verdict agreement: {agreement:.2%}")
+
+if __name__ == "__main__":
+    messageCount = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    main(messageCount)
@@ -0,0 +1,88 @@
+"""Benchmark measuring messages per second checked against the url blocklist index at 10k, 100k, and 1M
+blocklist entries, compared with the previous linear scan over the blocklist's link lists.
+
+Usage: python Benchmark_UrlBlocklist.py [messageCount]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import UrlBlocklist
+
+ENTRY_COUNTS = [10000, 100000, 1000000]
+
+# the linear scan is measured over fewer messages, since each message scans every entry
+LINEAR_SCAN_MESSAGE_COUNT = 200
+
+def generateBlocklist(entryCount: int) -> dict:
+    """Generates restricted urls data with the given number of links, mixing full urls, path prefixes,
+    and whole hosts.
+    """
+    links = []
+    for i in range(entryCount):
+        if (i % 10 == 0):
+            links.append(f"https://www.blocked{i}.com/")
+        elif (i % 10 == 1):
+            links.append(f"https://cdn{i % 500}.example.net/gallery{i}/")
+        else:
+            links.append(f"https://i.imgur.com/{i:08x}.jpg")
+
+    return {"url": [{"link": links, "type": "Pornography", "threat": "NSFW"}]}
+
+def generateMessages(messageCount: int, entryCount: int) -> list:
+    """Generates message contents: half plain text, a quarter clean links, and a quarter blocked links.
+    """
+    messages = []
+    for i in range(messageCount):
+        kind = i % 4
+        if (kind < 2):
+            messages.append(f"does anyone have the notes from lecture {i}?")
+        elif (kind == 2):
+            messages.append(f"see https://docs.python.org/3/library/{i}.html")
+        else:
+            messages.append(f"https://i.imgur.com/{random.randrange(entryCount):08x}.jpg")
+
+    return messages
+
+def linearScan(data: dict, content: str) -> bool:
+    """Checks message content the way urlFilter did before the blocklist index.
+    """
+    for urlDict in data["url"]:
+        if (content in urlDict["link"]):
+            return True
+    return False
+
+def main(messageCount: int):
+    print(f"{'entries':>10}{'build (s)':>12}{'indexed msgs/s':>17}{'linear msgs/s':>16}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for entryCount in ENTRY_COUNTS:
+            data = generateBlocklist(entryCount)
+            filePath = os.path.join(directory, f"urlCheck{entryCount}.json")
+            with open(filePath, "w") as f:
+                json.dump(data, f)
+
+            start = time.perf_counter()
+            blocklist = UrlBlocklist.UrlBlocklist(filePath)
+            blocklist.load()
+            buildTime = time.perf_counter() - start
+
+            messages = generateMessages(messageCount, entryCount)
+            start = time.perf_counter()
+            for content in messages:
+                blocklist.findBlockedUrl(content)
+            indexedRate = messageCount / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for content in messages[:LINEAR_SCAN_MESSAGE_COUNT]:
+                linearScan(data, content)
+            linearRate = LINEAR_SCAN_MESSAGE_COUNT / (time.perf_counter() - start)
+
+            print(f"{entryCount:>10}{buildTime:>12.2f}{indexedRate:>17.0f}{linearRate:>16.0f}")
+
+if __name__ == "__main__":
+    messageCount = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(messageCount)
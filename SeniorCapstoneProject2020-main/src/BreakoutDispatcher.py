@@ -0,0 +1,86 @@
+"""Module contains functions for planning the member moves made when sending students to their group voice channels
+and returning them, so that each group's voice channel is looked up once per command rather than once per member.
+
+Group voice channels are found from a single query of the server's groups and a single scan of the guild's
+channels, and the planned moves are run concurrently through a bulk operation executor."""
+
+import discord
+import BulkOperations
+from typing import Dict, Iterable, Optional
+
+class BreakoutPlan():
+    """BreakoutPlan object stores the moves planned for a breakout command as a dict of the voice channel each
+    member is moved to, along with (member, reason) pairs for the members that can't be moved.
+    """
+    def __init__(self):
+        self.moves = {}
+        self.unmoved = []
+
+    def summary(self, report: BulkOperations.BulkOperationReport, maxUnmovedListed: int = 10) -> str:
+        """Returns a message giving the number of members moved, listing the first maxUnmovedListed members
+        that were not moved along with the reason why.
+        """
+        unmoved = self.unmoved + [(member, getattr(error, "text", None) or error) for member, error in report.failed]
+        summary = f"{len(report.succeeded)} member(s) moved."
+        if (len(unmoved) > 0):
+            unmovedLines = [f"{member}: {reason}" for member, reason in unmoved[:maxUnmovedListed]]
+            if (len(unmoved) > maxUnmovedListed):
+                unmovedLines.append(f"...and {len(unmoved) - maxUnmovedListed} more")
+            summary += f" {len(unmoved)} member(s) not moved:\n" + "\n".join(unmovedLines)
+
+        return summary
+
+def mapGroupVoiceChannels(guild: discord.Guild, groupCategories: Dict[int, int]) -> Dict[int, discord.VoiceChannel]:
+    """Returns dict of the voice channel of each group role, given a dict of the category channel ID of each group
+    role. A group's voice channel is the first voice channel found in its category, and groups whose category has
+    no voice channel are left out.
+    """
+    categoryVoiceChannels = {}
+    for channel in guild.channels:
+        if (isinstance(channel, discord.VoiceChannel) and channel.category_id is not None):
+            categoryVoiceChannels.setdefault(channel.category_id, channel)
+
+    return {roleID: categoryVoiceChannels[categoryID] for roleID, categoryID in groupCategories.items() if categoryID in categoryVoiceChannels}
+
+def planBreakoutSend(members: Iterable[discord.Member], groupCategories: Dict[int, int], groupVoiceChannels: Dict[int, discord.VoiceChannel]) -> BreakoutPlan:
+    """Plans moving each of the given members to the voice channel of their group. Members in more than one group
+    go to the group of their highest group role, and members already in their group's voice channel aren't moved.
+    """
+    plan = BreakoutPlan()
+    for member in members:
+        # member.roles is ordered from lowest to highest role
+        groupRoles = [role for role in member.roles if role.id in groupCategories]
+        if (len(groupRoles) == 0):
+            plan.unmoved.append((member, "not in a group"))
+            continue
+
+        voiceChannel = groupVoiceChannels.get(groupRoles[-1].id)
+        if (voiceChannel is None):
+            plan.unmoved.append((member, f"group {groupRoles[-1].name} has no voice channel"))
+        elif (member.voice is None or member.voice.channel != voiceChannel):
+            plan.moves[member] = voiceChannel
+
+    return plan
+
+def planBreakoutReturn(groupVoiceChannels: Dict[int, discord.VoiceChannel], destination: discord.VoiceChannel,
+    excludedMembers: Iterable[discord.Member] = ()) -> BreakoutPlan:
+    """Plans moving every member in a group voice channel to the destination voice channel, except the
+    excluded members.
+    """
+    plan = BreakoutPlan()
+    excludedMembers = set(excludedMembers)
+    # groups may share a voice channel, each channel is only looked at once
+    for voiceChannel in dict.fromkeys(groupVoiceChannels.values()):
+        if (voiceChannel == destination):
+            continue
+        for member in voiceChannel.members:
+            if (member not in excludedMembers):
+                plan.moves[member] = destination
+
+    return plan
+
+async def runBreakoutPlan(plan: BreakoutPlan, bulkExecutor: BulkOperations.BulkOperationExecutor,
+    progressChannel: Optional[discord.abc.Messageable] = None, description: str = "Moving members") -> BulkOperations.BulkOperationReport:
+    """Makes the plan's moves concurrently through the bulk executor, returning the executor's report.
+    """
+    return await bulkExecutor.run(plan.moves, lambda member: member.move_to(plan.moves[member]), progressChannel, description)
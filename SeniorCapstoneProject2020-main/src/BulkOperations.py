@@ -0,0 +1,197 @@
+"""Module contains BulkOperationExecutor class for running a Discord API call over many members, roles, or
+channels without flooding the API."""
+
+import asyncio
+import random
+import discord
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+# default number of API calls a bulk operation runs at once, and the number of times a call is retried after
+# being rate limited or failing with a server error
+BULK_MAX_CONCURRENCY = 5
+BULK_MAX_RETRIES = 3
+
+# seconds waited before the first retry of a failed call, doubled for each further retry, and the longest
+# wait allowed between retries
+BULK_RETRY_BASE_DELAY = 1.0
+BULK_RETRY_MAX_DELAY = 30.0
+
+# bulk operations with at least this many items post a progress message in the invoking channel, which is
+# edited at most once every BULK_PROGRESS_INTERVAL seconds
+BULK_PROGRESS_MIN_ITEMS = 25
+BULK_PROGRESS_INTERVAL = 3.0
+
+class BulkOperationReport():
+    """BulkOperationReport object stores the outcome of a bulk operation: the result of the call for each
+    item, in the same order as the items, along with the items that succeeded and the items that failed
+    paired with the exception that caused the failure.
+    """
+    def __init__(self, items: List[Any]):
+        self.items = items
+        self.results = [None] * len(items)
+        self.succeeded = []
+        self.failed = []
+
+        # indexes of the items whose call succeeded
+        self.succeededIndexes = set()
+
+    @property
+    def successfulResults(self) -> List[Tuple[Any, Any]]:
+        """List of (item, result) pairs for the items whose call succeeded, in item order.
+        """
+        return [(self.items[index], self.results[index]) for index in sorted(self.succeededIndexes)]
+
+    def summary(self, maxFailuresListed: int = 10) -> str:
+        """Returns a message summarizing the number of items that succeeded and failed, listing the first
+        maxFailuresListed failures along with their reasons.
+        """
+        summary = f"{len(self.succeeded)} succeeded, {len(self.failed)} failed."
+        if (len(self.failed) > 0):
+            failureLines = [f"{item}: {getattr(error, 'text', None) or error}" for item, error in self.failed[:maxFailuresListed]]
+            if (len(self.failed) > maxFailuresListed):
+                failureLines.append(f"...and {len(self.failed) - maxFailuresListed} more")
+            summary += "\nFailed:\n" + "\n".join(failureLines)
+
+        return summary
+
+class BulkOperationExecutor():
+    """BulkOperationExecutor object runs a Discord API call for each item of a list with a cap on the number
+    of calls running at once, shared by every operation run by the executor. Calls that are rate limited or fail with a server error are retried with
+    exponential backoff, and a rate limit pauses every call run by the executor until the rate limit resets.
+    """
+    def __init__(self, maxConcurrency: int = BULK_MAX_CONCURRENCY, maxRetries: int = BULK_MAX_RETRIES):
+        self.maxConcurrency = maxConcurrency
+        self.maxRetries = maxRetries
+
+        # event loop time before which no new calls are started, set when the API responds with a rate limit
+        self.pausedUntil = 0.0
+
+        # semaphore held by each running call, created on first use in the event loop it is used from
+        self.semaphore = None
+        self.semaphoreLoop = None
+
+    async def run(self, items: Iterable[Any], operation: Callable[[Any], Awaitable], progressChannel: Optional[discord.abc.Messageable] = None,
+        description: str = "Working") -> BulkOperationReport:
+        """Calls operation on each item, returning a report of the results. operation must return a new
+        awaitable each time it is called, as failed calls are retried by calling it again. If progressChannel
+        is given, progress for large operations is posted to it under the given description.
+        """
+        items = list(items)
+        report = BulkOperationReport(items)
+        semaphore = self.getSemaphore()
+        progress = BulkOperationProgress(progressChannel, description, len(items))
+
+        async def runItem(index: int, item):
+            async with semaphore:
+                succeeded, result = await self.runWithRetries(item, operation)
+            if (succeeded):
+                report.results[index] = result
+                report.succeeded.append(item)
+                report.succeededIndexes.add(index)
+            else:
+                report.failed.append((item, result))
+            await progress.update(len(report.succeeded) + len(report.failed))
+
+        await progress.start()
+        await asyncio.gather(*[runItem(index, item) for index, item in enumerate(items)])
+        await progress.finish(report)
+
+        return report
+
+    def getSemaphore(self) -> asyncio.Semaphore:
+        """Returns the semaphore capping the calls running at once across all of the executor's operations,
+        creating it if the executor hasn't been used from the running event loop before.
+        """
+        loop = asyncio.get_event_loop()
+        if (self.semaphoreLoop is not loop):
+            self.semaphore = asyncio.Semaphore(self.maxConcurrency)
+            self.semaphoreLoop = loop
+        return self.semaphore
+
+    async def runWithRetries(self, item, operation: Callable[[Any], Awaitable]) -> Tuple[bool, Any]:
+        """Calls operation on the item, retrying retryable failures. Returns a tuple of whether the call
+        succeeded and either its result or the exception that caused it to fail.
+        """
+        loop = asyncio.get_event_loop()
+        for attempt in range(self.maxRetries + 1):
+            # wait out any rate limit hit by another call before starting this one
+            while (loop.time() < self.pausedUntil):
+                await asyncio.sleep(self.pausedUntil - loop.time())
+
+            try:
+                return (True, await operation(item))
+            except discord.HTTPException as e:
+                if (not self.isRetryable(e) or attempt == self.maxRetries):
+                    return (False, e)
+
+                delay = self.retryDelay(e, attempt)
+                if (e.status == 429):
+                    self.pausedUntil = max(self.pausedUntil, loop.time() + delay)
+                await asyncio.sleep(delay)
+            except Exception as e:
+                return (False, e)
+
+    @staticmethod
+    def isRetryable(error: discord.HTTPException) -> bool:
+        """Checks whether a failed call may succeed if tried again, which is the case for rate limits
+        and server errors.
+        """
+        return (error.status == 429) or (error.status >= 500)
+
+    @staticmethod
+    def retryDelay(error: discord.HTTPException, attempt: int) -> float:
+        """Returns the number of seconds to wait before retrying a failed call. Rate limited calls wait for
+        the time given by the response's rate limit headers, other failures back off exponentially with jitter.
+        """
+        headers = getattr(error.response, "headers", None) or {}
+        if (error.status == 429):
+            for header in ("Retry-After", "X-RateLimit-Reset-After"):
+                try:
+                    return min(float(headers[header]), BULK_RETRY_MAX_DELAY)
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+        delay = min(BULK_RETRY_BASE_DELAY * (2 ** attempt), BULK_RETRY_MAX_DELAY)
+        return delay * random.uniform(0.5, 1.0)
+
+class BulkOperationProgress():
+    """BulkOperationProgress object posts and edits a progress message for a bulk operation. Nothing is
+    posted for operations without a progress channel or with fewer than BULK_PROGRESS_MIN_ITEMS items.
+    """
+    def __init__(self, channel: Optional[discord.abc.Messageable], description: str, total: int):
+        self.channel = channel if (total >= BULK_PROGRESS_MIN_ITEMS) else None
+        self.description = description
+        self.total = total
+        self.message = None
+        self.lastUpdate = 0.0
+
+    async def start(self):
+        if (self.channel is not None):
+            try:
+                self.message = await self.channel.send(f"{self.description}: 0/{self.total}")
+            except discord.HTTPException:
+                return
+            self.lastUpdate = asyncio.get_event_loop().time()
+
+    async def update(self, completed: int):
+        if (self.message is None):
+            return
+
+        now = asyncio.get_event_loop().time()
+        if (now - self.lastUpdate >= BULK_PROGRESS_INTERVAL and completed < self.total):
+            self.lastUpdate = now
+            try:
+                await self.message.edit(content=f"{self.description}: {completed}/{self.total}")
+            except discord.HTTPException:
+                pass
+
+    async def finish(self, report: BulkOperationReport):
+        if (self.message is not None):
+            try:
+                await self.message.edit(content=f"{self.description}: {self.total}/{self.total} done, {len(report.failed)} failed.")
+            except discord.HTTPException:
+                pass
+
+
+# executor shared by the cogs, so that a rate limit hit by one bulk operation pauses every bulk operation
+sharedExecutor = BulkOperationExecutor()
@@ -1,5 +1,12 @@
 import NewBotCache
 import EduBotChecks
+import JobScheduler
+import HistoryScanner
+import InviteTracker
+import MessageDispatcher
+import PollTallies
+import NameIndex
+import StartupWarmup
 # from ServerAdminCog import ServerAdministration
 # from ContentModCog import ContentModeration
 from NotificationSysCog import NotificationSystem
@@ -11,19 +18,41 @@ import discord
 from discord.ext import commands
 import asyncio
 
-# method returns the prefix for the bot associated with the server the message was sent on
-async def get_prefix(client, message):
-    prefix = await cache.getServerCommandPrefix(message.guild.id)
-    return prefix
+# method returns the prefix for the bot associated with the server the message was sent on, called
+# for every message so the prefix is read from the cache's in-memory prefix map; direct messages
+# use the default prefix
+def get_prefix(client, message):
+    if (message.guild is None):
+        return NewBotCache.DEFAULT_COMMAND_PREFIX
+    return cache.getCachedCommandPrefix(message.guild.id)
 
 # establishes bot's command prefix, which will differentiate commands from regular
-# messages; and sets bots intents, which allows it access to certain server information
+# messages; and sets bots intents, which allows it access to certain server information;
+# the bot shows as idle until the startup warm-up completes
 botIntents = discord.Intents.all()
-bot = commands.Bot(command_prefix=get_prefix, intents=botIntents, case_insensitive = True)
+bot = commands.Bot(command_prefix=get_prefix, intents=botIntents, case_insensitive = True, status=discord.Status.idle)
 
 
 #### LISTENERS ####
 
+# Event used to pass each message to the message dispatcher, replacing the bot's
+# default on_message so that only command messages are processed as commands
+@bot.event
+async def on_message(message):
+    await messageDispatcher.dispatch(message)
+
+# Listener used to run the startup warm-up once the bot is connected, then to start
+# the job scheduler and history scanner, running any timed unlocks and reminders
+# that became due while the bot was offline and continuing any interrupted message
+# deletions, and to load the vote counts of open polls
+@bot.listen()
+async def on_ready():
+    await startupWarmup.run(bot.guilds)
+    await bot.change_presence(status=discord.Status.online)
+    await scheduler.start()
+    await historyScanner.start()
+    await pollTallies.load()
+
 # Listener used to add a servers database entry when bot is invited
 # to a new server
 @bot.listen()
@@ -35,6 +64,8 @@ async def on_guild_join(guild):
 @bot.listen()
 async def on_guild_remove(guild):
     await cache.remServer(guild.id)
+    NameIndex.sharedIndexes.removeGuild(guild.id)
+    inviteTracker.removeGuild(guild.id)
 
 # Listener used to remove polls and permOverwrites from database when
 # a channel is deleted
@@ -50,9 +81,48 @@ async def on_guild_channel_delete(channel):
 @bot.listen()
 async def on_member_remove(member):
     await cache.remPermOverwrite(member.guild.id, modifiedID=member.id)
+    NameIndex.sharedIndexes.removeMember(member)
+
+# Listeners used to keep the shared member and role name indexes current, so
+# that wildcard lookups don't have to scan every member of a server
+@bot.listen()
+async def on_member_join(member):
+    NameIndex.sharedIndexes.updateMember(member)
+
+@bot.listen()
+async def on_member_update(before, after):
+    if (before.nick != after.nick or before.name != after.name):
+        NameIndex.sharedIndexes.updateMember(after)
+
+@bot.listen()
+async def on_user_update(before, after):
+    if (before.name != after.name):
+        for guild in bot.guilds:
+            member = guild.get_member(after.id)
+            if (member is not None):
+                NameIndex.sharedIndexes.updateMember(member)
+
+@bot.listen()
+async def on_guild_role_create(role):
+    NameIndex.sharedIndexes.updateRole(role)
+
+@bot.listen()
+async def on_guild_role_update(before, after):
+    if (before.name != after.name):
+        NameIndex.sharedIndexes.updateRole(after)
+
+@bot.listen()
+async def on_guild_role_delete(role):
+    NameIndex.sharedIndexes.removeRole(role)
 
 
 #### COMMANDS ####
+# commands received before the startup warm-up completes wait for it rather than
+# running against cold state
+@bot.before_invoke
+async def waitForWarmup(ctx):
+    await startupWarmup.waitUntilReady()
+
 @bot.command(name="editCommandPrefix", brief="Sets the command prefix for this server.", usage="newPrefix")
 @commands.check(EduBotChecks.hasElevatedPrivileges)
 async def changePrefix(ctx, newPrefix):
@@ -83,15 +153,40 @@ async def on_command_error(ctx, error):
 
 
 #### MAIN ####
+# name of the connection profile used for the local cache database, one of the profiles in
+# NewBotCache.CONNECTION_PROFILES ("durable", "balanced", or "fast")
+CACHE_CONNECTION_PROFILE = "balanced"
+
 # create Cache object from BotCache
-cache = NewBotCache.Cache("../data/LocalCache.db")
+cache = NewBotCache.Cache("../data/LocalCache.db", useDBExecutor=True, connectionProfile=CACHE_CONNECTION_PROFILE)
 EduBotChecks.setCacheReference(cache)
 
+# create scheduler for timed jobs stored in the cache, started by on_ready
+scheduler = JobScheduler.JobScheduler(cache)
+
+# create scanner for checkpointed message history scans, started by on_ready
+historyScanner = HistoryScanner.HistoryScanner(bot, cache)
+
+# create vote counts of open polls, kept from reaction events and loaded by on_ready
+pollTallies = PollTallies.PollTallies(cache)
+
+# create snapshot of invite uses for giving roles to members joining with role invites
+inviteTracker = InviteTracker.InviteTracker(cache)
+
+# create warm-up loading every server's state and the cogs' indexes, run by on_ready
+startupWarmup = StartupWarmup.StartupWarmup(cache)
+
+# create dispatcher classifying each message once and passing it to the handlers subscribed
+# to its classes, with command processing only run on command messages from humans
+messageDispatcher = MessageDispatcher.MessageDispatcher(lambda message: get_prefix(bot, message), lambda: bot.user)
+messageDispatcher.subscribe("commands", lambda message, classes: bot.process_commands(message),
+    requiredClasses=["command"], excludedClasses=["bot"])
+
 # add cogs to bot
-bot.add_cog(ServerAdministration(bot, cache))
-bot.add_cog(ContentModeration(bot, cache))
-bot.add_cog(NotificationSystem(bot, cache))
-bot.add_cog(EduBotFeatures(bot, cache))
+bot.add_cog(ServerAdministration(bot, cache, inviteTracker))
+bot.add_cog(ContentModeration(bot, cache, historyScanner, startupWarmup, messageDispatcher))
+bot.add_cog(NotificationSystem(bot, cache, scheduler))
+bot.add_cog(EduBotFeatures(bot, cache, scheduler, pollTallies))
 # bot.add_cog(Reactions(bot))
 
 # start periodic commit loop
@@ -99,9 +194,18 @@ cache.saveDBToFile.start()
 
 try:
     loop = asyncio.get_event_loop()
+    # load every server's command prefix before any messages are received
+    loop.run_until_complete(cache.loadPrefixMap())
     loop.run_until_complete(bot.start("Nzk4MzQ0MjA2OTQxNjgzNzUz.X_zp-w.KNEbvC4eJJU4E8xyby9OJ_XTPnE"))
 except KeyboardInterrupt:
     loop.run_until_complete(bot.logout)
 finally:
+    scheduler.stop()
+    historyScanner.stop()
+    # write any poll votes still waiting to be counted in the cache
+    loop.run_until_complete(pollTallies.flush())
+    # commit any writes still waiting in the cache's write batch before the final save
+    loop.run_until_complete(cache.flushWrites())
     loop.run_until_complete(cache.saveDBToFile())
+    cache.closeDBExecutor()
     loop.close()
\ No newline at end of file
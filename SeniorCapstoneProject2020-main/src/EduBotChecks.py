@@ -1,8 +1,14 @@
 """Module contains custom written checks for EduBot."""
 
+import json
+import os
+
 # boolean stores whether the current iteration of the bot is a dev-build
 DEV_BUILD = True
 
+# path of the JSON file listing the user IDs of EduBot developers, who pass every privilege check in dev-builds
+DEV_IDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "DevIDs.json")
+
 # stores reference to cache object to allow checks to use cache
 cache = None
 
@@ -10,33 +16,42 @@ def setCacheReference(cacheRef):
     global cache
     cache = cacheRef
 
+def loadDevIDs(filePath: str) -> frozenset:
+    """Returns frozenset of the developer user IDs listed in the given JSON file, or an empty frozenset
+    if the file can't be read.
+    """
+    try:
+        with open(filePath) as f:
+            return frozenset(int(userID) for userID in json.load(f))
+    except (OSError, ValueError, TypeError) as e:
+        print(e)
+        return frozenset()
+
+# user IDs of EduBot developers, loaded once when the module is imported
+DEV_IDS = loadDevIDs(DEV_IDS_FILE)
+
 # check will see if the user who issued a bot command is a server owner
 # or a role specified as a moderator or bot operator to the bot by the server owner
 async def hasElevatedPrivileges(ctx):
-    isDev = await isEduBotDev(ctx)
-    isOwner = ctx.author.id == ctx.guild.owner_id
-    privilegedRoleList = await cache.getServerPrivilegedRolesList(ctx.guild.id)
-    isPrivileged = any(role.id in privilegedRoleList for role in ctx.author.roles)
-    # try:
-    #     # isPrivileged = any(role.id in cache.privilegedRolesCache[str(ctx.guild.id)] for role in ctx.author.roles)
-    #     # isPrivileged = any(role.name == "Principle" for role in ctx.author.roles)
-    # except KeyError:
-    #     isPrivileged = False
-
-    return any([isDev, isOwner, isPrivileged])
+    # a group command and its subcommand are checked against the same context, so the result is stored
+    # on the context and reused by any later check during the same invocation
+    try:
+        return ctx.hasElevatedPrivileges
+    except AttributeError:
+        pass
+
+    isElevated = await isEduBotDev(ctx) or ctx.author.id == ctx.guild.owner_id
+    if (not isElevated):
+        privilegedRoles = await cache.getServerPrivilegedRolesSet(ctx.guild.id)
+        isElevated = any(role.id in privilegedRoles for role in ctx.author.roles)
+
+    ctx.hasElevatedPrivileges = isElevated
+    return isElevated
 
 # check will see if the user who issed a bot command is a EduBot developer; this check should be removed in
 # official builds to prevent developers from being able to access adminstrative commands
 async def isEduBotDev(ctx):
     if (DEV_BUILD):
-        return ctx.author.id in {
-            210687957768601600,
-            269684001424408577,
-            428548599505223681,
-            250433861320704001,
-            373992852323303427,
-            324018912507199489,
-            166331247482634240
-            }
+        return ctx.author.id in DEV_IDS
     else:
-        return False
\ No newline at end of file
+        return False
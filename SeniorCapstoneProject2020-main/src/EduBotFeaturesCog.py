@@ -3,39 +3,41 @@ import discord
 from discord.ext import commands
 
 # EduBot imports
+import BreakoutDispatcher
+import BulkOperations
+import JobScheduler
+import NameIndex
 import NewBotCache
 import EduBotChecks
+import PermissionPlanner
+import PollTallies
 import EduBotExceptions
 
 # other imports
 import asyncio
-import re
-import warnings
+import time
 from typing import Union, Optional
 from sqlite3 import IntegrityError
 from random import shuffle
 
+# seconds before a scheduled unlock that could not restore every channel is retried
+SCHEDULED_UNLOCK_RETRY_DELAY = 300
+
 class EduBotFeatures(commands.Cog, name="EduBot Features"):
-    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache):
+    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache, scheduler: JobScheduler.JobScheduler, pollTallies: PollTallies.PollTallies):
         self.bot = bot
         self.cache = cache
         self.managedDeletions = set()
+        self.bulkExecutor = BulkOperations.sharedExecutor
+
+        # timed unlocks set by the lock command are run by the scheduler, which keeps them across restarts
+        self.scheduler = scheduler
+        self.scheduler.registerHandler("unlock", self.runScheduledUnlock)
+
+        # running poll vote counts, kept by the raw reaction listeners
+        self.pollTallies = pollTallies
 
     #### LISTENERS #####################################################################################
-    # Will check joining users to see if they used a role invite
-    @commands.Cog.listener()
-    async def on_member_join(self, member):
-        commandRestrictionChannel = discord.utils.get(member.guild.channels, name='notifications')
-        channel_id = commandRestrictionChannel.id
-        channel = self.bot.get_channel(channel_id)
-        embed = discord.Embed(title=f"Welcome to the server {member.name}", description=None, color=0x0000FF)
-        await channel.send(embed=embed)
-        after_join = await member.guild.invites()
-        role_id_for_link = await self.cache.roleIDFromUsedLink(member.guild.id, after_join)
-        get_role = discord.utils.get(channel.guild.roles, id=int(role_id_for_link))
-        await member.add_roles(get_role)
-        await channel.send(f'{member} has been given the role {get_role}')
-    
     # Server Initial Configuration
     @commands.Cog.listener()
     async def on_guild_join(self, guild):
@@ -113,6 +115,43 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
             await self.cache.remExcludedRole(role.guild.id, role.id)
         await self.cache.remPermOverwrite(role.guild.id, modifiedID=role.id)
 
+    # Poll vote counting, raw reaction events are used so that votes on poll messages
+    # that aren't in the bot's message cache are counted
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        await self.countPollVote(payload, 1)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        await self.countPollVote(payload, -1)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(self, payload: discord.RawReactionClearEvent):
+        await self.pollTallies.load()
+        self.pollTallies.clearVotes(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: discord.RawReactionClearEmojiEvent):
+        await self.pollTallies.load()
+        answerIndex = self.pollTallies.answerIndex(payload.message_id, payload.emoji)
+        if (answerIndex is not None):
+            self.pollTallies.clearVotes(payload.message_id, [answerIndex])
+
+    # Will remove polls whose message is deleted
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        await self.removeDeletedPolls(payload.guild_id, [payload.message_id])
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        await self.removeDeletedPolls(payload.guild_id, payload.message_ids)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        # the polls table rows are pruned by the listener in EduBot.py
+        await self.pollTallies.load()
+        self.pollTallies.removeChannelPolls(channel.id)
+
 
 
     #### COMMANDS ######################################################################################
@@ -211,40 +250,42 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
         else:
             raise EduBotExceptions.NotEnoughMembersError
 
-        # build list of coroutines for bulk tasks and enter those coroutines into the event loop, using 
-        # asyncio.gather if results are needed, and wait if they are not
+        # run the bulk tasks for each step through the bulk operation executor, with each step only
+        # operating on the groups whose earlier steps succeeded
         # create group roles
-        roleCreateCoros = [ctx.guild.create_role(name=f"{(roleToGroup.name + ' ') if roleToGroup != ctx.guild.default_role else ''}Group {i+1}", hoist=True, mentionable=True)\
-            for i in range(numGroups)]
-        newRoles = await asyncio.gather(*roleCreateCoros)
+        groupNumbers = list(range(1, numGroups + 1))
+        roleReport = await self.bulkExecutor.run(groupNumbers,
+            lambda i: ctx.guild.create_role(name=f"{(roleToGroup.name + ' ') if roleToGroup != ctx.guild.default_role else ''}Group {i}", hoist=True, mentionable=True),
+            ctx.channel, "Creating group roles")
+        newGroupRoles = [(newRole, newGroups[i - 1]) for i, newRole in roleReport.successfulResults]
 
         # add group members to roles
-        assignmentCoros = []
-        for role, group in zip(newRoles, newGroups):
-            assignmentCoros.extend([member.add_roles(role) for member in group])
-        await asyncio.wait(assignmentCoros)
+        memberGroupRoles = {member: role for role, group in newGroupRoles for member in group}
+        assignmentReport = await self.bulkExecutor.run(memberGroupRoles, lambda member: member.add_roles(memberGroupRoles[member]),
+            ctx.channel, "Assigning group members")
 
         # create category channels with perms set to be private to each role
-        categoryCreateCoros = [ctx.guild.create_category(name=f"{group.name}", overwrites={
+        categoryReport = await self.bulkExecutor.run([role for role, _ in newGroupRoles], lambda group: ctx.guild.create_category(name=f"{group.name}", overwrites={
             ctx.guild.default_role: discord.PermissionOverwrite(read_messages=False, connect=False, view_channel=False),
             group: discord.PermissionOverwrite(read_messages=True, connect=True, view_channel=True)
-        }) for group in newRoles]
-        newCategories = await asyncio.gather(*categoryCreateCoros)
+        }), ctx.channel, "Creating group categories")
+        newCategories = categoryReport.successfulResults
 
-        # create text channels placed under categories
-        textChannelCreateCoros = [ctx.guild.create_text_channel(name=f"{group.name}-general".replace(" ", "-").lower(), category=categoryChannel)\
-            for group, categoryChannel in zip(newRoles, newCategories)]
-        await asyncio.wait(textChannelCreateCoros)
-
-        # create voice channels placed under categories
-        voiceChannelCreateCoros = [ctx.guild.create_voice_channel(name=f"{group.name} Voice", category=categoryChannel)\
-            for group, categoryChannel in zip(newRoles, newCategories)]
-        await asyncio.wait(voiceChannelCreateCoros)
+        # create text and voice channels placed under categories
+        channelReport = await self.bulkExecutor.run(newCategories, lambda groupCategory: ctx.guild.create_text_channel(
+            name=f"{groupCategory[0].name}-general".replace(" ", "-").lower(), category=groupCategory[1]), ctx.channel, "Creating group text channels")
+        voiceChannelReport = await self.bulkExecutor.run(newCategories, lambda groupCategory: ctx.guild.create_voice_channel(
+            name=f"{groupCategory[0].name} Voice", category=groupCategory[1]), ctx.channel, "Creating group voice channels")
 
         # enter new roles into the cache of group roles for this server
-        await self.cache.addGroupRole(ctx.guild.id, [role.id for role in newRoles], [category.id for category in newCategories])
+        await self.cache.addGroupRole(ctx.guild.id, [role.id for role, _ in newCategories], [category.id for _, category in newCategories])
 
-        await ctx.send("New groups created!")
+        failedCount = sum(len(report.failed) for report in [roleReport, assignmentReport, categoryReport, channelReport, voiceChannelReport])
+        if (failedCount == 0):
+            await ctx.send("New groups created!")
+        else:
+            failures = [report.summary() for report in [roleReport, assignmentReport, categoryReport, channelReport, voiceChannelReport] if report.failed]
+            await ctx.send(f"New groups created, but {failedCount} step(s) failed:\n" + "\n".join(failures))
         
     @createGroupsRandom.error
     async def createGroupsRandom_error(self, ctx, error):
@@ -321,14 +362,8 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
                 await ctx.send("All group roles and associated channels deleted!")
             
             elif("*" in roleToDelete):
-                pattern = roleToDelete
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-
-                nameMatch = lambda role: re.fullmatch(pattern, role.name) is not None
-                groupRoles = [ctx.guild.get_role(id) for id in await self.cache.getServerGroupRolesList(ctx.guild.id)]
-                results = list(filter(nameMatch, groupRoles))
+                groupRoleIDs = set(await self.cache.getServerGroupRolesList(ctx.guild.id))
+                results = [role for role in NameIndex.sharedIndexes.matchRoles(ctx.guild, roleToDelete) if role.id in groupRoleIDs]
                 if(len(results) == 0):
                     raise EduBotExceptions.NoRolesMatchedPattern(roleToDelete)
 
@@ -472,15 +507,16 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
         elif len(args) > 10:
             raise EduBotExceptions.TooManyPollAnswers
         else:
-            fullPoll = question
-            for i in range(len(args)):
-                fullPoll += f"\n({chr(65 + i)})  {args[i]}"
+            fullPoll = self.formatPoll(question, args)
             msg = await ctx.send(fullPoll)
             reactions = []
             for i in range(len(args)):
-                reactions.append(msg.add_reaction(chr(127462 + i)))
+                reactions.append(msg.add_reaction(chr(PollTallies.POLL_FIRST_ANSWER_EMOJI + i)))
 
-            pollID = await self.cache.addPoll(ctx.guild.id, msg, args)
+            # votes are counted from as soon as the poll is sent
+            await self.pollTallies.load()
+            self.pollTallies.addPoll(ctx.guild.id, ctx.channel.id, msg.id, len(args))
+            pollID = await self.cache.addPoll(ctx.guild.id, msg, args, question)
             
             await asyncio.gather(*reactions)
             await msg.edit(content=f"Poll ID: {pollID}\n{fullPoll}")
@@ -503,42 +539,39 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
     async def pollClose(self, ctx, pollID):
         """Closes a poll with the given poll ID, provided one exists.
         """
-        msg = await self.cache.retrievePoll(ctx, ctx.guild.id, pollID)
-        if msg == None:
+        poll = await self.cache.getPoll(ctx.guild.id, pollID)
+        if (poll is None):
+            raise EduBotExceptions.PollNotInCacheError
+        channelID, messageID, question, answers = poll
+
+        counts = await self.getPollCounts(ctx.guild, channelID, messageID, len(answers))
+        self.pollTallies.removePoll(messageID)
+        await self.cache.remPoll(ctx.guild.id, pollID)
+        if (counts is None):
             await ctx.send(f"Error: Poll was deleted manually. Poll with ID {pollID} closed.")
             return
-        count = 1
-        rList = []
-        answers = await self.cache.getPollQuestions(ctx.guild.id, pollID)
-        for r in msg.reactions:
-            if type(r.emoji) != str or len(r.emoji) > 1 or r.count == 1 or not ord(r.emoji) in range(127462, 127462 + len(answers)):
-                continue
-            elif r.count == count:
-                rList.append(r)
-            elif r.count > count:
-                count = r.count
-                rList = [r]
-        await self.cache.remPoll(ctx.guild.id, pollID)
+
+        # answers with the most votes, ignoring answers no one voted for
+        mostVotes = max(counts, default=0)
+        winners = [i for i, count in enumerate(counts) if count == mostVotes and count > 0]
+        letters = [chr(65 + i) for i in winners]
+        winningAnswers = "".join(f"\n{answers[i]}" for i in winners)
+
         result = f"Poll with ID {pollID} closed. Result:\n"
-        if rList == []:
+        if (len(winners) == 0):
             result += "No reactions provided."
-        elif len(rList) == 1:
-            result += f"The answer with the most votes was {chr(ord(rList[0].emoji) - 127397)}. Answer:\n{answers[ord(rList[0].emoji) - 127462]}"
-        elif len(rList) == 2:
-            result += f"Tie between answers {chr(ord(rList[0].emoji) - 127397)} and {chr(ord(rList[1].emoji) - 127397)}. Answers:\n{answers[ord(rList[0].emoji) - 127462]}\n{answers[ord(rList[1].emoji) - 127462]}"
+        elif (len(winners) == 1):
+            result += f"The answer with the most votes was {letters[0]}. Answer:{winningAnswers}"
+        elif (len(winners) == 2):
+            result += f"Tie between answers {letters[0]} and {letters[1]}. Answers:{winningAnswers}"
         else:
-            result += "Tie between answers "
-            ansStr = ""
-            for i in range(len(rList) - 1):
-                result += f"{chr(ord(rList[i].emoji) - 127397)}, "
-                ansStr += f"\n{answers[ord(rList[i].emoji) - 127462]}"
-            result += f"and {chr(ord(rList[-1].emoji) - 127397)}. Answers:" + ansStr + f"\n{answers[ord(rList[-1].emoji) - 127462]}"
+            result += f"Tie between answers {', '.join(letters[:-1])}, and {letters[-1]}. Answers:{winningAnswers}"
         await ctx.send(result)
         
     @pollClose.error
     async def pollClose_error(self, ctx, error):
         if isinstance(error, commands.errors.CommandInvokeError):
-            if isinstance(error.original, EduBotExceptions.GuildNotInCacheError) or isinstance(error.original, EduBotExceptions.PollNotInCacheError):
+            if isinstance(error.original, (EduBotExceptions.GuildNotInCacheError, EduBotExceptions.PollNotInCacheError, ValueError)):
                 await ctx.send("Error: Poll with that ID was not found.")
         elif isinstance(error, commands.errors.MissingRequiredArgument):
             await ctx.send(f"Error: Missing required argument for {error.param}.")
@@ -546,26 +579,69 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
             await ctx.send(f"An unhandled exception has occurred: {error}")
 
 
+    @poll.command(name="results", brief="Shows the running results of an open poll.", usage="pollID")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def pollResults(self, ctx, pollID):
+        """Shows the number of votes each answer of an open poll has so far, without closing the poll.
+        """
+        poll = await self.cache.getPoll(ctx.guild.id, pollID)
+        if (poll is None):
+            raise EduBotExceptions.PollNotInCacheError
+        channelID, messageID, question, answers = poll
+
+        counts = await self.getPollCounts(ctx.guild, channelID, messageID, len(answers))
+        if (counts is None):
+            await ctx.send(f"Error: Poll with ID {pollID} was deleted manually.")
+            return
+
+        result = f"Poll ID: {pollID} running results:"
+        for i in range(len(answers)):
+            result += f"\n({chr(65 + i)})  {answers[i]}: {counts[i]} vote(s)"
+        await ctx.send(result)
+
+    @pollResults.error
+    async def pollResults_error(self, ctx, error):
+        if isinstance(error, commands.errors.CommandInvokeError):
+            if isinstance(error.original, (EduBotExceptions.PollNotInCacheError, ValueError)):
+                await ctx.send("Error: Poll with that ID was not found.")
+            else:
+                await ctx.send(f"An unhandled exception has occurred: {error.original}")
+        elif isinstance(error, commands.errors.MissingRequiredArgument):
+            await ctx.send(f"Error: Missing required argument for {error.param}.")
+        else:
+            await ctx.send(f"An unhandled exception has occurred: {error}")
+
+
     @poll.command(name="list", brief="Lists all created polls.")
     @commands.check(EduBotChecks.hasElevatedPrivileges)
     async def pollList(self, ctx):
         """Lists all polls created on this server along with their ID numbers.
         """
-        await ctx.send("Generating list of polls...")
+        polls = await self.cache.getPollsList(ctx.guild.id)
+
+        # polls whose message was deleted while the bot was offline are removed before listing
+        await self.pollTallies.load()
+        deletedPolls = set(await self.pollTallies.findDeletedPolls(ctx.guild, [(row[2], row[3]) for row in polls], self.bulkExecutor))
+        if (len(deletedPolls) > 0):
+            await self.removeDeletedPolls(ctx.guild.id, deletedPolls)
+            polls = [row for row in polls if row[3] not in deletedPolls]
+
+        if (len(polls) == 0):
+            await ctx.send("No polls found.")
+            return
+
+        # polls are listed from the local cache, split into messages under Discord's length limit
         sList = ["All polls:\n\n"]
         sLength = 12
-        for p in await self.cache.getServerPollList(ctx.guild.id):
-            msg = await self.cache.retrievePoll(ctx, ctx.guild.id, p)
-            if len(msg.content) + sLength > 1998:
+        for pollID, _, _, _, question, answers in polls:
+            content = f"Poll ID: {pollID}\n{self.formatPoll(question, answers)}"
+            if len(content) + sLength > 1998:
                 await ctx.send("".join(sList))
                 sList = []
                 sLength = 0
-            sList.append(f"{msg.content}\n\n")
-            sLength += len(msg.content) + 2
-        if len(await self.cache.getServerPollList(ctx.guild.id)) == 0:
-            await ctx.send("No polls found.")
-        else:
-            await ctx.send("".join(sList))
+            sList.append(f"{content}\n\n")
+            sLength += len(content) + 2
+        await ctx.send("".join(sList))
         
     @pollList.error
     async def pollList_error(self, ctx, error):
@@ -575,6 +651,68 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
         else:
             await ctx.send(f"An unhandled exception has occurred: {error}")
 
+    ## poll helper methods ##
+    @staticmethod
+    def formatPoll(question: str, answers) -> str:
+        """Returns the text of a poll message for the given question and answers.
+        """
+        fullPoll = question
+        for i in range(len(answers)):
+            fullPoll += f"\n({chr(65 + i)})  {answers[i]}"
+        return fullPoll
+
+    async def getPollCounts(self, guild: discord.Guild, channelID: int, messageID: int, answerCount: int) -> Optional[list]:
+        """Returns the vote count of each answer of a poll. Counts come from the running tallies, except for
+        polls created before tallies were kept, whose message is fetched to count its reactions. Returns None
+        if the poll's message has been deleted.
+        """
+        await self.pollTallies.load()
+        counts = self.pollTallies.getTally(messageID)
+        if (counts is not None):
+            return counts
+
+        channel = guild.get_channel(channelID)
+        if (channel is None):
+            return None
+        try:
+            message = await channel.fetch_message(messageID)
+        except discord.errors.NotFound:
+            return None
+
+        # the bot's own reaction on each answer isn't a vote
+        counts = [0] * answerCount
+        for reaction in message.reactions:
+            if (not isinstance(reaction.emoji, str)):
+                continue
+            answerIndex = self.pollTallies.answerIndex(messageID, discord.PartialEmoji(name=reaction.emoji))
+            if (answerIndex is not None):
+                counts[answerIndex] = reaction.count - (1 if reaction.me else 0)
+        return counts
+
+    async def countPollVote(self, payload: discord.RawReactionActionEvent, change: int):
+        """Counts a reaction added to or removed from a poll message as a vote, ignoring the bot's own reactions.
+        """
+        if (payload.guild_id is None or payload.user_id == self.bot.user.id):
+            return
+
+        await self.pollTallies.load()
+        answerIndex = self.pollTallies.answerIndex(payload.message_id, payload.emoji)
+        if (answerIndex is not None):
+            self.pollTallies.recordVote(payload.message_id, answerIndex, change)
+
+    async def removeDeletedPolls(self, guildID: Optional[int], messageIDs):
+        """Removes the polls among the given deleted messages from the local cache.
+        """
+        if (guildID is None):
+            return
+
+        await self.pollTallies.load()
+        deletedPolls = [messageID for messageID in messageIDs if self.pollTallies.isPoll(messageID)]
+        for messageID in deletedPolls:
+            self.pollTallies.removePoll(messageID)
+        if (len(deletedPolls) > 0):
+            await self.cache.remPollMessages(guildID, deletedPolls)
+
 
 
     #### User breakout commands ####
@@ -600,16 +738,13 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
     async def breakoutSend(self, ctx):
         """Sends students from the voice channel the admin is currently in to their group voice channels.
         """
-        groupRolesList = await self.cache.getServerGroupRolesList(ctx.guild.id)
-        for member in ctx.author.voice.channel.members:
-            if member != ctx.author:
-                for role in member.roles:
-                    if role.id in groupRolesList:
-                        groupCategoryID = await self.cache.getGroupCategoryChannelID(ctx.guild.id, role.id)
-                        groupCategory = ctx.guild.get_channel(groupCategoryID)
-                        voiceChannel = discord.utils.find(lambda channel: (channel.category == groupCategory) and (isinstance(channel, discord.VoiceChannel)), ctx.guild.channels)
-                        await member.move_to(voiceChannel)
-        await ctx.send("Breakout commenced.")
+        sourceChannel = ctx.author.voice.channel
+        groupCategories = await self.cache.getGroupCategoriesDict(ctx.guild.id)
+        groupVoiceChannels = BreakoutDispatcher.mapGroupVoiceChannels(ctx.guild, groupCategories)
+
+        plan = BreakoutDispatcher.planBreakoutSend([member for member in sourceChannel.members if member != ctx.author], groupCategories, groupVoiceChannels)
+        report = await BreakoutDispatcher.runBreakoutPlan(plan, self.bulkExecutor, ctx.channel, "Sending students to breakout rooms")
+        await ctx.send(f"Breakout commenced. {plan.summary(report)}")
         
     @breakoutSend.error
     async def breakoutSend_error(self, ctx, error):
@@ -626,15 +761,13 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
     async def breakoutReturn(self, ctx):
         """Returns students from their group voice channels to the voice channel the admin is currently in.
         """
-        groupRolesList = await self.cache.getServerGroupRolesList(ctx.guild.id)
-        for role in groupRolesList:
-            groupCategoryID = await self.cache.getGroupCategoryChannelID(ctx.guild.id, role)
-            groupCategory = ctx.guild.get_channel(groupCategoryID)
-            voiceChannel = discord.utils.find(lambda channel: (channel.category == groupCategory) and (isinstance(channel, discord.VoiceChannel)), ctx.guild.channels)
-            for member in voiceChannel.members:
-                if member != ctx.author:
-                    await member.move_to(ctx.author.voice.channel)
-        await ctx.send("Breakout concluded.")
+        destination = ctx.author.voice.channel
+        groupCategories = await self.cache.getGroupCategoriesDict(ctx.guild.id)
+        groupVoiceChannels = BreakoutDispatcher.mapGroupVoiceChannels(ctx.guild, groupCategories)
+
+        plan = BreakoutDispatcher.planBreakoutReturn(groupVoiceChannels, destination, [ctx.author])
+        report = await BreakoutDispatcher.runBreakoutPlan(plan, self.bulkExecutor, ctx.channel, "Returning students from breakout rooms")
+        await ctx.send(f"Breakout concluded. {plan.summary(report)}")
         
     @breakoutReturn.error
     async def breakoutReturn_error(self, ctx, error):
@@ -650,7 +783,7 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
     #### lock and unlock commands ####
     @commands.command(name="lock", brief="Lock all channels from view for non-moderators.", usage="[timeToLock]")
     @commands.check(EduBotChecks.hasElevatedPrivileges)
-    async def lockServer(self, ctx, time: Optional[int]):
+    async def lockServer(self, ctx, timeToLock: Optional[int]):
         """Locks the server by modifying the permissions of each channel on the server to disallow roles not
         specified in the servers privileged users from viewing, posting in, or connecting to channels on the
         server. Permissions overrides for specific members are not affected by the lock. The optional parameter 
@@ -658,7 +791,7 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
         """
 
         # validate time argument
-        if (time is not None and time <= 0):
+        if (timeToLock is not None and timeToLock <= 0):
             raise commands.errors.BadArgument
 
         # check if server is already locked, if the server state has not already been cached, then cache it and
@@ -667,39 +800,22 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
         if (isLocked):
             raise EduBotExceptions.ServerLockError
         
-        # create locked permission overwrite
-        restrictedPerms = discord.PermissionOverwrite(connect=False, send_messages=False, view_channel=False)
-
-        # iterate through guild channels and edit overwrite for each role and member that has an overwrite,
-        # ignoring channels that sync their permissions to another channel, current overwrites are cached to be
-        # used in unlocking later
-        cacheUpdateCoros = []
-        permissionUpdateCoros = []
-        for channel in ctx.guild.channels:
-            if (channel.permissions_synced):
-                continue
-            elif (len(channel.overwrites.keys()) == 0):
-                # create an overwrite for @everyone if there's no overwrites on a channel
-                defaultOverwrite = discord.PermissionOverwrite.from_pair(discord.Permissions.none, discord.Permissions.none)
-                cacheUpdateCoros.append(self.cache.addPermOverwrite(ctx.guild.id, channel.id, ctx.guild.default_role.id, defaultOverwrite))
-                permissionUpdateCoros.append(channel.set_permissions(target=ctx.guild.default_role, overwrite=restrictedPerms))
-            else:
-                for key in channel.overwrites.keys():
-                    isPrivilegedRole = await self.cache.isPrivilegedRole(ctx.guild.id, key.id)
-                    if (not isPrivilegedRole):
-                        cacheUpdateCoros.append(self.cache.addPermOverwrite(ctx.guild.id, channel.id, key.id, channel.overwrites[key]))
-                        permissionUpdateCoros.append(channel.set_permissions(target=key, overwrite=restrictedPerms))                  
-
-        await asyncio.wait(cacheUpdateCoros)
-        await asyncio.wait(permissionUpdateCoros)
+        # plan the lock against the guild's privileged roles, then snapshot every overwrite the lock replaces
+        # before editing any channels so that the server can always be unlocked
+        privilegedRoles = await self.cache.getServerPrivilegedRolesSet(ctx.guild.id)
+        lockPlan = PermissionPlanner.planLock(ctx.guild, privilegedRoles, PermissionPlanner.LOCK_OVERWRITE)
+        await self.cache.addPermOverwrites(ctx.guild.id, lockPlan.snapshot)
+
+        report = await PermissionPlanner.applyPermissionPlan(lockPlan, self.bulkExecutor, ctx.channel, "Locking channels")
         await self.cache.setServerLockStatus(ctx.guild.id, True)
-        await ctx.send("Server locked!")
+        if (len(report.failed) > 0):
+            await ctx.send("Server locked, but some channels could not be edited: " + report.summary())
+        else:
+            await ctx.send("Server locked!")
         
-        # schedule the execution of unlockServer if the user provided a time for the server to unlock
-        if (time is not None):
-            loop = asyncio.get_event_loop()
-            handle = loop.call_later(time * 60, asyncio.create_task, self.unlockServer(ctx=ctx))
-            self.unlockHandles[ctx.guild.id] = handle
+        # schedule an unlock if the user provided a time for the server to unlock
+        if (timeToLock is not None):
+            await self.scheduler.schedule(ctx.guild.id, "unlock", time.time() + timeToLock * 60, channelID=ctx.channel.id)
 
     @lockServer.error
     async def lockServerError(self, ctx, error):
@@ -724,40 +840,16 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
         if (not isLocked):
             raise EduBotExceptions.ServerLockError
 
-        # iterate through guild channels and create permission overwrites, ignoring channels that
-        # sync permissions to other channels
-        permissionUpdateCoros = []
-        for channel in ctx.guild.channels:
-            if (channel.permissions_synced):
-                continue
-            channelOverwritesList = await self.cache.getChannelOverwritesList(ctx.guild.id, channel.id)
-            for modifiedID, overwrite in channelOverwritesList:
-                # try to get role matching id number given by key, if target is None, then try to get member,
-                # if that also fails, then role may have been deleted while server was locked, I don't know why
-                # anybody would do that but people do dumb things so whatever
-                target = ctx.guild.get_role(int(modifiedID))
-                if (target is None):
-                    target = ctx.guild.get_member(int(modifiedID))
-                if (target is None):
-                    continue
-
-                permissionUpdateCoros.append(channel.set_permissions(target=target, overwrite=overwrite))
-
-        await asyncio.wait(permissionUpdateCoros)
-        await self.cache.setServerLockStatus(ctx.guild.id, False)
-        await self.cache.remPermOverwrite(ctx.guild.id)
+        report = await self.unlockGuild(ctx.guild, ctx.channel)
+        if (len(report.failed) > 0):
+            # the server is still locked, so any unlock scheduled by the lock command is kept
+            await ctx.send("Some channels could not be restored, the server is still locked and unlock can be retried: " + report.summary())
+            return
+
         await ctx.send("Server unlocked!")
 
-        # try to cancel the unlock callback for this guild and remove it from the local cache
-        # if there is no key for guild in dictionary, catch the error but do nothing
-        try:
-            handle = self.unlockHandles.pop(ctx.guild.id)
-            #TODO: See if there isn't any other way to handle this besides suppressing the warning
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                handle.cancel()
-        except KeyError:
-            pass
+        # cancel any unlock scheduled for this guild by the lock command
+        await self.scheduler.cancelJobs(ctx.guild.id, "unlock")
 
     @unlockServer.error
     async def unlockServerError(self, ctx, error):
@@ -766,6 +858,71 @@ class EduBotFeatures(commands.Cog, name="EduBot Features"):
         else:
             await ctx.send(f"An unhandled exception has occured: {error}")
 
+    async def unlockGuild(self, guild: discord.Guild, progressChannel: Optional[discord.TextChannel] = None) -> BulkOperations.BulkOperationReport:
+        """Resets the permissions on each channel of a locked guild to the values snapshotted when it was locked
+        and marks the guild as unlocked, returning the report of the channel edits. If any channel could not be
+        restored, the guild stays locked with its snapshot kept so that unlocking can be retried, which only
+        edits the channels that still differ from the snapshot.
+        """
+        snapshot = await self.cache.getServerOverwritesDict(guild.id)
+        unlockPlan = PermissionPlanner.planUnlock(guild, snapshot)
+
+        report = await PermissionPlanner.applyPermissionPlan(unlockPlan, self.bulkExecutor, progressChannel, "Unlocking channels")
+        if (len(report.failed) == 0):
+            await self.cache.setServerLockStatus(guild.id, False)
+            await self.cache.remPermOverwrite(guild.id)
+        return report
+
+    async def runScheduledUnlock(self, job: JobScheduler.ScheduledJob) -> Optional[float]:
+        """Scheduler handler for unlocks set by the lock command, unlocking the server if it is still locked
+        and announcing it in the channel the lock command was used in. If some channels could not be restored,
+        the server stays locked and the unlock is retried after SCHEDULED_UNLOCK_RETRY_DELAY seconds.
+        """
+        guild = self.bot.get_guild(job.guildID)
+        if (guild is None or not await self.cache.getServerLockStatus(guild.id)):
+            return None
+
+        report = await self.unlockGuild(guild)
+        channel = guild.get_channel(job.channelID)
+        if (channel is not None):
+            if (len(report.failed) > 0):
+                await channel.send("Some channels could not be restored, the server is still locked and unlock will be retried: " + report.summary())
+            else:
+                await channel.send("Server unlocked!")
+
+        if (len(report.failed) > 0):
+            return time.time() + SCHEDULED_UNLOCK_RETRY_DELAY
+        return None
+
+
+    @commands.command(name="permissionPlan", brief="Shows the API calls a lock or text mute role setup would take.", usage="[lock|mute]")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def permissionPlan(self, ctx, operation: str):
+        """Dry run of the lock command or of setting up the text mute role, reporting how many channel edits,
+        and so how many API calls, the operation would take on this server without making any changes.
+        """
+        operation = operation.lower()
+        if (operation == "lock"):
+            privilegedRoles = await self.cache.getServerPrivilegedRolesSet(ctx.guild.id)
+            plan = PermissionPlanner.planLock(ctx.guild, privilegedRoles, PermissionPlanner.LOCK_OVERWRITE)
+        elif (operation == "mute"):
+            # plan against a placeholder role if the text mute role hasn't been created yet
+            muteRole = discord.utils.get(ctx.guild.roles, name="EduBot_TextMute") or discord.Object(id=0)
+            plan = PermissionPlanner.planTextMuteRole(ctx.guild, muteRole)
+        else:
+            raise commands.errors.BadArgument
+
+        await ctx.send(f"Dry run of {operation} on {ctx.guild.name}: {plan.describe()}")
+
+    @permissionPlan.error
+    async def permissionPlanError(self, ctx, error):
+        if isinstance(error, commands.errors.CheckFailure):
+            await ctx.send("Error: You do not have permission to execute this command!")
+        elif isinstance(error, (commands.errors.BadArgument, commands.errors.MissingRequiredArgument)):
+            await ctx.send("Error: operation must be either lock or mute!")
+        else:
+            await ctx.send(f"An unhandled exception has occured: {error}")
+
 
 
     #### HELPER METHODS ################################################################################
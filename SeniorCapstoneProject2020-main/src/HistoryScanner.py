@@ -0,0 +1,248 @@
+"""Module contains HistoryScanner class for running long scans over a channel's message history, such as mass
+message deletions, that checkpoint their position in the local cache so that they can be paused, resumed, and
+continued after a restart."""
+
+import asyncio
+import discord
+from discord.ext import commands
+from typing import Callable, List, Optional
+import MessagePurge
+import NewBotCache
+
+# number of messages fetched per page of channel history, a scan's checkpoint is saved after each page
+SCAN_PAGE_SIZE = 100
+
+# seconds between edits of a scan's progress message, scans finishing sooner than this post only their result
+SCAN_PROGRESS_INTERVAL = 5.0
+
+# statuses stored for a scan in the history_scans table
+SCAN_RUNNING = "running"
+SCAN_PAUSED = "paused"
+
+class HistoryScan():
+    """HistoryScan object stores a scan over a channel's history: its id in the history_scans table, the server
+    and channel it belongs to, the type of scan, its status, the id of the last message it processed, the number
+    of messages it has processed, a dict of arguments for the scan, and the report of the messages it has deleted.
+
+    Two payload keys are used by the scanner itself: beforeID, the id of a message the scan stops at, and limit,
+    the largest number of messages the scan processes.
+    """
+    def __init__(self, scanID: int, guildID: int, channelID: int, scanType: str, status: str, checkpointID: Optional[int],
+        processedCount: int, payload: dict, report: MessagePurge.PurgeReport):
+        self.scanID = scanID
+        self.guildID = guildID
+        self.channelID = channelID
+        self.scanType = scanType
+        self.status = status
+        self.checkpointID = checkpointID
+        self.processedCount = processedCount
+        self.payload = payload
+        self.report = report
+
+        # task running the scan, and the progress message posted for it along with the event loop time it
+        # was last edited at
+        self.task = None
+        self.progressMessage = None
+        self.lastProgressUpdate = 0.0
+
+    def describe(self) -> str:
+        return (f"Scan {self.scanID} ({self.scanType}) in <#{self.channelID}>: {self.status}, "
+            f"{self.processedCount} message(s) scanned, {self.report.totalDeleted} deleted.")
+
+class HistoryScanner():
+    """HistoryScanner object runs scans that walk a channel's history a page at a time and delete the messages
+    matching the scan's check. After each page the id of the last message processed is saved to the
+    history_scans table of the local cache, so that a scan paused, or interrupted by a restart, continues from
+    where it stopped rather than walking the history again.
+
+    Each scan type has a check factory registered by the cog that starts it. Check factories take the
+    HistoryScan and return a function deciding whether a message is deleted. Scans walk the history newest
+    first, unless their scan type is registered as oldest first.
+    """
+    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache):
+        self.bot = bot
+        self.cache = cache
+        self.scanTypes = {}
+
+        # scans stores each unfinished scan by id, whether running or paused
+        self.scans = {}
+        self.started = False
+
+    def registerScanType(self, scanType: str, makeCheck: Callable[[HistoryScan], Callable[[discord.Message], bool]], oldestFirst: bool = False):
+        """Sets the check factory for scans of the given type, and whether they walk the history oldest first.
+        """
+        self.scanTypes[scanType] = (makeCheck, oldestFirst)
+
+    async def start(self):
+        """Loads the unfinished scans stored in the local cache, continuing the scans that were running when
+        the bot stopped. Does nothing if the scanner is already started.
+        """
+        if (self.started):
+            return
+        self.started = True
+
+        for row in await self.cache.getHistoryScansList():
+            scan = HistoryScan(*row[:8], MessagePurge.PurgeReport.fromDict(row[8]))
+            self.scans[scan.scanID] = scan
+            if (scan.status == SCAN_RUNNING):
+                scan.task = asyncio.ensure_future(self.runScan(scan))
+
+    def stop(self):
+        """Stops every running scan, scans stay in the local cache and are continued by start.
+        """
+        for scan in self.scans.values():
+            if (scan.task is not None):
+                scan.task.cancel()
+        self.scans = {}
+        self.started = False
+
+    async def startScan(self, guildID: int, channelID: int, scanType: str, payload: Optional[dict] = None) -> HistoryScan:
+        """Stores a new scan of the given type over a channel's history and starts running it.
+        """
+        payload = payload or {}
+        scanID = await self.cache.addHistoryScan(guildID, channelID, scanType, payload)
+        scan = HistoryScan(scanID, guildID, channelID, scanType, SCAN_RUNNING, None, 0, payload, MessagePurge.PurgeReport())
+        self.scans[scanID] = scan
+        scan.task = asyncio.ensure_future(self.runScan(scan))
+
+        return scan
+
+    async def pause(self, guildID: int, scanID: int) -> bool:
+        """Pauses the running scan with the given id on the given server, returning whether there was such a
+        scan. The scan stops after the message it is processing.
+        """
+        scan = self.getScan(guildID, scanID)
+        if (scan is None or scan.status != SCAN_RUNNING):
+            return False
+
+        scan.status = SCAN_PAUSED
+        await self.cache.setHistoryScanStatus(scanID, SCAN_PAUSED)
+        return True
+
+    async def resume(self, guildID: int, scanID: int) -> bool:
+        """Continues the paused scan with the given id on the given server from its checkpoint, returning
+        whether there was such a scan.
+        """
+        scan = self.getScan(guildID, scanID)
+        if (scan is None or scan.status != SCAN_PAUSED):
+            return False
+
+        # wait for the scan to reach its checkpoint if it is still stopping
+        if (scan.task is not None):
+            await scan.task
+
+        scan.status = SCAN_RUNNING
+        await self.cache.setHistoryScanStatus(scanID, SCAN_RUNNING)
+        scan.task = asyncio.ensure_future(self.runScan(scan))
+        return True
+
+    async def cancel(self, guildID: int, scanID: int) -> bool:
+        """Stops and removes the scan with the given id on the given server, returning whether there was such
+        a scan. Messages already deleted by the scan stay deleted.
+        """
+        scan = self.getScan(guildID, scanID)
+        if (scan is None):
+            return False
+
+        del self.scans[scanID]
+        if (scan.task is not None):
+            scan.task.cancel()
+            scan.task = None
+        await self.cache.remHistoryScan(scanID)
+        return True
+
+    def getScan(self, guildID: int, scanID: int) -> Optional[HistoryScan]:
+        scan = self.scans.get(scanID)
+        return scan if (scan is not None and scan.guildID == guildID) else None
+
+    def getScans(self, guildID: int) -> List[HistoryScan]:
+        """Returns list of the unfinished scans on the given server ordered by id.
+        """
+        return sorted((scan for scan in self.scans.values() if scan.guildID == guildID), key=lambda scan: scan.scanID)
+
+    def fetchPage(self, channel: discord.TextChannel, scan: HistoryScan, oldestFirst: bool, pageSize: int):
+        """Returns a history iterator over the next page of messages after the scan's checkpoint.
+        """
+        beforeID = scan.payload.get("beforeID")
+        if (oldestFirst):
+            after = discord.Object(scan.checkpointID) if (scan.checkpointID is not None) else None
+            before = discord.Object(beforeID) if (beforeID is not None) else None
+            return channel.history(limit=pageSize, before=before, after=after, oldest_first=True)
+
+        startID = scan.checkpointID if (scan.checkpointID is not None) else beforeID
+        return channel.history(limit=pageSize, before=discord.Object(startID) if (startID is not None) else None)
+
+    async def runScan(self, scan: HistoryScan):
+        """Walks the scan's channel history from its checkpoint a page at a time, deleting the messages passing
+        the scan's check and saving the checkpoint after each page, until the history or the scan's limit runs
+        out or the scan is paused. Finished scans are removed and their report posted in the channel.
+        """
+        channel = self.bot.get_channel(scan.channelID)
+        scanType = self.scanTypes.get(scan.scanType)
+        if (channel is None or scanType is None):
+            print(f"Removing history scan {scan.scanID} of type '{scan.scanType}', its channel or scan type no longer exists")
+            await self.finishScan(scan)
+            return
+
+        makeCheck, oldestFirst = scanType
+        check = makeCheck(scan)
+        deleter = MessagePurge.MessageDeleter(channel, scan.report)
+        limit = scan.payload.get("limit")
+        scan.lastProgressUpdate = asyncio.get_event_loop().time()
+
+        try:
+            while (scan.status == SCAN_RUNNING):
+                pageSize = SCAN_PAGE_SIZE if (limit is None) else min(SCAN_PAGE_SIZE, limit - scan.processedCount)
+                if (pageSize <= 0):
+                    break
+
+                page = await self.fetchPage(channel, scan, oldestFirst, pageSize).flatten()
+                for message in page:
+                    if (check(message)):
+                        await deleter.delete(message)
+                    scan.processedCount += 1
+                    scan.checkpointID = message.id
+                    if (scan.status != SCAN_RUNNING):
+                        break
+
+                await deleter.flush()
+                await self.cache.setHistoryScanCheckpoint(scan.scanID, scan.checkpointID, scan.processedCount, scan.report.toDict())
+                if (len(page) < pageSize):
+                    break
+                await self.updateProgress(scan, channel, f"{scan.describe()} Use deleteMSG pause {scan.scanID} to pause.")
+        except discord.HTTPException as e:
+            # the history can't be read, such as after losing access to the channel
+            print(f"History scan {scan.scanID} failed: {e}")
+            await self.finishScan(scan)
+            await self.updateProgress(scan, channel, f"Scan {scan.scanID} stopped, the channel history could not be read. {scan.report.summary()}", force=True)
+            return
+
+        scan.task = None
+        if (scan.status == SCAN_PAUSED):
+            await self.updateProgress(scan, channel, f"{scan.describe()} Use deleteMSG resume {scan.scanID} to continue.", force=True)
+            return
+
+        await self.finishScan(scan)
+        await self.updateProgress(scan, channel, scan.report.summary(), force=True)
+
+    async def finishScan(self, scan: HistoryScan):
+        scan.task = None
+        self.scans.pop(scan.scanID, None)
+        await self.cache.remHistoryScan(scan.scanID)
+
+    async def updateProgress(self, scan: HistoryScan, channel: discord.TextChannel, content: str, force: bool = False):
+        """Posts or edits the scan's progress message, at most once every SCAN_PROGRESS_INTERVAL seconds
+        unless force is given.
+        """
+        now = asyncio.get_event_loop().time()
+        if (not force and now - scan.lastProgressUpdate < SCAN_PROGRESS_INTERVAL):
+            return
+
+        scan.lastProgressUpdate = now
+        try:
+            if (scan.progressMessage is None):
+                scan.progressMessage = await channel.send(content)
+            else:
+                await scan.progressMessage.edit(content=content)
+        except discord.HTTPException:
+            pass
@@ -0,0 +1,174 @@
+"""Module contains InviteTracker class for working out which role invite new members joined with, keeping a snapshot
+of each server's invite uses so that members joining together share a single fetch of the server's invites."""
+
+import asyncio
+import discord
+from typing import Dict, List, Optional, Tuple, Union
+import NewBotCache
+
+# seconds after an invite is deleted during which its remaining uses are counted as used by the next members to
+# join, as invites reaching their largest number of uses are deleted rather than returned by the next fetch
+INVITE_EXHAUSTED_WINDOW = 10.0
+
+# value returned for a member who may have joined with a role invite but whose role can't be worked out, such as
+# members joining together with role invites giving different roles, so that their role is assigned by hand
+UNRESOLVED_ROLE = "unresolved"
+
+class GuildInvites():
+    """GuildInvites object stores the invite snapshot of a server: the last known number of uses and the largest
+    number of uses of each invite by code, the role given by each role invite, the remaining uses of deleted
+    invites along with the event loop time they were deleted, the futures of the members waiting for their invite
+    to be worked out, and the lock held while the server's invites are fetched.
+    """
+    def __init__(self):
+        self.uses = {}
+        self.maxUses = {}
+        self.roleInvites = None
+        self.exhaustedUses = {}
+        self.pendingMembers = []
+        self.lock = asyncio.Lock()
+
+class InviteTracker():
+    """InviteTracker object works out the role invite each new member joined with by comparing the uses of the
+    server's role invites against a snapshot of their uses, kept current by the invite create and delete events.
+
+    Members joining while the server's invites are being fetched wait for the fetch and are worked out together
+    from its result, so a burst of joins makes one fetch rather than one per member. The role is only given when
+    every role invite used among them gives the same role, their uses account for every member, and no other
+    invite was used, as otherwise there is no telling which members joined with which invite. When any role
+    invite was used but the role can't be given, every member of the burst is returned as UNRESOLVED_ROLE.
+    """
+    def __init__(self, cache: NewBotCache.Cache):
+        self.cache = cache
+        self.guilds = {}
+
+    def getGuildInvites(self, guildID: int) -> GuildInvites:
+        if (guildID not in self.guilds):
+            self.guilds[guildID] = GuildInvites()
+        return self.guilds[guildID]
+
+    async def loadRoleInvites(self, guildID: int, guildInvites: GuildInvites):
+        """Loads the server's role invites and their stored number of uses from the local cache, if they aren't
+        already loaded. The stored uses are the starting snapshot for invites without a newer snapshot.
+        """
+        if (guildInvites.roleInvites is not None):
+            return
+
+        roleInvites = await self.cache.getRoleInvitesDict(guildID)
+        guildInvites.roleInvites = {inviteID: roleID for inviteID, (roleID, _) in roleInvites.items()}
+        for inviteID, (_, usesCount) in roleInvites.items():
+            guildInvites.uses.setdefault(inviteID, usesCount)
+
+    def inviteCreated(self, invite: discord.Invite):
+        guildInvites = self.getGuildInvites(invite.guild.id)
+        guildInvites.uses[invite.code] = invite.uses or 0
+        guildInvites.maxUses[invite.code] = invite.max_uses or 0
+
+    def inviteDeleted(self, invite: discord.Invite):
+        """Removes a deleted invite from the snapshot. If the invite had a largest number of uses, its remaining
+        uses are counted as used by the members joining within the next INVITE_EXHAUSTED_WINDOW seconds.
+        """
+        guildInvites = self.getGuildInvites(invite.guild.id)
+        uses = guildInvites.uses.pop(invite.code, None)
+        maxUses = guildInvites.maxUses.pop(invite.code, 0)
+        if (uses is not None and maxUses > uses):
+            guildInvites.exhaustedUses[invite.code] = (maxUses - uses, asyncio.get_event_loop().time())
+
+    def addRoleInvite(self, guildID: int, inviteID: str, roleID: int, uses: int):
+        guildInvites = self.getGuildInvites(guildID)
+        if (guildInvites.roleInvites is not None):
+            guildInvites.roleInvites[inviteID] = roleID
+        guildInvites.uses[inviteID] = uses
+
+    def removeRoleInvite(self, guildID: int, inviteID: str):
+        guildInvites = self.getGuildInvites(guildID)
+        if (guildInvites.roleInvites is not None):
+            guildInvites.roleInvites.pop(inviteID, None)
+
+    def removeAllRoleInvites(self, guildID: int):
+        self.getGuildInvites(guildID).roleInvites = {}
+
+    def removeGuild(self, guildID: int):
+        self.guilds.pop(guildID, None)
+
+    async def memberJoined(self, member: discord.Member) -> Optional[Union[int, str]]:
+        """Returns the id of the role given by the role invite the member joined with, None if the member didn't
+        join with a role invite, or UNRESOLVED_ROLE if the member's role can't be worked out.
+        """
+        guildInvites = self.getGuildInvites(member.guild.id)
+        result = asyncio.get_event_loop().create_future()
+        guildInvites.pendingMembers.append(result)
+
+        # the member waits for any fetch already running, which may have worked the member out
+        async with guildInvites.lock:
+            if (not result.done()):
+                await self.resolvePendingMembers(member.guild, guildInvites)
+
+        return result.result()
+
+    async def resolvePendingMembers(self, guild: discord.Guild, guildInvites: GuildInvites):
+        """Fetches the server's invites once and works out the role of every member waiting, storing the new
+        uses of the server's role invites in the local cache.
+        """
+        await self.loadRoleInvites(guild.id, guildInvites)
+        try:
+            invites = await guild.invites()
+        except discord.HTTPException as e:
+            print(f"Unable to fetch invites of {guild}: {e}")
+            invites = None
+
+        # members whose join arrived while the invites were fetched are counted in the fetched uses
+        pendingMembers, guildInvites.pendingMembers = guildInvites.pendingMembers, []
+        roleIDs = [None] * len(pendingMembers)
+        if (invites is None):
+            if (len(guildInvites.roleInvites) > 0):
+                roleIDs = [UNRESOLVED_ROLE] * len(pendingMembers)
+        else:
+            roleUses, otherUses, changedUses = self.countRoleInviteUses(guildInvites, invites)
+            usedRoles = {guildInvites.roleInvites[inviteID] for inviteID in roleUses}
+            if (len(usedRoles) == 1 and sum(roleUses.values()) >= len(pendingMembers) and otherUses == 0):
+                roleIDs = [usedRoles.pop()] * len(pendingMembers)
+            elif (len(usedRoles) > 0):
+                roleIDs = [UNRESOLVED_ROLE] * len(pendingMembers)
+
+            if (len(changedUses) > 0):
+                await self.cache.setRoleInviteUses(guild.id, changedUses)
+
+        for result, roleID in zip(pendingMembers, roleIDs):
+            result.set_result(roleID)
+
+    def countRoleInviteUses(self, guildInvites: GuildInvites, invites: List[discord.Invite]) -> Tuple[Dict[str, int], int, List[Tuple[str, int]]]:
+        """Replaces the snapshot with the fetched invites, returning a dict of the number of new uses of each role
+        invite used since the last snapshot, the number of new uses of the other invites, and a list of
+        (inviteID, uses) pairs for the role invites whose uses changed. Invites missing from the snapshot, such as
+        invites created while the bot was offline, aren't counted until the next fetch.
+        """
+        now = asyncio.get_event_loop().time()
+        fetchedUses = {invite.code: invite.uses for invite in invites}
+        roleUses = {}
+        changedUses = []
+        for inviteID in guildInvites.roleInvites:
+            newUses = 0
+            if (inviteID in fetchedUses):
+                newUses = fetchedUses[inviteID] - guildInvites.uses.get(inviteID, fetchedUses[inviteID])
+                if (newUses != 0):
+                    changedUses.append((inviteID, fetchedUses[inviteID]))
+
+            exhaustedUses, deletedAt = guildInvites.exhaustedUses.get(inviteID, (0, now))
+            if (now - deletedAt < INVITE_EXHAUSTED_WINDOW):
+                newUses += exhaustedUses
+            if (newUses > 0):
+                roleUses[inviteID] = newUses
+
+        otherUses = 0
+        for inviteID, uses in fetchedUses.items():
+            if (inviteID not in guildInvites.roleInvites):
+                otherUses += max(uses - guildInvites.uses.get(inviteID, uses), 0)
+        for inviteID, (exhaustedUses, deletedAt) in guildInvites.exhaustedUses.items():
+            if (inviteID not in guildInvites.roleInvites and now - deletedAt < INVITE_EXHAUSTED_WINDOW):
+                otherUses += exhaustedUses
+
+        guildInvites.uses = fetchedUses
+        guildInvites.maxUses = {invite.code: invite.max_uses or 0 for invite in invites}
+        guildInvites.exhaustedUses = {}
+        return (roleUses, otherUses, changedUses)
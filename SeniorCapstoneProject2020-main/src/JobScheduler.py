@@ -0,0 +1,174 @@
+"""Module contains JobScheduler class for running timed jobs, such as automatic server unlocks and reminders,
+that are stored in the local cache so that they survive restarts."""
+
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, List, Optional
+import NewBotCache
+
+# longest number of seconds the dispatcher sleeps before checking the next due job again, so that changes to
+# the system clock delay a job by at most this long
+SCHEDULER_MAX_SLEEP = 60.0
+
+class ScheduledJob():
+    """ScheduledJob object stores a job waiting to be run by the scheduler: its id in the scheduled_jobs
+    table, the server and channel it belongs to, the type of job, the unix timestamp it is due at, and a dict
+    of arguments for the job's handler.
+    """
+    def __init__(self, jobID: int, guildID: int, channelID: Optional[int], jobType: str, dueTime: float, payload: dict):
+        self.jobID = jobID
+        self.guildID = guildID
+        self.channelID = channelID
+        self.jobType = jobType
+        self.dueTime = dueTime
+        self.payload = payload
+
+class JobScheduler():
+    """JobScheduler object runs scheduled jobs from a single dispatcher task that sleeps until the next job
+    is due. Pending jobs are kept in a heap ordered by due time and stored in the scheduled_jobs table of the
+    local cache, from which they are reloaded when the scheduler starts.
+
+    Each job type has a handler registered by the cog that schedules it. Handlers are coroutine functions
+    taking the ScheduledJob, and return None once the job is finished or a new unix timestamp to run the
+    job again at.
+    """
+    def __init__(self, cache: NewBotCache.Cache):
+        self.cache = cache
+        self.handlers = {}
+
+        # jobs stores each pending job by id, and jobQueue is a heap of (dueTime, jobID) pairs; entries for
+        # jobs that were cancelled or moved are left in the heap and skipped when they reach the top
+        self.jobs = {}
+        self.jobQueue = []
+
+        # dispatcherTask runs dispatch once the scheduler is started, and wakeEvent is set to wake it
+        # early when a job is scheduled ahead of the job it is sleeping until
+        self.dispatcherTask = None
+        self.wakeEvent = None
+
+    def registerHandler(self, jobType: str, handler: Callable[[ScheduledJob], Awaitable[Optional[float]]]):
+        """Sets the coroutine function that runs jobs of the given type.
+        """
+        self.handlers[jobType] = handler
+
+    async def start(self):
+        """Loads the pending jobs stored in the local cache and starts the dispatcher task, jobs that became
+        due while the bot was offline are run right away. Does nothing if the scheduler is already running.
+        """
+        if (self.dispatcherTask is not None):
+            return
+
+        self.wakeEvent = asyncio.Event()
+        for jobID, guildID, channelID, jobType, dueTime, payload in await self.cache.getScheduledJobsList():
+            self.queueJob(ScheduledJob(jobID, guildID, channelID, jobType, dueTime, payload))
+
+        self.dispatcherTask = asyncio.ensure_future(self.dispatch())
+
+    def stop(self):
+        """Stops the dispatcher task, pending jobs stay in the local cache and are reloaded by start.
+        """
+        if (self.dispatcherTask is not None):
+            self.dispatcherTask.cancel()
+            self.dispatcherTask = None
+
+    async def schedule(self, guildID: int, jobType: str, dueTime: float, channelID: Optional[int] = None,
+        payload: Optional[dict] = None) -> ScheduledJob:
+        """Stores a new job of the given type due at the given unix timestamp and queues it to be run.
+        """
+        payload = payload or {}
+        jobID = await self.cache.addScheduledJob(guildID, jobType, dueTime, channelID, payload)
+        job = ScheduledJob(jobID, guildID, channelID, jobType, float(dueTime), payload)
+        self.queueJob(job)
+
+        return job
+
+    async def cancel(self, guildID: int, jobID: int) -> bool:
+        """Cancels the pending job with the given id on the given server, returning whether there was
+        such a job.
+        """
+        job = self.jobs.get(jobID)
+        if (job is None or job.guildID != guildID):
+            return False
+
+        del self.jobs[jobID]
+        await self.cache.remScheduledJob(jobID)
+        return True
+
+    async def cancelJobs(self, guildID: int, jobType: Optional[str] = None) -> int:
+        """Cancels every pending job on the given server, or only the jobs of the given type, returning the
+        number of jobs cancelled.
+        """
+        jobIDs = [job.jobID for job in self.getJobs(guildID) if (jobType is None or job.jobType == jobType)]
+        for jobID in jobIDs:
+            del self.jobs[jobID]
+
+        if (len(jobIDs) > 0):
+            await self.cache.remScheduledJob(jobIDs)
+        return len(jobIDs)
+
+    def getJobs(self, guildID: int) -> List[ScheduledJob]:
+        """Returns list of the pending jobs on the given server ordered by due time.
+        """
+        return sorted((job for job in self.jobs.values() if job.guildID == guildID), key=lambda job: (job.dueTime, job.jobID))
+
+    def queueJob(self, job: ScheduledJob):
+        """Adds a job to the heap, waking the dispatcher if the job is now the next one due.
+        """
+        self.jobs[job.jobID] = job
+        heapq.heappush(self.jobQueue, (job.dueTime, job.jobID))
+
+        if (self.wakeEvent is not None and self.jobQueue[0][1] == job.jobID):
+            self.wakeEvent.set()
+
+    async def dispatch(self):
+        """Runs each job as it becomes due, sleeping until the next job in the heap is due or a job is
+        scheduled ahead of it.
+        """
+        while True:
+            self.wakeEvent.clear()
+
+            now = time.time()
+            while (len(self.jobQueue) > 0 and self.jobQueue[0][0] <= now):
+                dueTime, jobID = heapq.heappop(self.jobQueue)
+                job = self.jobs.get(jobID)
+
+                # skip entries left behind by cancelled or moved jobs
+                if (job is None or job.dueTime != dueTime):
+                    continue
+                asyncio.ensure_future(self.runJob(job))
+
+            sleepTime = SCHEDULER_MAX_SLEEP
+            if (len(self.jobQueue) > 0):
+                sleepTime = min(self.jobQueue[0][0] - time.time(), SCHEDULER_MAX_SLEEP)
+
+            try:
+                await asyncio.wait_for(self.wakeEvent.wait(), max(sleepTime, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def runJob(self, job: ScheduledJob):
+        """Runs a due job's handler, then either requeues the job at the time returned by the handler or
+        removes it from the local cache. Jobs whose handler fails or is not registered are removed.
+        """
+        nextDueTime = None
+        handler = self.handlers.get(job.jobType)
+        try:
+            if (handler is None):
+                print(f"No handler registered for scheduled job {job.jobID} of type '{job.jobType}', removing it")
+            else:
+                nextDueTime = await handler(job)
+        except Exception as e:
+            print(f"Scheduled job {job.jobID} of type '{job.jobType}' failed: {e}")
+
+        # the job may have been cancelled while its handler ran
+        if (self.jobs.get(job.jobID) is not job):
+            return
+
+        if (nextDueTime is None):
+            del self.jobs[job.jobID]
+            await self.cache.remScheduledJob(job.jobID)
+        else:
+            job.dueTime = float(nextDueTime)
+            await self.cache.setScheduledJobDueTime(job.jobID, job.dueTime)
+            self.queueJob(job)
@@ -0,0 +1,133 @@
+"""Module contains JoinAggregator class for welcoming new members, collecting the members joining a server within a
+short window so that a burst of joins, such as a class joining at once, is welcomed with one message."""
+
+import asyncio
+import discord
+from typing import Dict, List, Optional
+import BulkOperations
+import InviteTracker
+import NewBotCache
+
+# seconds the joins to a server are collected for before they are welcomed together
+JOIN_BATCH_WINDOW = 2.0
+
+# largest number of members named in a combined welcome message
+JOIN_WELCOME_MAX_NAMES = 50
+
+# name of the channel welcomes are sent to on servers without a stored notification channel
+DEFAULT_NOTIFICATION_CHANNEL_NAME = "notifications"
+
+class JoinBatch():
+    """JoinBatch object stores the members that joined a server within one window, in join order, along with
+    the task working out the role invite each member joined with.
+    """
+    def __init__(self, guild: discord.Guild):
+        self.guild = guild
+        self.members = []
+        self.roleLookups = []
+
+class JoinAggregator():
+    """JoinAggregator object collects the members joining each server for JOIN_BATCH_WINDOW seconds from the
+    first join, then gives each member the role of the role invite they joined with through the bulk executor
+    and sends a single welcome message naming every member of the batch to the server's notification channel.
+    Members whose role invite can't be worked out are listed in the notification channel to be given their role
+    by hand.
+    """
+    def __init__(self, cache: NewBotCache.Cache, inviteTracker: InviteTracker.InviteTracker, bulkExecutor: BulkOperations.BulkOperationExecutor):
+        self.cache = cache
+        self.inviteTracker = inviteTracker
+        self.bulkExecutor = bulkExecutor
+
+        # batches stores the batch of each server collecting joins
+        self.batches = {}
+
+    def memberJoined(self, member: discord.Member):
+        """Adds the member to their server's batch, starting a new batch if the server has none.
+        """
+        batch = self.batches.get(member.guild.id)
+        if (batch is None):
+            batch = JoinBatch(member.guild)
+            self.batches[member.guild.id] = batch
+            asyncio.get_event_loop().call_later(JOIN_BATCH_WINDOW, lambda: asyncio.ensure_future(self.flush(member.guild.id)))
+
+        batch.members.append(member)
+        batch.roleLookups.append(asyncio.ensure_future(self.inviteTracker.memberJoined(member)))
+
+    async def flush(self, guildID: int):
+        """Closes the server's batch, giving its members their roles and welcoming them.
+        """
+        batch = self.batches.pop(guildID, None)
+        if (batch is None):
+            return
+
+        roleIDs = await asyncio.gather(*batch.roleLookups)
+        memberRoles = {}
+        unresolvedMembers = []
+        for member, roleID in zip(batch.members, roleIDs):
+            if (roleID == InviteTracker.UNRESOLVED_ROLE):
+                unresolvedMembers.append(member)
+                continue
+            role = batch.guild.get_role(roleID) if (roleID is not None) else None
+            if (role is not None):
+                memberRoles[member] = role
+        report = await self.bulkExecutor.run(memberRoles, lambda member: member.add_roles(memberRoles[member]))
+
+        channel = await self.getNotificationChannel(batch.guild)
+        if (channel is None):
+            print(f"Unable to welcome {len(batch.members)} member(s) to {batch.guild}, the server has no notification channel")
+            return
+
+        try:
+            await channel.send(embed=self.welcomeEmbed(batch.members))
+            roleMessage = self.roleMessage(memberRoles, report, unresolvedMembers)
+            if (roleMessage is not None):
+                await channel.send(roleMessage)
+        except discord.HTTPException as e:
+            print(f"Unable to welcome {len(batch.members)} member(s) to {batch.guild}: {e}")
+
+    async def getNotificationChannel(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
+        """Returns the server's stored notification channel. Servers without one stored have their channel named
+        DEFAULT_NOTIFICATION_CHANNEL_NAME looked up by name once and stored.
+        """
+        channelID = await self.cache.getServerNotificationChannelID(guild.id)
+        if (channelID is not None):
+            return guild.get_channel(channelID)
+
+        channel = discord.utils.get(guild.text_channels, name=DEFAULT_NOTIFICATION_CHANNEL_NAME)
+        if (channel is not None):
+            await self.cache.setServerNotificationChannelID(guild.id, channel.id)
+        return channel
+
+    @staticmethod
+    def welcomeEmbed(members: List[discord.Member]) -> discord.Embed:
+        if (len(members) == 1):
+            return discord.Embed(title=f"Welcome to the server {members[0].name}", description=None, color=0x0000FF)
+
+        names = ", ".join(member.name for member in members[:JOIN_WELCOME_MAX_NAMES])
+        if (len(members) > JOIN_WELCOME_MAX_NAMES):
+            names += f", and {len(members) - JOIN_WELCOME_MAX_NAMES} more"
+        return discord.Embed(title=f"Welcome to the server, {len(members)} new members", description=names, color=0x0000FF)
+
+    @staticmethod
+    def roleMessage(memberRoles: Dict[discord.Member, discord.Role], report: BulkOperations.BulkOperationReport,
+        unresolvedMembers: List[discord.Member] = ()) -> Optional[str]:
+        """Returns a message giving the roles given to the batch's members and listing the members whose role
+        couldn't be worked out, or None if no roles were given or attempted and every member was worked out.
+        """
+        if (len(memberRoles) == 1 and len(report.succeeded) == 1 and len(unresolvedMembers) == 0):
+            member, role = next(iter(memberRoles.items()))
+            return f'{member} has been given the role {role}'
+
+        roleCounts = {}
+        for member in report.succeeded:
+            roleCounts[memberRoles[member]] = roleCounts.get(memberRoles[member], 0) + 1
+        lines = [f"{count} member(s) have been given the role {role}" for role, count in roleCounts.items()]
+        if (len(report.failed) > 0):
+            lines.append(f"{len(report.failed)} member(s) could not be given their role")
+        if (len(unresolvedMembers) > 0):
+            names = ", ".join(str(member) for member in unresolvedMembers[:JOIN_WELCOME_MAX_NAMES])
+            if (len(unresolvedMembers) > JOIN_WELCOME_MAX_NAMES):
+                names += f", and {len(unresolvedMembers) - JOIN_WELCOME_MAX_NAMES} more"
+            lines.append(f"The role invites used by {len(unresolvedMembers)} member(s) could not be worked out, "
+                f"please give them their role by hand: {names}")
+        return "\n".join(lines) if (len(lines) > 0) else None
@@ -0,0 +1,112 @@
+"""Module contains MessageDispatcher class for classifying each received message once and passing it only to the
+handlers subscribed to its classes, so that messages no handler cares about, such as the bot's own messages,
+skip the handlers entirely."""
+
+import asyncio
+import discord
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable
+import UrlBlocklist
+
+# classes a message may be sorted into; every message is in exactly one of guild and direct, one of bot and
+# human, and one of text and empty, with self marking the bot's own messages
+MESSAGE_CLASSES = ["guild", "direct", "bot", "human", "self", "command", "text", "empty", "url", "attachment"]
+
+class MessageSubscription():
+    """MessageSubscription object stores a message handler along with the classes a message must be in and the
+    classes it must not be in to be passed to the handler, and the number of messages passed to it.
+    """
+    def __init__(self, name: str, handler: Callable[[discord.Message, FrozenSet[str]], Awaitable],
+        requiredClasses: Iterable[str], excludedClasses: Iterable[str]):
+        self.name = name
+        self.handler = handler
+        self.requiredClasses = frozenset(requiredClasses)
+        self.excludedClasses = frozenset(excludedClasses)
+        self.deliveries = 0
+
+        unknownClasses = (self.requiredClasses | self.excludedClasses).difference(MESSAGE_CLASSES)
+        if (len(unknownClasses) > 0):
+            raise ValueError(f"Unknown message class(es) {', '.join(sorted(unknownClasses))}")
+
+    def matches(self, classes: FrozenSet[str]) -> bool:
+        return self.requiredClasses <= classes and self.excludedClasses.isdisjoint(classes)
+
+class MessageDispatcher():
+    """MessageDispatcher object receives every message from the bot's on_message event, sorts it into the classes
+    in MESSAGE_CLASSES, and runs the handlers subscribed to those classes concurrently. Handlers are coroutine
+    functions taking the message and the frozenset of its classes. A failing handler is reported without
+    affecting the other handlers of the message.
+
+    Counts of the messages received in each class are kept to show the bot's traffic mix.
+    """
+    def __init__(self, getPrefix: Callable[[discord.Message], str], botUser: Callable[[], discord.ClientUser]):
+        self.getPrefix = getPrefix
+        self.botUser = botUser
+        self.subscriptions = {}
+
+        # messageCount stores the number of messages dispatched, with classCounts storing the number in each class
+        self.messageCount = 0
+        self.classCounts = {messageClass: 0 for messageClass in MESSAGE_CLASSES}
+
+    def subscribe(self, name: str, handler: Callable[[discord.Message, FrozenSet[str]], Awaitable],
+        requiredClasses: Iterable[str] = (), excludedClasses: Iterable[str] = ()) -> MessageSubscription:
+        """Adds a handler passed the messages in every one of requiredClasses and none of excludedClasses,
+        replacing any handler subscribed with the same name.
+        """
+        subscription = MessageSubscription(name, handler, requiredClasses, excludedClasses)
+        self.subscriptions[name] = subscription
+        return subscription
+
+    def unsubscribe(self, name: str):
+        self.subscriptions.pop(name, None)
+
+    def classify(self, message: discord.Message) -> FrozenSet[str]:
+        """Returns frozenset of the classes the message is in.
+        """
+        classes = ["guild" if (message.guild is not None) else "direct"]
+        classes.append("bot" if message.author.bot else "human")
+        if (message.author == self.botUser()):
+            classes.append("self")
+
+        content = message.content
+        if (content):
+            classes.append("text")
+            if (content.startswith(self.getPrefix(message))):
+                classes.append("command")
+            if (UrlBlocklist.containsUrl(content)):
+                classes.append("url")
+        else:
+            classes.append("empty")
+
+        if (message.attachments):
+            classes.append("attachment")
+
+        return frozenset(classes)
+
+    async def dispatch(self, message: discord.Message):
+        """Classifies the message, counts it, and runs the handlers subscribed to its classes.
+        """
+        classes = self.classify(message)
+        self.messageCount += 1
+        for messageClass in classes:
+            self.classCounts[messageClass] += 1
+
+        subscriptions = [subscription for subscription in self.subscriptions.values() if subscription.matches(classes)]
+        if (len(subscriptions) == 0):
+            return
+
+        for subscription in subscriptions:
+            subscription.deliveries += 1
+        results = await asyncio.gather(*[subscription.handler(message, classes) for subscription in subscriptions], return_exceptions=True)
+        for subscription, result in zip(subscriptions, results):
+            if (isinstance(result, Exception)):
+                print(f"Message handler '{subscription.name}' failed: {result}")
+
+    def getTrafficStats(self) -> Dict[str, object]:
+        """Returns the number of messages dispatched, the number in each class, and the number passed to each
+        subscribed handler.
+        """
+        return {
+            "messages": self.messageCount,
+            "classes": dict(self.classCounts),
+            "handlers": {name: subscription.deliveries for name, subscription in self.subscriptions.items()}
+        }
@@ -0,0 +1,124 @@
+"""Module contains MessageDeleter class for deleting the messages found by a scan over a channel's history, using
+bulk delete calls for recent messages and paced single deletes for older ones."""
+
+import asyncio
+import datetime
+import discord
+from typing import Optional
+
+# the Discord API only bulk deletes messages younger than 14 days; messages within BULK_DELETE_AGE_MARGIN of
+# the limit are deleted one at a time in case they pass it before the bulk delete call is made
+BULK_DELETE_MAX_AGE = datetime.timedelta(days=14)
+BULK_DELETE_AGE_MARGIN = datetime.timedelta(minutes=5)
+
+# largest number of messages deleted by one bulk delete call
+BULK_DELETE_BATCH_SIZE = 100
+
+# seconds waited between deletes of messages too old to bulk delete, which are rate limited per channel
+SINGLE_DELETE_INTERVAL = 1.0
+
+class PurgeReport():
+    """PurgeReport object stores the outcome of a purge: the number of messages deleted for each author ID,
+    the name of each of those authors, and the number of messages deleted by bulk delete and one at a time.
+    """
+    def __init__(self):
+        self.authorCounts = {}
+        self.authorNames = {}
+        self.bulkDeleted = 0
+        self.singleDeleted = 0
+        self.failed = 0
+
+    @property
+    def totalDeleted(self) -> int:
+        return self.bulkDeleted + self.singleDeleted
+
+    def addDeleted(self, message: discord.Message):
+        self.authorCounts[message.author.id] = self.authorCounts.get(message.author.id, 0) + 1
+        self.authorNames[message.author.id] = str(message.author)
+
+    def toDict(self) -> dict:
+        """Returns the report as a JSON serializable dict, used to checkpoint the report of a history scan.
+        """
+        return {
+            "authors": [[authorID, self.authorNames[authorID], count] for authorID, count in self.authorCounts.items()],
+            "bulkDeleted": self.bulkDeleted,
+            "singleDeleted": self.singleDeleted,
+            "failed": self.failed
+        }
+
+    @classmethod
+    def fromDict(cls, data: dict) -> "PurgeReport":
+        """Returns the report stored in a dict returned by toDict.
+        """
+        report = cls()
+        for authorID, name, count in data.get("authors", []):
+            report.authorCounts[authorID] = count
+            report.authorNames[authorID] = name
+        report.bulkDeleted = data.get("bulkDeleted", 0)
+        report.singleDeleted = data.get("singleDeleted", 0)
+        report.failed = data.get("failed", 0)
+        return report
+
+    def summary(self, maxAuthorsListed: int = 20) -> str:
+        """Returns a message giving the number of messages deleted, listing the counts of the
+        maxAuthorsListed authors with the most messages deleted.
+        """
+        summary = f"{self.totalDeleted} message(s) deleted."
+        if (self.failed > 0):
+            summary += f" {self.failed} message(s) could not be deleted."
+
+        authorIDs = sorted(self.authorCounts, key=lambda authorID: (-self.authorCounts[authorID], self.authorNames[authorID]))
+        authorLines = [f"{self.authorNames[authorID]}: {self.authorCounts[authorID]}" for authorID in authorIDs[:maxAuthorsListed]]
+        if (len(authorIDs) > maxAuthorsListed):
+            authorLines.append(f"...and {len(authorIDs) - maxAuthorsListed} more")
+        if (len(authorLines) > 0):
+            summary += "\n" + "\n".join(authorLines)
+
+        return summary
+
+class MessageDeleter():
+    """MessageDeleter object deletes the messages of a channel it is given, recording the results in a
+    PurgeReport. Messages young enough are batched into bulk delete calls of up to BULK_DELETE_BATCH_SIZE
+    messages, and older messages are deleted right away, SINGLE_DELETE_INTERVAL seconds apart. flush must be
+    called to delete the last batch.
+    """
+    def __init__(self, channel: discord.TextChannel, report: PurgeReport, now: Optional[datetime.datetime] = None):
+        self.channel = channel
+        self.report = report
+        self.bulkCutoff = (now or datetime.datetime.utcnow()) - BULK_DELETE_MAX_AGE + BULK_DELETE_AGE_MARGIN
+        self.batch = []
+
+    async def delete(self, message: discord.Message):
+        if (message.created_at > self.bulkCutoff):
+            self.batch.append(message)
+            if (len(self.batch) == BULK_DELETE_BATCH_SIZE):
+                await self.flush()
+            return
+
+        try:
+            await message.delete()
+        except discord.NotFound:
+            # already deleted by someone else during the purge
+            pass
+        except discord.HTTPException:
+            self.report.failed += 1
+        else:
+            self.report.singleDeleted += 1
+            self.report.addDeleted(message)
+        await asyncio.sleep(SINGLE_DELETE_INTERVAL)
+
+    async def flush(self):
+        """Deletes the batched messages with a single bulk delete call.
+        """
+        if (len(self.batch) == 0):
+            return
+
+        batch, self.batch = self.batch, []
+        try:
+            await self.channel.delete_messages(batch)
+        except discord.HTTPException:
+            self.report.failed += len(batch)
+        else:
+            self.report.bulkDeleted += len(batch)
+            for message in batch:
+                self.report.addDeleted(message)
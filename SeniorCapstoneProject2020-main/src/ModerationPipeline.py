@@ -0,0 +1,75 @@
+"""Module contains ModerationPipeline class for running automatic moderation checks on messages."""
+
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# value returned by a stage to end the pipeline without an infraction, exempting the message from the
+# remaining stages
+EXEMPT = "exempt"
+
+class Infraction():
+    """Infraction object describes a message that failed a moderation stage, storing the name of the stage,
+    the report sent to the infraction channel, and an optional notice sent to the message's channel.
+    """
+    def __init__(self, stage: str, report: str, channelNotice: Optional[str] = None):
+        self.stage = stage
+        self.report = report
+        self.channelNotice = channelNotice
+
+class ModerationPipeline():
+    """ModerationPipeline object runs a message through an ordered list of moderation stages, stopping at the
+    first stage that exempts the message or finds an infraction. Stages are coroutine functions taking the
+    message and a dict shared by the stages of a single run, and return None to pass the message on to the next
+    stage, EXEMPT, or an Infraction. Stages should be ordered cheapest first.
+    """
+    def __init__(self, stages: List[Tuple[str, Callable[..., Awaitable]]]):
+        self.stages = stages
+
+        # stageStats stores a dict for each stage name holding the number of times the stage ran, the number
+        # of runs it ended, and the total seconds spent in the stage
+        self.stageStats = {name: {"calls": 0, "stops": 0, "seconds": 0.0} for name, _ in stages}
+
+    @property
+    def stageNames(self) -> List[str]:
+        return [name for name, _ in self.stages]
+
+    async def run(self, message, disabledStages: Iterable[str] = (), context: Optional[dict] = None) -> Optional[Infraction]:
+        """Runs the message through each stage not in disabledStages, returning the Infraction found by a
+        stage, or None if the message passed or was exempted. The stages share the given context dict, or a
+        new dict if none is given.
+        """
+        if (context is None):
+            context = {}
+        for name, stage in self.stages:
+            if (name in disabledStages):
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = await stage(message, context)
+            finally:
+                stats = self.stageStats[name]
+                stats["calls"] += 1
+                stats["seconds"] += time.perf_counter() - start
+
+            if (result is not None):
+                stats["stops"] += 1
+                return result if isinstance(result, Infraction) else None
+
+        return None
+
+    def getStageStats(self) -> Dict[str, dict]:
+        """Returns a dict holding, for each stage, the number of times it ran, the number of runs it ended,
+        and the total and average time spent in the stage in milliseconds.
+        """
+        stageStats = {}
+        for name, stats in self.stageStats.items():
+            totalMS = stats["seconds"] * 1000
+            stageStats[name] = {
+                "calls": stats["calls"],
+                "stops": stats["stops"],
+                "total_ms": totalMS,
+                "average_ms": totalMS / stats["calls"] if stats["calls"] else 0.0
+            }
+
+        return stageStats
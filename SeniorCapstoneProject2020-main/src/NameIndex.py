@@ -0,0 +1,200 @@
+"""Module contains NameIndex class for looking up members and roles by wildcard patterns such as "student*",
+where * matches any run of characters, without scanning every member of a guild."""
+
+import bisect
+import functools
+import re
+import discord
+from typing import Iterable, List, Optional, Set
+
+# number of compiled wildcard patterns kept in the compiled pattern cache
+WILDCARD_CACHE_SIZE = 256
+
+# length of the substrings indexed for each name; literal parts of a pattern at least this long are used to
+# find the names that can match the pattern
+TRIGRAM_LENGTH = 3
+
+@functools.lru_cache(maxsize=WILDCARD_CACHE_SIZE)
+def compileWildcard(pattern: str) -> re.Pattern:
+    """Returns a compiled regex fully matching the given wildcard pattern, where * matches any run of
+    characters and every other character matches itself.
+    """
+    return re.compile(".*".join(re.escape(part) for part in pattern.split("*")), re.DOTALL)
+
+def trigrams(text: str) -> Set[str]:
+    """Returns the set of substrings of length TRIGRAM_LENGTH in the given text.
+    """
+    return {text[i:i + TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+class NameIndex():
+    """NameIndex object indexes the names of a set of objects, such as the names and nicknames of a guild's
+    members, for wildcard lookups. Names are kept in a sorted list for patterns starting with a literal prefix,
+    and in a trigram index for patterns containing longer literal parts, so a lookup only runs the pattern's
+    regex on the names that can match it. The index is updated one object at a time as names change.
+    """
+    def __init__(self):
+        # objectNames stores the indexed names of each object ID, and nameOwners the IDs of the objects
+        # having each name
+        self.objectNames = {}
+        self.nameOwners = {}
+
+        # sortedNames holds every indexed name in sorted order, and trigramNames stores the set of names
+        # containing each trigram
+        self.sortedNames = []
+        self.trigramNames = {}
+
+    def __len__(self) -> int:
+        return len(self.objectNames)
+
+    def update(self, objectID: int, names: Iterable[Optional[str]]):
+        """Sets the names indexed for an object, ignoring names that are None.
+        """
+        names = tuple(sorted({name for name in names if name is not None}))
+        if (self.objectNames.get(objectID) == names):
+            return
+
+        self.remove(objectID)
+        self.objectNames[objectID] = names
+        for name in names:
+            owners = self.nameOwners.get(name)
+            if (owners is not None):
+                owners.add(objectID)
+                continue
+
+            self.nameOwners[name] = {objectID}
+            bisect.insort(self.sortedNames, name)
+            for trigram in trigrams(name):
+                self.trigramNames.setdefault(trigram, set()).add(name)
+
+    def remove(self, objectID: int):
+        """Removes an object from the index, doing nothing if it isn't indexed.
+        """
+        for name in self.objectNames.pop(objectID, ()):
+            owners = self.nameOwners[name]
+            owners.discard(objectID)
+            if (len(owners) > 0):
+                continue
+
+            # drop the name from the index once no objects have it
+            del self.nameOwners[name]
+            del self.sortedNames[bisect.bisect_left(self.sortedNames, name)]
+            for trigram in trigrams(name):
+                trigramNames = self.trigramNames[trigram]
+                trigramNames.discard(name)
+                if (len(trigramNames) == 0):
+                    del self.trigramNames[trigram]
+
+    def candidateNames(self, pattern: str) -> Iterable[str]:
+        """Returns the indexed names that may match the given wildcard pattern: the names containing every
+        trigram of the pattern's literal parts, else the names starting with the pattern's literal prefix, else
+        every name.
+        """
+        parts = pattern.split("*")
+        patternTrigrams = set().union(*(trigrams(part) for part in parts))
+        if (len(patternTrigrams) > 0):
+            # intersect starting from the rarest trigram so that the candidate set shrinks quickly
+            trigramSets = sorted((self.trigramNames.get(trigram, set()) for trigram in patternTrigrams), key=len)
+            return trigramSets[0].intersection(*trigramSets[1:])
+
+        prefix = parts[0]
+        if (len(prefix) > 0):
+            start = bisect.bisect_left(self.sortedNames, prefix)
+            end = start
+            while (end < len(self.sortedNames) and self.sortedNames[end].startswith(prefix)):
+                end += 1
+            return self.sortedNames[start:end]
+
+        return self.sortedNames
+
+    def match(self, pattern: str) -> Set[int]:
+        """Returns the set of IDs of the objects with a name fully matching the given wildcard pattern.
+        """
+        if ("*" not in pattern):
+            return set(self.nameOwners.get(pattern, ()))
+
+        regex = compileWildcard(pattern)
+        matches = set()
+        for name in self.candidateNames(pattern):
+            if (regex.fullmatch(name) is not None):
+                matches.update(self.nameOwners[name])
+        return matches
+
+class GuildNameIndexes():
+    """GuildNameIndexes object stores a NameIndex over the names and nicknames of the members of each guild and
+    one over the names of each guild's roles. Indexes are built the first time a guild is searched, and are kept
+    current by the member and role listeners calling the update methods.
+    """
+    def __init__(self):
+        self.memberIndexes = {}
+        self.roleIndexes = {}
+
+    def getMemberIndex(self, guild: discord.Guild) -> NameIndex:
+        index = self.memberIndexes.get(guild.id)
+        if (index is None):
+            index = NameIndex()
+            for member in guild.members:
+                index.update(member.id, (member.name, member.nick))
+            self.memberIndexes[guild.id] = index
+        return index
+
+    def getRoleIndex(self, guild: discord.Guild) -> NameIndex:
+        index = self.roleIndexes.get(guild.id)
+        if (index is None):
+            index = NameIndex()
+            for role in guild.roles:
+                index.update(role.id, (role.name,))
+            self.roleIndexes[guild.id] = index
+        return index
+
+    def matchMembers(self, guild: discord.Guild, pattern: str) -> List[discord.Member]:
+        """Returns the members of the guild whose name or nickname fully matches the given wildcard pattern,
+        ordered by ID.
+        """
+        regex = compileWildcard(pattern)
+        members = []
+        for memberID in sorted(self.getMemberIndex(guild).match(pattern)):
+            # results are checked against the member itself in case an update was missed
+            member = guild.get_member(memberID)
+            if (member is not None and (regex.fullmatch(member.name) or (member.nick is not None and regex.fullmatch(member.nick)))):
+                members.append(member)
+        return members
+
+    def matchRoles(self, guild: discord.Guild, pattern: str) -> List[discord.Role]:
+        """Returns the roles of the guild whose name fully matches the given wildcard pattern, ordered by ID.
+        """
+        regex = compileWildcard(pattern)
+        roles = []
+        for roleID in sorted(self.getRoleIndex(guild).match(pattern)):
+            role = guild.get_role(roleID)
+            if (role is not None and regex.fullmatch(role.name)):
+                roles.append(role)
+        return roles
+
+    ## index update methods, called from listeners ##
+    def updateMember(self, member: discord.Member):
+        index = self.memberIndexes.get(member.guild.id)
+        if (index is not None):
+            index.update(member.id, (member.name, member.nick))
+
+    def removeMember(self, member: discord.Member):
+        index = self.memberIndexes.get(member.guild.id)
+        if (index is not None):
+            index.remove(member.id)
+
+    def updateRole(self, role: discord.Role):
+        index = self.roleIndexes.get(role.guild.id)
+        if (index is not None):
+            index.update(role.id, (role.name,))
+
+    def removeRole(self, role: discord.Role):
+        index = self.roleIndexes.get(role.guild.id)
+        if (index is not None):
+            index.remove(role.id)
+
+    def removeGuild(self, guildID: int):
+        self.memberIndexes.pop(guildID, None)
+        self.roleIndexes.pop(guildID, None)
+
+
+# name indexes shared by the cogs, kept current by the listeners in EduBot.py
+sharedIndexes = GuildNameIndexes()
@@ -1,19 +1,121 @@
 """Module contains Cache class for interacting with local cache database."""
 
+import asyncio
+import functools
+import itertools
+import json
+import random
 import sqlite3
 import discord
+from concurrent.futures import ThreadPoolExecutor
 from discord.ext import commands, tasks
-from typing import Union, Optional, List, Tuple
+from typing import Callable, Dict, Union, Optional, List, Tuple
+
+# boolean stores whether Cache objects run their database operations on a dedicated database thread
+# by default, rather than directly on the event loop
+USE_DB_EXECUTOR = False
+
+# number of seconds a write batch stays open collecting mutations before it is committed, and the number of
+# queued mutations that causes a batch to be committed before its window closes
+WRITE_BATCH_WINDOW = 0.01
+MAX_WRITE_BATCH_SIZE = 500
+
+# connection profiles store the pragmas applied to the database connection when a Cache is created, trading
+# durability of the most recent commits against read/write throughput
+#   durable  - every commit is synced to disk before it returns
+#   balanced - commits are synced at WAL checkpoints, a power loss may drop the latest commits but cannot corrupt the db
+#   fast     - syncing is left to the operating system, for development and disposable databases
+CONNECTION_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT"
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 67108864,
+        "temp_store": "MEMORY"
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY"
+    }
+}
+DEFAULT_CONNECTION_PROFILE = "balanced"
+
+# command prefix of servers without one stored, and of direct messages
+DEFAULT_COMMAND_PREFIX = '!'
+
+# poll IDs are shown as 5 digit numbers, giving each server POLL_ID_SPACE possible IDs; when the ID derived from
+# a new poll's message is taken, up to POLL_ID_RANDOM_ATTEMPTS random IDs are tried before searching for a free one
+POLL_ID_SPACE = 100000
+POLL_ID_RANDOM_ATTEMPTS = 16
 
 class Cache():
     """Cache object stores object references for local cache database and methods for abstracting
     data modification and data retrieval from the database.
     """
-    def __init__(self, dbFile: str):
+    def __init__(self, dbFile: str, useDBExecutor: Optional[bool] = None, connectionProfile: str = DEFAULT_CONNECTION_PROFILE):
+        if (useDBExecutor is None):
+            useDBExecutor = USE_DB_EXECUTOR
+        if (connectionProfile not in CONNECTION_PROFILES):
+            raise ValueError(f"Unknown connection profile '{connectionProfile}'")
+
+        # name of the entry in CONNECTION_PROFILES holding the pragmas used for the database connection
+        self.connectionProfile = connectionProfile
+
+        # dbExecutor is a single worker thread that owns all SQLite work when the cache runs in executor mode,
+        # serializing reads and writes off of the event loop; it is None when database work runs inline
+        self.dbExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="EduBotDB") if useDBExecutor else None
+
+        #### WRITE BATCHING ####
+        # pendingWrites stores the queued mutations waiting to be committed together in the next write batch,
+        # with writeBatchHandle holding the scheduled flush for the open batch, if any
+        self.pendingWrites = []
+        self.writeBatchHandle = None
+        self.writeBatchWindow = WRITE_BATCH_WINDOW
+        self.maxWriteBatchSize = MAX_WRITE_BATCH_SIZE
+
         self.dbConnection = self.createConnection(dbFile)
         if (self.dbConnection is not None):
             self.initializeDatabase()
 
+        #### IN-MEMORY SETTINGS CACHE ####
+        # guildSettingsCache stores a dict for each guild ID holding that guild's command prefix, infraction
+        # channel ID, notification channel ID, and lock status; entries are loaded lazily from the servers table
+        # the first time a guild's settings are requested and are kept current by the servers table setters
+        self.guildSettingsCache = {}
+
+        # counters for the number of settings lookups served from guildSettingsCache and the number that
+        # had to query the servers table
+        self.settingsCacheHits = 0
+        self.settingsCacheMisses = 0
+
+        # privilegedRolesCache stores a frozenset of privileged role IDs for each guild ID, used by the
+        # elevated privileges check run before every administrative command; entries are loaded lazily from
+        # the privileged_roles table and are kept current by addPrivilegedRole and remPrivilegedRole; the
+        # version counter is incremented by each change so that a load racing a change is not cached
+        self.privilegedRolesCache = {}
+        self.privilegedRolesVersion = 0
+
+        # prefixMap stores the command prefix of every server by guild ID, loaded with one query by loadPrefixMap
+        # and kept current by the servers table methods, so that the bot's prefix lookup for each message is a
+        # dict lookup rather than a database operation
+        self.prefixMap = {}
+
+        # groupCategoriesCache stores a dict of the category channel ID of each group role for each guild ID, used
+        # by the breakout commands; entries are loaded lazily from the groups table and are dropped by
+        # addGroupRole and remGroupRole, with the version counter guarding loads racing a change
+        self.groupCategoriesCache = {}
+        self.groupCategoriesVersion = 0
+
 
     ###### DATABASE INITIALIZATION ######
     def createConnection(self, dbFile: str):
@@ -22,16 +124,31 @@ class Cache():
         """
         dbConnection = None
         try:
-            dbConnection = sqlite3.connect(dbFile)
+            # the connection is handed to the database thread in executor mode, so sqlite3's same-thread
+            # check is only kept when all work happens on the thread that created the connection
+            dbConnection = sqlite3.connect(dbFile, check_same_thread=(self.dbExecutor is None))
         except sqlite3.Error as e:
             print(e)
             print(f"Database connection to '{dbFile}' failed, terminating...")
             exit()
             
         dbConnection.execute("PRAGMA foreign_keys = 1")
+        for pragma, value in CONNECTION_PROFILES[self.connectionProfile].items():
+            dbConnection.execute(f"PRAGMA {pragma} = {value}")
         dbConnection.commit()
         return dbConnection
 
+    def getConnectionPragmas(self) -> dict:
+        """Returns a dict of the current value of each pragma set by the cache's connection profile,
+        as reported by the database connection.
+        """
+        pragmas = {}
+        for pragma in CONNECTION_PROFILES[self.connectionProfile]:
+            value, = self.dbConnection.execute(f"PRAGMA {pragma}").fetchone()
+            pragmas[pragma] = value
+
+        return pragmas
+
     def createCursor(self):
         """Gets a cursor object for the current db connection and returns it
         """
@@ -44,91 +161,238 @@ class Cache():
             return dbCursor
 
     def initializeDatabase(self):
-        """Initialize tables in the db file if they do not already exist
+        """Brings the db file up to the current schema, running in order every schema migration newer than
+        the schema version recorded in the db file's user_version pragma. A new db file starts at version 0.
         """
+        # list of schema migration methods, where the migration at index i upgrades the schema from version
+        # i to version i+1
+        schemaMigrations = [
+            self.migrateToIntegerSchema,
+            self.migrateAddFilterWords,
+            self.migrateAddDisabledModerationStages,
+            self.migrateAddScheduledJobs,
+            self.migrateAddHistoryScans,
+            self.migrateAddPollTallies,
+            self.migrateAddPollIDIndex
+        ]
+
+        cursor = self.createCursor()
+        cursor.execute("PRAGMA user_version")
+        schemaVersion, = cursor.fetchone()
 
-        # store table creation statements and pass each of them to createTable
-        sqlCreateTableServers = """CREATE TABLE IF NOT EXISTS servers (
-            id text PRIMARY KEY ON CONFLICT IGNORE,
+        for version in range(schemaVersion, len(schemaMigrations)):
+            # foreign keys are disabled while tables are rebuilt, the pragma has no effect inside a transaction
+            # so it is toggled around the migration's transaction
+            self.dbConnection.execute("PRAGMA foreign_keys = 0")
+            try:
+                with self.dbConnection:
+                    cursor.execute("BEGIN")
+                    schemaMigrations[version](cursor)
+                    cursor.execute(f"PRAGMA user_version = {version + 1}")
+            finally:
+                self.dbConnection.execute("PRAGMA foreign_keys = 1")
+
+    def tableExists(self, cursor: sqlite3.Cursor, tableName: str) -> bool:
+        """Checks whether a table with the given name exists in the db file.
+        """
+        cursor.execute("""SELECT COUNT(1) FROM sqlite_master WHERE type = 'table' AND name = ?""", (tableName,))
+        result, = cursor.fetchone()
+        return result > 0
+
+    def rebuildTable(self, cursor: sqlite3.Cursor, tableName: str, sqlCreateTable: str, selectColumns: str):
+        """Creates a table from the definition given in sqlCreateTable. If a table with the same name already
+        exists, its rows are copied into the new table using the column expressions given by selectColumns and
+        the old table is replaced.
+        """
+        if (not self.tableExists(cursor, tableName)):
+            cursor.execute(sqlCreateTable.format(tableName=tableName))
+            return
+
+        # rename by creating the new table under a temporary name and swapping it in, renaming the old table
+        # instead would rewrite the foreign key references of the tables that reference it
+        cursor.execute(sqlCreateTable.format(tableName=f"{tableName}_migrated"))
+        cursor.execute(f"INSERT INTO {tableName}_migrated SELECT {selectColumns} FROM {tableName}")
+        cursor.execute(f"DROP TABLE {tableName}")
+        cursor.execute(f"ALTER TABLE {tableName}_migrated RENAME TO {tableName}")
+
+    def migrateToIntegerSchema(self, cursor: sqlite3.Cursor):
+        """Schema version 1. Creates the cache tables with every Discord ID stored as an INTEGER, converting the
+        rows of any tables left from the original text keyed schema, and adds indexes on the server_id columns
+        used by the per-server queries.
+        """
+        # store table creation statements and the column expressions used to convert rows from the text keyed
+        # schema; IDs in nullable columns that were stored as the string 'None' are converted to NULL
+        toID = "CAST({0} AS INTEGER)"
+        toOptionalID = "CASE WHEN {0} GLOB '[0-9]*' THEN CAST({0} AS INTEGER) END"
+
+        sqlCreateTableServers = """CREATE TABLE {tableName} (
+            id INTEGER PRIMARY KEY ON CONFLICT IGNORE,
             command_prefix text NOT NULL,
-            infraction_channel text,
-            notification_channel text,
+            infraction_channel INTEGER,
+            notification_channel INTEGER,
             is_locked int NOT NULL
         );"""
+        serversColumns = ", ".join([toID.format("id"), "command_prefix", toOptionalID.format("infraction_channel"),
+            toOptionalID.format("notification_channel"), "is_locked"])
 
-        sqlCreateTableGroups = """CREATE TABLE IF NOT EXISTS groups (
-            role_id text PRIMARY KEY ON CONFLICT IGNORE,
-            server_id text NOT NULL,
-            category_id text NOT NULL,
+        sqlCreateTableGroups = """CREATE TABLE {tableName} (
+            role_id INTEGER PRIMARY KEY ON CONFLICT IGNORE,
+            server_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
             FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
         );"""
+        groupsColumns = ", ".join([toID.format("role_id"), toID.format("server_id"), toID.format("category_id")])
 
-        sqlCreateTablePrivilegedRoles = """CREATE TABLE IF NOT EXISTS privileged_roles (
-            role_id text PRIMARY KEY ON CONFLICT IGNORE,
-            server_id text NOT NULL,
+        sqlCreateTablePrivilegedRoles = """CREATE TABLE {tableName} (
+            role_id INTEGER PRIMARY KEY ON CONFLICT IGNORE,
+            server_id INTEGER NOT NULL,
             FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
         );"""
+        privilegedRolesColumns = ", ".join([toID.format("role_id"), toID.format("server_id")])
 
-        sqlCreateTableExcludedRoles = """CREATE TABLE IF NOT EXISTS excluded_roles (
-            role_id text PRIMARY KEY ON CONFLICT IGNORE,
-            server_id text NOT NULL,
+        sqlCreateTableExcludedRoles = """CREATE TABLE {tableName} (
+            role_id INTEGER PRIMARY KEY ON CONFLICT IGNORE,
+            server_id INTEGER NOT NULL,
             FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
         );"""
+        excludedRolesColumns = privilegedRolesColumns
 
-        sqlCreateTablePermOverwrites = """CREATE TABLE IF NOT EXISTS perm_overwrites (
-            channel_id text NOT NULL,
-            modified_id text NOT NULL,
-            server_id text NOT NULL,
+        sqlCreateTablePermOverwrites = """CREATE TABLE {tableName} (
+            channel_id INTEGER NOT NULL,
+            modified_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
             allow_value text NOT NULL,
             deny_value text NOT NULL,
             CONSTRAINT PK_PermOverwrite PRIMARY KEY (channel_id,modified_id) ON CONFLICT REPLACE
             FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
         );"""
+        permOverwritesColumns = ", ".join([toID.format("channel_id"), toID.format("modified_id"), toID.format("server_id"),
+            "allow_value", "deny_value"])
 
-        sqlCreateTablePolls = """CREATE TABLE IF NOT EXISTS polls (
+        sqlCreateTablePolls = """CREATE TABLE {tableName} (
             poll_id text NOT NULL,
-            server_id text NOT NULL,
-            channel_id text NOT NULL,
-            message_id text NOT NULL UNIQUE,
+            server_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL UNIQUE,
             questions text NOT NULL,
             CONSTRAINT PK_Poll PRIMARY KEY (poll_id, message_id),
             FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
         );"""
+        pollsColumns = ", ".join(["poll_id", toID.format("server_id"), toID.format("channel_id"), toID.format("message_id"), "questions"])
 
-        sqlCreateTableRoleReactMsgs = """CREATE TABLE IF NOT EXISTS role_react_msgs (
-            message_id text PRIMARY KEY,
-            channel_id text NOT NULL,
-            server_id text NOT NULL,
-            role_id text NOT NULL,
+        sqlCreateTableRoleReactMsgs = """CREATE TABLE {tableName} (
+            message_id INTEGER PRIMARY KEY,
+            channel_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
             FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
         );"""
+        roleReactMsgsColumns = ", ".join([toID.format("message_id"), toID.format("channel_id"), toID.format("server_id"), toID.format("role_id")])
 
-        sqlCreateTableRoleInvites = """CREATE TABLE IF NOT EXISTS role_invites (
+        sqlCreateTableRoleInvites = """CREATE TABLE {tableName} (
             invite_id text PRIMARY KEY,
-            server_id text NOT NULL,
-            role_id text NOT NULL,
+            server_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
             uses_count int NOT NULL,
             FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
         );"""
+        roleInvitesColumns = ", ".join(["invite_id", toID.format("server_id"), toID.format("role_id"), "uses_count"])
+
+        self.rebuildTable(cursor, "servers", sqlCreateTableServers, serversColumns)
+        self.rebuildTable(cursor, "groups", sqlCreateTableGroups, groupsColumns)
+        self.rebuildTable(cursor, "privileged_roles", sqlCreateTablePrivilegedRoles, privilegedRolesColumns)
+        self.rebuildTable(cursor, "excluded_roles", sqlCreateTableExcludedRoles, excludedRolesColumns)
+        self.rebuildTable(cursor, "perm_overwrites", sqlCreateTablePermOverwrites, permOverwritesColumns)
+        self.rebuildTable(cursor, "polls", sqlCreateTablePolls, pollsColumns)
+        self.rebuildTable(cursor, "role_react_msgs", sqlCreateTableRoleReactMsgs, roleReactMsgsColumns)
+        self.rebuildTable(cursor, "role_invites", sqlCreateTableRoleInvites, roleInvitesColumns)
+
+        # secondary indexes for the per-server list queries, perm_overwrites is also queried per channel
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_groups_server ON groups (server_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_privileged_roles_server ON privileged_roles (server_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_excluded_roles_server ON excluded_roles (server_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_perm_overwrites_server_channel ON perm_overwrites (server_id, channel_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_polls_server_channel ON polls (server_id, channel_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_role_react_msgs_server ON role_react_msgs (server_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_role_invites_server ON role_invites (server_id)")
+
+    def migrateAddFilterWords(self, cursor: sqlite3.Cursor):
+        """Schema version 2. Adds the filter_words table storing each server's custom language filter words.
+        """
+        cursor.execute("""CREATE TABLE filter_words (
+            server_id INTEGER NOT NULL,
+            word text NOT NULL,
+            CONSTRAINT PK_FilterWord PRIMARY KEY (server_id, word) ON CONFLICT IGNORE,
+            FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
+        );""")
 
-        with self.dbConnection:
-            self.createTable(sqlCreateTableServers)
-            self.createTable(sqlCreateTableGroups)
-            self.createTable(sqlCreateTablePrivilegedRoles)
-            self.createTable(sqlCreateTableExcludedRoles)
-            self.createTable(sqlCreateTablePermOverwrites)
-            self.createTable(sqlCreateTablePolls)
-            self.createTable(sqlCreateTableRoleReactMsgs)
-            self.createTable(sqlCreateTableRoleInvites)
+    def migrateAddDisabledModerationStages(self, cursor: sqlite3.Cursor):
+        """Schema version 3. Adds the disabled_moderation_stages table storing the automatic moderation stages
+        each server has turned off.
+        """
+        cursor.execute("""CREATE TABLE disabled_moderation_stages (
+            server_id INTEGER NOT NULL,
+            stage text NOT NULL,
+            CONSTRAINT PK_DisabledModerationStage PRIMARY KEY (server_id, stage) ON CONFLICT IGNORE,
+            FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
+        );""")
 
-    def createTable(self, sqlCreateTable):
-        """Creates a table based on the definition given in parameter sqlCreateTable
+    def migrateAddScheduledJobs(self, cursor: sqlite3.Cursor):
+        """Schema version 4. Adds the scheduled_jobs table storing jobs waiting to be run by the job scheduler,
+        such as timed server unlocks and reminders, so that they survive restarts. due_time is a unix timestamp
+        and payload a JSON object holding the job's arguments.
         """
-        try:
-            cursor = self.createCursor()
-            cursor.execute(sqlCreateTable)
-        except sqlite3.Error as e:
-            print(e)
+        cursor.execute("""CREATE TABLE scheduled_jobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_id INTEGER NOT NULL,
+            channel_id INTEGER,
+            job_type text NOT NULL,
+            due_time REAL NOT NULL,
+            payload text NOT NULL DEFAULT '{}',
+            FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
+        );""")
+        cursor.execute("CREATE INDEX idx_scheduled_jobs_server ON scheduled_jobs (server_id)")
+
+    def migrateAddHistoryScans(self, cursor: sqlite3.Cursor):
+        """Schema version 5. Adds the history_scans table storing the message history scans run by the history
+        scanner, such as mass message deletions, so that they can be resumed after a restart. checkpoint_id is
+        the id of the last message the scan processed, and payload and progress are JSON objects holding the
+        scan's arguments and its results so far.
+        """
+        cursor.execute("""CREATE TABLE history_scans (
+            scan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            scan_type text NOT NULL,
+            status text NOT NULL DEFAULT 'running',
+            checkpoint_id INTEGER,
+            processed_count INTEGER NOT NULL DEFAULT 0,
+            payload text NOT NULL DEFAULT '{}',
+            progress text NOT NULL DEFAULT '{}',
+            FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
+        );""")
+        cursor.execute("CREATE INDEX idx_history_scans_server ON history_scans (server_id)")
+
+    def migrateAddPollTallies(self, cursor: sqlite3.Cursor):
+        """Schema version 6. Adds the question column to the polls table, so that polls can be listed without
+        fetching their messages, and the poll_tallies table storing the running vote count of each poll answer,
+        kept from reaction events. Polls created before this version have no poll_tallies rows.
+        """
+        cursor.execute("ALTER TABLE polls ADD COLUMN question text NOT NULL DEFAULT ''")
+        cursor.execute("""CREATE TABLE poll_tallies (
+            message_id INTEGER NOT NULL,
+            answer_index INTEGER NOT NULL,
+            vote_count INTEGER NOT NULL DEFAULT 0,
+            CONSTRAINT PK_PollTally PRIMARY KEY (message_id, answer_index),
+            FOREIGN KEY (message_id) REFERENCES polls (message_id) ON DELETE CASCADE
+        );""")
+
+    def migrateAddPollIDIndex(self, cursor: sqlite3.Cursor):
+        """Schema version 7. Adds a unique index on the server and poll ID of the polls table, which addPoll
+        relies on to reject a poll ID already used on the server. addPoll has always kept poll IDs unique per
+        server, so existing rows satisfy the index.
+        """
+        cursor.execute("CREATE UNIQUE INDEX idx_polls_server_poll ON polls (server_id, poll_id)")
 
 
     #### CACHE MODIFICATION METHODS ####
@@ -142,11 +406,13 @@ class Cache():
         elif (not isinstance(guildID, int)):
             raise TypeError
 
-        cursor = self.createCursor()
         insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
 
-        with self.dbConnection:
-            cursor.execute(insertStatement, (str(guildID), '!', 0))
+        # the insert is ignored for servers already in the table, whose settings are kept
+        rowsInserted = await self.queueDBWrite(self.executeMany, insertStatement, [(guildID, DEFAULT_COMMAND_PREFIX, 0)])
+        if (rowsInserted > 0):
+            self.guildSettingsCache.pop(guildID, None)
+            self.prefixMap[guildID] = DEFAULT_COMMAND_PREFIX
 
     async def remServer(self, guildID: int):
         """Remove a row for a server from the servers table in local cache database.
@@ -154,11 +420,143 @@ class Cache():
         if (not isinstance(guildID, int)):
             raise TypeError
 
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM servers WHERE id = ?"""
 
-        with self.dbConnection:
-            cursor.execute(deleteStatement, (str(guildID),))
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(guildID,)])
+        self.guildSettingsCache.pop(guildID, None)
+        self.privilegedRolesCache.pop(guildID, None)
+        self.prefixMap.pop(guildID, None)
+        self.groupCategoriesVersion += 1
+        self.groupCategoriesCache.pop(guildID, None)
+
+    async def getServerSettings(self, guildID: int) -> Optional[dict]:
+        """Returns a dict of the settings stored in the servers table for the given server, using the
+        in-memory settings cache when possible. Returns None if the server is not in the database.
+        """
+        if (not isinstance(guildID, int)):
+            raise TypeError
+
+        try:
+            settings = self.guildSettingsCache[guildID]
+            self.settingsCacheHits += 1
+            return settings
+        except KeyError:
+            self.settingsCacheMisses += 1
+
+        selectStatement = """SELECT command_prefix, infraction_channel, notification_channel, is_locked FROM servers WHERE id = ?"""
+
+        def selectSettings():
+            cursor = self.createCursor()
+            cursor.execute(selectStatement, (guildID,))
+            return cursor.fetchone()
+
+        result = await self.runDBOperation(selectSettings)
+
+        # servers missing from the database are not cached so that a later addServer is picked up
+        if (result is None):
+            return None
+
+        prefix, infractionChannelID, notificationChannelID, lockStatus = result
+        settings = {
+            "command_prefix": prefix,
+            "infraction_channel": self.channelIDFromColumn(infractionChannelID),
+            "notification_channel": self.channelIDFromColumn(notificationChannelID),
+            "is_locked": lockStatus == 1
+        }
+        self.guildSettingsCache[guildID] = settings
+        return settings
+
+    def updateCachedServerSetting(self, guildID: int, setting: str, value, rowsUpdated: int):
+        """Writes a new setting value through to the in-memory settings cache after the servers table
+        has been updated, dropping the cached entry if the update did not match a row.
+        """
+        if (rowsUpdated == 0):
+            self.guildSettingsCache.pop(guildID, None)
+        elif (guildID in self.guildSettingsCache):
+            self.guildSettingsCache[guildID][setting] = value
+
+    def getSettingsCacheStats(self) -> dict:
+        """Returns the hit and miss counts of the in-memory settings cache along with the number of
+        guilds currently held in it.
+        """
+        return {
+            "hits": self.settingsCacheHits,
+            "misses": self.settingsCacheMisses,
+            "size": len(self.guildSettingsCache)
+        }
+
+    async def warmGuildState(self) -> Dict[str, int]:
+        """Loads the state of every server into the in-memory caches with one query per table, filling the
+        settings cache, prefix map, privileged roles cache, and group categories cache. The excluded_roles and
+        role_react_msgs tables are read in the same pass so that their pages are in SQLite's page cache before
+        the first command needing them. Returns dict of the number of rows read from each table.
+        """
+        selectStatements = {
+            "servers": """SELECT id, command_prefix, infraction_channel, notification_channel, is_locked FROM servers""",
+            "privileged_roles": """SELECT server_id, role_id FROM privileged_roles""",
+            "groups": """SELECT server_id, role_id, category_id FROM groups""",
+            "excluded_roles": """SELECT server_id, role_id FROM excluded_roles""",
+            "role_react_msgs": """SELECT server_id, message_id, role_id FROM role_react_msgs"""
+        }
+
+        def selectTables():
+            cursor = self.createCursor()
+            results = {}
+            for tableName, selectStatement in selectStatements.items():
+                cursor.execute(selectStatement)
+                results[tableName] = cursor.fetchall()
+            return results
+
+        privilegedRolesVersion = self.privilegedRolesVersion
+        groupCategoriesVersion = self.groupCategoriesVersion
+        results = await self.runDBOperation(selectTables)
+
+        guildSettings = {}
+        for guildID, prefix, infractionChannelID, notificationChannelID, lockStatus in results["servers"]:
+            guildSettings[guildID] = {
+                "command_prefix": prefix,
+                "infraction_channel": self.channelIDFromColumn(infractionChannelID),
+                "notification_channel": self.channelIDFromColumn(notificationChannelID),
+                "is_locked": lockStatus == 1
+            }
+        # entries already cached were loaded or updated after the query started, and are kept
+        for guildID, settings in guildSettings.items():
+            self.guildSettingsCache.setdefault(guildID, settings)
+            self.prefixMap.setdefault(guildID, settings["command_prefix"])
+
+        # every server gets an entry, so that servers without privileged roles or groups aren't queried later
+        privilegedRoles = {guildID: set() for guildID in guildSettings}
+        for guildID, roleID in results["privileged_roles"]:
+            privilegedRoles.setdefault(guildID, set()).add(int(roleID))
+        if (privilegedRolesVersion == self.privilegedRolesVersion):
+            self.privilegedRolesCache = {guildID: frozenset(roleIDs) for guildID, roleIDs in privilegedRoles.items()}
+
+        groupCategories = {guildID: {} for guildID in guildSettings}
+        for guildID, roleID, categoryID in results["groups"]:
+            groupCategories.setdefault(guildID, {})[roleID] = categoryID
+        if (groupCategoriesVersion == self.groupCategoriesVersion):
+            self.groupCategoriesCache = groupCategories
+
+        return {tableName: len(rows) for tableName, rows in results.items()}
+
+    async def updateServerColumn(self, updateStatement: str, parameters: tuple) -> int:
+        """Runs an update statement against the servers table and returns the number of rows it modified.
+        """
+        return await self.queueDBWrite(self.executeMany, updateStatement, [parameters])
+
+    async def loadPrefixMap(self):
+        """Loads the command prefix of every server in the servers table into the prefix map.
+        """
+        selectStatement = """SELECT id, command_prefix FROM servers"""
+
+        results = await self.runDBOperation(self.fetchAll, selectStatement, ())
+        self.prefixMap = {guildID: prefix for guildID, prefix in results}
+
+    def getCachedCommandPrefix(self, guildID: int) -> str:
+        """Returns the command prefix for the given server from the prefix map, or the default prefix for servers
+        not in the map. Doesn't touch the database, so it is safe to call for every message.
+        """
+        return self.prefixMap.get(guildID, DEFAULT_COMMAND_PREFIX)
 
     async def getServerCommandPrefix(self, guildID: int):
         """Returns the command prefix character for the given server. If server is not in database
@@ -167,19 +565,14 @@ class Cache():
         if (not isinstance(guildID, int)):
             raise TypeError
 
-        cursor = self.createCursor()
-        selectStatement = """SELECT command_prefix FROM servers WHERE id = ?"""
-
-        cursor.execute(selectStatement, (str(guildID),))
-
         # check if server lookup returns anything, if not, add server to db
         # this shouldn't happen normally, but will catch it if it does
-        try:
-            prefix, = cursor.fetchone()
-            return prefix
-        except TypeError:
+        settings = await self.getServerSettings(guildID)
+        if (settings is None):
             await self.addServer(guildID)
-            return '!'
+            return DEFAULT_COMMAND_PREFIX
+
+        return settings["command_prefix"]
 
     async def setServerCommandPrefix(self, guildID: int, newPrefix: str):
         """Modifies the command prefix character for the given server. Returns bool indicating
@@ -194,13 +587,13 @@ class Cache():
         elif (len(newPrefix) != 1):
             raise commands.errors.BadArgument
 
-        cursor = self.createCursor()
         updateStatement = """UPDATE servers SET command_prefix = ? WHERE id = ?"""
+        rowsUpdated = await self.updateServerColumn(updateStatement, (newPrefix, guildID))
 
-        with self.dbConnection:
-            cursor.execute(updateStatement, (newPrefix, str(guildID)))
-
-        return cursor.rowcount == 1
+        self.updateCachedServerSetting(guildID, "command_prefix", newPrefix, rowsUpdated)
+        if (rowsUpdated == 1):
+            self.prefixMap[guildID] = newPrefix
+        return rowsUpdated == 1
     
     async def getServerLockStatus(self, guildID: int):
         """Returns the lock status for the given server.
@@ -208,17 +601,12 @@ class Cache():
         if (not isinstance(guildID, int)):
             raise TypeError
 
-        cursor = self.createCursor()
-        selectStatement = """SELECT is_locked FROM servers WHERE id = ?"""
-
-        cursor.execute(selectStatement, (str(guildID),))
-
-        try:
-            lockStatus, = cursor.fetchone()
-            return lockStatus == 1
-        except TypeError:
+        settings = await self.getServerSettings(guildID)
+        if (settings is None):
             return None
 
+        return settings["is_locked"]
+
     async def setServerLockStatus(self, guildID: int, lockStatus: bool):
         """Modifies the lock status of the given server.
         """
@@ -229,12 +617,11 @@ class Cache():
         elif (not isinstance(lockStatus, bool)):
             raise TypeError
                
-        cursor = self.createCursor()
         updateStatement = """UPDATE servers SET is_locked = ? WHERE id = ?"""
+        lockVal = 1 if lockStatus else 0
+        rowsUpdated = await self.updateServerColumn(updateStatement, (lockVal, guildID))
 
-        with self.dbConnection:
-            lockVal = 1 if lockStatus else 0
-            cursor.execute(updateStatement, (lockVal, str(guildID)))
+        self.updateCachedServerSetting(guildID, "is_locked", lockStatus, rowsUpdated)
 
     async def getServerInfractionChannelID(self, guildID: int):
         """Returns the id number of the infraction channel for the given server. Returns
@@ -243,19 +630,12 @@ class Cache():
         if (not isinstance(guildID, int)):
             raise TypeError
 
-        cursor = self.createCursor()
-        selectStatement = """SELECT infraction_channel FROM servers WHERE id = ?"""
-
-        cursor.execute(selectStatement, (str(guildID),))
-
-        try:
-            infractionChannelID, = cursor.fetchone()
-            return int(infractionChannelID)
-        except TypeError:
-            return None
-        except ValueError:
+        settings = await self.getServerSettings(guildID)
+        if (settings is None):
             return None
 
+        return settings["infraction_channel"]
+
     async def setServerInfractionChannelID(self, guildID: int, channelID: Optional[int]):
         """Modifies the channel id of the infraction channel for the given server
         in the database.
@@ -265,11 +645,10 @@ class Cache():
         elif (not isinstance(channelID, int) and channelID is not None):
             raise TypeError
 
-        cursor = self.createCursor()
         updateStatement = """UPDATE servers SET infraction_channel = ? WHERE id = ?"""
+        rowsUpdated = await self.updateServerColumn(updateStatement, (channelID, guildID))
 
-        with self.dbConnection:
-            cursor.execute(updateStatement, (str(channelID), str(guildID)))
+        self.updateCachedServerSetting(guildID, "infraction_channel", channelID, rowsUpdated)
 
     async def getServerNotificationChannelID(self, guildID: int):
         """Returns the id number of the notification channel for the given server. Returns
@@ -278,19 +657,12 @@ class Cache():
         if (not isinstance(guildID, int)):
             raise TypeError
 
-        cursor = self.createCursor()
-        selectStatement = """SELECT notification_channel FROM servers WHERE id = ?"""
-
-        cursor.execute(selectStatement, (str(guildID),))
-
-        try:
-            notificationChannelID, = cursor.fetchone()
-            return int(notificationChannelID)
-        except TypeError:
-            return None
-        except ValueError:
+        settings = await self.getServerSettings(guildID)
+        if (settings is None):
             return None
 
+        return settings["notification_channel"]
+
     async def setServerNotificationChannelID(self, guildID: int, channelID: Optional[int]):
         """Modifies the channel if of the notification channel for the given server
         in the database.
@@ -300,11 +672,22 @@ class Cache():
         elif (not isinstance(channelID, int) and channelID is not None):
             raise TypeError
 
-        cursor = self.createCursor()
         updateStatement = """UPDATE servers SET notification_channel = ? WHERE id = ?"""
+        rowsUpdated = await self.updateServerColumn(updateStatement, (channelID, guildID))
+
+        self.updateCachedServerSetting(guildID, "notification_channel", channelID, rowsUpdated)
 
-        with self.dbConnection:
-            cursor.execute(updateStatement, (str(channelID), str(guildID)))
+    @staticmethod
+    def channelIDFromColumn(columnValue) -> Optional[int]:
+        """Converts a value stored in a channel column of the servers table into a channel ID number,
+        returning None for unset channels.
+        """
+        try:
+            return int(columnValue)
+        except TypeError:
+            return None
+        except ValueError:
+            return None
 
 
     ## groups table methods ##
@@ -326,13 +709,12 @@ class Cache():
         elif (type(roleIDs) != type(categoryIDs)):
             raise TypeError
 
-        cursor = self.createCursor()
         insertStatement = """INSERT INTO groups(role_id, server_id, category_id) VALUES(?,?,?)"""
 
         # determine whether the method was passed a single role or a list of roles
         # and either insert a single entry or a list of entries
         if isinstance(roleIDs, int):
-            cursor.execute(insertStatement, (str(roleIDs), str(guildID), str(categoryIDs)))
+            parameters = [(roleIDs, guildID, categoryIDs)]
         else:
             # check typing on parameters before begining list operations
             if (not all([isinstance(roleID, int) for roleID in roleIDs])):
@@ -342,8 +724,11 @@ class Cache():
             if (len(roleIDs) != len(categoryIDs)):
                 raise TypeError
             
-            parameters = [(str(roleID), str(guildID), str(categoryID)) for roleID, categoryID in zip(roleIDs, categoryIDs)]
-            cursor.executemany(insertStatement, parameters)
+            parameters = [(roleID, guildID, categoryID) for roleID, categoryID in zip(roleIDs, categoryIDs)]
+
+        await self.queueDBWrite(self.executeMany, insertStatement, parameters)
+        self.groupCategoriesVersion += 1
+        self.groupCategoriesCache.pop(guildID, None)
 
     async def remGroupRole(self, guildID: int, roleIDs: Union[int, List[int]]):
         """Removes rows from groups table in the local cache
@@ -359,20 +744,22 @@ class Cache():
         elif (not isinstance(roleIDs, int) and not isinstance(roleIDs, list)):
             raise TypeError
 
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM groups WHERE role_id = ? AND server_id = ?"""
 
         # determine whether the method was passed a single role or a list of roles
         # and either delete a single entry or a list of entries
         if isinstance(roleIDs, int):
-            cursor.execute(deleteStatement, (str(roleIDs), str(guildID)))
+            parameters = [(roleIDs, guildID)]
         else:
             # return TypeError if not all roleIDs are integers
             if (not all([isinstance(roleID, int) for roleID in roleIDs])):
                 raise TypeError
 
-            parameters = [(str(roleID), str(guildID)) for roleID in roleIDs]
-            cursor.executemany(deleteStatement, parameters)
+            parameters = [(roleID, guildID) for roleID in roleIDs]
+
+        await self.queueDBWrite(self.executeMany, deleteStatement, parameters)
+        self.groupCategoriesVersion += 1
+        self.groupCategoriesCache.pop(guildID, None)
 
     async def isGroupRole(self, guildID: int, roleID: int):
         """Checks the group roles table to see if the given role is a group role
@@ -385,11 +772,9 @@ class Cache():
 
         # get the row count when searching for a specific role on a server, if row count
         # is 1, then return true, else if row count is 0, then return false
-        cursor = self.createCursor()
         selectStatement = """SELECT COUNT(1) FROM groups WHERE server_id = ? AND role_id = ?"""
 
-        cursor.execute(selectStatement, (str(guildID), str(roleID)))
-        result, = cursor.fetchone()
+        result, = await self.runDBOperation(self.fetchOne, selectStatement, (guildID, roleID))
         if (result > 0):
             return True
         else:
@@ -403,27 +788,45 @@ class Cache():
             raise TypeError
 
         # select all group role IDs on a given server and place them into an iterator
-        cursor = self.createCursor()
         selectStatement = """SELECT role_id FROM groups WHERE server_id = ?"""
 
-        cursor.execute(selectStatement, (guildID,))
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
 
         try:
-            groupList = [int(row[0]) for row in cursor]
+            groupList = [int(row[0]) for row in results]
             return groupList
         except TypeError:
             return None
 
+    async def getGroupCategoriesDict(self, guildID: int) -> Dict[int, int]:
+        """Returns dict of the category channel ID of each group role on the given server, using the in-memory
+        group categories cache when possible.
+        """
+        # type checking
+        if (not isinstance(guildID, int)):
+            raise TypeError
+
+        try:
+            return dict(self.groupCategoriesCache[guildID])
+        except KeyError:
+            pass
+
+        selectStatement = """SELECT role_id, category_id FROM groups WHERE server_id = ?"""
+
+        version = self.groupCategoriesVersion
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
+        groupCategories = {roleID: categoryID for roleID, categoryID in results}
+        if (version == self.groupCategoriesVersion):
+            self.groupCategoriesCache[guildID] = groupCategories
+        return dict(groupCategories)
+
     async def getGroupCategoryChannelID(self, guildID: int, roleID: int):
         """Returns the channel ID of the category channel corresponding to a specific group role. Returns
         None if role is not a group role.
         """
-        cursor = self.createCursor()
         selectStatement = """SELECT category_id FROM groups WHERE server_id = ? AND role_id = ?"""
 
-        cursor.execute(selectStatement, (str(guildID), str(roleID)))
-
-        result = cursor.fetchone()
+        result = await self.runDBOperation(self.fetchOne, selectStatement, (guildID, roleID))
         if (result is not None):
             categoryID, = result
             return int(categoryID)
@@ -446,21 +849,23 @@ class Cache():
         elif (not isinstance(roleIDs, int) and not isinstance(roleIDs, list)):
             raise TypeError
 
-        cursor = self.createCursor()
         insertStatement = """INSERT INTO privileged_roles(role_id, server_id) VALUES(?,?)"""
 
         # determine whether the method was passed a single role or a list of roles
         # and either insert a single entry or a list of entries
-        with self.dbConnection:
-            if isinstance(roleIDs, int):
-                cursor.execute(insertStatement, (str(roleIDs), str(guildID)))
-            else:
-                # return TypeError if not all roleIDs are integers
-                if (not all([isinstance(roleID, int) for roleID in roleIDs])):
-                    raise TypeError
+        if isinstance(roleIDs, int):
+            parameters = [(roleIDs, guildID)]
+        else:
+            # return TypeError if not all roleIDs are integers
+            if (not all([isinstance(roleID, int) for roleID in roleIDs])):
+                raise TypeError
+
+            parameters = [(roleID, guildID) for roleID in roleIDs]
 
-                parameters = [(str(roleID), str(guildID)) for roleID in roleIDs]
-                cursor.executemany(insertStatement, parameters)
+        await self.queueDBWrite(self.executeMany, insertStatement, parameters)
+        self.privilegedRolesVersion += 1
+        if (guildID in self.privilegedRolesCache):
+            self.privilegedRolesCache[guildID] = self.privilegedRolesCache[guildID].union(roleID for roleID, _ in parameters)
 
     async def remPrivilegedRole(self, guildID: int, roleIDs: Union[int, List[int]]):
         """Removes rows from privileged_roles table in the local cache
@@ -476,21 +881,23 @@ class Cache():
         elif (not isinstance(roleIDs, int) and not isinstance(roleIDs, list)):
             raise TypeError
 
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM privileged_roles WHERE role_id = ? AND server_id = ?"""
 
         # determine whether the method was passed a single role or a list of roles
         # and either delete a single entry or a list of entries
-        with self.dbConnection:
-            if isinstance(roleIDs, int):
-                cursor.execute(deleteStatement, (str(roleIDs), str(guildID)))
-            else:
-                # return TypeError if not all roleIDs are integers
-                if (not all([isinstance(roleID, int) for roleID in roleIDs])):
-                    raise TypeError
+        if isinstance(roleIDs, int):
+            parameters = [(roleIDs, guildID)]
+        else:
+            # return TypeError if not all roleIDs are integers
+            if (not all([isinstance(roleID, int) for roleID in roleIDs])):
+                raise TypeError
+
+            parameters = [(roleID, guildID) for roleID in roleIDs]
 
-                parameters = [(str(roleID), str(guildID)) for roleID in roleIDs]
-                cursor.executemany(deleteStatement, parameters)
+        await self.queueDBWrite(self.executeMany, deleteStatement, parameters)
+        self.privilegedRolesVersion += 1
+        if (guildID in self.privilegedRolesCache):
+            self.privilegedRolesCache[guildID] = self.privilegedRolesCache[guildID].difference(roleID for roleID, _ in parameters)
 
     async def isPrivilegedRole(self, guildID: int, roleID: int):
         """Checks the privileged_roles table to see if the given role is a privileged role
@@ -501,17 +908,8 @@ class Cache():
         if (not isinstance(guildID, int) or not isinstance(roleID, int)):
             raise TypeError
 
-        # get the row count when searching for a specific role on a server, if row count
-        # is 1, then return true, else if row count is 0, then return false
-        cursor = self.createCursor()
-        selectStatement = """SELECT COUNT(1) FROM privileged_roles WHERE server_id = ? AND role_id = ?"""
-
-        cursor.execute(selectStatement, (str(guildID), str(roleID)))
-        result, = cursor.fetchone()
-        if (result > 0):
-            return True
-        else:
-            return False
+        privilegedRoles = await self.getServerPrivilegedRolesSet(guildID)
+        return roleID in privilegedRoles
 
     async def getServerPrivilegedRolesList(self, guildID: int):
         """Returns list of privileged roles existing on the given server.
@@ -520,17 +918,31 @@ class Cache():
         if (not isinstance(guildID, int)):
             raise TypeError
 
-        # select all group role IDs on a given server and place them into an iterator
-        cursor = self.createCursor()
-        selectStatement = """SELECT role_id FROM privileged_roles WHERE server_id = ?"""
+        privilegedRoles = await self.getServerPrivilegedRolesSet(guildID)
+        return list(privilegedRoles)
 
-        cursor.execute(selectStatement, (guildID,))
+    async def getServerPrivilegedRolesSet(self, guildID: int) -> frozenset:
+        """Returns frozenset of the privileged role IDs on the given server, using the in-memory privileged
+        roles cache when possible.
+        """
+        # type checking
+        if (not isinstance(guildID, int)):
+            raise TypeError
 
         try:
-            privilegedList = [int(row[0]) for row in cursor]
-            return privilegedList
-        except TypeError:
-            return None
+            return self.privilegedRolesCache[guildID]
+        except KeyError:
+            pass
+
+        # select all privileged role IDs on a given server
+        selectStatement = """SELECT role_id FROM privileged_roles WHERE server_id = ?"""
+
+        version = self.privilegedRolesVersion
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
+        privilegedRoles = frozenset(int(row[0]) for row in results)
+        if (version == self.privilegedRolesVersion):
+            self.privilegedRolesCache[guildID] = privilegedRoles
+        return privilegedRoles
 
 
     ## excluded_roles table methods ##
@@ -548,21 +960,20 @@ class Cache():
         elif (not isinstance(roleIDs, int) and not isinstance(roleIDs, list)):
             raise TypeError
 
-        cursor = self.createCursor()
         insertStatement = """INSERT INTO excluded_roles(role_id, server_id) VALUES(?,?)"""
 
         # determine whether the method was passed a single role or a list of roles
         # and either insert a single entry or a list of entries
-        with self.dbConnection:
-            if isinstance(roleIDs, int):
-                cursor.execute(insertStatement, (str(roleIDs), str(guildID)))
-            else:
-                # return TypeError if not all roleIDs are integers
-                if (not all([isinstance(roleID, int) for roleID in roleIDs])):
-                    raise TypeError
+        if isinstance(roleIDs, int):
+            parameters = [(roleIDs, guildID)]
+        else:
+            # return TypeError if not all roleIDs are integers
+            if (not all([isinstance(roleID, int) for roleID in roleIDs])):
+                raise TypeError
+
+            parameters = [(roleID, guildID) for roleID in roleIDs]
 
-                parameters = [(str(roleID), str(guildID)) for roleID in roleIDs]
-                cursor.executemany(insertStatement, parameters)
+        await self.queueDBWrite(self.executeMany, insertStatement, parameters)
 
     async def remExcludedRole(self, guildID: int, roleIDs: Union[int, List[int]]):
         """Removes rows from excluded_roles table in the local cache
@@ -578,21 +989,20 @@ class Cache():
         elif (not isinstance(roleIDs, int) and not isinstance(roleIDs, list)):
             raise TypeError
 
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM excluded_roles WHERE role_id = ? AND server_id = ?"""
 
         # determine whether the method was passed a single role or a list of roles
         # and either delete a single entry or a list of entries
-        with self.dbConnection:
-            if isinstance(roleIDs, int):
-                cursor.execute(deleteStatement, (str(roleIDs), str(guildID)))
-            else:
-                # return TypeError if not all roleIDs are integers
-                if (not all([isinstance(roleID, int) for roleID in roleIDs])):
-                    raise TypeError
+        if isinstance(roleIDs, int):
+            parameters = [(roleIDs, guildID)]
+        else:
+            # return TypeError if not all roleIDs are integers
+            if (not all([isinstance(roleID, int) for roleID in roleIDs])):
+                raise TypeError
 
-                parameters = [(str(roleID), str(guildID)) for roleID in roleIDs]
-                cursor.executemany(deleteStatement, parameters)
+            parameters = [(roleID, guildID) for roleID in roleIDs]
+
+        await self.queueDBWrite(self.executeMany, deleteStatement, parameters)
 
     async def isExcludedRole(self, guildID: int, roleID: int):
         """Checks the excluded_roles table to see if the given role is a excluded role
@@ -605,11 +1015,9 @@ class Cache():
 
         # get the row count when searching for a specific role on a server, if row count
         # is 1, then return true, else if row count is 0, then return false
-        cursor = self.createCursor()
         selectStatement = """SELECT COUNT(1) FROM excluded_roles WHERE server_id = ? AND role_id = ?"""
 
-        cursor.execute(selectStatement, (str(guildID), str(roleID)))
-        result, = cursor.fetchone()
+        result, = await self.runDBOperation(self.fetchOne, selectStatement, (guildID, roleID))
         if (result > 0):
             return True
         else:
@@ -623,13 +1031,12 @@ class Cache():
             raise TypeError
 
         # select all group role IDs on a given server and place them into an iterator
-        cursor = self.createCursor()
         selectStatement = """SELECT role_id FROM excluded_roles WHERE server_id = ?"""
 
-        cursor.execute(selectStatement, (guildID,))
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
 
         try:
-            excludedList = [int(row[0]) for row in cursor]
+            excludedList = [int(row[0]) for row in results]
             return excludedList
         except TypeError:
             return None
@@ -645,20 +1052,46 @@ class Cache():
         # insert row into permOverwrite table with the supplied data, converting the
         # PermissionOverwrite object into a pair of values corresponding to the numeric
         # representation of its allowed permissions and denied permissions
-        cursor = self.createCursor()
         insertStatement = """INSERT INTO perm_overwrites(channel_id, modified_id, server_id, allow_value, deny_value)
         VALUES(?,?,?,?,?)"""
 
         allow, deny = overwrite.pair()
 
-        with self.dbConnection:
+        def insertOverwrite():
+            cursor = self.createCursor()
             try:
-                cursor.execute(insertStatement, (str(channelID), str(modifiedID), str(guildID), str(allow.value), str(deny.value)))
+                cursor.execute(insertStatement, (channelID, modifiedID, guildID, str(allow.value), str(deny.value)))
             except sqlite3.IntegrityError:
                 # if entry already exists in db, update entry rather than inserting it
                 updateStatement = """UPDATE perm_overwrites SET allow_value = ?, deny_value = ?
                 WHERE guildID = ? AND channel_id = ? AND modified_id = ?"""
-                cursor.execute(updateStatement, (str(allow), str(deny), str(guildID), str(channelID), str(modifiedID)))
+                cursor.execute(updateStatement, (str(allow), str(deny), guildID, channelID, modifiedID))
+
+        await self.queueDBWrite(insertOverwrite)
+
+    async def addPermOverwrites(self, guildID: int, overwrites: List[Tuple[int, int, discord.PermissionOverwrite]]):
+        """Add rows for a list of (channelID, modifiedID, overwrite) tuples to the perm_overwrites table in a single
+        statement, replacing any overwrite already stored for the same channel and modified id pair. Used to
+        snapshot every overwrite changed by a server lock at once.
+        """
+        # type checking
+        if (guildID is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(guildID, int)):
+            raise TypeError
+        elif (not all([isinstance(channelID, int) and isinstance(modifiedID, int) and isinstance(overwrite, discord.PermissionOverwrite)
+            for channelID, modifiedID, overwrite in overwrites])):
+            raise TypeError
+
+        insertStatement = """INSERT INTO perm_overwrites(channel_id, modified_id, server_id, allow_value, deny_value)
+        VALUES(?,?,?,?,?)"""
+
+        parameters = []
+        for channelID, modifiedID, overwrite in overwrites:
+            allow, deny = overwrite.pair()
+            parameters.append((channelID, modifiedID, guildID, str(allow.value), str(deny.value)))
+
+        await self.queueDBWrite(self.executeMany, insertStatement, parameters)
 
     async def remPermOverwrite(self, guildID: int, channelID: Optional[int] = None, modifiedID: Optional[int] = None):
         """Removes row from permOverwrite table of local cache. Providing each level of specificity
@@ -668,20 +1101,18 @@ class Cache():
         permission overwrite applies to. 
         """
         # check each level of specificity given, and remove the most specific entry provided
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM perm_overwrites WHERE server_id = ?"""
-        parameters = (str(guildID),)
+        parameters = (guildID,)
 
         if (channelID is not None):
             deleteStatement += "AND channel_id = ?"
-            parameters += (str(channelID),)
+            parameters += (channelID,)
 
         if (modifiedID is not None):
             deleteStatement += "AND modified_id = ?"
-            parameters += (str(modifiedID),)
+            parameters += (modifiedID,)
 
-        with self.dbConnection:
-            cursor.execute(deleteStatement, parameters)
+        await self.queueDBWrite(self.executeMany, deleteStatement, [parameters])
 
     async def getPermOverwrite(self, guildID: int, channelID: int, modifiedID: int):
         """Returns a PermissionOverwrite object based on the stored allow/deny value pair corresponding
@@ -691,15 +1122,14 @@ class Cache():
         """
         # get the allow deny pair corresponding to the given parameters and create a PermissionOverwrite
         # object from the pair
-        cursor = self.createCursor()
         selectStatement = """SELECT allow_value, deny_value FROM perm_overwrites 
         WHERE server_id = ? AND channel_id = ? AND modified_id = ?"""
 
-        cursor.execute(selectStatement, (str(guildID), str(channelID), str(modifiedID)))
+        result = await self.runDBOperation(self.fetchOne, selectStatement, (guildID, channelID, modifiedID))
 
         # return none if no overwrite was found, else construct and return an overwrite object
         try:
-            allow_val, deny_val = cursor.fetchone()
+            allow_val, deny_val = result
             allow = discord.Permissions(int(allow_val))
             deny = discord.Permissions(int(deny_val))
             overwrite = discord.PermissionOverwrite.from_pair(allow, deny)
@@ -710,13 +1140,10 @@ class Cache():
     async def getChannelOverwritesList(self, guildID: int, channelID: int):
         """Retrieve list of tuples containing a modified id and an associated permission overwrite.
         """
-        cursor = self.createCursor()
         selectStatement = """SELECT modified_id, allow_value, deny_value FROM perm_overwrites WHERE server_id = ? AND channel_id = ?"""
 
-        cursor.execute(selectStatement, (str(guildID), str(channelID)))
-
         try:
-            results = cursor.fetchall()
+            results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID, channelID))
             channelOverwrites = [(int(modifiedID), discord.PermissionOverwrite.from_pair(discord.Permissions(int(allowVal)), discord.Permissions(int(denyVal))))\
                 for modifiedID, allowVal, denyVal in results]
         except TypeError:
@@ -724,50 +1151,76 @@ class Cache():
 
         return channelOverwrites
 
+    async def getServerOverwritesDict(self, guildID: int) -> Dict[int, List[Tuple[int, discord.PermissionOverwrite]]]:
+        """Retrieve every permission overwrite stored for the given server in a single query, as a dict holding
+        a list of (modifiedID, overwrite) tuples for each channel ID.
+        """
+        # type checking
+        if (not isinstance(guildID, int)):
+            raise TypeError
+
+        selectStatement = """SELECT channel_id, modified_id, allow_value, deny_value FROM perm_overwrites WHERE server_id = ?"""
+
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
+
+        serverOverwrites = {}
+        for channelID, modifiedID, allowVal, denyVal in results:
+            overwrite = discord.PermissionOverwrite.from_pair(discord.Permissions(int(allowVal)), discord.Permissions(int(denyVal)))
+            serverOverwrites.setdefault(channelID, []).append((modifiedID, overwrite))
+
+        return serverOverwrites
+
     async def updateOverwriteChannel(self, guildID: int, oldChannelID: int, newChannelID: int):
         """Update the rows in the perm_overwrites table with a given channel ID to a new channel ID.
         Use in the event that a channel gets recreated during a deleteMSG all.
         """
-        cursor = self.createCursor()
         updateStatement = """UPDATE perm_overwrites SET channel_id = ? WHERE server_id = ? AND channel_id = ?"""
 
-        with self.dbConnection:
-            cursor.execute(updateStatement, (str(newChannelID), str(guildID), str(oldChannelID)))
+        await self.queueDBWrite(self.executeMany, updateStatement, [(newChannelID, guildID, oldChannelID)])
 
 
     ## polls table methods ##
-    async def addPoll(self, guildID: int, message: discord.Message, questions: List[str]):
+    async def addPoll(self, guildID: int, message: discord.Message, questions: List[str], question: str = ""):
         """Takes the guild ID of the server and a message object and creates a row pertaining
-        to the poll in the local cache database.
+        to the poll in the local cache database, along with a zero vote count for each answer.
+        questions is the list of the poll's answers and question is the poll's question.
         """
-        cursor = self.createCursor()
         pollSelectStatement = """SELECT poll_id FROM polls WHERE server_id = ?"""
-        insertStatement = """INSERT INTO polls(poll_id, server_id, channel_id, message_id, questions) VALUES(?,?,?,?,?)"""
-
-        # create a unique 5 digit poll id by getting the last 5 digits of the product of
-        # the message's id and the message channel's id
-        pollID = (message.id * message.channel.id) % 100000
-        cursor.execute(pollSelectStatement, (str(guildID),))
-        guildPolls = cursor.fetchall()
-
-        # check if the pollID is already present in server poll list, if so increment the id
-        # until it does not match any existing id on this server
-        while((str(pollID).zfill(5),) in guildPolls):
-            pollID += 1
-            if (pollID == 100000):
-                pollID = 0
-
-        pollID = str(pollID).zfill(5)
+        insertStatement = """INSERT INTO polls(poll_id, server_id, channel_id, message_id, questions, question) VALUES(?,?,?,?,?,?)
+            ON CONFLICT(server_id, poll_id) DO NOTHING"""
+        insertTallyStatement = """INSERT INTO poll_tallies(message_id, answer_index, vote_count) VALUES(?,?,0)"""
 
         # concatenate questions into a single ASCII-001 delimited string, stripping any instance
         # of the character from the questions first to avoid any unexpected errors
         questions = [q.replace(chr(1), "") for q in questions]
         questionString = chr(1).join(questions)
 
-        with self.dbConnection:
-            cursor.execute(insertStatement, (pollID, str(guildID), str(message.channel.id), str(message.id), questionString))
+        def insertPoll():
+            cursor = self.createCursor()
 
-        return pollID
+            # try the 5 digit ID given by the last 5 digits of the product of the message's id and the message
+            # channel's id, then random IDs, until an insert isn't rejected by the unique index on the server's
+            # poll IDs, so each try is a single index lookup however many polls the server has
+            candidateIDs = itertools.chain([(message.id * message.channel.id) % POLL_ID_SPACE],
+                (random.randrange(POLL_ID_SPACE) for _ in range(POLL_ID_RANDOM_ATTEMPTS)))
+            for candidateID in candidateIDs:
+                pollID = str(candidateID).zfill(5)
+                cursor.execute(insertStatement, (pollID, guildID, message.channel.id, message.id, questionString, question))
+                if (cursor.rowcount == 1):
+                    break
+            else:
+                # nearly every ID is taken, use the lowest free one
+                cursor.execute(pollSelectStatement, (guildID,))
+                takenIDs = {row[0] for row in cursor.fetchall()}
+                pollID = next((str(i).zfill(5) for i in range(POLL_ID_SPACE) if str(i).zfill(5) not in takenIDs), None)
+                if (pollID is None):
+                    raise sqlite3.IntegrityError("Every poll ID is taken on this server")
+                cursor.execute(insertStatement, (pollID, guildID, message.channel.id, message.id, questionString, question))
+
+            cursor.executemany(insertTallyStatement, [(message.id, i) for i in range(len(questions))])
+            return pollID
+
+        return await self.queueDBWrite(insertPoll)
 
     async def remPoll(self, guildID: int, pollID: str):
         """Removes row in polls table of local cache corresponding to the given pollID
@@ -776,20 +1229,28 @@ class Cache():
         if (not pollID.isnumeric()):
             raise ValueError
 
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM polls WHERE server_id = ? AND poll_id = ?"""
 
-        with self.dbConnection:
-            cursor.execute(deleteStatement, (str(guildID), pollID))
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(guildID, pollID)])
+
+    async def remPollMessages(self, guildID: int, messageIDs: list):
+        """Removes the rows in polls table of local cache for polls whose message is one of the given
+        message ids on the given server.
+        """
+        if (len(messageIDs) == 0):
+            return
+
+        # a single statement removes every poll, whatever the number of messages
+        deleteStatement = f"""DELETE FROM polls WHERE server_id = ? AND message_id IN ({",".join("?" * len(messageIDs))})"""
+
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(guildID, *messageIDs)])
 
     async def prunePolls(self, guildID: int, channelID: int):
         """Removes all database entries for polls in a given channel.
         """
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM polls WHERE server_id = ? AND channel_id = ?"""
 
-        with self.dbConnection:
-            cursor.execute(deleteStatement, (str(guildID), str(channelID)))
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(guildID, channelID)])
 
     async def retrievePoll(self, ctx: commands.Context, guildID: int, pollID: str) -> discord.Message:
         """Retrieves the poll with the given pollID on the given server, returning the message
@@ -799,12 +1260,10 @@ class Cache():
         if (not pollID.isnumeric()):
             raise ValueError
 
-        cursor = self.createCursor()
         selectStatement = """SELECT channel_id, message_id FROM polls WHERE server_id = ? AND poll_id = ?"""
 
         # retrieve the message object from the channelID and messageID and return it
-        cursor.execute(selectStatement, (str(guildID), pollID))
-        channelID, messageID = cursor.fetchone()
+        channelID, messageID = await self.runDBOperation(self.fetchOne, selectStatement, (guildID, pollID))
         channel = ctx.guild.get_channel(int(channelID))
 
         # if channel could not be found by id, then channel has been deleted
@@ -826,12 +1285,11 @@ class Cache():
     async def getServerPollList(self, guildID: int):
         """Returns list of poll ID numbers for all polls on the given server.
         """
-        cursor = self.createCursor()
         selectStatement = """SELECT poll_id FROM polls WHERE server_id = ?"""
 
         try:
-            cursor.execute(selectStatement, (str(guildID),))
-            pollList = [pollID[0] for pollID in cursor]
+            results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
+            pollList = [pollID[0] for pollID in results]
             return pollList
         except TypeError:
             return None
@@ -843,74 +1301,126 @@ class Cache():
         if (not pollID.isnumeric()):
             raise ValueError
 
-        cursor = self.createCursor()
         selectStatement = """SELECT questions FROM polls WHERE server_id = ? AND poll_id = ?"""
 
-        cursor.execute(selectStatement, (str(guildID), pollID))
+        result = await self.runDBOperation(self.fetchOne, selectStatement, (guildID, pollID))
 
         try:
-            questions, = cursor.fetchone()
+            questions, = result
             questionList = questions.split(chr(1))
             return questionList
         except TypeError:
             return None
 
 
+    async def getPoll(self, guildID: int, pollID: str) -> Optional[Tuple[int, int, str, List[str]]]:
+        """Returns a (channel_id, message_id, question, answers) tuple for the poll with the given pollID
+        on the given server, or None if there is no such poll.
+        """
+        if (not pollID.isnumeric()):
+            raise ValueError
+
+        selectStatement = """SELECT channel_id, message_id, question, questions FROM polls WHERE server_id = ? AND poll_id = ?"""
+
+        result = await self.runDBOperation(self.fetchOne, selectStatement, (guildID, pollID))
+        if (result is None):
+            return None
+
+        channelID, messageID, question, answers = result
+        return (channelID, messageID, question, answers.split(chr(1)))
+
+    async def getPollsList(self, guildID: Optional[int] = None) -> List[Tuple[str, int, int, int, str, List[str]]]:
+        """Returns list of (poll_id, server_id, channel_id, message_id, question, answers) tuples for the polls
+        on the given server, or on every server if no guildID is given, ordered by poll id.
+        """
+        # type checking
+        if (guildID is not None and not isinstance(guildID, int)):
+            raise TypeError
+
+        selectStatement = """SELECT poll_id, server_id, channel_id, message_id, question, questions FROM polls"""
+        if (guildID is None):
+            results = await self.runDBOperation(self.fetchAll, selectStatement + " ORDER BY server_id, poll_id", ())
+        else:
+            results = await self.runDBOperation(self.fetchAll, selectStatement + " WHERE server_id = ? ORDER BY poll_id", (guildID,))
+
+        return [row[:5] + (row[5].split(chr(1)),) for row in results]
+
+    ## poll_tallies table methods ##
+    async def addPollVotes(self, votes: List[Tuple[int, int, int]]):
+        """Adds to the vote counts of poll answers, given as a list of (messageID, answerIndex, change) tuples
+        where change may be negative. Vote counts don't go below zero.
+        """
+        # type checking
+        if (not isinstance(votes, list) or not all([isinstance(value, int) for vote in votes for value in vote])):
+            raise TypeError
+
+        upsertStatement = """INSERT INTO poll_tallies(message_id, answer_index, vote_count) VALUES(?,?,MAX(?, 0))
+            ON CONFLICT(message_id, answer_index) DO UPDATE SET vote_count = MAX(vote_count + ?, 0)"""
+
+        await self.queueDBWrite(self.executeMany, upsertStatement, [(messageID, answerIndex, change, change) for messageID, answerIndex, change in votes])
+
+    async def getPollTalliesDict(self) -> Dict[int, Dict[int, int]]:
+        """Returns dict of the vote count of each answer index for each poll message id with tallies.
+        """
+        selectStatement = """SELECT message_id, answer_index, vote_count FROM poll_tallies"""
+
+        results = await self.runDBOperation(self.fetchAll, selectStatement, ())
+
+        tallies = {}
+        for messageID, answerIndex, voteCount in results:
+            tallies.setdefault(messageID, {})[answerIndex] = voteCount
+        return tallies
+
+
     ## role_react_msgs table methods ##
     async def addRoleReactMsg(self, guildID: int, channelID: int, messageID: int, roleID: int):
         """Add row pertaining to a react for role message in the role_react_msgs table from
         the given guild, channel, message, and role ID number.
         """
-        cursor = self.createCursor()
         insertStatement = """INSERT INTO role_react_msgs(message_id, channel_id, server_id, role_id)
         VALUES(?,?,?,?)
         """
 
-        with self.dbConnection:
-            try:
-                cursor.execute(insertStatement, (str(messageID), str(channelID), str(guildID), str(roleID)))
-            except sqlite3.IntegrityError:
-                print("Attempting to add message already in database")
+        try:
+            await self.queueDBWrite(self.executeMany, insertStatement, [(messageID, channelID, guildID, roleID)])
+        except sqlite3.IntegrityError:
+            print("Attempting to add message already in database")
 
     async def remRoleReactMsg(self, guildID: int, messageID: int):
         """Removes row from role_react_msgs table with the provided guild, channel, and message_id.
         """
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM role_react_msgs WHERE server_id = ? AND channel_id = ? AND message_id = ?"""
 
-        with self.dbConnection:
-            cursor.execute(deleteStatement, (str(guildID), str(messageID)))
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(guildID, messageID)])
 
     async def getRoleIDFromReactMsg(self, guildID: int, messageID: int) -> Optional[int]:
         """Returns a discord Role object corresponding to the role a message should assign, or
         None if no role should be assigned from the messages.
         """
-        cursor = self.createCursor()
         selectStatement = """SELECT role_id FROM role_react_msgs WHERE server_id = ? AND message_id = ?"""
 
-        cursor.execute(selectStatement, (str(guildID), str(messageID)))
+        result = await self.runDBOperation(self.fetchOne, selectStatement, (guildID, messageID))
 
         try:
-            roleID, = cursor.fetchone()
+            roleID, = result
             return int(roleID)
         except TypeError:
             return None
 
 
     ## role_invites table methods ##
-    async def addRoleInvite(self, guildID: int, inviteID: str, roleID: int):
+    async def addRoleInvite(self, guildID: int, inviteID: str, roleID: int, usesCount: int = 0):
         """Add row to role_invites table that stores an invite and the role it applies to a user that
-        joins with it. 
+        joins with it, along with the number of times the invite has been used so far.
         """
         if ((guildID is None) or (inviteID is None) or (roleID is None)):
             raise sqlite3.IntegrityError
-        elif ((not isinstance(guildID, int)) or (not isinstance(inviteID, str)) or (not isinstance(roleID, int))):
+        elif ((not isinstance(guildID, int)) or (not isinstance(inviteID, str)) or (not isinstance(roleID, int)) or (not isinstance(usesCount, int))):
             raise TypeError
         
-        cursor = self.createCursor()
         insertStatement = """INSERT INTO role_invites(invite_id, server_id, role_id, uses_count) VALUES(?,?,?,?)"""
 
-        cursor.execute(insertStatement, (inviteID, str(guildID), str(roleID), 0))
+        await self.queueDBWrite(self.executeMany, insertStatement, [(inviteID, guildID, roleID, usesCount)])
 
     async def remRoleInvite(self, guildID: int, inviteID: str):
         """Removes a row from the  role_invites table corresponding to the given guild and invite ID number. 
@@ -918,10 +1428,9 @@ class Cache():
         if ((not isinstance(guildID, int)) or (not isinstance(inviteID, str))):
             raise TypeError
 
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM role_invites WHERE server_id = ? AND invite_id = ?"""
 
-        cursor.execute(deleteStatement, (str(guildID), inviteID))
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(guildID, inviteID)])
 
     async def remAllInvite(self, guildID: int):
         """Removes all rows from the  role_invites table corresponding to the given guild and invite ID number.
@@ -929,10 +1438,9 @@ class Cache():
         if ((not isinstance(guildID, int))):
             raise TypeError
 
-        cursor = self.createCursor()
         deleteStatement = """DELETE FROM role_invites WHERE server_id = ?"""
 
-        cursor.execute(deleteStatement, (str(guildID),))
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(guildID,)])
 
     async def getServerRoleInvitesList(self, guildID: int) -> List[Tuple[str, int]]:
         """Gets a list of all role invites on the given server and returns their IDs and the role IDs
@@ -941,53 +1449,413 @@ class Cache():
         if (not isinstance(guildID, int)):
             raise TypeError
 
-        cursor = self.createCursor()
         selectStatement = """SELECT invite_id, role_id FROM role_invites WHERE server_id = ?"""
 
-        cursor.execute(selectStatement, (str(guildID),))
-
-        results = cursor.fetchall()
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
         return results
 
-    async def roleIDFromUsedLink(self, guildID: int, invitesList: List[discord.Invite]):
-        """Determines, based on the provided list of invites from the server, what invite has been incremented,
-        and as such what role should be applied based on the used invite link.
+    async def getRoleInvitesDict(self, guildID: int) -> Dict[str, Tuple[int, int]]:
+        """Returns dict of the (role_id, uses_count) pair of each role invite on the given server.
+        """
+        if (not isinstance(guildID, int)):
+            raise TypeError
+
+        selectStatement = """SELECT invite_id, role_id, uses_count FROM role_invites WHERE server_id = ?"""
+
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
+        return {inviteID: (roleID, usesCount) for inviteID, roleID, usesCount in results}
+
+    async def setRoleInviteUses(self, guildID: int, inviteUses: List[Tuple[str, int]]):
+        """Sets the uses_count of role invites on the given server, given as a list of (inviteID, usesCount) pairs.
+        """
+        if (not isinstance(guildID, int)):
+            raise TypeError
+        elif (not all([isinstance(inviteID, str) and isinstance(usesCount, int) for inviteID, usesCount in inviteUses])):
+            raise TypeError
+
+        updateStatement = """UPDATE role_invites SET uses_count = ? WHERE server_id = ? AND invite_id = ?"""
+
+        await self.queueDBWrite(self.executeMany, updateStatement, [(usesCount, guildID, inviteID) for inviteID, usesCount in inviteUses])
+
+
+    ## filter_words table methods ##
+    async def addFilterWord(self, guildID: int, words: Union[str, List[str]]):
+        """Add new rows for custom language filter words into the filter_words table of the local cache,
+        words are stored in lowercase
+        \n:param:`words` can be either a single new entry or list of new entries
+        """
+        # type checking
+        if (guildID is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(guildID, int)):
+            raise TypeError
+        elif (words is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(words, str) and not isinstance(words, list)):
+            raise TypeError
+
+        insertStatement = """INSERT INTO filter_words(server_id, word) VALUES(?,?)"""
+
+        # determine whether the method was passed a single word or a list of words
+        # and either insert a single entry or a list of entries
+        if isinstance(words, str):
+            parameters = [(guildID, words.lower())]
+        else:
+            # return TypeError if not all words are strings
+            if (not all([isinstance(word, str) for word in words])):
+                raise TypeError
+
+            parameters = [(guildID, word.lower()) for word in words]
+
+        await self.queueDBWrite(self.executeMany, insertStatement, parameters)
+
+    async def remFilterWord(self, guildID: int, words: Union[str, List[str]]):
+        """Removes rows from filter_words table in the local cache
+        \n:param:`words` can be either a single word or list of words to remove
+        """
+        # type checking
+        if (guildID is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(guildID, int)):
+            raise TypeError
+        elif (words is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(words, str) and not isinstance(words, list)):
+            raise TypeError
+
+        deleteStatement = """DELETE FROM filter_words WHERE server_id = ? AND word = ?"""
+
+        if isinstance(words, str):
+            parameters = [(guildID, words.lower())]
+        else:
+            if (not all([isinstance(word, str) for word in words])):
+                raise TypeError
+
+            parameters = [(guildID, word.lower()) for word in words]
+
+        await self.queueDBWrite(self.executeMany, deleteStatement, parameters)
+
+    async def getServerFilterWordsList(self, guildID: int) -> List[str]:
+        """Returns list of custom language filter words stored for the given server.
+        """
+        # type checking
+        if (not isinstance(guildID, int)):
+            raise TypeError
+
+        selectStatement = """SELECT word FROM filter_words WHERE server_id = ? ORDER BY word"""
+
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
+        return [row[0] for row in results]
+
+
+    ## disabled_moderation_stages table methods ##
+    async def disableModerationStage(self, guildID: int, stage: str):
+        """Adds a row to the disabled_moderation_stages table turning off the given automatic moderation stage
+        on the given server.
+        """
+        # type checking
+        if (guildID is None or stage is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(guildID, int) or not isinstance(stage, str)):
+            raise TypeError
+
+        insertStatement = """INSERT INTO disabled_moderation_stages(server_id, stage) VALUES(?,?)"""
+        await self.queueDBWrite(self.executeMany, insertStatement, [(guildID, stage)])
+
+    async def enableModerationStage(self, guildID: int, stage: str):
+        """Removes the row from the disabled_moderation_stages table for the given automatic moderation stage
+        on the given server, turning the stage back on.
+        """
+        # type checking
+        if (guildID is None or stage is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(guildID, int) or not isinstance(stage, str)):
+            raise TypeError
+
+        deleteStatement = """DELETE FROM disabled_moderation_stages WHERE server_id = ? AND stage = ?"""
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(guildID, stage)])
+
+    async def getServerDisabledModerationStages(self, guildID: int) -> List[str]:
+        """Returns list of the automatic moderation stages turned off on the given server.
         """
+        # type checking
         if (not isinstance(guildID, int)):
             raise TypeError
-        elif (any([not isinstance(val, discord.Invite) for val in invitesList])):
+
+        selectStatement = """SELECT stage FROM disabled_moderation_stages WHERE server_id = ?"""
+
+        results = await self.runDBOperation(self.fetchAll, selectStatement, (guildID,))
+        return [row[0] for row in results]
+
+
+    ## scheduled_jobs table methods ##
+    async def addScheduledJob(self, guildID: int, jobType: str, dueTime: float, channelID: Optional[int] = None,
+        payload: Optional[dict] = None) -> int:
+        """Adds a row to the scheduled_jobs table for a job of the given type due at the given unix timestamp,
+        returning the new job's id. payload must be JSON serializable.
+        """
+        # type checking
+        if (guildID is None or jobType is None or dueTime is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(guildID, int) or not isinstance(jobType, str) or not isinstance(dueTime, (int, float))):
+            raise TypeError
+        elif (channelID is not None and not isinstance(channelID, int)):
+            raise TypeError
+
+        insertStatement = """INSERT INTO scheduled_jobs(server_id, channel_id, job_type, due_time, payload) VALUES(?,?,?,?,?)"""
+        parameters = (guildID, channelID, jobType, float(dueTime), json.dumps(payload or {}))
+
+        def insertJob():
+            cursor = self.createCursor()
+            cursor.execute(insertStatement, parameters)
+            return cursor.lastrowid
+
+        return await self.queueDBWrite(insertJob)
+
+    async def remScheduledJob(self, jobIDs: Union[int, List[int]]):
+        """Removes rows from the scheduled_jobs table
+        \n:param:`jobIDs` can be either a single job id or list of job ids to remove
+        """
+        # type checking
+        if (jobIDs is None):
+            raise sqlite3.IntegrityError
+        elif isinstance(jobIDs, int):
+            jobIDs = [jobIDs]
+        elif (not isinstance(jobIDs, list) or not all([isinstance(jobID, int) for jobID in jobIDs])):
+            raise TypeError
+
+        deleteStatement = """DELETE FROM scheduled_jobs WHERE job_id = ?"""
+
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(jobID,) for jobID in jobIDs])
+
+    async def setScheduledJobDueTime(self, jobID: int, dueTime: float):
+        """Moves the given scheduled job to a new unix timestamp, used by jobs that repeat.
+        """
+        # type checking
+        if (jobID is None or dueTime is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(jobID, int) or not isinstance(dueTime, (int, float))):
+            raise TypeError
+
+        updateStatement = """UPDATE scheduled_jobs SET due_time = ? WHERE job_id = ?"""
+
+        await self.queueDBWrite(self.executeMany, updateStatement, [(float(dueTime), jobID)])
+
+    async def getScheduledJobsList(self, guildID: Optional[int] = None) -> List[Tuple[int, int, Optional[int], str, float, dict]]:
+        """Returns list of (job_id, server_id, channel_id, job_type, due_time, payload) tuples for the scheduled
+        jobs on the given server, or on every server if no guildID is given, ordered by due time.
+        """
+        # type checking
+        if (guildID is not None and not isinstance(guildID, int)):
+            raise TypeError
+
+        selectStatement = """SELECT job_id, server_id, channel_id, job_type, due_time, payload FROM scheduled_jobs"""
+        if (guildID is None):
+            results = await self.runDBOperation(self.fetchAll, selectStatement + " ORDER BY due_time, job_id", ())
+        else:
+            results = await self.runDBOperation(self.fetchAll, selectStatement + " WHERE server_id = ? ORDER BY due_time, job_id", (guildID,))
+
+        return [row[:5] + (json.loads(row[5]),) for row in results]
+
+    ## history_scans table methods ##
+    async def addHistoryScan(self, guildID: int, channelID: int, scanType: str, payload: Optional[dict] = None) -> int:
+        """Adds a row to the history_scans table for a new scan of the given type over a channel's history,
+        returning the new scan's id. payload must be JSON serializable.
+        """
+        # type checking
+        if (guildID is None or channelID is None or scanType is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(guildID, int) or not isinstance(channelID, int) or not isinstance(scanType, str)):
+            raise TypeError
+
+        insertStatement = """INSERT INTO history_scans(server_id, channel_id, scan_type, payload) VALUES(?,?,?,?)"""
+        parameters = (guildID, channelID, scanType, json.dumps(payload or {}))
+
+        def insertScan():
+            cursor = self.createCursor()
+            cursor.execute(insertStatement, parameters)
+            return cursor.lastrowid
+
+        return await self.queueDBWrite(insertScan)
+
+    async def remHistoryScan(self, scanIDs: Union[int, List[int]]):
+        """Removes rows from the history_scans table
+        \n:param:`scanIDs` can be either a single scan id or list of scan ids to remove
+        """
+        # type checking
+        if (scanIDs is None):
+            raise sqlite3.IntegrityError
+        elif isinstance(scanIDs, int):
+            scanIDs = [scanIDs]
+        elif (not isinstance(scanIDs, list) or not all([isinstance(scanID, int) for scanID in scanIDs])):
+            raise TypeError
+
+        deleteStatement = """DELETE FROM history_scans WHERE scan_id = ?"""
+
+        await self.queueDBWrite(self.executeMany, deleteStatement, [(scanID,) for scanID in scanIDs])
+
+    async def setHistoryScanCheckpoint(self, scanID: int, checkpointID: Optional[int], processedCount: int, progress: dict):
+        """Records the id of the last message processed by the given scan, along with the number of messages
+        it has processed and its results so far. progress must be JSON serializable.
+        """
+        # type checking
+        if (scanID is None or processedCount is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(scanID, int) or not isinstance(processedCount, int)):
+            raise TypeError
+        elif (checkpointID is not None and not isinstance(checkpointID, int)):
             raise TypeError
 
+        updateStatement = """UPDATE history_scans SET checkpoint_id = ?, processed_count = ?, progress = ? WHERE scan_id = ?"""
+
+        await self.queueDBWrite(self.executeMany, updateStatement, [(checkpointID, processedCount, json.dumps(progress), scanID)])
+
+    async def setHistoryScanStatus(self, scanID: int, status: str):
+        """Sets the status of the given scan, either 'running' or 'paused'.
+        """
+        # type checking
+        if (scanID is None or status is None):
+            raise sqlite3.IntegrityError
+        elif (not isinstance(scanID, int) or not isinstance(status, str)):
+            raise TypeError
+
+        updateStatement = """UPDATE history_scans SET status = ? WHERE scan_id = ?"""
+
+        await self.queueDBWrite(self.executeMany, updateStatement, [(status, scanID)])
+
+    async def getHistoryScansList(self, guildID: Optional[int] = None) -> List[Tuple[int, int, int, str, str, Optional[int], int, dict, dict]]:
+        """Returns list of (scan_id, server_id, channel_id, scan_type, status, checkpoint_id, processed_count,
+        payload, progress) tuples for the history scans on the given server, or on every server if no guildID is
+        given, ordered by scan id.
+        """
+        # type checking
+        if (guildID is not None and not isinstance(guildID, int)):
+            raise TypeError
+
+        selectStatement = """SELECT scan_id, server_id, channel_id, scan_type, status, checkpoint_id, processed_count, payload, progress
+            FROM history_scans"""
+        if (guildID is None):
+            results = await self.runDBOperation(self.fetchAll, selectStatement + " ORDER BY scan_id", ())
+        else:
+            results = await self.runDBOperation(self.fetchAll, selectStatement + " WHERE server_id = ? ORDER BY scan_id", (guildID,))
+
+        return [row[:7] + (json.loads(row[7]), json.loads(row[8])) for row in results]
+
+
+    #### DATABASE OPERATION HELPERS ####
+    async def runDBOperation(self, operation: Callable, *args):
+        """Runs a synchronous database operation and returns its result. When the cache was created with a
+        database executor, the operation runs on the cache's database thread and is awaited so the event loop
+        is never blocked on SQLite; otherwise the operation runs directly on the event loop.
+        """
+        if (self.dbExecutor is None):
+            return operation(*args)
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.dbExecutor, functools.partial(operation, *args))
+
+    def fetchOne(self, selectStatement: str, parameters: tuple):
+        """Executes a select statement and returns the first row of the result, or None if no rows matched.
+        """
         cursor = self.createCursor()
-        selectStatement = """SELECT invite_id, uses_count, role_id FROM role_invites WHERE server_id = ?"""
+        cursor.execute(selectStatement, parameters)
+        return cursor.fetchone()
+
+    def fetchAll(self, selectStatement: str, parameters: tuple):
+        """Executes a select statement and returns every row of the result as a list.
+        """
+        cursor = self.createCursor()
+        cursor.execute(selectStatement, parameters)
+        return cursor.fetchall()
+
+    def executeMany(self, statement: str, parameters: List[tuple]) -> int:
+        """Executes a statement once for each parameter tuple and returns the number of rows modified.
+        """
+        cursor = self.createCursor()
+        cursor.executemany(statement, parameters)
+        return cursor.rowcount
+
+    async def queueDBWrite(self, operation: Callable, *args):
+        """Queues a synchronous database mutation to be committed alongside any other mutations issued within
+        the write batch window, returning the operation's result once the batch containing it has committed.
+        A batch is committed early once it holds maxWriteBatchSize mutations.
+        """
+        loop = asyncio.get_event_loop()
+        writeFuture = loop.create_future()
+        self.pendingWrites.append((operation, args, writeFuture))
+
+        if (len(self.pendingWrites) >= self.maxWriteBatchSize):
+            asyncio.ensure_future(self.flushWrites())
+        elif (self.writeBatchHandle is None):
+            self.writeBatchHandle = loop.call_later(self.writeBatchWindow, lambda: asyncio.ensure_future(self.flushWrites()))
+
+        return await writeFuture
 
-        cursor.execute(selectStatement, (str(guildID),))
+    async def flushWrites(self):
+        """Commits every queued mutation in a single transaction and resolves the future of each caller that
+        queued one. Used by saveDBToFile and on shutdown to make sure no queued writes are lost.
+        """
+        if (self.writeBatchHandle is not None):
+            self.writeBatchHandle.cancel()
+            self.writeBatchHandle = None
+
+        batch, self.pendingWrites = self.pendingWrites, []
+        if (len(batch) == 0):
+            return
 
-        # create dictionary from select statement results, then check which invite in the invites list
-        # has a greater use value than what is stored, and return the role id associated with that invite
-        inviteUsageDict = {invite_id: (uses_count, role_id) for invite_id, uses_count, role_id in cursor}
+        try:
+            results = await self.runDBOperation(self.commitWriteBatch, [(operation, args) for operation, args, _ in batch])
+        except Exception as e:
+            # the batch transaction itself failed to commit, so every write in it was lost
+            results = [(False, e)] * len(batch)
+
+        for (_, _, writeFuture), (succeeded, result) in zip(batch, results):
+            if (writeFuture.done()):
+                continue
+            elif (succeeded):
+                writeFuture.set_result(result)
+            else:
+                writeFuture.set_exception(result)
+
+    def commitWriteBatch(self, operations: List[Tuple[Callable, tuple]]) -> List[Tuple[bool, object]]:
+        """Runs each queued mutation inside one transaction and commits it, returning a (succeeded, result) pair
+        for each mutation. Every mutation runs under its own savepoint, so a mutation that fails is rolled back
+        without affecting the rest of the batch.
+        """
+        cursor = self.createCursor()
+        if (not self.dbConnection.in_transaction):
+            cursor.execute("BEGIN")
 
-        # method for checking if a invite has been incremented, returns false for invites
-        # not stored in the role_invites table
-        def incrementCheck(invite):
+        results = []
+        for operation, args in operations:
+            cursor.execute("SAVEPOINT batched_write")
             try:
-                return invite.uses > inviteUsageDict[invite.id][0]
-            except KeyError:
-                return False
-        
-        usedInvite = discord.utils.find(incrementCheck, invitesList)
-        roleID = inviteUsageDict[usedInvite.id][1]
+                results.append((True, operation(*args)))
+            except Exception as e:
+                cursor.execute("ROLLBACK TO batched_write")
+                results.append((False, e))
+            cursor.execute("RELEASE batched_write")
 
-        # increment the uses_count for the used invite
-        updateStatement = """UPDATE role_invites SET uses_count = ? WHERE server_id = ? AND invite_id = ?"""
-        cursor.execute(updateStatement, (inviteUsageDict[usedInvite.id][0] + 1, str(guildID), usedInvite.id))
+        try:
+            self.dbConnection.commit()
+        except sqlite3.Error:
+            self.dbConnection.rollback()
+            raise
 
-        return roleID
+        return results
+
+    def closeDBExecutor(self):
+        """Shuts down the cache's database thread, waiting for any queued database operations to finish.
+        """
+        if (self.dbExecutor is not None):
+            self.dbExecutor.shutdown(wait=True)
+            self.dbExecutor = None
 
 
     @tasks.loop(minutes=1)
     async def saveDBToFile(self):
-        self.dbConnection.commit()
+        await self.flushWrites()
+        await self.runDBOperation(self.dbConnection.commit)
 
 if (__name__ == '__main__'):
     cache = Cache("../data/LocalCache.db")
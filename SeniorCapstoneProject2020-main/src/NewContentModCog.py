@@ -1,20 +1,29 @@
 # discord imports
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ext.commands.cog import Cog
 
 # EduBot imports
 import EduBotChecks
 import EduBotExceptions
+import HistoryScanner
+import MessageDispatcher
+import ModerationPipeline
+import NameIndex
 import NewBotCache
+import ProfanityFilter
+import StartupWarmup
+import UrlBlocklist
 
 # other imports
-import re
 from typing import Union, Optional
-import json
-import validators
-from better_profanity import profanity
-profanity.load_censor_words()
+
+# path of the restricted urls file, and the number of seconds between checks of the file for changes
+URL_BLOCKLIST_FILE = '../data/urlCheck.json'
+URL_BLOCKLIST_RELOAD_INTERVAL = 30
+
+# names of the automatic moderation stages that servers can turn on and off
+TOGGLEABLE_STAGES = ["prefix", "attachment", "url", "words"]
 
 
 class ContentModeration(commands.Cog, name="Content Moderation"):
@@ -22,58 +31,80 @@ class ContentModeration(commands.Cog, name="Content Moderation"):
     mass message deletion and automatic message filtering
     """
 
-    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache):
+    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache, historyScanner: HistoryScanner.HistoryScanner,
+        startupWarmup: StartupWarmup.StartupWarmup, messageDispatcher: MessageDispatcher.MessageDispatcher):
         self.bot = bot
         self.cache = cache
-        self.unlockHandles = {}
-        self.data_from_url_check = []
+
+        # new messages are passed to automatic moderation by the message dispatcher, skipping direct messages,
+        # the bot's own messages, and messages without text, none of which can fail a moderation stage
+        self.messageDispatcher = messageDispatcher
+        self.moderationSubscription = self.messageDispatcher.subscribe("moderation", self.moderateMessage,
+            requiredClasses=["guild", "text"], excludedClasses=["self"])
+
+        # the url blocklist and default profanity matcher are built on a background thread by the startup warm-up,
+        # which messages wait for before they are moderated
+        self.startupWarmup = startupWarmup
+        self.startupWarmup.registerBackgroundLoad("moderation indexes", self.loadModerationIndexes)
+
+        # mass message deletions are run as history scans so that they can be paused and survive restarts
+        self.historyScanner = historyScanner
+        self.historyScanner.registerScanType("deleteUser", self.authorCheck)
+        self.historyScanner.registerScanType("deleteRole", self.authorRoleCheck)
+        self.historyScanner.registerScanType("deleteAmount", lambda scan: (lambda message: True), oldestFirst=True)
+        self.urlBlocklist = UrlBlocklist.UrlBlocklist(URL_BLOCKLIST_FILE)
+
+        # profanityMatcher matches the default language filter word list, with guildProfanityMatchers storing
+        # a matcher for the custom filter words of each guild, or None for guilds without custom words;
+        # guild matchers are compiled the first time one of the guild's messages is checked
+        self.profanityMatcher = ProfanityFilter.ProfanityMatcher([])
+        self.guildProfanityMatchers = {}
+
+        # moderationPipeline runs the automatic moderation stages in cheapest first order, except that the prefix
+        # stage runs after the url stage so that command messages are only exempt from the language filter;
+        # guildDisabledStages stores the set of stages each guild has turned off, loaded the first time one of
+        # its messages is checked
+        self.moderationPipeline = ModerationPipeline.ModerationPipeline([
+            ("author", self.authorStage),
+            ("channel", self.infractionChannelStage),
+            ("attachment", self.attachmentStage),
+            ("url", self.urlStage),
+            ("prefix", self.commandPrefixStage),
+            ("words", self.wordStage)
+        ])
+        self.guildDisabledStages = {}
+
+    def cog_unload(self):
+        self.reloadUrlBlocklist.cancel()
+        self.messageDispatcher.unsubscribe("moderation")
+
+    def loadModerationIndexes(self):
+        """Builds the url blocklist index and the default profanity matcher, run on a background thread
+        by the startup warm-up.
+        """
+        self.urlBlocklist.reloadIfChanged()
+        self.profanityMatcher = ProfanityFilter.ProfanityMatcher(ProfanityFilter.loadDefaultWords())
 
     #### LISTENERS #####################################################################################
-    # listener used to load restricted urls file
+    # listener used to start watching the restricted urls file for changes once the warm-up has loaded it
     @Cog.listener()
     async def on_ready(self):
-        with open('../data/urlCheck.json') as f:
-            self.data_from_url_check = json.load(f)
+        await self.startupWarmup.waitUntilReady()
+        if (not self.reloadUrlBlocklist.is_running()):
+            self.reloadUrlBlocklist.start()
 
-    # Listener used to scan for language filter infractions in newly sent messages
-    @Cog.listener()
-    async def on_message(self, message):
-        channel = await self.cache.getServerInfractionChannelID(message.guild.id)
-        if(channel == None):
-            pass
-        else:
-            channel = self.bot.get_channel(channel)
-            await self.urlFilter(message, channel, message.channel)
-
-            if(message.author != self.bot.user):
-                if(profanity.contains_profanity(message.content)):
-                    if(message.content[0] == await self.cache.getServerCommandPrefix(message.guild.id)):
-                        return
-                    else:
-                        InfractionReport = "\n==================================\nLanguage Infraction Noted:\nLocation: {}\nUser Name: {}\nNickname: {}\nMessage Content: {}".format(message.channel,message.author, message.author.nick, message.content)
-                        try:
-                            await message.delete()
-                        except Exception:
-                            return  
-                        await channel.send(InfractionReport)       
-            
-    # Listener used to scan for language filter infractions in formerly clean but newly edited
+    # task rebuilds the url blocklist index off of the event loop whenever the restricted urls file changes
+    @tasks.loop(seconds=URL_BLOCKLIST_RELOAD_INTERVAL)
+    async def reloadUrlBlocklist(self):
+        await self.bot.loop.run_in_executor(None, self.urlBlocklist.reloadIfChanged)
+
+    # Listener used to scan for filter infractions in formerly clean but newly edited messages, filtered
+    # the same way as the new messages passed to moderateMessage by the message dispatcher
     @Cog.listener()
     async def on_message_edit(self, beforeModification, afterModification):
-        channel = await self.cache.getServerInfractionChannelID(afterModification.guild.id)
-        if(channel == None):
-            pass
-        else:
-            channel = self.bot.get_channel(channel)
-            await self.urlFilter(afterModification, channel, afterModification.channel)
-
-            if(afterModification.author != self.bot.user):
-                if(profanity.contains_profanity(afterModification.content)):
-                    channel = await self.cache.getServerInfractionChannelID(afterModification.guild.id)
-                    channel = self.bot.get_channel(channel)
-                    await channel.send("\n==================================\n")
-                    await channel.send("Language Infraction Noted:\nLocation: {}\nUser Name: {}\nNickname: {}\nMessage Content: {}".format(afterModification.channel,afterModification.author, afterModification.author.nick, afterModification.content))
-                    await afterModification.delete()
+        classes = self.messageDispatcher.classify(afterModification)
+        if self.moderationSubscription.matches(classes):
+            await self.moderateMessage(afterModification, classes, edited=True)
 
     # Listener used to delete command invoke messages on successful command execute
     @Cog.listener()
@@ -147,43 +178,32 @@ class ContentModeration(commands.Cog, name="Content Moderation"):
     @deleteMSG.command(name="user", brief="Delete specific user's messages in channel.", usage="user")
     @commands.check(EduBotChecks.hasElevatedPrivileges)
     async def deleteMSGUser(self, ctx, user: Union[discord.Member, str]):
-        """Deletes all messages sent by the given user from the channel the command is run in.
+        """Deletes all messages sent by the given user from the channel the command is run in. Can also be used
+        with * operator to delete the messages of all users matching the given pattern.
         """
         if(isinstance(user, str)):
-            if("*" in user):
-                pattern = user
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-                nameMatch = lambda name: (re.fullmatch(pattern, name.name) is not None) or (re.fullmatch(pattern, str(name.nick)) is not None)
-                results = list(filter(nameMatch, ctx.guild.members))
-
-                if (len(results) == 0):
-                    raise EduBotExceptions.NoMembersMatchedPattern(user)
-
-                if(not results):
-                    await ctx.send("This user does not exist, or the wildcard did not have any results.")
-                
-                else:
-                    for result in results:
-                        def UserCheck(message: discord.Message):
-                            return result == message.author
-                        await ctx.channel.purge(check=UserCheck)
-                        await ctx.send("{}'s Messages Deleted.".format(result))
-        else:
+            if("*" not in user):
+                raise commands.errors.BadArgument
 
+            results = NameIndex.sharedIndexes.matchMembers(ctx.guild, user)
+            if (len(results) == 0):
+                raise EduBotExceptions.NoMembersMatchedPattern(user)
+        else:
             if(user not in ctx.guild.members):
                 raise commands.errors.BadArgument
-            else:
-                def UserCheck(message: discord.Message):
-                    return user == message.author
-                await ctx.channel.purge(check=UserCheck)
-                await ctx.send("{}'s Messages Deleted.".format(user))
+            results = [user]
+
+        # messages of every matched user are deleted in a single walk over the channel history
+        payload = {"authorIDs": [result.id for result in results], "beforeID": ctx.message.id}
+        scan = await self.historyScanner.startScan(ctx.guild.id, ctx.channel.id, "deleteUser", payload)
+        await ctx.send(f"Deleting messages as scan {scan.scanID}, use deleteMSG pause or cancel to stop it.")
 
     @deleteMSGUser.error
     async def DeleteUser_error(self, ctx, error):
         # Runs when there is no user by given name
-        if isinstance(error, commands.BadArgument):
+        if isinstance(error, EduBotExceptions.NoMembersMatchedPattern):
+            await ctx.send(f"Error: {error}")
+        elif isinstance(error, commands.BadArgument):
             await ctx.send("Error: User does not exist in server!")
         else:
             await ctx.send(f"An unhandled exception has occured: {error}")  
@@ -192,41 +212,32 @@ class ContentModeration(commands.Cog, name="Content Moderation"):
     @deleteMSG.command(name="role", brief="Delete specific role's messages in channel.", usage="role")
     @commands.check(EduBotChecks.hasElevatedPrivileges)
     async def deleteMSGRole(self, ctx, role: Union[discord.Role, str]):
-        """Deletes all messages sent by any users with the given role from the channel the command is run in.
+        """Deletes all messages sent by any users with the given role from the channel the command is run in. Can
+        also be used with * operator to delete the messages of users having any role matching the given pattern.
         """
         if(isinstance(role, str)):
+            if("*" not in role):
+                raise commands.errors.BadArgument
 
-            if("*" in role):                
-                pattern = role
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-                nameMatch = lambda name: re.fullmatch(pattern, name.name) is not None
-                results = list(filter(nameMatch, ctx.guild.roles))
-
-                if (len(results) == 0):
-                    raise EduBotExceptions.NoRolesMatchedPattern(role)
-
-                for result in results:
-
-                    def authorHasRole(message: discord.Message):
-                        return result in message.author.roles
-                    await ctx.channel.purge(check=authorHasRole)
-                    await ctx.send("{}'s Messages Deleted.".format(result))
+            results = NameIndex.sharedIndexes.matchRoles(ctx.guild, role)
+            if (len(results) == 0):
+                raise EduBotExceptions.NoRolesMatchedPattern(role)
         else:
-
             # Checks to see if role exists in server
             if(role not in ctx.guild.roles):
                 raise commands.errors.BadArgument
-            def authorHasRole(message: discord.Message):
-                return role in message.author.roles
-            await ctx.channel.purge(check=authorHasRole)
-            await ctx.send("{} Role Messsages Deleted.".format(role))
+            results = [role]
+
+        payload = {"roleIDs": [result.id for result in results], "beforeID": ctx.message.id}
+        scan = await self.historyScanner.startScan(ctx.guild.id, ctx.channel.id, "deleteRole", payload)
+        await ctx.send(f"Deleting messages as scan {scan.scanID}, use deleteMSG pause or cancel to stop it.")
 
     @deleteMSGRole.error
     async def DeleteRole_error(self, ctx, error):
-        # Runs when there is no user by given name
-        if isinstance(error, commands.BadArgument):
+        # Runs when there is no role by given name
+        if isinstance(error, EduBotExceptions.NoRolesMatchedPattern):
+            await ctx.send(f"Error: {error}")
+        elif isinstance(error, commands.BadArgument):
             await ctx.send("Error: Role does not exist in the server!")
         else:
             await ctx.send(f"An unhandled exception has occured: {error}")  
@@ -267,9 +278,10 @@ class ContentModeration(commands.Cog, name="Content Moderation"):
         """
         if(amountToDelete <= 0):
             raise commands.errors.BadArgument
-        else:
-            await ctx.channel.purge(oldest_first = True, limit=amountToDelete)
-            await ctx.send("Messages Deleted.")
+
+        payload = {"limit": amountToDelete, "beforeID": ctx.message.id}
+        scan = await self.historyScanner.startScan(ctx.guild.id, ctx.channel.id, "deleteAmount", payload)
+        await ctx.send(f"Deleting messages as scan {scan.scanID}, use deleteMSG pause or cancel to stop it.")
 
     @deleteMSGAmount.error
     async def DeleteAmount_error(self, ctx, error):
@@ -279,17 +291,285 @@ class ContentModeration(commands.Cog, name="Content Moderation"):
         else:
             await ctx.send(f"An unhandled exception has occured: {error}")
 
+    @deleteMSG.command(name="scans", brief="Lists this server's unfinished message deletions.")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def deleteMSGScans(self, ctx):
+        """Lists the message deletions on this server that are running or paused."""
+        scans = self.historyScanner.getScans(ctx.guild.id)
+        if (len(scans) == 0):
+            await ctx.send("There are no message deletions running on this server.")
+        else:
+            await ctx.send("\n".join(scan.describe() for scan in scans))
+
+    @deleteMSG.command(name="pause", brief="Pauses a running message deletion.", usage="scanID")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def deleteMSGPause(self, ctx, scanID: int):
+        """Pauses the message deletion with the given scan id, which can be continued with deleteMSG resume."""
+        if (not await self.historyScanner.pause(ctx.guild.id, scanID)):
+            raise commands.errors.BadArgument(f"There is no running message deletion with scan id {scanID}.")
+        await ctx.send(f"Pausing scan {scanID}.")
+
+    @deleteMSG.command(name="resume", brief="Resumes a paused message deletion.", usage="scanID")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def deleteMSGResume(self, ctx, scanID: int):
+        """Continues the paused message deletion with the given scan id from where it stopped."""
+        if (not await self.historyScanner.resume(ctx.guild.id, scanID)):
+            raise commands.errors.BadArgument(f"There is no paused message deletion with scan id {scanID}.")
+        await ctx.send(f"Resumed scan {scanID}.")
+
+    @deleteMSG.command(name="cancel", brief="Cancels a message deletion.", usage="scanID")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def deleteMSGCancel(self, ctx, scanID: int):
+        """Stops the message deletion with the given scan id, messages it already deleted stay deleted."""
+        if (not await self.historyScanner.cancel(ctx.guild.id, scanID)):
+            raise commands.errors.BadArgument(f"There is no message deletion with scan id {scanID}.")
+        await ctx.send(f"Cancelled scan {scanID}.")
+
+    @deleteMSGPause.error
+    @deleteMSGResume.error
+    @deleteMSGCancel.error
+    async def deleteMSGScanError(self, ctx, error):
+        if isinstance(error, (commands.BadArgument, commands.MissingRequiredArgument)):
+            await ctx.send(f"Error: {error}")
+        else:
+            await ctx.send(f"An unhandled exception has occured: {error}")
+
+    ## history scan checks ##
+    @staticmethod
+    def authorCheck(scan: HistoryScanner.HistoryScan):
+        """Returns check for a deleteUser scan, matching messages sent by any of the scan's authors."""
+        authorIDs = set(scan.payload["authorIDs"])
+        return lambda message: message.author.id in authorIDs
+
+    @staticmethod
+    def authorRoleCheck(scan: HistoryScanner.HistoryScan):
+        """Returns check for a deleteRole scan, matching messages sent by members having any of the scan's
+        roles. Authors that have left the server no longer have roles, so their messages are kept.
+        """
+        roleIDs = set(scan.payload["roleIDs"])
+        return lambda message: any(authorRole.id in roleIDs for authorRole in getattr(message.author, "roles", ()))
+
+
+
+    ## Language Filter Word Commands ##
+    @commands.group(name="filterWord", brief="Parent command for custom language filter words.")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def filterWord(self, ctx):
+        """Parent command for managing the words this server's language filter checks for in addition
+        to the default word list.
+        """
+        if(ctx.invoked_subcommand is None):
+            await ctx.send("No subcommand provided for filterWord command. Use help filterWord for more information.")
+
+    @filterWord.command(name="add", brief="Adds words to the server's language filter.", usage="word [word ...]")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def filterWordAdd(self, ctx, *words: str):
+        """Adds the given words to this server's language filter."""
+        if(len(words) == 0):
+            raise commands.errors.BadArgument
+        await self.cache.addFilterWord(ctx.guild.id, list(words))
+        self.guildProfanityMatchers.pop(ctx.guild.id, None)
+        await ctx.send(f"Added {len(words)} word(s) to the language filter.")
+
+    @filterWord.command(name="remove", brief="Removes words from the server's language filter.", usage="word [word ...]")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def filterWordRemove(self, ctx, *words: str):
+        """Removes the given custom words from this server's language filter."""
+        if(len(words) == 0):
+            raise commands.errors.BadArgument
+        await self.cache.remFilterWord(ctx.guild.id, list(words))
+        self.guildProfanityMatchers.pop(ctx.guild.id, None)
+        await ctx.send(f"Removed {len(words)} word(s) from the language filter.")
+
+    @filterWord.command(name="list", brief="Lists the server's custom language filter words.")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def filterWordList(self, ctx):
+        """Sends the custom words in this server's language filter to the user who ran the command."""
+        words = await self.cache.getServerFilterWordsList(ctx.guild.id)
+        if(len(words) == 0):
+            await ctx.send("This server has no custom language filter words.")
+        else:
+            await ctx.author.send(f"Custom language filter words for {ctx.guild.name}: " + ", ".join(words))
+
+    @filterWord.error
+    @filterWordAdd.error
+    @filterWordRemove.error
+    @filterWordList.error
+    async def filterWordError(self, ctx, error):
+        if isinstance(error, commands.errors.CheckFailure):
+            await ctx.send("Error: You do not have permission to execute this command!")
+        elif isinstance(error, commands.errors.BadArgument):
+            await ctx.send("Error: No words were given!")
+        else:
+            await ctx.send(f"An unhandled exception has occured: {error}")
+
+
+
+    ## Automatic Moderation Commands ##
+    @commands.group(name="moderation", brief="Parent command for automatic moderation settings.")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def moderation(self, ctx):
+        """Parent command for turning the automatic moderation checks run on this server's messages on or off,
+        and viewing how long each check takes.
+        """
+        if(ctx.invoked_subcommand is None):
+            await ctx.send("No subcommand provided for moderation command. Use help moderation for more information.")
+
+    @moderation.command(name="enable", brief="Turns on an automatic moderation check.", usage=f"[{'|'.join(TOGGLEABLE_STAGES)}]")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def moderationEnable(self, ctx, stage: str):
+        """Turns on the given automatic moderation check for this server."""
+        stage = stage.lower()
+        if(stage not in TOGGLEABLE_STAGES):
+            raise commands.errors.BadArgument
+        await self.cache.enableModerationStage(ctx.guild.id, stage)
+        self.guildDisabledStages.pop(ctx.guild.id, None)
+        await ctx.send(f"The {stage} check is now on.")
+
+    @moderation.command(name="disable", brief="Turns off an automatic moderation check.", usage=f"[{'|'.join(TOGGLEABLE_STAGES)}]")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def moderationDisable(self, ctx, stage: str):
+        """Turns off the given automatic moderation check for this server."""
+        stage = stage.lower()
+        if(stage not in TOGGLEABLE_STAGES):
+            raise commands.errors.BadArgument
+        await self.cache.disableModerationStage(ctx.guild.id, stage)
+        self.guildDisabledStages.pop(ctx.guild.id, None)
+        await ctx.send(f"The {stage} check is now off.")
+
+    @moderation.command(name="status", brief="Shows the automatic moderation checks and their timings.")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def moderationStatus(self, ctx):
+        """Shows whether each automatic moderation check is on for this server, along with how many messages
+        each check has run on and its average time across all servers.
+        """
+        disabledStages = await self.getDisabledStages(ctx.guild.id)
+        lines = []
+        for stage, stats in self.moderationPipeline.getStageStats().items():
+            state = "off" if stage in disabledStages else "on"
+            lines.append(f"{stage}: {state}, {stats['calls']} runs, {stats['stops']} stops, {stats['average_ms']:.3f} ms average")
+        await ctx.send("Automatic moderation checks:\n" + "\n".join(lines))
+
+    @moderation.command(name="traffic", brief="Shows the kinds of messages received and how many were moderated.")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def moderationTraffic(self, ctx):
+        """Shows the number of messages the bot has received across all servers in each message class, and the
+        number passed to each message handler, including automatic moderation.
+        """
+        stats = self.messageDispatcher.getTrafficStats()
+        lines = [f"{stats['messages']} messages received"]
+        lines += [f"{messageClass}: {count}" for messageClass, count in stats["classes"].items()]
+        lines += [f"passed to {name}: {count}" for name, count in stats["handlers"].items()]
+        await ctx.send("Message traffic:\n" + "\n".join(lines))
+
+    @moderation.error
+    @moderationEnable.error
+    @moderationDisable.error
+    @moderationStatus.error
+    @moderationTraffic.error
+    async def moderationError(self, ctx, error):
+        if isinstance(error, commands.errors.CheckFailure):
+            await ctx.send("Error: You do not have permission to execute this command!")
+        elif isinstance(error, (commands.errors.BadArgument, commands.errors.MissingRequiredArgument)):
+            await ctx.send(f"Error: stage must be one of {', '.join(TOGGLEABLE_STAGES)}!")
+        else:
+            await ctx.send(f"An unhandled exception has occured: {error}")
+
 
 
     #### HELPER METHODS ################################################################################
-    def validateUrl(self, url):
-        '''validates if the message sent is an url or not
+    async def moderateMessage(self, message, classes: frozenset, edited: bool = False):
+        '''runs the message through the moderation pipeline, deleting it and reporting it to the
+        infraction channel if it fails a stage; classes is the message's classes from the message dispatcher,
+        and edited is whether the message is an edit, which is never exempt as a command
         '''
+        await self.startupWarmup.waitUntilReady()
+        disabledStages = await self.getDisabledStages(message.guild.id) if message.guild is not None else ()
+        infraction = await self.moderationPipeline.run(message, disabledStages, {"classes": classes, "edited": edited})
+        if infraction is None:
+            return
+
         try:
-            validators.url(url)
-            return url
-        except:
-            pass
+            await message.delete()
+        except discord.HTTPException:
+            return
+        if infraction.channelNotice is not None:
+            await message.channel.send(infraction.channelNotice)
+
+        infraction_channel = self.bot.get_channel(await self.cache.getServerInfractionChannelID(message.guild.id))
+        if infraction_channel is not None:
+            await infraction_channel.send("\n==================================\n" + infraction.report)
+
+    async def getDisabledStages(self, guildID: int) -> set:
+        '''returns the set of moderation stages turned off for the guild
+        '''
+        try:
+            return self.guildDisabledStages[guildID]
+        except KeyError:
+            disabledStages = set(await self.cache.getServerDisabledModerationStages(guildID))
+            self.guildDisabledStages[guildID] = disabledStages
+            return disabledStages
+
+    ## Moderation Stages ##
+    # stages are run in the order given to moderationPipeline, return None to pass the message to the next stage,
+    # ModerationPipeline.EXEMPT to skip the remaining stages, or an Infraction
+    async def authorStage(self, message, context):
+        '''exempts direct messages and the bot's own messages
+        '''
+        if message.guild is None or message.author == self.bot.user:
+            return ModerationPipeline.EXEMPT
+
+    async def infractionChannelStage(self, message, context):
+        '''exempts messages on servers without an infraction channel set
+        '''
+        if await self.cache.getServerInfractionChannelID(message.guild.id) is None:
+            return ModerationPipeline.EXEMPT
+
+    async def commandPrefixStage(self, message, context):
+        '''exempts new command messages from the language filter, edited messages aren't run as commands
+        and are not exempted
+        '''
+        if "command" in context["classes"] and not context["edited"]:
+            return ModerationPipeline.EXEMPT
+
+    async def attachmentStage(self, message, context):
+        '''marks messages with an image attachment so the url stage skips them
+        '''
+        context["is_image"] = "attachment" in context["classes"] and self.image_filter(message) is not None
+
+    async def urlStage(self, message, context):
+        '''make sure the websites posted on the server are not NSFW
+        '''
+        if context.get("is_image") or "url" not in context["classes"]:
+            return
+        blocked_url = self.urlBlocklist.findBlockedUrl(message.content)
+        if blocked_url is not None:
+            link, url_dict = blocked_url
+            return ModerationPipeline.Infraction("url",
+                f"Link Infraction Noted:\nLocation: {message.channel}\nUser Name: {message.author}\nType: {url_dict['type']}\nThreat: {url_dict['threat']}\nLink sent: <{link}>",
+                "This link sent is NSFW!!!")
+
+    async def wordStage(self, message, context):
+        '''checks message content against the language filter
+        '''
+        if await self.containsProfanity(message.guild.id, message.content):
+            return ModerationPipeline.Infraction("words",
+                "Language Infraction Noted:\nLocation: {}\nUser Name: {}\nNickname: {}\nMessage Content: {}".format(message.channel, message.author, message.author.nick, message.content))
+
+    async def containsProfanity(self, guildID: int, content: str) -> bool:
+        '''checks message content against the default language filter and the guild's custom words
+        '''
+        if self.profanityMatcher.containsProfanity(content):
+            return True
+
+        try:
+            guildMatcher = self.guildProfanityMatchers[guildID]
+        except KeyError:
+            words = await self.cache.getServerFilterWordsList(guildID)
+            guildMatcher = ProfanityFilter.ProfanityMatcher(words) if words else None
+            self.guildProfanityMatchers[guildID] = guildMatcher
+
+        return guildMatcher is not None and guildMatcher.containsProfanity(content)
 
     def image_filter(self, message):
         pic_extension = ['jpg', 'png', 'gif']
@@ -299,21 +579,3 @@ class ContentModeration(commands.Cog, name="Content Moderation"):
                 return True
             else:
                 return
-
-    async def urlFilter(self, message, infraction_channel, message_channel):
-        '''make sure the websites posted on the server are not NSFW
-        '''
-        #check if the message is image or not
-        message_is_image = self.image_filter(message)
-        message_is_url = self.validateUrl(message.content)
-        url_info = self.data_from_url_check['url']
-        if message_is_image == None:
-            for url_dict in url_info:
-                if (message_is_url in url_dict['link']):
-                    await message.delete()
-                    await message_channel.send(f"This link sent is NSFW!!!")
-                    await infraction_channel.send("\n==================================\n")
-                    await infraction_channel.send(f"Link Infraction Noted:\nLocation: {message.channel}\nUser Name: {message.author}\nType: {url_dict['type']}\nThreat: {url_dict['threat']}\nLink sent: <{message.content}>")
-
-        else:
-            return
@@ -8,13 +8,17 @@ from discord.ext.commands.errors import CommandInvokeError
 from discord import CategoryChannel
 
 # EduBot imports
+import BulkOperations
 import EduBotChecks
 import EduBotExceptions
+import InviteTracker
+import JoinAggregator
+import NameIndex
 import NewBotCache
+import PermissionPlanner
 
 # other imports
 import asyncio
-import re
 from typing import Union, Optional
 from sqlite3 import IntegrityError
 
@@ -23,10 +27,16 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
     kick, move, group, role, and poll commands.
     """
 
-    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache):
+    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache, inviteTracker: InviteTracker.InviteTracker):
         self.bot = bot
         self.cache = cache
         self.managedDeletions = set()
+        self.bulkExecutor = BulkOperations.sharedExecutor
+
+        # snapshot of invite uses used to work out the role invite new members joined with, and the
+        # aggregator welcoming new members in batches
+        self.inviteTracker = inviteTracker
+        self.joinAggregator = JoinAggregator.JoinAggregator(cache, inviteTracker, self.bulkExecutor)
 
     #### LISTENERS #####################################################################################
     ## Server Initial Configuration ##
@@ -87,9 +97,9 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
                     await guild.create_voice_channel('student', overwrites=None, category=category_voice, reason=None)
         #let the server owner know that initial configuration has been setup
         commandRestrictionChannel = discord.utils.get(guild.channels, name='notifications')
-        await self.cache.setServerNotificationChannelID(guild.id, commandRestrictionChannel)
+        await self.cache.setServerNotificationChannelID(guild.id, commandRestrictionChannel.id)
         infractionChannel = discord.utils.get(guild.channels, name = "Infraction Channel")
-        await self.cache.setServerInfractionChannelID(guild.id, infractionChannel)
+        await self.cache.setServerInfractionChannelID(guild.id, infractionChannel.id if (infractionChannel is not None) else None)
         channel_to_send = self.bot.get_channel(commandRestrictionChannel.id)
         message = "The server has been set up with the predefined initial configuration"
         embed = discord.Embed(title="Initial Server Configuration", description=message, color=0x00FF00)
@@ -98,18 +108,19 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
 
         return
 
+    # Will welcome joining members in batches, giving them the role of the role invite they used
     @commands.Cog.listener()
     async def on_member_join(self, member):
-        commandRestrictionChannel = discord.utils.get(member.guild.channels, name='notifications')
-        channel_id = commandRestrictionChannel.id
-        channel = self.bot.get_channel(channel_id)
-        embed = discord.Embed(title=f"Welcome to the server {member.name}", description=None, color=0x0000FF)
-        await channel.send(embed=embed)
-        after_join = await member.guild.invites()
-        role_id_for_link = await self.cache.roleIDFromUsedLink(member.guild.id, after_join)
-        get_role = discord.utils.get(channel.guild.roles, id=int(role_id_for_link))
-        await member.add_roles(get_role)
-        await channel.send(f'{member} has been given the role {get_role}')
+        self.joinAggregator.memberJoined(member)
+
+    # Will keep the invite snapshot used by on_member_join current
+    @commands.Cog.listener()
+    async def on_invite_create(self, invite):
+        self.inviteTracker.inviteCreated(invite)
+
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite):
+        self.inviteTracker.inviteDeleted(invite)
 
 
 
@@ -140,13 +151,7 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         """
         if(isinstance(roleToAdd, str)):
             if ("*" in roleToAdd):
-                pattern = roleToAdd
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-                
-                nameMatch = lambda name: re.fullmatch(pattern, name.name) is not None
-                results = list(filter(nameMatch, ctx.guild.roles))
+                results = NameIndex.sharedIndexes.matchRoles(ctx.guild, roleToAdd)
 
                 if (len(results) == 0):
                     raise EduBotExceptions.NoRolesMatchedPattern(roleToAdd)
@@ -491,10 +496,9 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         if (len(members) == 0):
             raise commands.errors.BadArgument
 
-        roleAssignmentCoros = [member.add_roles(role) for member in members]
-        await asyncio.wait(roleAssignmentCoros)
+        report = await self.bulkExecutor.run(members, lambda member: member.add_roles(role), ctx.channel, f"Assigning {role.name}")
 
-        await ctx.send(f"Users have been assigned the {role.name} role.")
+        await ctx.send(f"Users have been assigned the {role.name} role. {report.summary()}")
 
     @assignRoles.error
     async def assignRoles_error(self, ctx, error):
@@ -548,7 +552,8 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         role_id = get_role_from_name.id
         for invite in await ctx.guild.invites():
             if id == invite.id:
-                await self.cache.addRoleInvite(ctx.guild.id, invite.id, role_id)
+                await self.cache.addRoleInvite(ctx.guild.id, invite.id, role_id, invite.uses)
+                self.inviteTracker.addRoleInvite(ctx.guild.id, invite.id, role_id, invite.uses)
                 #await self.save_links(role, invite)
                 await ctx.send(f'the link <{invite}> has been given the role generation of {role}')
 
@@ -598,10 +603,12 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
             if invite.code == id:
                 await self.bot.delete_invite(invite)
                 await self.cache.remRoleInvite(ctx.guild.id, invite.code)
+                self.inviteTracker.removeRoleInvite(ctx.guild.id, invite.code)
                 await ctx.send(f'Invite link with ID {id} has been deleted.')
             elif id == "all":
                 await self.bot.delete_invite(invite)
                 await self.cache.remAllInvite(ctx.guild.id)
+                self.inviteTracker.removeAllRoleInvites(ctx.guild.id)
                 await ctx.send("\nAll active invites have been revoked")
 
     @deleteListLink.error
@@ -687,12 +694,7 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         # check to see if wildcard is given
         if(isinstance(userToKick, str)):
             if("*" in userToKick):
-                pattern = userToKick
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-                nameMatch = lambda name: (re.fullmatch(pattern, name.name) is not None) or (re.fullmatch(pattern, str(name.nick)) is not None)
-                results = list(filter(nameMatch, ctx.guild.members))
+                results = NameIndex.sharedIndexes.matchMembers(ctx.guild, userToKick)
 
                 if (len(results) == 0):
                     raise EduBotExceptions.NoMembersMatchedPattern(userToKick)
@@ -725,14 +727,7 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         """
         if(isinstance(roleToKick, str)):
             if("*" in roleToKick):
-                pattern = roleToKick
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-                
-                nameMatch = lambda name: re.fullmatch(pattern, name.name) is not None
-                
-                results = list(filter(nameMatch, ctx.guild.roles))
+                results = NameIndex.sharedIndexes.matchRoles(ctx.guild, roleToKick)
                 
                 if (len(results) == 0):
                     raise EduBotExceptions.NoRolesMatchedPattern(roleToKick)
@@ -746,17 +741,11 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
                         if(result in member.roles and (not member.bot)):
                             memberlist.append(member)
                     
-                    # Setup for for loop
-                    Asgrun = []
-                    for user in memberlist:
-                        # Kicks every member in list
-                        Asgrun.extend([user.kick()])
-                        Asgrun.extend([ctx.send("***{} has been kicked.***".format(user))])
-                    
-                    if not Asgrun:
+                    if not memberlist:
                         await ctx.send("Role is empty.")
                     else:
-                        await asyncio.wait(Asgrun)
+                        report = await self.bulkExecutor.run(memberlist, lambda user: user.kick(), ctx.channel, f"Kicking {result.name}")
+                        await ctx.send(f"***Members with the role {result.name} have been kicked.*** {report.summary()}")
                     
             else:
                 raise commands.errors.RoleNotFound(roleToKick)
@@ -768,13 +757,8 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
                 if(roleToKick in member.roles and (not member.bot)):
                     memberlist.append(member)
             
-            # Setup for for loop
-            Asgrun = []
-            for user in memberlist:
-                # Kicks every member in list
-                Asgrun.extend([user.kick()])
-                Asgrun.extend([ctx.send("***{} has been kicked.***".format(user))])
-            await asyncio.wait(Asgrun)
+            report = await self.bulkExecutor.run(memberlist, lambda user: user.kick(), ctx.channel, f"Kicking {roleToKick.name}")
+            await ctx.send(f"***Members with the role {roleToKick.name} have been kicked.*** {report.summary()}")
 
     @kickRole.error
     async def kickRole_error(self, ctx, error):
@@ -793,25 +777,19 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         """
         # List to store those to kick
         memberlist = []
+        privilegedRoleList = await self.cache.getServerPrivilegedRolesList(ctx.guild.id)
 
         # adds members into list, and excludes bot
         for member in ctx.guild.members:
             
             # Seachers for those without Principle role or bot.
-            privilegedRoleList = await self.cache.getServerPrivilegedRolesList(ctx.guild.id)
             isPrivileged = any(role.id in privilegedRoleList for role in member.roles)
             if (not isPrivileged and not member.bot):
                 memberlist.append(member)
-                print(member)
         
-        # setup for for loop
-        Asgrun = []
-        for user in memberlist:
-            # kicks all members in list
-            Asgrun.extend([user.kick()])
-        await asyncio.wait(Asgrun)
+        report = await self.bulkExecutor.run(memberlist, lambda user: user.kick(), ctx.channel, "Kicking members")
 
-        await ctx.send("All members kicked.")
+        await ctx.send(f"All members kicked. {report.summary()}")
 
     @kickAll.error
     async def kickAll_error(self, ctx, error):
@@ -847,12 +825,7 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         # check to see if wildcard is given
         if(isinstance(userToMove, str)):
             if("*" in userToMove):                
-                pattern = userToMove
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-                nameMatch = lambda name: (re.fullmatch(pattern, name.name) is not None) or (re.fullmatch(pattern, str(name.nick)) is not None)
-                results = list(filter(nameMatch, ctx.guild.members))
+                results = NameIndex.sharedIndexes.matchMembers(ctx.guild, userToMove)
 
                 if (len(results) == 0):
                     raise EduBotExceptions.NoMembersMatchedPattern(userToMove)
@@ -892,15 +865,10 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         """
         if(isinstance(roleToMove, str)):
             if("*" in roleToMove):                
-                pattern = roleToMove
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-                nameMatch = lambda name: re.fullmatch(pattern, name.name) is not None
-                results = list(filter(nameMatch, ctx.guild.roles))
+                results = NameIndex.sharedIndexes.matchRoles(ctx.guild, roleToMove)
 
                 if (len(results) == 0):
-                    EduBotExceptions.NoRolesMatchedPattern(roleToMove)
+                    raise EduBotExceptions.NoRolesMatchedPattern(roleToMove)
 
                 for result in results:
                     doThisStuff = []
@@ -910,8 +878,10 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
                             connectedMembers.extend(c.members)
                     for user in result.members:
                         if user in connectedMembers:
-                            doThisStuff.append(user.move_to(channel))
-                    await asyncio.wait(doThisStuff)
+                            doThisStuff.append(user)
+                    report = await self.bulkExecutor.run(doThisStuff, lambda user: user.move_to(channel), ctx.channel, f"Moving {result.name}")
+                    if report.failed:
+                        await ctx.send(f"Moves for {result.name}: {report.summary()}")
             else:
                 raise commands.errors.RoleNotFound(roleToMove)
         else:
@@ -922,9 +892,9 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
                     connectedMembers.extend(c.members)
             for user in roleToMove.members:
                 if user in connectedMembers:
-                    doThisStuff.append(user.move_to(channel))
-            await asyncio.wait(doThisStuff)
-            await ctx.send("Moves complete.")
+                    doThisStuff.append(user)
+            report = await self.bulkExecutor.run(doThisStuff, lambda user: user.move_to(channel), ctx.channel, f"Moving {roleToMove.name}")
+            await ctx.send(f"Moves complete. {report.summary()}")
 
     @moveRole.error
     async def moveRole_error(self, ctx, error):
@@ -1013,13 +983,7 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
 
         if isinstance(userToMute, str):
             if ("*" in userToMute):
-                pattern = userToMute
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-
-                nameMatch = lambda member: (re.fullmatch(pattern, member.name) is not None) or (re.fullmatch(pattern, str(member.nick)) is not None)
-                results = list(filter(nameMatch, ctx.guild.members))
+                results = NameIndex.sharedIndexes.matchMembers(ctx.guild, userToMute)
                 
                 if (len(results) == 0):
                     raise EduBotExceptions.NoMembersMatchedPattern(userToMute)
@@ -1060,13 +1024,7 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         """
         if isinstance(userToMute, str):
             if ("*" in userToMute):
-                pattern = userToMute
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-
-                nameMatch = lambda member: (re.fullmatch(pattern, member.name) is not None) or (re.fullmatch(pattern, str(member.nick)) is not None)
-                results = list(filter(nameMatch, ctx.guild.members))
+                results = NameIndex.sharedIndexes.matchMembers(ctx.guild, userToMute)
 
                 if (len(results) == 0):
                     raise EduBotExceptions.NoMembersMatchedPattern(userToMute)
@@ -1123,10 +1081,9 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         if (textMuteRole is None):
             textMuteRole = await self.createTextMuteRole(ctx)
         membersToMute = list(filter(lambda member: roleToMute in member.roles, ctx.guild.members))
-        roleMuteCoros = [member.add_roles(textMuteRole) for member in membersToMute]
-        await asyncio.wait(roleMuteCoros)
+        report = await self.bulkExecutor.run(membersToMute, lambda member: member.add_roles(textMuteRole), ctx.channel, f"Text muting {roleToMute.name}")
 
-        await ctx.send(f'Members with the role {roleToMute.name} have been text muted.')
+        await ctx.send(f'Members with the role {roleToMute.name} have been text muted. {report.summary()}')
 
     @muteRoleText.error
     async def muteRoleText_error(self, ctx, error):
@@ -1225,13 +1182,7 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
 
         if isinstance(userToUnmute, str):
             if ("*" in userToUnmute):
-                pattern = userToUnmute
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-
-                nameMatch = lambda member: (re.fullmatch(pattern, member.name) is not None) or (re.fullmatch(pattern, str(member.nick)) is not None)
-                results = list(filter(nameMatch, ctx.guild.members))
+                results = NameIndex.sharedIndexes.matchMembers(ctx.guild, userToUnmute)
 
                 if (len(results) == 0):
                     raise EduBotExceptions.NoMembersMatchedPattern(userToUnmute)
@@ -1270,13 +1221,7 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         """
         if isinstance(userToUnmute, str):
             if ("*" in userToUnmute):
-                pattern = userToUnmute
-                for i in ["+", "?", "\\", ".", "^", "[", "]", "$", "&", "|"]:
-                    pattern = pattern.replace(i, "\\" + i)
-                pattern = pattern.replace("*", ".*")
-                
-                nameMatch = lambda member: (re.fullmatch(pattern, member.name) is not None) or (re.fullmatch(pattern, str(member.nick)) is not None)
-                results = list(filter(nameMatch, ctx.guild.members))
+                results = NameIndex.sharedIndexes.matchMembers(ctx.guild, userToUnmute)
 
                 if (len(results) == 0):
                     raise EduBotExceptions.NoMembersMatchedPattern(userToUnmute)
@@ -1393,11 +1338,8 @@ class ServerAdministration(commands.Cog, name="Server Administration"):
         each channel on the server to disallow the text mute role from sending messages on the channel.
         """
         muteRole = await ctx.guild.create_role(name="EduBot_TextMute")
-        permissionConfigCoros = []
-        for channel in ctx.guild.channels:
-            if (isinstance(channel, discord.CategoryChannel) or isinstance(channel, discord.TextChannel)):
-                if (not channel.permissions_synced):
-                    permissionConfigCoros.append(channel.set_permissions(target=muteRole, send_messages=False))
-        
-        await asyncio.wait(permissionConfigCoros)
+        mutePlan = PermissionPlanner.planTextMuteRole(ctx.guild, muteRole)
+        report = await PermissionPlanner.applyPermissionPlan(mutePlan, self.bulkExecutor, ctx.channel, "Configuring text mute role")
+        if report.failed:
+            await ctx.send(f"Text mute role could not be configured on some channels. {report.summary()}")
         return muteRole
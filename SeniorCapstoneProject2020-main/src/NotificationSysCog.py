@@ -6,6 +6,7 @@ from typing import Union, Optional
 import NewBotCache
 import EduBotChecks
 import EduBotExceptions
+import JobScheduler
 import ServerAdminCog
 import discord
 from discord.ext import commands, timers, tasks
@@ -18,10 +19,14 @@ class NotificationSystem(commands.Cog, name="Notification System"):
     automated announcements and assignment tracking
     """
     
-    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache):
+    def __init__(self, bot: commands.Bot, cache: NewBotCache.Cache, scheduler: JobScheduler.JobScheduler):
         self.bot = bot
         self.cache = cache
 
+        # reminders set by the remind command are sent by the scheduler, which keeps them across restarts
+        self.scheduler = scheduler
+        self.scheduler.registerHandler("reminder", self.runScheduledReminder)
+
     #### COMMANDS ####
 
 
@@ -45,53 +50,126 @@ class NotificationSystem(commands.Cog, name="Notification System"):
             await ctx.message.delete()
             await ctx.send("This command is only allowed in the notifications channel!")
 
-    #Timed Reminder, not finished this is just the design to understand how it works
-    @commands.command(name="remind", help="Creates a reminder with a given message to be displayed at a given time.")
+    #Timed Reminder, sends a reminder with the time remaining every reminder_time seconds until the given time
+    @commands.command(name="remind", help="Creates a reminder with a given message to be displayed at a given time.",
+        usage="message \"YYYY-MM-DD HH:MM:SS\" reminderIntervalSeconds")
     @commands.check(EduBotChecks.hasElevatedPrivileges)
-    async def remind(self, ctx, message, time , reminder_time: int):
-        channel = await self.cache.getServerNotificationChannelID(message.guild.id)
+    async def remind(self, ctx, message, time, reminder_time: int):
+        channel = await self.cache.getServerNotificationChannelID(ctx.guild.id)
         commandRestrictionChannel = self.bot.get_channel(channel)
         #commandRestrictionChannel = discord.utils.get(ctx.guild.channels, name='notifications')
-        if ctx.channel.id == commandRestrictionChannel.id:
+        if commandRestrictionChannel is not None and ctx.channel.id == commandRestrictionChannel.id:
             await ctx.message.delete()
-            while True:
-                time_format = "%Y-%m-%d %H:%M:%S"
-                time_now = datetime.now(tz=None)
-                input_time = datetime.strptime(time, time_format)
-                #finding time difference
-                time_difference = input_time - time_now
-                #calculating days and hours and minutes difference
-                day_left = time_difference.days
-                hour_left = int(time_difference.total_seconds()/3600)
-                minute_left = int(time_difference.total_seconds()/60)
-                #to send reminder at the beginning of every minute
-                exact_minute = int(time_now.second)
-                if time_now.strftime('%Y') > input_time.strftime('%Y'):
-                    await ctx.send ("The year you have entered is invalid, the year {} has already passed. The current year is {}".format(input_time.strftime('%Y'), time_now.strftime('%Y')))
-                    return False
-
-                elif time_now.strftime('%Y') <= input_time.strftime('%Y') and time_now.strftime('%m') > input_time.strftime('%m'):
-                    await ctx.send ("The month you have entered is invalid, the month {} has already passed. The current month is {}".format(input_time.strftime('%m'), time_now.strftime('%m')))
-                    return False
-
-                elif time_now.strftime('%d') == input_time.strftime('%d') and time_now.strftime('%H') > input_time.strftime('%H'):
-                    await ctx.send ("The time you entered is invalid, the time {} has already passed. The current time is {}".format(input_time.strftime('%H:%M:%S'), time_now.strftime('%H:%M:%S')))
-                    return False
-                else:
-                    #setting up the format for how to display the reminder
-                    if minute_left != 0:
-                        message_to_send = ("**Remaining Time:**\n\nDays left: {}\nHours Left: {}\nMinutes left: {}".format(day_left,hour_left,minute_left))
-                        embed_reminder = discord.Embed(title="REMINDER: {}".format(message), description=message_to_send, color=0xFF0000)
-                        embed_reminder.set_footer(text="Reminder set by {}".format(ctx.message.author.name))
-                        await ctx.send(embed=embed_reminder)
-                    else:
-                        message_to_send = ("The time is up!")
-                        embed_reminder = discord.Embed(title="REMINDER: {}".format(message), description=message_to_send, color=0xFF0000)
-                        embed_reminder.set_footer(text="Reminder set by {}".format(ctx.message.author.name))
-                        await ctx.send(embed=embed_reminder)
-                        return False
-
-                await asyncio.sleep(reminder_time-exact_minute)
+            if reminder_time <= 0:
+                raise BadArgument
+
+            time_format = "%Y-%m-%d %H:%M:%S"
+            time_now = datetime.now(tz=None)
+            input_time = datetime.strptime(time, time_format)
+            if input_time <= time_now:
+                await ctx.send ("The time you entered is invalid, the time {} has already passed. The current time is {}".format(input_time.strftime(time_format), time_now.strftime(time_format)))
+                return False
+
+            #the reminder is stored by the scheduler, which sends each following reminder and keeps them across restarts
+            reminder = {"message": message, "remind_at": input_time.timestamp(), "interval": reminder_time, "author": ctx.message.author.name}
+            if not await self.sendReminder(ctx.channel, reminder):
+                await self.scheduler.schedule(ctx.guild.id, "reminder", self.nextReminderTime(reminder), channelID=ctx.channel.id, payload=reminder)
+
+        else:
+            await ctx.send("This command is only allowed in the notifications channel!")
+
+    @remind.error
+    async def remindError(self, ctx, error):
+        if isinstance(error, commands.errors.CheckFailure):
+            await ctx.send("Error: You do not have permission to execute this command!")
+        elif isinstance(error, (commands.errors.BadArgument, commands.errors.MissingRequiredArgument)):
+            await ctx.send("Error: Usage is remind message \"YYYY-MM-DD HH:MM:SS\" reminderIntervalSeconds, with an interval above 0!")
+        elif isinstance(error, commands.errors.CommandInvokeError) and isinstance(error.original, ValueError):
+            await ctx.send("Error: The time must be given in the format \"YYYY-MM-DD HH:MM:SS\"!")
+        else:
+            await ctx.send(f"An unhandled exception has occured: {error}")
+
+
+    ## Scheduled Job Commands ##
+    @commands.group(name="schedule", brief="Parent command for viewing and cancelling scheduled jobs.")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def schedule(self, ctx):
+        """Parent command for viewing and cancelling this server's scheduled jobs, such as timed unlocks
+        and reminders.
+        """
+        if(ctx.invoked_subcommand is None):
+            await ctx.send("No subcommand provided for schedule command. Use help schedule for more information.")
 
+    @schedule.command(name="list", brief="Lists the server's scheduled jobs.")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def scheduleList(self, ctx):
+        """Lists the id, type, and due time of each job scheduled on this server."""
+        jobs = self.scheduler.getJobs(ctx.guild.id)
+        if(len(jobs) == 0):
+            await ctx.send("This server has no scheduled jobs.")
+            return
+
+        lines = []
+        for job in jobs:
+            due_time = datetime.fromtimestamp(job.dueTime).strftime("%Y-%m-%d %H:%M:%S")
+            description = f": {job.payload['message']}" if "message" in job.payload else ""
+            lines.append(f"{job.jobID}: {job.jobType} at {due_time}{description}")
+        await ctx.send("Scheduled jobs:\n" + "\n".join(lines))
+
+    @schedule.command(name="cancel", brief="Cancels a scheduled job.", usage="jobID")
+    @commands.check(EduBotChecks.hasElevatedPrivileges)
+    async def scheduleCancel(self, ctx, job_id: int):
+        """Cancels the scheduled job with the given id, as shown by schedule list."""
+        if not await self.scheduler.cancel(ctx.guild.id, job_id):
+            raise BadArgument
+        await ctx.send(f"Cancelled scheduled job {job_id}.")
+
+    @schedule.error
+    @scheduleList.error
+    @scheduleCancel.error
+    async def scheduleError(self, ctx, error):
+        if isinstance(error, commands.errors.CheckFailure):
+            await ctx.send("Error: You do not have permission to execute this command!")
+        elif isinstance(error, (commands.errors.BadArgument, commands.errors.MissingRequiredArgument)):
+            await ctx.send("Error: No scheduled job with that id exists on this server!")
         else:
-            await ctx.send("This command is only allowed in the notifications channel!")
\ No newline at end of file
+            await ctx.send(f"An unhandled exception has occured: {error}")
+
+
+
+    #### HELPER METHODS ####
+    async def sendReminder(self, channel, reminder: dict) -> bool:
+        """Sends a reminder embed showing the time remaining, returning True if the time is up and this was
+        the last reminder.
+        """
+        time_left = reminder["remind_at"] - datetime.now(tz=None).timestamp()
+        #calculating days and hours and minutes difference
+        day_left = int(time_left // 86400)
+        hour_left = int(time_left/3600)
+        minute_left = int(time_left/60)
+        if minute_left > 0:
+            message_to_send = ("**Remaining Time:**\n\nDays left: {}\nHours Left: {}\nMinutes left: {}".format(day_left,hour_left,minute_left))
+        else:
+            message_to_send = ("The time is up!")
+
+        embed_reminder = discord.Embed(title="REMINDER: {}".format(reminder["message"]), description=message_to_send, color=0xFF0000)
+        embed_reminder.set_footer(text="Reminder set by {}".format(reminder["author"]))
+        await channel.send(embed=embed_reminder)
+        return minute_left <= 0
+
+    @staticmethod
+    def nextReminderTime(reminder: dict) -> float:
+        """Returns the unix timestamp of the next reminder, which is sent one interval from now or when the
+        time is up, whichever is sooner.
+        """
+        return min(datetime.now(tz=None).timestamp() + reminder["interval"], reminder["remind_at"])
+
+    async def runScheduledReminder(self, job: JobScheduler.ScheduledJob):
+        """Scheduler handler for reminders set by the remind command, sending the next reminder and returning
+        the time of the one after it.
+        """
+        channel = self.bot.get_channel(job.channelID)
+        if channel is None or await self.sendReminder(channel, job.payload):
+            return None
+
+        return self.nextReminderTime(job.payload)
@@ -0,0 +1,169 @@
+"""Module contains functions for planning the channel permission edits made when locking and unlocking a server
+and when setting up the text mute role, so that each channel is edited at most once and channels that would not
+change are not edited at all.
+
+Plans are built from the guild's category/channel tree. Each category's new overwrites are worked out once, and
+channels synced to their category are given the same overwrites as the category so that they stay synced. The
+Discord API doesn't propagate a category's overwrites to its channels, so each synced channel still takes an API
+call; this replaces skipping synced channels, which left them unchanged once their category was edited."""
+
+import discord
+import BulkOperations
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# overwrite given to each role and member without privileges on every channel when the server is locked
+LOCK_OVERWRITE = discord.PermissionOverwrite(connect=False, send_messages=False, view_channel=False)
+
+# overwrite given to the text mute role on each text channel and category
+TEXT_MUTE_OVERWRITE = discord.PermissionOverwrite(send_messages=False)
+
+class PermissionPlan():
+    """PermissionPlan object stores the channel edits planned for an operation as (channel, overwrites) pairs,
+    where overwrites is the complete overwrites dict the channel is set to in a single API call, along with
+    the (channelID, modifiedID, overwrite) rows snapshotted to the perm_overwrites table so that the
+    operation can be undone. Category edits are ordered before the edits of their channels.
+    """
+    def __init__(self):
+        self.edits = []
+        self.snapshot = []
+
+        # number of planned edits that keep a channel synced to its category, and the number of channels
+        # looked at that needed no edit
+        self.syncedChannelEdits = 0
+        self.unchangedChannels = 0
+
+    @property
+    def apiCallCount(self) -> int:
+        """Number of API calls needed to carry out the plan.
+        """
+        return len(self.edits)
+
+    def describe(self) -> str:
+        """Returns a message describing the number of API calls needed to carry out the plan.
+        """
+        categoryEdits = sum(1 for channel, _ in self.edits if isinstance(channel, discord.CategoryChannel))
+        return (f"{self.apiCallCount} API call(s): {categoryEdits} category edit(s), {self.syncedChannelEdits} synced channel edit(s), "
+            f"{self.apiCallCount - categoryEdits - self.syncedChannelEdits} other channel edit(s), {self.unchangedChannels} channel(s) unchanged.")
+
+def planOverwriteChange(guild: discord.Guild, changeOverwrites: Callable[[discord.abc.GuildChannel, dict], dict],
+    channelFilter: Optional[Callable[[discord.abc.GuildChannel], bool]] = None) -> PermissionPlan:
+    """Plans applying changeOverwrites to the channels of the guild that pass channelFilter, or to every channel
+    if no filter is given. changeOverwrites takes a channel and a copy of its overwrites dict, and returns the
+    dict the channel should be set to. A channel synced to a category that is also being planned is set to its
+    category's planned overwrites instead of calling changeOverwrites.
+    """
+    plan = PermissionPlan()
+    plannedOverwrites = {}
+
+    def planChannel(channel: discord.abc.GuildChannel) -> dict:
+        if (channel.id in plannedOverwrites):
+            return plannedOverwrites[channel.id]
+
+        # a channel's category is planned before the channel, so category edits come before channel edits
+        channelOverwrites = channel.overwrites
+        category = channel.category
+        isSynced = (category is not None) and (channelFilter is None or channelFilter(category)) and (category.overwrites == channelOverwrites)
+        if (isSynced):
+            newOverwrites = planChannel(category)
+        else:
+            newOverwrites = changeOverwrites(channel, dict(channelOverwrites))
+        plannedOverwrites[channel.id] = newOverwrites
+
+        if (newOverwrites == channelOverwrites):
+            plan.unchangedChannels += 1
+        else:
+            plan.edits.append((channel, newOverwrites))
+            plan.syncedChannelEdits += isSynced
+        return newOverwrites
+
+    for channel in guild.channels:
+        if (channelFilter is None or channelFilter(channel)):
+            planChannel(channel)
+
+    return plan
+
+def planLock(guild: discord.Guild, privilegedRoles: Iterable[int], lockedOverwrite: discord.PermissionOverwrite) -> PermissionPlan:
+    """Plans locking the guild by setting every overwrite on each channel that isn't for a privileged role to
+    lockedOverwrite. Channels without any overwrites get an @everyone overwrite. Every overwrite replaced by the
+    lock is snapshotted, while channels whose overwrites already match the lock are not edited.
+    """
+    def lockOverwrites(channel: discord.abc.GuildChannel, overwrites: dict) -> dict:
+        # create an overwrite for @everyone if there's no overwrites on a channel, which is snapshotted
+        # empty so that unlocking removes it again
+        currentOverwrites = overwrites if (len(overwrites) > 0) else {guild.default_role: discord.PermissionOverwrite()}
+
+        lockedOverwrites = dict(overwrites)
+        for target, overwrite in currentOverwrites.items():
+            if (target.id not in privilegedRoles):
+                lockedOverwrites[target] = lockedOverwrite
+        return lockedOverwrites
+
+    plan = planOverwriteChange(guild, lockOverwrites)
+
+    # snapshot the overwrites replaced on every edited channel, including synced channels
+    for channel, lockedOverwrites in plan.edits:
+        channelOverwrites = channel.overwrites
+        for target in lockedOverwrites:
+            if (target.id not in privilegedRoles):
+                plan.snapshot.append((channel.id, target.id, channelOverwrites.get(target, discord.PermissionOverwrite())))
+
+    return plan
+
+def planUnlock(guild: discord.Guild, snapshot: Dict[int, List[Tuple[int, discord.PermissionOverwrite]]]) -> PermissionPlan:
+    """Plans restoring the overwrites snapshotted when the guild was locked, given as a dict of (modifiedID,
+    overwrite) lists for each channel ID. Snapshotted overwrites that are empty are removed, and overwrites for
+    roles or members that no longer exist are skipped. Channels whose overwrites would not change are not edited.
+    Each channel is restored from its own snapshot, as locking can leave a channel identical to its category
+    without the two having been synced before the lock.
+    """
+    plan = PermissionPlan()
+    for channel in guild.channels:
+        channelSnapshot = snapshot.get(channel.id)
+        if (channelSnapshot is None):
+            continue
+
+        channelOverwrites = channel.overwrites
+        restoredOverwrites = dict(channelOverwrites)
+        for modifiedID, overwrite in channelSnapshot:
+            # the role or member may have been deleted or left while the server was locked
+            target = guild.get_role(modifiedID) or guild.get_member(modifiedID)
+            if (target is None):
+                continue
+
+            if (overwrite.is_empty()):
+                restoredOverwrites.pop(target, None)
+            else:
+                restoredOverwrites[target] = overwrite
+
+        if (restoredOverwrites == channelOverwrites):
+            plan.unchangedChannels += 1
+        else:
+            plan.edits.append((channel, restoredOverwrites))
+
+    return plan
+
+def planRoleOverwrite(guild: discord.Guild, target: Union[discord.Role, discord.Object], overwrite: discord.PermissionOverwrite,
+    channelFilter: Optional[Callable[[discord.abc.GuildChannel], bool]] = None) -> PermissionPlan:
+    """Plans setting the overwrite for the given role on the channels that pass channelFilter, used to
+    configure the text mute role on every text channel and category.
+    """
+    def addRoleOverwrite(channel: discord.abc.GuildChannel, overwrites: dict) -> dict:
+        overwrites[target] = overwrite
+        return overwrites
+
+    return planOverwriteChange(guild, addRoleOverwrite, channelFilter)
+
+def planTextMuteRole(guild: discord.Guild, muteRole: Union[discord.Role, discord.Object]) -> PermissionPlan:
+    """Plans configuring the text mute role on every text channel and category of the guild.
+    """
+    isTextOrCategory = lambda channel: isinstance(channel, (discord.TextChannel, discord.CategoryChannel))
+    return planRoleOverwrite(guild, muteRole, TEXT_MUTE_OVERWRITE, isTextOrCategory)
+
+async def applyPermissionPlan(plan: PermissionPlan, bulkExecutor: BulkOperations.BulkOperationExecutor,
+    progressChannel: Optional[discord.abc.Messageable] = None, description: str = "Editing channels") -> BulkOperations.BulkOperationReport:
+    """Makes the channel edits of a permission plan through the bulk executor, setting each channel's
+    overwrites in a single API call.
+    """
+    channelOverwrites = dict(plan.edits)
+    return await bulkExecutor.run(channelOverwrites.keys(), lambda channel: channel.edit(overwrites=channelOverwrites[channel]),
+        progressChannel=progressChannel, description=description)
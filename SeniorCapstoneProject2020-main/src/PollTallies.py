@@ -0,0 +1,207 @@
+"""Module contains PollTallies class for keeping running vote counts of open polls from reaction events, so that
+polls can be closed and their results shown without fetching the poll messages."""
+
+import asyncio
+import sqlite3
+import discord
+from typing import Iterable, List, Optional, Tuple
+import BulkOperations
+import NewBotCache
+
+# seconds vote count changes are collected for before being written to the poll_tallies table together
+POLL_VOTE_FLUSH_INTERVAL = 2.0
+
+# code point of the regional indicator A emoji used for the first poll answer, answer i uses code point + i
+POLL_FIRST_ANSWER_EMOJI = 127462
+
+# seconds a poll message found to exist is assumed to still exist before it is fetched again, deletions seen by
+# the message delete listeners remove the poll right away
+POLL_EXISTENCE_TTL = 300.0
+
+class PollTallies():
+    """PollTallies object stores the running vote count of each answer of each open poll, keyed by the poll's
+    message id. Counts are changed by the reaction listeners as votes come in, with the changes collected for
+    POLL_VOTE_FLUSH_INTERVAL seconds and written to the poll_tallies table of the local cache in one batch.
+
+    Polls created before vote counts were kept have no counts, and getTally returns None for them. Votes made
+    while the bot is offline are not counted.
+    """
+    def __init__(self, cache: NewBotCache.Cache):
+        self.cache = cache
+
+        # polls stores a (guildID, channelID, answerCount) tuple for each open poll's message id, and counts
+        # the list of vote counts for each poll with tallies
+        self.polls = {}
+        self.counts = {}
+
+        # pendingVotes stores the vote count changes not yet written for each (messageID, answerIndex) pair,
+        # with flushHandle holding the scheduled write, if any
+        self.pendingVotes = {}
+        self.flushHandle = None
+
+        # verifiedAt stores the event loop time each poll's message was last known to exist
+        self.verifiedAt = {}
+
+        # loadTask loads the open polls and their counts from the local cache the first time they are needed
+        self.loadTask = None
+
+    async def load(self):
+        """Loads the open polls and their vote counts from the local cache, if they aren't already loaded.
+        """
+        if (self.loadTask is None):
+            self.loadTask = asyncio.ensure_future(self.loadPolls())
+        await self.loadTask
+
+    async def loadPolls(self):
+        tallies = await self.cache.getPollTalliesDict()
+        for pollID, guildID, channelID, messageID, question, answers in await self.cache.getPollsList():
+            self.polls[messageID] = (guildID, channelID, len(answers))
+            if (messageID in tallies):
+                self.counts[messageID] = [tallies[messageID].get(i, 0) for i in range(len(answers))]
+
+    def addPoll(self, guildID: int, channelID: int, messageID: int, answerCount: int):
+        self.polls[messageID] = (guildID, channelID, answerCount)
+        self.counts[messageID] = [0] * answerCount
+        self.verifiedAt[messageID] = asyncio.get_event_loop().time()
+
+    def removePoll(self, messageID: int):
+        """Stops counting the votes of a closed or deleted poll, dropping any unwritten changes to its counts.
+        """
+        self.polls.pop(messageID, None)
+        self.verifiedAt.pop(messageID, None)
+        answerCount = len(self.counts.pop(messageID, ()))
+        for answerIndex in range(answerCount):
+            self.pendingVotes.pop((messageID, answerIndex), None)
+
+    def removeChannelPolls(self, channelID: int) -> List[int]:
+        """Stops counting the votes of every poll in a deleted channel, returning the polls' message ids.
+        """
+        messageIDs = [messageID for messageID, (_, pollChannelID, _) in self.polls.items() if pollChannelID == channelID]
+        for messageID in messageIDs:
+            self.removePoll(messageID)
+        return messageIDs
+
+    async def findDeletedPolls(self, guild: discord.Guild, polls: List[Tuple[int, int]], executor: BulkOperations.BulkOperationExecutor) -> List[int]:
+        """Returns the message ids of the given (channelID, messageID) polls whose message or channel no longer
+        exists. Messages not known to exist within the last POLL_EXISTENCE_TTL seconds are fetched concurrently
+        with the given executor, and messages that fail to fetch for reasons other than being deleted are
+        assumed to exist.
+        """
+        now = asyncio.get_event_loop().time()
+        deletedPolls = []
+        messagesToFetch = []
+        for channelID, messageID in polls:
+            verifiedAt = self.verifiedAt.get(messageID)
+            if (verifiedAt is not None and now - verifiedAt < POLL_EXISTENCE_TTL):
+                continue
+
+            channel = guild.get_channel(channelID)
+            if (channel is None):
+                deletedPolls.append(messageID)
+            else:
+                messagesToFetch.append((channel, messageID))
+
+        async def messageExists(item: Tuple[discord.TextChannel, int]) -> bool:
+            channel, messageID = item
+            try:
+                await channel.fetch_message(messageID)
+            except discord.NotFound:
+                return False
+            return True
+
+        report = await executor.run(messagesToFetch, messageExists)
+        for (channel, messageID), exists in report.successfulResults:
+            if (exists):
+                self.verifiedAt[messageID] = now
+            else:
+                deletedPolls.append(messageID)
+
+        return deletedPolls
+
+    def isPoll(self, messageID: int) -> bool:
+        return messageID in self.polls
+
+    def answerIndex(self, messageID: int, emoji: discord.PartialEmoji) -> Optional[int]:
+        """Returns the index of the poll answer the emoji votes for, or None if the message isn't an open poll
+        or the emoji isn't one of the poll's answer emojis.
+        """
+        poll = self.polls.get(messageID)
+        if (poll is None or emoji.id is not None or len(emoji.name) != 1):
+            return None
+
+        answerIndex = ord(emoji.name) - POLL_FIRST_ANSWER_EMOJI
+        return answerIndex if (0 <= answerIndex < poll[2]) else None
+
+    def getTally(self, messageID: int) -> Optional[List[int]]:
+        """Returns a copy of the vote counts of the poll's answers, or None for polls without counts.
+        """
+        counts = self.counts.get(messageID)
+        return list(counts) if (counts is not None) else None
+
+    def recordVote(self, messageID: int, answerIndex: int, change: int):
+        """Changes the vote count of a poll answer, scheduling the change to be written to the local cache.
+        """
+        counts = self.counts.get(messageID)
+        if (counts is None):
+            return
+
+        # counts are kept from zero, as a removal can arrive for a vote made while the bot was offline
+        change = max(counts[answerIndex] + change, 0) - counts[answerIndex]
+        if (change == 0):
+            return
+        counts[answerIndex] += change
+        self.pendingVotes[(messageID, answerIndex)] = self.pendingVotes.get((messageID, answerIndex), 0) + change
+        self.scheduleFlush()
+
+    def scheduleFlush(self):
+        if (self.flushHandle is None):
+            self.flushHandle = asyncio.get_event_loop().call_later(POLL_VOTE_FLUSH_INTERVAL, lambda: asyncio.ensure_future(self.flush()))
+
+    def clearVotes(self, messageID: int, answerIndexes: Optional[Iterable[int]] = None):
+        """Resets the vote counts of the given answers of a poll to zero, or of every answer if none are given,
+        used when reactions are cleared from a poll message.
+        """
+        counts = self.counts.get(messageID)
+        if (counts is None):
+            return
+
+        for answerIndex in (answerIndexes if (answerIndexes is not None) else range(len(counts))):
+            self.recordVote(messageID, answerIndex, -counts[answerIndex])
+
+    async def flush(self):
+        """Writes the vote count changes collected since the last flush to the local cache. Changes to polls no
+        longer counted are dropped. If the batch fails, such as when a poll was removed from the local cache
+        while its votes were being collected, each poll's changes are written separately, so only the changes
+        of the polls that fail are lost. Changes that fail for reasons other than their poll being removed are
+        kept for the next flush.
+        """
+        if (self.flushHandle is not None):
+            self.flushHandle.cancel()
+            self.flushHandle = None
+
+        votes = [(messageID, answerIndex, change) for (messageID, answerIndex), change in self.pendingVotes.items() if change != 0 and messageID in self.polls]
+        self.pendingVotes = {}
+        if (len(votes) == 0):
+            return
+
+        try:
+            await self.cache.addPollVotes(votes)
+            return
+        except sqlite3.Error as e:
+            print(f"Unable to write the votes of {len(set(vote[0] for vote in votes))} poll(s) together, writing each poll separately: {e}")
+
+        pollVotes = {}
+        for vote in votes:
+            pollVotes.setdefault(vote[0], []).append(vote)
+
+        # each poll's changes are queued together, the cache rolling back only the writes that fail
+        results = await asyncio.gather(*[self.cache.addPollVotes(messageVotes) for messageVotes in pollVotes.values()], return_exceptions=True)
+        for (messageID, messageVotes), result in zip(pollVotes.items(), results):
+            if (isinstance(result, sqlite3.IntegrityError)):
+                print(f"Dropping the votes of poll message {messageID}, it is no longer in the local cache: {result}")
+            elif (isinstance(result, Exception)):
+                print(f"Unable to write the votes of poll message {messageID}, retrying at the next flush: {result}")
+                if (messageID in self.polls):
+                    for _, answerIndex, change in messageVotes:
+                        self.pendingVotes[(messageID, answerIndex)] = self.pendingVotes.get((messageID, answerIndex), 0) + change
+                    self.scheduleFlush()
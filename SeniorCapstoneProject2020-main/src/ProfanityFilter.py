@@ -0,0 +1,114 @@
+"""Module contains ProfanityMatcher class for checking messages against the language filter word lists."""
+
+import os
+import re
+from typing import Iterable, List, Optional
+from better_profanity.constants import ALLOWED_CHARACTERS
+from better_profanity.utils import get_complete_path_of_file
+
+# path of the EduBot word list that is added to better_profanity's default word list
+WORD_FILTER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wordfilter.txt")
+
+# leetspeak substitutions accepted for each letter of a filtered word, matching the substitutions
+# better_profanity accepts so that both give the same verdicts
+LEETSPEAK_VARIANTS = {
+    "a": ("a", "@", "*", "4"),
+    "i": ("i", "*", "l", "1"),
+    "o": ("o", "*", "0", "@"),
+    "u": ("u", "*", "v"),
+    "v": ("v", "*", "u"),
+    "l": ("l", "1"),
+    "e": ("e", "*", "3"),
+    "s": ("s", "$", "5"),
+    "t": ("t", "7"),
+}
+
+# regex character class for the characters better_profanity treats as part of a word, used to match filtered
+# words only at word boundaries
+WORD_CHARACTERS = "[" + "".join(re.escape(char) for char in sorted(ALLOWED_CHARACTERS)) + "]"
+
+# regex for the separators allowed between the letters of a word that is spelled across several words; this
+# approximates the complement of WORD_CHARACTERS with a short class, as it is repeated for every letter
+SEPARATORS = r"""(?:[^\w@$*"'\u0300-\u036f]|_)+"""
+
+def readWordList(filePath: str) -> List[str]:
+    """Returns the non-empty lines of a word list file.
+    """
+    with open(filePath, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def loadDefaultWords() -> List[str]:
+    """Returns the words of better_profanity's default word list combined with EduBot's word list.
+    """
+    return readWordList(get_complete_path_of_file("profanity_wordlist.txt")) + readWordList(WORD_FILTER_FILE)
+
+class ProfanityMatcher():
+    """ProfanityMatcher object compiles a list of filtered words into a single regex that finds any of the
+    words in a message in one pass. Like better_profanity, a filtered word matches whole words only, ignoring
+    case and accepting the substitutions in LEETSPEAK_VARIANTS, and may be spelled out across several words
+    separated by spaces or punctuation.
+    """
+    def __init__(self, words: Iterable[str]):
+        self.words = sorted({word.lower() for word in words if word.strip()})
+        self.pattern = self.compilePattern(self.words) if self.words else None
+
+    @staticmethod
+    def compilePattern(words: List[str]) -> re.Pattern:
+        """Compiles a regex matching any of the given words. The words are merged into a trie first so
+        that words sharing a prefix share the regex for that prefix.
+        """
+        # each trie key is the regex for one character of a word, with None marking the end of a word
+        trie = {}
+        for word in words:
+            node = trie
+            for index, char in enumerate(word):
+                node = node.setdefault(ProfanityMatcher.characterRegex(word, index), {})
+            node[None] = {}
+
+        return re.compile(f"(?<!{WORD_CHARACTERS})(?:{ProfanityMatcher.trieRegex(trie)})(?!{WORD_CHARACTERS})")
+
+    @staticmethod
+    def characterRegex(word: str, index: int) -> str:
+        """Returns the regex for the character at the given index of a word. Word characters can be
+        preceded by separators when the previous character of the word is also a word character, which
+        matches the word spelled across several words.
+        """
+        char = word[index]
+        if (char not in ALLOWED_CHARACTERS):
+            return re.escape(char)
+
+        variants = LEETSPEAK_VARIANTS.get(char, (char,))
+        charRegex = re.escape(char) if (len(variants) == 1) else "[" + "".join(re.escape(variant) for variant in variants) + "]"
+        if (index > 0 and word[index - 1] in ALLOWED_CHARACTERS):
+            charRegex = f"(?:{SEPARATORS})?" + charRegex
+
+        return charRegex
+
+    @staticmethod
+    def trieRegex(node: dict) -> str:
+        """Returns the regex matching every word suffix stored below the given trie node.
+        """
+        alternatives = [charRegex + ProfanityMatcher.trieRegex(child) for charRegex, child in node.items() if charRegex is not None]
+        if (not alternatives):
+            return ""
+
+        regex = alternatives[0] if (len(alternatives) == 1) else "(?:" + "|".join(alternatives) + ")"
+        if (None in node):
+            regex = f"(?:{regex})?"
+
+        return regex
+
+    def findProfanity(self, text: str) -> Optional[str]:
+        """Returns the first filtered word found in the given text as it was written, or None if the
+        text contains no filtered words.
+        """
+        if (self.pattern is None):
+            return None
+
+        match = self.pattern.search(text.lower())
+        return match.group() if (match is not None) else None
+
+    def containsProfanity(self, text: str) -> bool:
+        """Returns whether the given text contains any filtered words.
+        """
+        return self.findProfanity(text) is not None
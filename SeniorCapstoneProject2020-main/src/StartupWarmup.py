@@ -0,0 +1,109 @@
+"""Module contains StartupWarmup class for loading the bot's state once it connects, before it starts serving
+commands, so that the first command in each server doesn't pay for cold database pages and per-table queries.
+
+The warm-up loads every server's state from the local cache with one query per table, builds the indexes
+registered by the cogs on background threads, and reconciles the servers table with the servers the bot
+joined or left while it was offline."""
+
+import asyncio
+import time
+from typing import Callable, Iterable, List, Tuple
+import discord
+import NewBotCache
+
+class StartupWarmup():
+    """StartupWarmup object runs the bot's warm-up once and records how long each of its steps took. Cogs register
+    the blocking loads they need finished before serving, such as compiling their moderation indexes, and wait for
+    the warm-up with waitUntilReady.
+    """
+    def __init__(self, cache: NewBotCache.Cache):
+        self.cache = cache
+
+        # backgroundLoads stores (name, function) pairs of the blocking loads run on background threads
+        self.backgroundLoads = []
+
+        # timings stores the seconds taken by each step of the warm-up by name, with rowCounts storing the number
+        # of rows read from each table and the joined and left lists storing the servers reconciled
+        self.timings = {}
+        self.rowCounts = {}
+        self.joinedGuildIDs = []
+        self.leftGuildIDs = []
+
+        self.started = False
+        self.ready = asyncio.Event()
+
+    def registerBackgroundLoad(self, name: str, load: Callable[[], None]):
+        """Adds a blocking load run on a background thread during the warm-up.
+        """
+        self.backgroundLoads.append((name, load))
+
+    async def waitUntilReady(self):
+        await self.ready.wait()
+
+    async def run(self, guilds: Iterable[discord.Guild]):
+        """Runs the warm-up for the given guilds, the guilds the bot is in. The background loads are started
+        first so that they overlap with the database work. A failing step is reported and the warm-up continues
+        without it, the state it would have loaded being loaded lazily instead. Does nothing if the warm-up has
+        already been started.
+        """
+        if (self.started):
+            return
+        self.started = True
+
+        start = time.perf_counter()
+        loop = asyncio.get_event_loop()
+        backgroundTasks = [(name, loop.run_in_executor(None, self.timeLoad, load)) for name, load in self.backgroundLoads]
+
+        try:
+            stepStart = time.perf_counter()
+            self.rowCounts = await self.cache.warmGuildState()
+            self.timings["guild state"] = time.perf_counter() - stepStart
+
+            stepStart = time.perf_counter()
+            self.joinedGuildIDs, self.leftGuildIDs = await self.reconcileGuilds([guild.id for guild in guilds])
+            self.timings["reconcile"] = time.perf_counter() - stepStart
+        except Exception as e:
+            print(f"Warm-up of guild state failed: {e}")
+
+        for name, task in backgroundTasks:
+            try:
+                self.timings[name] = await task
+            except Exception as e:
+                print(f"Warm-up load '{name}' failed: {e}")
+
+        self.timings["total"] = time.perf_counter() - start
+        self.ready.set()
+        print(self.describe())
+
+    async def reconcileGuilds(self, guildIDs: List[int]) -> Tuple[List[int], List[int]]:
+        """Adds the servers the bot joined while offline to the servers table and removes the servers it left,
+        returning lists of the joined and left guild IDs. Must be run after the guild state is loaded, as the
+        servers stored are read from the prefix map.
+        """
+        currentGuildIDs = set(guildIDs)
+        joinedGuildIDs = [guildID for guildID in guildIDs if guildID not in self.cache.prefixMap]
+        leftGuildIDs = [guildID for guildID in self.cache.prefixMap if guildID not in currentGuildIDs]
+
+        for guildID in joinedGuildIDs:
+            await self.cache.addServer(guildID)
+        for guildID in leftGuildIDs:
+            await self.cache.remServer(guildID)
+
+        return (joinedGuildIDs, leftGuildIDs)
+
+    @staticmethod
+    def timeLoad(load: Callable[[], None]) -> float:
+        """Runs the load, returning the seconds it took.
+        """
+        start = time.perf_counter()
+        load()
+        return time.perf_counter() - start
+
+    def describe(self) -> str:
+        """Returns a summary of the warm-up, giving the time of each step, the rows loaded, and the servers
+        reconciled.
+        """
+        timings = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.timings.items())
+        rows = ", ".join(f"{count} {tableName}" for tableName, count in self.rowCounts.items())
+        return (f"Warm-up complete, ready to serve: {timings}. Loaded {rows}. "
+            f"Joined {len(self.joinedGuildIDs)} and left {len(self.leftGuildIDs)} server(s) while offline.")
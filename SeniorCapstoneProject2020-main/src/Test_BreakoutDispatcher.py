@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+import discord
+import pytest
+import BreakoutDispatcher
+import BulkOperations
+
+class FakeVoiceChannel(discord.VoiceChannel):
+    # members is a property reading the guild's voice states on real channels
+    members = None
+
+    def __init__(self, channelID: int, categoryID: int):
+        self.id = channelID
+        self.category_id = categoryID
+        self.members = []
+
+class FakeMember():
+    def __init__(self, memberID: int, roles: list, channel: FakeVoiceChannel = None):
+        self.id = memberID
+        self.roles = roles
+        self.voice = None
+        self.moveTo(channel)
+
+    def moveTo(self, channel: FakeVoiceChannel):
+        if (self.voice is not None):
+            self.voice.channel.members.remove(self)
+        self.voice = SimpleNamespace(channel=channel) if (channel is not None) else None
+        if (channel is not None):
+            channel.members.append(self)
+
+    async def move_to(self, channel: FakeVoiceChannel):
+        await asyncio.sleep(0)
+        if (self.id in FAILING_MEMBER_IDS):
+            raise discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions")
+        self.moveTo(channel)
+
+    def __str__(self):
+        return f"member{self.id}"
+
+# members whose moves fail with Forbidden
+FAILING_MEMBER_IDS = {1029}
+
+## fixtures ##
+@pytest.fixture
+def classroom():
+    """A lecture voice channel holding a teacher and 30 groups of 5 students, with one student in no group and
+    one group without a voice channel
+    """
+    lecture = FakeVoiceChannel(1, None)
+    textChannels = [SimpleNamespace(id=2000 + i, category_id=100 + i) for i in range(31)]
+    voiceChannels = {100 + i: FakeVoiceChannel(3000 + i, 100 + i) for i in range(30)}
+    guild = SimpleNamespace(channels=[lecture] + textChannels + list(voiceChannels.values()))
+
+    groupRoles = [SimpleNamespace(id=500 + i, name=f"Group {i + 1}") for i in range(31)]
+    groupCategories = {role.id: 100 + i for i, role in enumerate(groupRoles)}
+    everyone = SimpleNamespace(id=1, name="@everyone")
+
+    teacher = FakeMember(1, [everyone], lecture)
+    students = [FakeMember(1000 + i, [everyone, groupRoles[i // 5]], lecture) for i in range(155)]
+    loner = FakeMember(2000, [everyone], lecture)
+
+    return SimpleNamespace(guild=guild, lecture=lecture, groupCategories=groupCategories, voiceChannels=voiceChannels,
+        teacher=teacher, students=students, loner=loner)
+
+
+## unit tests ##
+def testMapGroupVoiceChannels(classroom):
+    groupVoiceChannels = BreakoutDispatcher.mapGroupVoiceChannels(classroom.guild, classroom.groupCategories)
+    assert groupVoiceChannels == {500 + i: classroom.voiceChannels[100 + i] for i in range(30)}
+
+def testPlanBreakoutSend(classroom):
+    groupVoiceChannels = BreakoutDispatcher.mapGroupVoiceChannels(classroom.guild, classroom.groupCategories)
+    members = [member for member in classroom.lecture.members if member != classroom.teacher]
+    plan = BreakoutDispatcher.planBreakoutSend(members, classroom.groupCategories, groupVoiceChannels)
+
+    assert len(plan.moves) == 150
+    assert all(channel.category_id == 100 + (member.id - 1000) // 5 for member, channel in plan.moves.items())
+    assert [(str(member), reason) for member, reason in plan.unmoved] == [("member1150", "group Group 31 has no voice channel"),
+        ("member1151", "group Group 31 has no voice channel"), ("member1152", "group Group 31 has no voice channel"),
+        ("member1153", "group Group 31 has no voice channel"), ("member1154", "group Group 31 has no voice channel"),
+        ("member2000", "not in a group")]
+
+def testPlanBreakoutSend_HighestGroupRole(classroom):
+    groupVoiceChannels = BreakoutDispatcher.mapGroupVoiceChannels(classroom.guild, classroom.groupCategories)
+    student = classroom.students[0]
+    student.roles.append(SimpleNamespace(id=503, name="Group 4"))
+
+    plan = BreakoutDispatcher.planBreakoutSend([student], classroom.groupCategories, groupVoiceChannels)
+    assert plan.moves == {student: classroom.voiceChannels[103]}
+
+@pytest.mark.asyncio
+async def testBreakoutSendAndReturn(classroom):
+    executor = BulkOperations.BulkOperationExecutor(maxConcurrency=10, maxRetries=0)
+    groupVoiceChannels = BreakoutDispatcher.mapGroupVoiceChannels(classroom.guild, classroom.groupCategories)
+    members = [member for member in classroom.lecture.members if member != classroom.teacher]
+
+    plan = BreakoutDispatcher.planBreakoutSend(members, classroom.groupCategories, groupVoiceChannels)
+    report = await BreakoutDispatcher.runBreakoutPlan(plan, executor)
+    assert plan.summary(report).startswith("149 member(s) moved. 7 member(s) not moved:\n")
+    assert "member1029: Missing Permissions" in plan.summary(report)
+    assert len(classroom.lecture.members) == 8
+
+    plan = BreakoutDispatcher.planBreakoutReturn(groupVoiceChannels, classroom.lecture, [classroom.teacher])
+    report = await BreakoutDispatcher.runBreakoutPlan(plan, executor)
+    assert (len(report.succeeded) == 149) and (len(classroom.lecture.members) == 157)
+
+def testBreakoutPlan_SummaryTruncated(classroom):
+    plan = BreakoutDispatcher.BreakoutPlan()
+    plan.unmoved = [(student, "not in a group") for student in classroom.students[:12]]
+    report = BulkOperations.BulkOperationReport([])
+
+    assert plan.summary(report, maxUnmovedListed=10).endswith("member1009: not in a group\n...and 2 more")
@@ -0,0 +1,113 @@
+import asyncio
+from typing import Optional
+import pytest
+import discord
+import BulkOperations
+
+class FakeResponse():
+    def __init__(self, status: int, headers: Optional[dict] = None):
+        self.status = status
+        self.reason = "Fake Response"
+        self.headers = headers or {}
+
+class FakeChannel():
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+        return self
+
+    async def edit(self, content):
+        self.sent.append(content)
+
+## fixtures ##
+@pytest.fixture(autouse=True)
+def shortDelays(monkeypatch):
+    monkeypatch.setattr(BulkOperations, "BULK_RETRY_BASE_DELAY", 0.001)
+
+
+## unit tests ##
+@pytest.mark.asyncio
+async def testRun_ConcurrencyCapped():
+    executor = BulkOperations.BulkOperationExecutor(maxConcurrency=3)
+    running = 0
+    maxRunning = 0
+
+    async def operation(item):
+        nonlocal running, maxRunning
+        running += 1
+        maxRunning = max(maxRunning, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return item * 2
+
+    report = await executor.run(range(20), operation)
+
+    assert (maxRunning == 3) and (report.results == [i * 2 for i in range(20)]) and (len(report.succeeded) == 20)
+
+@pytest.mark.asyncio
+async def testRun_ConcurrencyCappedAcrossOperations():
+    executor = BulkOperations.BulkOperationExecutor(maxConcurrency=3)
+    running = 0
+    maxRunning = 0
+
+    async def operation(item):
+        nonlocal running, maxRunning
+        running += 1
+        maxRunning = max(maxRunning, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return item
+
+    reports = await asyncio.gather(executor.run(range(20), operation), executor.run(range(20), operation))
+
+    assert (maxRunning == 3) and all(len(report.succeeded) == 20 for report in reports)
+
+@pytest.mark.asyncio
+async def testRun_RetriesRateLimit():
+    executor = BulkOperations.BulkOperationExecutor()
+    attempts = {}
+
+    async def operation(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if (item == 1 and attempts[item] < 3):
+            raise discord.HTTPException(FakeResponse(429, {"Retry-After": "0.01"}), "rate limited")
+        return item
+
+    report = await executor.run([0, 1, 2], operation)
+
+    assert (attempts[1] == 3) and (report.results == [0, 1, 2]) and (report.failed == []) and (executor.pausedUntil > 0)
+
+@pytest.mark.asyncio
+async def testRun_ReportsFailures():
+    executor = BulkOperations.BulkOperationExecutor(maxRetries=2)
+    attempts = {}
+
+    async def operation(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if (item == "forbidden"):
+            raise discord.Forbidden(FakeResponse(403), "Missing Permissions")
+        elif (item == "server error"):
+            raise discord.HTTPException(FakeResponse(500), "Internal Server Error")
+        return item
+
+    report = await executor.run(["ok", "forbidden", "server error"], operation)
+    failedItems = {item for item, _ in report.failed}
+
+    assert (failedItems == {"forbidden", "server error"}) and (attempts["forbidden"] == 1) and (attempts["server error"] == 3)
+    assert (report.successfulResults == [("ok", "ok")]) and ("Missing Permissions" in report.summary())
+
+@pytest.mark.asyncio
+async def testRun_Progress():
+    executor = BulkOperations.BulkOperationExecutor()
+    channel = FakeChannel()
+
+    async def operation(item):
+        return item
+
+    await executor.run(range(BulkOperations.BULK_PROGRESS_MIN_ITEMS), operation, channel, "Kicking members")
+    await executor.run(range(3), operation, channel, "Assigning roles")
+
+    assert channel.sent[0] == f"Kicking members: 0/{BulkOperations.BULK_PROGRESS_MIN_ITEMS}"
+    assert channel.sent[-1].endswith("done, 0 failed.") and (len(channel.sent) == 2)
@@ -0,0 +1,18 @@
+import pytest
+import NewBotCache
+
+## unit tests ##
+@pytest.mark.parametrize("profile", list(NewBotCache.CONNECTION_PROFILES))
+def testCreateConnection_AppliesProfile(tmp_path, profile):
+    cache = NewBotCache.Cache(str(tmp_path / "LocalCache.db"), connectionProfile=profile)
+    pragmas = cache.getConnectionPragmas()
+    cache.dbConnection.close()
+
+    expected = NewBotCache.CONNECTION_PROFILES[profile]
+    synchronousLevels = {"OFF": 0, "NORMAL": 1, "FULL": 2}
+    assert (pragmas["journal_mode"] == "wal") and (pragmas["synchronous"] == synchronousLevels[expected["synchronous"]])
+    assert pragmas["cache_size"] == expected["cache_size"]
+
+def testCreateConnection_UnknownProfile():
+    with pytest.raises(ValueError):
+        NewBotCache.Cache(':memory:', connectionProfile="unsafe")
@@ -0,0 +1,83 @@
+import json
+import pytest
+from types import SimpleNamespace
+import NewBotCache
+import EduBotChecks
+
+## fixtures ##
+@pytest.fixture
+def sampleCache(monkeypatch):
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert server and privileged role
+    cache.createCursor().execute("""INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)""", (798358551230677042, '!', False))
+    cache.createCursor().execute("""INSERT INTO privileged_roles(role_id, server_id) VALUES(?,?)""", (805602260993310752, 798358551230677042))
+
+    # count the queries made against the privileged_roles table
+    cache.privilegedRoleQueries = 0
+    fetchAll = cache.fetchAll
+    def countingFetchAll(selectStatement, parameters):
+        if ("privileged_roles" in selectStatement):
+            cache.privilegedRoleQueries += 1
+        return fetchAll(selectStatement, parameters)
+    monkeypatch.setattr(cache, "fetchAll", countingFetchAll)
+
+    monkeypatch.setattr(EduBotChecks, "cache", cache)
+    monkeypatch.setattr(EduBotChecks, "DEV_IDS", frozenset([210687957768601600]))
+    return cache
+
+def makeContext(authorID: int, roleIDs: list):
+    author = SimpleNamespace(id=authorID, roles=[SimpleNamespace(id=roleID) for roleID in roleIDs])
+    return SimpleNamespace(author=author, guild=SimpleNamespace(id=798358551230677042, owner_id=1))
+
+
+## unit tests ##
+@pytest.mark.asyncio
+async def testHasElevatedPrivileges_PrivilegedRole(sampleCache: NewBotCache.Cache):
+    result = await EduBotChecks.hasElevatedPrivileges(makeContext(5, [805602260993310752]))
+    assert result
+
+@pytest.mark.asyncio
+async def testHasElevatedPrivileges_NoPrivilegedRole(sampleCache: NewBotCache.Cache):
+    result = await EduBotChecks.hasElevatedPrivileges(makeContext(5, [805892126675697686]))
+    assert not result
+
+@pytest.mark.asyncio
+async def testHasElevatedPrivileges_OwnerAndDevSkipQuery(sampleCache: NewBotCache.Cache):
+    isOwner = await EduBotChecks.hasElevatedPrivileges(makeContext(1, []))
+    isDev = await EduBotChecks.hasElevatedPrivileges(makeContext(210687957768601600, []))
+    assert isOwner and isDev and (sampleCache.privilegedRoleQueries == 0)
+
+@pytest.mark.asyncio
+async def testHasElevatedPrivileges_MemoizedPerContext(sampleCache: NewBotCache.Cache):
+    ctx = makeContext(5, [805602260993310752])
+    await EduBotChecks.hasElevatedPrivileges(ctx)
+
+    # the parent group's check has already run, so the subcommand's check reuses its result
+    await sampleCache.remPrivilegedRole(798358551230677042, 805602260993310752)
+    result = await EduBotChecks.hasElevatedPrivileges(ctx)
+    assert result
+
+@pytest.mark.asyncio
+async def testHasElevatedPrivileges_OneQueryPerGuild(sampleCache: NewBotCache.Cache):
+    for _ in range(5):
+        await EduBotChecks.hasElevatedPrivileges(makeContext(5, [805602260993310752]))
+    assert sampleCache.privilegedRoleQueries == 1
+
+@pytest.mark.asyncio
+async def testHasElevatedPrivileges_RoleRemoved(sampleCache: NewBotCache.Cache):
+    await EduBotChecks.hasElevatedPrivileges(makeContext(5, [805602260993310752]))
+    await sampleCache.remPrivilegedRole(798358551230677042, 805602260993310752)
+    result = await EduBotChecks.hasElevatedPrivileges(makeContext(5, [805602260993310752]))
+    assert not result
+
+def testLoadDevIDs(tmp_path):
+    devIDsFile = tmp_path / "DevIDs.json"
+    devIDsFile.write_text(json.dumps([210687957768601600, "269684001424408577"]))
+    assert EduBotChecks.loadDevIDs(str(devIDsFile)) == frozenset([210687957768601600, 269684001424408577])
+
+def testLoadDevIDs_MissingFile(tmp_path):
+    assert EduBotChecks.loadDevIDs(str(tmp_path / "missing.json")) == frozenset()
+
+def testDevIDsFile_Loaded():
+    assert 210687957768601600 in EduBotChecks.loadDevIDs(EduBotChecks.DEV_IDS_FILE)
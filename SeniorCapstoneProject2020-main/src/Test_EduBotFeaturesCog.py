@@ -0,0 +1,148 @@
+import time
+from types import SimpleNamespace
+import discord
+import pytest
+import BulkOperations
+import NewBotCache
+import JobScheduler
+import PollTallies
+import EduBotFeaturesCog
+from EduBotFeaturesCog import EduBotFeatures
+
+GUILD_ID = 798358551230677042
+CHANNEL_ID = 799027610283819029
+EVERYONE_ROLE_ID = 798358551230677042
+
+class FakeResponse():
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "Fake Response"
+
+class FakeChannel():
+    def __init__(self, channelID: int, overwrites: dict, failEdits: bool = False):
+        self.id = channelID
+        self.overwrites = overwrites
+        self.failEdits = failEdits
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+    async def edit(self, overwrites: dict):
+        if (self.failEdits):
+            raise discord.Forbidden(FakeResponse(403), "Missing Permissions")
+        self.overwrites = overwrites
+
+    def __str__(self):
+        return f"channel {self.id}"
+
+class FakeGuild():
+    def __init__(self, channels: list, roles: list):
+        self.id = GUILD_ID
+        self.channels = channels
+        self.roles = {role.id: role for role in roles}
+
+    def get_role(self, roleID: int):
+        return self.roles.get(roleID)
+
+    def get_member(self, memberID: int):
+        return None
+
+    def get_channel(self, channelID: int):
+        return next((channel for channel in self.channels if channel.id == channelID), None)
+
+class FakeContext():
+    def __init__(self, guild: FakeGuild):
+        self.guild = guild
+        self.channel = None
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+## fixtures ##
+@pytest.fixture
+def lockedCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert a locked server
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, (GUILD_ID, '!', True))
+    return cache
+
+async def lockedCog(cache: NewBotCache.Cache, guild: FakeGuild):
+    """Returns the cog with an unlock scheduled for the guild, and the guild's channels snapshotted as
+    allowing everyone to send messages
+    """
+    scheduler = JobScheduler.JobScheduler(cache)
+    bot = SimpleNamespace(get_guild=lambda guildID: guild if (guildID == GUILD_ID) else None)
+    cog = EduBotFeatures(bot, cache, scheduler, PollTallies.PollTallies(cache))
+    cog.bulkExecutor = BulkOperations.BulkOperationExecutor(maxRetries=0)
+
+    await scheduler.schedule(GUILD_ID, "unlock", time.time() + 3600, CHANNEL_ID)
+    await cache.addPermOverwrites(GUILD_ID, [(channel.id, EVERYONE_ROLE_ID, discord.PermissionOverwrite(send_messages=True))
+        for channel in guild.channels])
+    await cache.flushWrites()
+    return cog
+
+def sampleGuild(failEdits: bool) -> FakeGuild:
+    everyone = discord.Object(EVERYONE_ROLE_ID)
+    locked = {everyone: discord.PermissionOverwrite(send_messages=False)}
+    channels = [FakeChannel(CHANNEL_ID, dict(locked)), FakeChannel(CHANNEL_ID + 1, dict(locked), failEdits)]
+    return FakeGuild(channels, [everyone])
+
+
+## unlock command tests ##
+@pytest.mark.asyncio
+async def testUnlockServer_CancelsScheduledUnlock(lockedCache: NewBotCache.Cache):
+    guild = sampleGuild(failEdits=False)
+    cog = await lockedCog(lockedCache, guild)
+    ctx = FakeContext(guild)
+
+    await EduBotFeatures.unlockServer.callback(cog, ctx)
+    await lockedCache.flushWrites()
+
+    assert (ctx.sent == ["Server unlocked!"]) and (cog.scheduler.getJobs(GUILD_ID) == [])
+    assert await lockedCache.getServerLockStatus(GUILD_ID) == False
+
+@pytest.mark.asyncio
+async def testUnlockServer_PartialFailureKeepsScheduledUnlock(lockedCache: NewBotCache.Cache):
+    guild = sampleGuild(failEdits=True)
+    cog = await lockedCog(lockedCache, guild)
+    ctx = FakeContext(guild)
+
+    await EduBotFeatures.unlockServer.callback(cog, ctx)
+    await lockedCache.flushWrites()
+
+    assert ctx.sent[0].startswith("Some channels could not be restored")
+    assert [job.jobType for job in cog.scheduler.getJobs(GUILD_ID)] == ["unlock"]
+    assert len(await lockedCache.getScheduledJobsList(GUILD_ID)) == 1
+    assert await lockedCache.getServerLockStatus(GUILD_ID) == True
+
+
+## scheduled unlock tests ##
+@pytest.mark.asyncio
+async def testRunScheduledUnlock_PartialFailureRetried(lockedCache: NewBotCache.Cache):
+    guild = sampleGuild(failEdits=True)
+    cog = await lockedCog(lockedCache, guild)
+    job, = cog.scheduler.getJobs(GUILD_ID)
+
+    await cog.scheduler.runJob(job)
+    await lockedCache.flushWrites()
+
+    assert guild.channels[0].sent[0].startswith("Some channels could not be restored")
+    assert (cog.scheduler.getJobs(GUILD_ID) == [job]) and (job.dueTime >= time.time() + EduBotFeaturesCog.SCHEDULED_UNLOCK_RETRY_DELAY - 60)
+    (_, _, _, _, dueTime, _), = await lockedCache.getScheduledJobsList(GUILD_ID)
+    assert dueTime == job.dueTime
+
+@pytest.mark.asyncio
+async def testRunScheduledUnlock_Succeeds(lockedCache: NewBotCache.Cache):
+    guild = sampleGuild(failEdits=False)
+    cog = await lockedCog(lockedCache, guild)
+    job, = cog.scheduler.getJobs(GUILD_ID)
+
+    await cog.scheduler.runJob(job)
+    await lockedCache.flushWrites()
+
+    assert (guild.channels[0].sent == ["Server unlocked!"]) and (cog.scheduler.getJobs(GUILD_ID) == [])
+    assert await lockedCache.getScheduledJobsList(GUILD_ID) == []
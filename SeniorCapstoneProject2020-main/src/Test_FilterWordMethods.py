@@ -0,0 +1,70 @@
+import pytest
+import NewBotCache
+from sqlite3.dbapi2 import IntegrityError
+
+@pytest.fixture
+def emptyCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert server
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, (798358551230677042, '!', False))
+
+    return cache
+
+@pytest.fixture
+def sampleCache():
+    cache = NewBotCache.Cache(':memory:')
+    # insert servers
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().executemany(insertStatement, [(798358551230677042, '!', False), (394215266986491904, '.', False)])
+
+    # insert words
+    insertStatement = """INSERT INTO filter_words(server_id, word) VALUES(?,?)"""
+    parameters = [
+        (798358551230677042, "homework"),
+        (798358551230677042, "pop quiz"),
+        (394215266986491904, "detention")
+    ]
+    cache.createCursor().executemany(insertStatement, parameters)
+
+    return cache
+
+@pytest.mark.asyncio
+async def testAddFilterWord_Single(emptyCache: NewBotCache.Cache):
+    await emptyCache.addFilterWord(798358551230677042, "Homework")
+    results = await emptyCache.getServerFilterWordsList(798358551230677042)
+    assert results == ["homework"]
+
+@pytest.mark.asyncio
+async def testAddFilterWord_ListWithDuplicate(emptyCache: NewBotCache.Cache):
+    await emptyCache.addFilterWord(798358551230677042, ["pop quiz", "homework", "HOMEWORK"])
+    results = await emptyCache.getServerFilterWordsList(798358551230677042)
+    assert results == ["homework", "pop quiz"]
+
+@pytest.mark.asyncio
+async def testAddFilterWord_NonStr(emptyCache: NewBotCache.Cache):
+    with pytest.raises(TypeError):
+        await emptyCache.addFilterWord(798358551230677042, ["homework", 5])
+
+@pytest.mark.asyncio
+async def testAddFilterWord_None(emptyCache: NewBotCache.Cache):
+    with pytest.raises(IntegrityError):
+        await emptyCache.addFilterWord(798358551230677042, None)
+
+@pytest.mark.asyncio
+async def testRemFilterWord_Single(sampleCache: NewBotCache.Cache):
+    await sampleCache.remFilterWord(798358551230677042, "Pop Quiz")
+    results = await sampleCache.getServerFilterWordsList(798358551230677042)
+    assert results == ["homework"]
+
+@pytest.mark.asyncio
+async def testGetServerFilterWordsList_OtherServer(sampleCache: NewBotCache.Cache):
+    results = await sampleCache.getServerFilterWordsList(394215266986491904)
+    assert results == ["detention"]
+
+@pytest.mark.asyncio
+async def testGetServerFilterWordsList_RemServer(sampleCache: NewBotCache.Cache):
+    await sampleCache.remServer(798358551230677042)
+    results = await sampleCache.getServerFilterWordsList(798358551230677042)
+    assert results == []
@@ -189,4 +189,17 @@ async def testIsGroupRole_GroupRole(sampleCache: NewBotCache.Cache):
 @pytest.mark.asyncio
 async def testIsGroupRole_NotGroupRole(sampleCache: NewBotCache.Cache):
     result = await sampleCache.isGroupRole(798358551230677042, 805602260993310751)
-    assert not result
\ No newline at end of file
+    assert not result
+
+@pytest.mark.asyncio
+async def testGetGroupCategoriesDict(sampleCache: NewBotCache.Cache):
+    expectedResults = {805602260993310752: 834165166769307678,
+                       805892126675697686: 834165167528607784,
+                       806302209130102815: 834165168102440990}
+    results = await sampleCache.getGroupCategoriesDict(798358551230677042)
+    assert results == expectedResults
+
+@pytest.mark.asyncio
+async def testGetGroupCategoriesDict_Incorrect_GuildID(sampleCache: NewBotCache.Cache):
+    with pytest.raises(TypeError):
+        await sampleCache.getGroupCategoriesDict("Value")
@@ -0,0 +1,219 @@
+import asyncio
+import datetime
+import sqlite3
+from types import SimpleNamespace
+import pytest
+import NewBotCache
+import HistoryScanner
+import MessagePurge
+
+GUILD_ID = 798358551230677042
+CHANNEL_ID = 799027610283819029
+
+class FakeAuthor():
+    def __init__(self, authorID: int):
+        self.id = authorID
+
+    def __str__(self):
+        return f"user{self.id}"
+
+class FakeMessage():
+    def __init__(self, channel: "FakeChannel", messageID: int, author: FakeAuthor):
+        self.channel = channel
+        self.id = messageID
+        self.author = author
+        self.created_at = datetime.datetime.utcnow()
+
+class FakeSentMessage():
+    def __init__(self, content: str):
+        self.content = content
+
+    async def edit(self, content: str):
+        self.content = content
+
+class FakeHistory():
+    def __init__(self, channel: "FakeChannel", messages: list):
+        self.channel = channel
+        self.messages = messages
+
+    async def flatten(self):
+        # the gate lets a test act while the scan waits on a page
+        if (self.channel.gate is not None):
+            await self.channel.gate.wait()
+        self.channel.pagesFetched += 1
+        return self.messages
+
+class FakeChannel():
+    def __init__(self, messageCount: int):
+        self.id = CHANNEL_ID
+        self.messages = [FakeMessage(self, i, FakeAuthor(1 + i % 2)) for i in range(1, messageCount + 1)]
+        self.sent = []
+        self.pagesFetched = 0
+        self.gate = None
+
+    def history(self, limit=None, before=None, after=None, oldest_first=None):
+        messages = sorted(self.messages, key=lambda message: message.id, reverse=not oldest_first)
+        messages = [message for message in messages if (before is None or message.id < before.id) and (after is None or message.id > after.id)]
+        return FakeHistory(self, messages[:limit])
+
+    async def delete_messages(self, messages):
+        for message in messages:
+            self.messages.remove(message)
+
+    async def send(self, content: str):
+        message = FakeSentMessage(content)
+        self.sent.append(message)
+        return message
+
+    def remainingIDs(self) -> list:
+        return [message.id for message in self.messages]
+
+def createScanner(cache: NewBotCache.Cache, channel: FakeChannel) -> HistoryScanner.HistoryScanner:
+    bot = SimpleNamespace(get_channel=lambda channelID: channel if (channelID == channel.id) else None)
+    scanner = HistoryScanner.HistoryScanner(bot, cache)
+    scanner.registerScanType("deleteUser", lambda scan: (lambda message: message.author.id in scan.payload["authorIDs"]))
+    scanner.registerScanType("deleteAmount", lambda scan: (lambda message: True), oldestFirst=True)
+    return scanner
+
+async def waitForScan(scan: HistoryScanner.HistoryScan):
+    if (scan.task is not None):
+        await scan.task
+
+## fixtures ##
+@pytest.fixture
+def emptyCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert servers
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, (GUILD_ID, '!', False))
+    return cache
+
+@pytest.fixture
+def sampleChannel():
+    return FakeChannel(250)
+
+
+## cache method tests ##
+@pytest.mark.asyncio
+async def testAddHistoryScan(emptyCache: NewBotCache.Cache):
+    scanID = await emptyCache.addHistoryScan(GUILD_ID, CHANNEL_ID, "deleteUser", {"authorIDs": [1]})
+    result = await emptyCache.getHistoryScansList(GUILD_ID)
+    assert result == [(scanID, GUILD_ID, CHANNEL_ID, "deleteUser", "running", None, 0, {"authorIDs": [1]}, {})]
+
+@pytest.mark.asyncio
+async def testAddHistoryScan_TypeErrors(emptyCache: NewBotCache.Cache):
+    with pytest.raises(TypeError):
+        await emptyCache.addHistoryScan(str(GUILD_ID), CHANNEL_ID, "deleteUser")
+    with pytest.raises(sqlite3.IntegrityError):
+        await emptyCache.addHistoryScan(GUILD_ID, None, "deleteUser")
+
+@pytest.mark.asyncio
+async def testSetHistoryScanCheckpoint(emptyCache: NewBotCache.Cache):
+    scanID = await emptyCache.addHistoryScan(GUILD_ID, CHANNEL_ID, "deleteUser")
+    await emptyCache.setHistoryScanCheckpoint(scanID, 150, 100, {"bulkDeleted": 50})
+    await emptyCache.setHistoryScanStatus(scanID, "paused")
+
+    result = await emptyCache.getHistoryScansList()
+    assert result[0][4:] == ("paused", 150, 100, {}, {"bulkDeleted": 50})
+
+@pytest.mark.asyncio
+async def testRemServer_CascadesHistoryScans(emptyCache: NewBotCache.Cache):
+    await emptyCache.addHistoryScan(GUILD_ID, CHANNEL_ID, "deleteUser")
+    await emptyCache.remServer(GUILD_ID)
+    assert await emptyCache.getHistoryScansList() == []
+
+
+## scanner tests ##
+@pytest.mark.asyncio
+async def testStartScan_DeletesMatchingMessages(emptyCache: NewBotCache.Cache, sampleChannel: FakeChannel):
+    scanner = createScanner(emptyCache, sampleChannel)
+    scan = await scanner.startScan(GUILD_ID, CHANNEL_ID, "deleteUser", {"authorIDs": [1], "beforeID": 201})
+    await waitForScan(scan)
+
+    assert sampleChannel.remainingIDs() == list(range(1, 201, 2)) + list(range(201, 251))
+    assert (scan.processedCount == 200) and (sampleChannel.pagesFetched == 3)
+    assert (scanner.scans == {}) and (await emptyCache.getHistoryScansList() == [])
+    assert sampleChannel.sent[-1].content.startswith("100 message(s) deleted.")
+
+@pytest.mark.asyncio
+async def testStartScan_OldestFirstLimit(emptyCache: NewBotCache.Cache, sampleChannel: FakeChannel):
+    scanner = createScanner(emptyCache, sampleChannel)
+    scan = await scanner.startScan(GUILD_ID, CHANNEL_ID, "deleteAmount", {"limit": 120})
+    await waitForScan(scan)
+
+    assert sampleChannel.remainingIDs() == list(range(121, 251))
+
+@pytest.mark.asyncio
+async def testPauseAndResume(emptyCache: NewBotCache.Cache, sampleChannel: FakeChannel):
+    scanner = createScanner(emptyCache, sampleChannel)
+    sampleChannel.gate = asyncio.Event()
+    scan = await scanner.startScan(GUILD_ID, CHANNEL_ID, "deleteUser", {"authorIDs": [2]})
+    await asyncio.sleep(0)
+
+    # the scan stops after the first message of the page it is waiting on
+    paused = await scanner.pause(GUILD_ID, scan.scanID)
+    sampleChannel.gate.set()
+    await waitForScan(scan)
+
+    storedScan, = await emptyCache.getHistoryScansList()
+    assert paused and (storedScan[4:7] == ("paused", 250, 1)) and (len(sampleChannel.messages) == 250)
+
+    resumed = await scanner.resume(GUILD_ID, scan.scanID)
+    await waitForScan(scan)
+    assert resumed and (sampleChannel.remainingIDs() == list(range(2, 251, 2))) and (scan.processedCount == 250)
+
+@pytest.mark.asyncio
+async def testResume_NotPaused(emptyCache: NewBotCache.Cache, sampleChannel: FakeChannel):
+    scanner = createScanner(emptyCache, sampleChannel)
+    scan = await scanner.startScan(GUILD_ID, CHANNEL_ID, "deleteUser", {"authorIDs": [2]})
+    assert not await scanner.resume(GUILD_ID, scan.scanID)
+    assert not await scanner.pause(123456789012345678, scan.scanID)
+    await waitForScan(scan)
+
+@pytest.mark.asyncio
+async def testCancel(emptyCache: NewBotCache.Cache, sampleChannel: FakeChannel):
+    scanner = createScanner(emptyCache, sampleChannel)
+    sampleChannel.gate = asyncio.Event()
+    scan = await scanner.startScan(GUILD_ID, CHANNEL_ID, "deleteUser", {"authorIDs": [1, 2]})
+    await asyncio.sleep(0)
+
+    cancelled = await scanner.cancel(GUILD_ID, scan.scanID)
+    sampleChannel.gate.set()
+    await asyncio.sleep(0.01)
+
+    assert cancelled and (len(sampleChannel.messages) == 250) and (scanner.scans == {}) and (await emptyCache.getHistoryScansList() == [])
+
+@pytest.mark.asyncio
+async def testStart_ResumesFromCheckpoint(emptyCache: NewBotCache.Cache, sampleChannel: FakeChannel):
+    # a scan interrupted by a restart after processing messages 250 to 101
+    scanID = await emptyCache.addHistoryScan(GUILD_ID, CHANNEL_ID, "deleteUser", {"authorIDs": [1, 2]})
+    report = MessagePurge.PurgeReport()
+    report.bulkDeleted = 150
+    await emptyCache.setHistoryScanCheckpoint(scanID, 101, 150, report.toDict())
+
+    scanner = createScanner(emptyCache, sampleChannel)
+    await scanner.start()
+    scan = scanner.scans[scanID]
+    await waitForScan(scan)
+
+    assert (sampleChannel.remainingIDs() == list(range(101, 251))) and (scan.processedCount == 250) and (scan.report.totalDeleted == 250)
+
+@pytest.mark.asyncio
+async def testStart_PausedScanNotRun(emptyCache: NewBotCache.Cache, sampleChannel: FakeChannel):
+    scanID = await emptyCache.addHistoryScan(GUILD_ID, CHANNEL_ID, "deleteUser", {"authorIDs": [1, 2]})
+    await emptyCache.setHistoryScanStatus(scanID, "paused")
+
+    scanner = createScanner(emptyCache, sampleChannel)
+    await scanner.start()
+    await asyncio.sleep(0.01)
+
+    assert (len(sampleChannel.messages) == 250) and ([scan.scanID for scan in scanner.getScans(GUILD_ID)] == [scanID])
+
+@pytest.mark.asyncio
+async def testRunScan_MissingChannelRemoved(emptyCache: NewBotCache.Cache, sampleChannel: FakeChannel):
+    scanner = createScanner(emptyCache, sampleChannel)
+    scan = await scanner.startScan(GUILD_ID, 1234, "deleteUser", {"authorIDs": [1]})
+    await waitForScan(scan)
+
+    assert (scanner.scans == {}) and (await emptyCache.getHistoryScansList() == [])
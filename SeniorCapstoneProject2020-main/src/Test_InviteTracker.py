@@ -0,0 +1,173 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import NewBotCache
+import InviteTracker
+
+GUILD_ID = 798358551230677042
+STUDENT_ROLE_ID = 805602260993310752
+TA_ROLE_ID = 805892126675697686
+
+class FakeGuild():
+    def __init__(self):
+        self.id = GUILD_ID
+        self.inviteList = [
+            SimpleNamespace(code="students", uses=4, max_uses=0),
+            SimpleNamespace(code="tas", uses=1, max_uses=0),
+            SimpleNamespace(code="plain", uses=7, max_uses=0)
+        ]
+        for invite in self.inviteList:
+            invite.guild = self
+        self.fetchCount = 0
+
+    def useInvite(self, code: str, times: int = 1):
+        next(invite for invite in self.inviteList if invite.code == code).uses += times
+
+    async def invites(self):
+        # the fetch takes a few event loop iterations, as a REST call would
+        self.fetchCount += 1
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return [SimpleNamespace(**vars(invite)) for invite in self.inviteList]
+
+    def __str__(self):
+        return "guild"
+
+def joinWith(tracker: InviteTracker.InviteTracker, guild: FakeGuild, code: str, count: int):
+    """Uses the invite count times and returns the joined members' role lookups, started together as a join burst
+    """
+    guild.useInvite(code, count)
+    return asyncio.gather(*[tracker.memberJoined(SimpleNamespace(guild=guild)) for _ in range(count)])
+
+## fixtures ##
+@pytest.fixture
+def sampleCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert servers
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, (GUILD_ID, '!', False))
+
+    # insert role invites, with the uses stored when they were last checked
+    insertStatement = """INSERT INTO role_invites(invite_id, server_id, role_id, uses_count) VALUES(?,?,?,?)"""
+    cache.createCursor().executemany(insertStatement, [("students", GUILD_ID, STUDENT_ROLE_ID, 4), ("tas", GUILD_ID, TA_ROLE_ID, 1)])
+    return cache
+
+
+## cache method tests ##
+@pytest.mark.asyncio
+async def testGetRoleInvitesDict(sampleCache: NewBotCache.Cache):
+    result = await sampleCache.getRoleInvitesDict(GUILD_ID)
+    assert result == {"students": (STUDENT_ROLE_ID, 4), "tas": (TA_ROLE_ID, 1)}
+
+@pytest.mark.asyncio
+async def testSetRoleInviteUses(sampleCache: NewBotCache.Cache):
+    await sampleCache.setRoleInviteUses(GUILD_ID, [("students", 30), ("tas", 2)])
+    assert await sampleCache.getRoleInvitesDict(GUILD_ID) == {"students": (STUDENT_ROLE_ID, 30), "tas": (TA_ROLE_ID, 2)}
+
+    with pytest.raises(TypeError):
+        await sampleCache.setRoleInviteUses(GUILD_ID, [("students", "30")])
+
+@pytest.mark.asyncio
+async def testAddRoleInvite_UsesCount(sampleCache: NewBotCache.Cache):
+    await sampleCache.addRoleInvite(GUILD_ID, "late", STUDENT_ROLE_ID, 12)
+    result = await sampleCache.getRoleInvitesDict(GUILD_ID)
+    assert result["late"] == (STUDENT_ROLE_ID, 12)
+
+
+## tracker tests ##
+@pytest.mark.asyncio
+async def testMemberJoined_BurstSharesOneFetch(sampleCache: NewBotCache.Cache):
+    guild = FakeGuild()
+    tracker = InviteTracker.InviteTracker(sampleCache)
+
+    roleIDs = await joinWith(tracker, guild, "students", 200)
+    assert (roleIDs == [STUDENT_ROLE_ID] * 200) and (guild.fetchCount == 1)
+    assert (await sampleCache.getRoleInvitesDict(GUILD_ID))["students"] == (STUDENT_ROLE_ID, 204)
+
+@pytest.mark.asyncio
+async def testMemberJoined_SequentialJoins(sampleCache: NewBotCache.Cache):
+    guild = FakeGuild()
+    tracker = InviteTracker.InviteTracker(sampleCache)
+
+    assert await joinWith(tracker, guild, "tas", 1) == [TA_ROLE_ID]
+    assert await joinWith(tracker, guild, "students", 1) == [STUDENT_ROLE_ID]
+    assert await joinWith(tracker, guild, "plain", 1) == [None]
+    assert guild.fetchCount == 3
+
+@pytest.mark.asyncio
+async def testMemberJoined_DifferentRolesUnresolved(sampleCache: NewBotCache.Cache):
+    guild = FakeGuild()
+    tracker = InviteTracker.InviteTracker(sampleCache)
+
+    guild.useInvite("tas")
+    assert await joinWith(tracker, guild, "students", 2) == [InviteTracker.UNRESOLVED_ROLE] * 2
+
+    # the snapshot is still moved forward, so later joins aren't affected
+    assert await joinWith(tracker, guild, "tas", 1) == [TA_ROLE_ID]
+
+@pytest.mark.asyncio
+async def testMemberJoined_FewerRoleUsesThanMembers(sampleCache: NewBotCache.Cache):
+    guild = FakeGuild()
+    tracker = InviteTracker.InviteTracker(sampleCache)
+
+    # one of the two members joined with an invite that gives no role
+    guild.useInvite("plain")
+    guild.useInvite("students")
+    results = await asyncio.gather(*[tracker.memberJoined(SimpleNamespace(guild=guild)) for _ in range(2)])
+    assert results == [InviteTracker.UNRESOLVED_ROLE] * 2
+
+@pytest.mark.asyncio
+async def testMemberJoined_BurstWithOneOtherInvite(sampleCache: NewBotCache.Cache):
+    guild = FakeGuild()
+    tracker = InviteTracker.InviteTracker(sampleCache)
+
+    # a class joins with the role invite along with one member using a personal invite
+    guild.useInvite("plain")
+    guild.useInvite("students", 30)
+    roleIDs = await asyncio.gather(*[tracker.memberJoined(SimpleNamespace(guild=guild)) for _ in range(31)])
+    assert roleIDs == [InviteTracker.UNRESOLVED_ROLE] * 31
+
+@pytest.mark.asyncio
+async def testMemberJoined_MixedBurstUnresolved(sampleCache: NewBotCache.Cache):
+    guild = FakeGuild()
+    tracker = InviteTracker.InviteTracker(sampleCache)
+    await joinWith(tracker, guild, "plain", 1)
+
+    # one member joins with the role invite and two with another invite, in any order
+    guild.useInvite("students")
+    guild.useInvite("plain", 2)
+    roleIDs = await asyncio.gather(*[tracker.memberJoined(SimpleNamespace(guild=guild)) for _ in range(3)])
+    assert roleIDs == [InviteTracker.UNRESOLVED_ROLE] * 3
+
+    # the role invite uses cover the members, but a member whose join hasn't arrived yet used another invite
+    guild.useInvite("students", 2)
+    guild.useInvite("plain")
+    roleIDs = await asyncio.gather(*[tracker.memberJoined(SimpleNamespace(guild=guild)) for _ in range(2)])
+    assert roleIDs == [InviteTracker.UNRESOLVED_ROLE] * 2
+
+@pytest.mark.asyncio
+async def testMemberJoined_ExhaustedInvite(sampleCache: NewBotCache.Cache):
+    guild = FakeGuild()
+    tracker = InviteTracker.InviteTracker(sampleCache)
+    await joinWith(tracker, guild, "plain", 1)
+
+    # the invite reaches its largest number of uses and is deleted before the join is worked out
+    invite = SimpleNamespace(code="class", uses=0, max_uses=30, guild=guild)
+    tracker.inviteCreated(invite)
+    tracker.addRoleInvite(GUILD_ID, "class", STUDENT_ROLE_ID, 0)
+    guild.inviteList.append(invite)
+    assert await joinWith(tracker, guild, "class", 29) == [STUDENT_ROLE_ID] * 29
+
+    guild.inviteList.remove(invite)
+    tracker.inviteDeleted(invite)
+    assert await tracker.memberJoined(SimpleNamespace(guild=guild)) == STUDENT_ROLE_ID
+
+@pytest.mark.asyncio
+async def testMemberJoined_RemovedRoleInvite(sampleCache: NewBotCache.Cache):
+    guild = FakeGuild()
+    tracker = InviteTracker.InviteTracker(sampleCache)
+    await joinWith(tracker, guild, "plain", 1)
+
+    tracker.removeRoleInvite(GUILD_ID, "students")
+    assert await joinWith(tracker, guild, "students", 1) == [None]
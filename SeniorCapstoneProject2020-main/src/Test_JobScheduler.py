@@ -0,0 +1,175 @@
+import asyncio
+import sqlite3
+import time
+import pytest
+import NewBotCache
+import JobScheduler
+
+## fixtures ##
+@pytest.fixture
+def emptyCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert servers
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, (798358551230677042, '!', False))
+    cache.createCursor().execute(insertStatement, (123456789012345678, '!', False))
+
+    return cache
+
+@pytest.fixture
+def sampleCache(emptyCache: NewBotCache.Cache):
+    # insert jobs, one overdue and one far in the future
+    insertStatement = """INSERT INTO scheduled_jobs(job_id, server_id, channel_id, job_type, due_time, payload) VALUES(?,?,?,?,?,?)"""
+    emptyCache.createCursor().execute(insertStatement, (1, 798358551230677042, 799027610283819029, "unlock", time.time() - 60, '{}'))
+    emptyCache.createCursor().execute(insertStatement, (2, 798358551230677042, 799027610283819029, "reminder", time.time() + 3600, '{"message": "quiz"}'))
+
+    return emptyCache
+
+def recordingHandler(calls: list, result=None):
+    async def handler(job: JobScheduler.ScheduledJob):
+        calls.append((job.jobID, time.time()))
+        return result(job) if callable(result) else result
+    return handler
+
+
+## cache method tests ##
+@pytest.mark.asyncio
+async def testAddScheduledJob(emptyCache: NewBotCache.Cache):
+    jobID = await emptyCache.addScheduledJob(798358551230677042, "reminder", 1000.0, 799027610283819029, {"message": "quiz"})
+    result = await emptyCache.getScheduledJobsList(798358551230677042)
+    assert result == [(jobID, 798358551230677042, 799027610283819029, "reminder", 1000.0, {"message": "quiz"})]
+
+@pytest.mark.asyncio
+async def testAddScheduledJob_TypeErrors(emptyCache: NewBotCache.Cache):
+    with pytest.raises(TypeError):
+        await emptyCache.addScheduledJob("798358551230677042", "unlock", 1000.0)
+    with pytest.raises(TypeError):
+        await emptyCache.addScheduledJob(798358551230677042, "unlock", "soon")
+    with pytest.raises(sqlite3.IntegrityError):
+        await emptyCache.addScheduledJob(798358551230677042, None, 1000.0)
+
+@pytest.mark.asyncio
+async def testRemScheduledJob_List(sampleCache: NewBotCache.Cache):
+    await sampleCache.remScheduledJob([1, 2])
+    result = await sampleCache.getScheduledJobsList()
+    assert result == []
+
+@pytest.mark.asyncio
+async def testSetScheduledJobDueTime(sampleCache: NewBotCache.Cache):
+    await sampleCache.setScheduledJobDueTime(2, 5.0)
+    result = await sampleCache.getScheduledJobsList()
+    assert [row[0] for row in result] == [2, 1]
+
+@pytest.mark.asyncio
+async def testGetScheduledJobsList_Server(sampleCache: NewBotCache.Cache):
+    await sampleCache.addScheduledJob(123456789012345678, "unlock", 1000.0)
+    result = await sampleCache.getScheduledJobsList(798358551230677042)
+    assert [row[0] for row in result] == [1, 2]
+
+@pytest.mark.asyncio
+async def testRemServer_CascadesScheduledJobs(sampleCache: NewBotCache.Cache):
+    await sampleCache.remServer(798358551230677042)
+    result = await sampleCache.getScheduledJobsList()
+    assert result == []
+
+
+## scheduler tests ##
+@pytest.mark.asyncio
+async def testStart_RunsOverdueJobs(sampleCache: NewBotCache.Cache):
+    calls = []
+    scheduler = JobScheduler.JobScheduler(sampleCache)
+    scheduler.registerHandler("unlock", recordingHandler(calls))
+    scheduler.registerHandler("reminder", recordingHandler(calls))
+    await scheduler.start()
+    await asyncio.sleep(0.1)
+    scheduler.stop()
+
+    result = await sampleCache.getScheduledJobsList()
+    assert ([jobID for jobID, _ in calls] == [1]) and ([row[0] for row in result] == [2]) and (list(scheduler.jobs) == [2])
+
+@pytest.mark.asyncio
+async def testSchedule_WakesDispatcher(emptyCache: NewBotCache.Cache):
+    calls = []
+    scheduler = JobScheduler.JobScheduler(emptyCache)
+    scheduler.registerHandler("unlock", recordingHandler(calls))
+    await scheduler.start()
+
+    # the dispatcher is sleeping until the first job when the second, earlier job is scheduled
+    await scheduler.schedule(798358551230677042, "unlock", time.time() + 3600)
+    await asyncio.sleep(0.01)
+    job = await scheduler.schedule(798358551230677042, "unlock", time.time() + 0.05)
+    await asyncio.sleep(0.2)
+    scheduler.stop()
+
+    assert ([jobID for jobID, _ in calls] == [job.jobID]) and (calls[0][1] >= job.dueTime)
+
+@pytest.mark.asyncio
+async def testCancel(emptyCache: NewBotCache.Cache):
+    calls = []
+    scheduler = JobScheduler.JobScheduler(emptyCache)
+    scheduler.registerHandler("unlock", recordingHandler(calls))
+    await scheduler.start()
+
+    job = await scheduler.schedule(798358551230677042, "unlock", time.time() + 0.05)
+    wrongServer = await scheduler.cancel(123456789012345678, job.jobID)
+    cancelled = await scheduler.cancel(798358551230677042, job.jobID)
+    await asyncio.sleep(0.1)
+    scheduler.stop()
+
+    result = await emptyCache.getScheduledJobsList()
+    assert (not wrongServer) and cancelled and (calls == []) and (result == [])
+
+@pytest.mark.asyncio
+async def testCancelJobs_Type(sampleCache: NewBotCache.Cache):
+    scheduler = JobScheduler.JobScheduler(sampleCache)
+    await scheduler.start()
+    scheduler.stop()
+
+    cancelledCount = await scheduler.cancelJobs(798358551230677042, "reminder")
+    result = await sampleCache.getScheduledJobsList()
+    assert (cancelledCount == 1) and ([row[0] for row in result] == [1]) and ([job.jobID for job in scheduler.getJobs(798358551230677042)] == [1])
+
+@pytest.mark.asyncio
+async def testRunJob_Reschedules(emptyCache: NewBotCache.Cache):
+    calls = []
+    scheduler = JobScheduler.JobScheduler(emptyCache)
+
+    # handler runs the job three times, 0.02 seconds apart
+    scheduler.registerHandler("reminder", recordingHandler(calls, lambda job: time.time() + 0.02 if len(calls) < 3 else None))
+    await scheduler.start()
+    await scheduler.schedule(798358551230677042, "reminder", time.time())
+    await asyncio.sleep(0.3)
+    scheduler.stop()
+
+    result = await emptyCache.getScheduledJobsList()
+    assert (len(calls) == 3) and (result == []) and (scheduler.jobs == {})
+
+@pytest.mark.asyncio
+async def testRunJob_FailingHandlerRemovesJob(emptyCache: NewBotCache.Cache):
+    async def failingHandler(job):
+        raise RuntimeError("channel deleted")
+
+    scheduler = JobScheduler.JobScheduler(emptyCache)
+    scheduler.registerHandler("unlock", failingHandler)
+    await scheduler.start()
+    await scheduler.schedule(798358551230677042, "unlock", time.time())
+    await asyncio.sleep(0.1)
+    scheduler.stop()
+
+    result = await emptyCache.getScheduledJobsList()
+    assert (result == []) and (scheduler.jobs == {})
+
+@pytest.mark.asyncio
+async def testStart_SurvivesRestart(emptyCache: NewBotCache.Cache):
+    scheduler = JobScheduler.JobScheduler(emptyCache)
+    await scheduler.start()
+    job = await scheduler.schedule(798358551230677042, "reminder", time.time() + 3600, payload={"message": "quiz"})
+    scheduler.stop()
+
+    restartedScheduler = JobScheduler.JobScheduler(emptyCache)
+    await restartedScheduler.start()
+    restartedScheduler.stop()
+
+    restoredJob = restartedScheduler.jobs[job.jobID]
+    assert (restoredJob.dueTime == job.dueTime) and (restoredJob.payload == {"message": "quiz"})
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+import discord
+import pytest
+import BulkOperations
+import InviteTracker
+import JoinAggregator
+import NewBotCache
+
+GUILD_ID = 798358551230677042
+NOTIFICATION_CHANNEL_ID = 808765968746283048
+STUDENT_ROLE_ID = 805602260993310752
+
+class FakeChannel():
+    def __init__(self, channelID: int, name: str):
+        self.id = channelID
+        self.name = name
+        self.sent = []
+
+    async def send(self, content: str = None, embed: discord.Embed = None):
+        self.sent.append(embed if (embed is not None) else content)
+
+class FakeMember():
+    def __init__(self, memberID: int, guild):
+        self.id = memberID
+        self.name = f"student{memberID}"
+        self.guild = guild
+        self.roles = []
+
+    async def add_roles(self, role):
+        await asyncio.sleep(0)
+        self.roles.append(role)
+
+    def __str__(self):
+        return self.name
+
+class FakeRole():
+    def __init__(self, roleID: int, name: str):
+        self.id = roleID
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+class FakeInviteTracker():
+    def __init__(self, roleIDs: dict):
+        self.roleIDs = roleIDs
+
+    async def memberJoined(self, member):
+        return self.roleIDs.get(member.id)
+
+## fixtures ##
+@pytest.fixture(autouse=True)
+def shortWindow(monkeypatch):
+    monkeypatch.setattr(JoinAggregator, "JOIN_BATCH_WINDOW", 0.01)
+
+@pytest.fixture
+def sampleCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert servers
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, (GUILD_ID, '!', False))
+    return cache
+
+@pytest.fixture
+def sampleGuild():
+    notifications = FakeChannel(NOTIFICATION_CHANNEL_ID, "notifications")
+    general = FakeChannel(2, "general")
+    role = FakeRole(STUDENT_ROLE_ID, "Student")
+    channels = {channel.id: channel for channel in [notifications, general]}
+    return SimpleNamespace(id=GUILD_ID, text_channels=list(channels.values()), get_channel=channels.get,
+        get_role=lambda roleID: role if (roleID == STUDENT_ROLE_ID) else None, notifications=notifications, role=role)
+
+def createAggregator(cache: NewBotCache.Cache, roleIDs: dict) -> JoinAggregator.JoinAggregator:
+    return JoinAggregator.JoinAggregator(cache, FakeInviteTracker(roleIDs), BulkOperations.BulkOperationExecutor(maxRetries=0))
+
+
+## unit tests ##
+@pytest.mark.asyncio
+async def testMemberJoined_BurstWelcomedTogether(sampleCache: NewBotCache.Cache, sampleGuild):
+    members = [FakeMember(i, sampleGuild) for i in range(1, 61)]
+    aggregator = createAggregator(sampleCache, {member.id: STUDENT_ROLE_ID for member in members[:59]})
+    for member in members:
+        aggregator.memberJoined(member)
+    await asyncio.sleep(0.05)
+
+    welcome, roleMessage = sampleGuild.notifications.sent
+    assert welcome.title == "Welcome to the server, 60 new members"
+    assert welcome.description.endswith("student50, and 10 more")
+    assert roleMessage == "59 member(s) have been given the role Student"
+    assert all(member.roles == [sampleGuild.role] for member in members[:59]) and (members[59].roles == [])
+
+    # the notification channel found by name is stored for later batches
+    assert await sampleCache.getServerNotificationChannelID(GUILD_ID) == NOTIFICATION_CHANNEL_ID
+
+@pytest.mark.asyncio
+async def testMemberJoined_SingleMember(sampleCache: NewBotCache.Cache, sampleGuild):
+    await sampleCache.setServerNotificationChannelID(GUILD_ID, 2)
+    member = FakeMember(1, sampleGuild)
+    aggregator = createAggregator(sampleCache, {1: STUDENT_ROLE_ID})
+    aggregator.memberJoined(member)
+    await asyncio.sleep(0.05)
+
+    welcome, roleMessage = sampleGuild.get_channel(2).sent
+    assert (welcome.title == "Welcome to the server student1") and (roleMessage == "student1 has been given the role Student")
+    assert sampleGuild.notifications.sent == []
+
+@pytest.mark.asyncio
+async def testMemberJoined_SeparateWindows(sampleCache: NewBotCache.Cache, sampleGuild):
+    aggregator = createAggregator(sampleCache, {})
+    aggregator.memberJoined(FakeMember(1, sampleGuild))
+    await asyncio.sleep(0.05)
+    aggregator.memberJoined(FakeMember(2, sampleGuild))
+    aggregator.memberJoined(FakeMember(3, sampleGuild))
+    await asyncio.sleep(0.05)
+
+    assert [embed.title for embed in sampleGuild.notifications.sent] == ["Welcome to the server student1", "Welcome to the server, 2 new members"]
+
+def testRoleMessage_FailuresCounted(sampleGuild):
+    members = [FakeMember(i, sampleGuild) for i in range(1, 4)]
+    memberRoles = {member: sampleGuild.role for member in members}
+    report = BulkOperations.BulkOperationReport(members)
+    report.succeeded = members[:2]
+    report.failed = [(members[2], discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions"))]
+
+    message = JoinAggregator.JoinAggregator.roleMessage(memberRoles, report)
+    assert message == "2 member(s) have been given the role Student\n1 member(s) could not be given their role"
+
+@pytest.mark.asyncio
+async def testMemberJoined_UnresolvedMembersReported(sampleCache: NewBotCache.Cache, sampleGuild):
+    members = [FakeMember(i, sampleGuild) for i in range(1, 4)]
+    aggregator = createAggregator(sampleCache, {1: STUDENT_ROLE_ID, 2: InviteTracker.UNRESOLVED_ROLE, 3: InviteTracker.UNRESOLVED_ROLE})
+    for member in members:
+        aggregator.memberJoined(member)
+    await asyncio.sleep(0.05)
+
+    welcome, roleMessage = sampleGuild.notifications.sent
+    assert roleMessage == ("1 member(s) have been given the role Student\nThe role invites used by 2 member(s) could not "
+        "be worked out, please give them their role by hand: student2, student3")
+    assert (members[0].roles == [sampleGuild.role]) and (members[1].roles == []) and (members[2].roles == [])
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+import pytest
+import MessageDispatcher
+
+GUILD_ID = 798358551230677042
+
+BOT_USER = SimpleNamespace(name="EduBot", bot=True)
+HUMAN_USER = SimpleNamespace(name="student", bot=False)
+OTHER_BOT_USER = SimpleNamespace(name="OtherBot", bot=True)
+
+def fakeMessage(content: str = "", author=HUMAN_USER, guild: bool = True, attachments: list = None):
+    return SimpleNamespace(content=content, author=author, guild=SimpleNamespace(id=GUILD_ID) if guild else None,
+        attachments=attachments or [])
+
+## fixtures ##
+@pytest.fixture
+def sampleDispatcher():
+    # servers use "." as their command prefix and direct messages use "!"
+    dispatcher = MessageDispatcher.MessageDispatcher(lambda message: "." if message.guild is not None else "!", lambda: BOT_USER)
+    dispatcher.received = []
+
+    def handler(name):
+        async def handle(message, classes):
+            dispatcher.received.append((name, message.content))
+        return handle
+
+    dispatcher.subscribe("commands", handler("commands"), requiredClasses=["command"], excludedClasses=["bot"])
+    dispatcher.subscribe("moderation", handler("moderation"), requiredClasses=["guild", "text"], excludedClasses=["self"])
+    return dispatcher
+
+
+## classification tests ##
+def testClassify(sampleDispatcher: MessageDispatcher.MessageDispatcher):
+    assert sampleDispatcher.classify(fakeMessage("hello")) == {"guild", "human", "text"}
+    assert sampleDispatcher.classify(fakeMessage(".help")) == {"guild", "human", "text", "command"}
+    assert sampleDispatcher.classify(fakeMessage("!help", guild=False)) == {"direct", "human", "text", "command"}
+    assert sampleDispatcher.classify(fakeMessage("see www.example.com", author=BOT_USER)) == {"guild", "bot", "self", "text", "url"}
+    assert sampleDispatcher.classify(fakeMessage(attachments=["image.png"])) == {"guild", "human", "empty", "attachment"}
+
+def testSubscribe_UnknownClass(sampleDispatcher: MessageDispatcher.MessageDispatcher):
+    with pytest.raises(ValueError):
+        sampleDispatcher.subscribe("links", None, requiredClasses=["link"])
+
+
+## dispatch tests ##
+@pytest.mark.asyncio
+async def testDispatch_Subscriptions(sampleDispatcher: MessageDispatcher.MessageDispatcher):
+    messages = [
+        fakeMessage("hello"),
+        fakeMessage(".help"),
+        fakeMessage("!help", guild=False),
+        fakeMessage("hello", guild=False),
+        fakeMessage("own message", author=BOT_USER),
+        fakeMessage(".help", author=OTHER_BOT_USER),
+        fakeMessage(attachments=["image.png"])
+    ]
+    for message in messages:
+        await sampleDispatcher.dispatch(message)
+
+    assert sampleDispatcher.received == [
+        ("moderation", "hello"),
+        ("commands", ".help"), ("moderation", ".help"),
+        ("commands", "!help"),
+        ("moderation", ".help")
+    ]
+
+    stats = sampleDispatcher.getTrafficStats()
+    assert (stats["messages"] == 7) and (stats["handlers"] == {"commands": 2, "moderation": 3})
+    assert (stats["classes"]["direct"] == 2) and (stats["classes"]["self"] == 1) and (stats["classes"]["empty"] == 1)
+
+@pytest.mark.asyncio
+async def testDispatch_FailingHandler(sampleDispatcher: MessageDispatcher.MessageDispatcher):
+    async def failingHandler(message, classes):
+        raise RuntimeError("handler failed")
+
+    sampleDispatcher.subscribe("failing", failingHandler, requiredClasses=["text"])
+    await sampleDispatcher.dispatch(fakeMessage(".help"))
+    assert sampleDispatcher.received == [("commands", ".help"), ("moderation", ".help")]
+
+@pytest.mark.asyncio
+async def testUnsubscribe(sampleDispatcher: MessageDispatcher.MessageDispatcher):
+    sampleDispatcher.unsubscribe("moderation")
+    await sampleDispatcher.dispatch(fakeMessage("hello"))
+    assert (sampleDispatcher.received == []) and (sampleDispatcher.getTrafficStats()["handlers"] == {"commands": 0})
@@ -0,0 +1,114 @@
+import datetime
+from types import SimpleNamespace
+import discord
+import pytest
+import MessagePurge
+
+NOW = datetime.datetime(2021, 4, 1, 12, 0, 0)
+
+class FakeMessage():
+    def __init__(self, channel: "FakeChannel", messageID: int, author, createdAt: datetime.datetime):
+        self.channel = channel
+        self.id = messageID
+        self.author = author
+        self.created_at = createdAt
+
+    async def delete(self):
+        self.channel.singleDeletes.append(self.id)
+        self.channel.messages.remove(self)
+
+class FakeChannel():
+    def __init__(self):
+        self.messages = []
+        self.bulkDeletes = []
+        self.singleDeletes = []
+
+    async def delete_messages(self, messages):
+        self.bulkDeletes.append([message.id for message in messages])
+        for message in messages:
+            self.messages.remove(message)
+
+class FakeAuthor():
+    def __init__(self, authorID: int, name: str):
+        self.id = authorID
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+async def deleteAll(deleter: MessagePurge.MessageDeleter, messages: list):
+    for message in messages:
+        await deleter.delete(message)
+    await deleter.flush()
+
+## fixtures ##
+@pytest.fixture(autouse=True)
+def noDeleteInterval(monkeypatch):
+    monkeypatch.setattr(MessagePurge, "SINGLE_DELETE_INTERVAL", 0)
+
+@pytest.fixture
+def sampleChannel():
+    channel = FakeChannel()
+    alice, bob, carol = FakeAuthor(1, "alice"), FakeAuthor(2, "bob"), FakeAuthor(3, "carol")
+
+    # messages 1-6 are 20 days old, messages 7-12 are from the last hour
+    for i in range(1, 13):
+        age = datetime.timedelta(days=20) if (i <= 6) else datetime.timedelta(minutes=60 - i)
+        channel.messages.append(FakeMessage(channel, i, [alice, bob, carol][i % 3], NOW - age))
+    return channel
+
+def newestFirst(channel: FakeChannel) -> list:
+    return sorted(channel.messages, key=lambda message: message.id, reverse=True)
+
+
+## unit tests ##
+@pytest.mark.asyncio
+async def testMessageDeleter_BulkDeletesRecentOnly(sampleChannel: FakeChannel):
+    report = MessagePurge.PurgeReport()
+    await deleteAll(MessagePurge.MessageDeleter(sampleChannel, report, now=NOW), newestFirst(sampleChannel))
+
+    assert (sampleChannel.bulkDeletes == [[12, 11, 10, 9, 8, 7]]) and (sampleChannel.singleDeletes == [6, 5, 4, 3, 2, 1])
+    assert (report.bulkDeleted == 6) and (report.singleDeleted == 6) and (report.authorCounts == {1: 4, 2: 4, 3: 4})
+
+@pytest.mark.asyncio
+async def testMessageDeleter_BatchSize(sampleChannel: FakeChannel, monkeypatch):
+    monkeypatch.setattr(MessagePurge, "BULK_DELETE_BATCH_SIZE", 4)
+    await deleteAll(MessagePurge.MessageDeleter(sampleChannel, MessagePurge.PurgeReport(), now=NOW), newestFirst(sampleChannel))
+    assert sampleChannel.bulkDeletes == [[12, 11, 10, 9], [8, 7]]
+
+@pytest.mark.asyncio
+async def testMessageDeleter_NearAgeLimitDeletedSingly():
+    channel = FakeChannel()
+    author = FakeAuthor(1, "alice")
+    channel.messages.append(FakeMessage(channel, 1, author, NOW - datetime.timedelta(days=14) + datetime.timedelta(minutes=1)))
+    channel.messages.append(FakeMessage(channel, 2, author, NOW))
+
+    await deleteAll(MessagePurge.MessageDeleter(channel, MessagePurge.PurgeReport(), now=NOW), list(channel.messages))
+    assert (channel.bulkDeletes == [[2]]) and (channel.singleDeletes == [1])
+
+@pytest.mark.asyncio
+async def testMessageDeleter_FailedBulkDeleteCounted(sampleChannel: FakeChannel):
+    async def failingDelete(messages):
+        raise discord.HTTPException(SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions")
+    sampleChannel.delete_messages = failingDelete
+
+    report = MessagePurge.PurgeReport()
+    await deleteAll(MessagePurge.MessageDeleter(sampleChannel, report, now=NOW), newestFirst(sampleChannel))
+    assert (report.failed == 6) and (report.singleDeleted == 6) and (report.bulkDeleted == 0)
+
+@pytest.mark.asyncio
+async def testPurgeReport_Summary(sampleChannel: FakeChannel):
+    report = MessagePurge.PurgeReport()
+    messages = [message for message in newestFirst(sampleChannel) if message.author.id != 3]
+    await deleteAll(MessagePurge.MessageDeleter(sampleChannel, report, now=NOW), messages)
+
+    assert report.summary(maxAuthorsListed=1).startswith("8 message(s) deleted.\n")
+    assert report.summary(maxAuthorsListed=1).endswith("...and 1 more")
+
+@pytest.mark.asyncio
+async def testPurgeReport_DictRoundTrip(sampleChannel: FakeChannel):
+    report = MessagePurge.PurgeReport()
+    await deleteAll(MessagePurge.MessageDeleter(sampleChannel, report, now=NOW), newestFirst(sampleChannel))
+
+    restoredReport = MessagePurge.PurgeReport.fromDict(report.toDict())
+    assert (restoredReport.summary() == report.summary()) and (restoredReport.totalDeleted == 12)
@@ -0,0 +1,78 @@
+import pytest
+import NewBotCache
+import ModerationPipeline
+
+## fixtures ##
+@pytest.fixture
+def samplePipeline():
+    calls = []
+
+    def stage(name, result):
+        async def runStage(message, context):
+            calls.append(name)
+            context[name] = True
+            return result(message, context) if callable(result) else result
+        return (name, runStage)
+
+    pipeline = ModerationPipeline.ModerationPipeline([
+        stage("author", lambda message, context: ModerationPipeline.EXEMPT if message == "bot" else None),
+        stage("attachment", None),
+        stage("url", lambda message, context: ModerationPipeline.Infraction("url", "bad link") if "http" in message else None),
+        stage("words", lambda message, context: ModerationPipeline.Infraction("words", "bad word") if "darn" in message else None)
+    ])
+    pipeline.calls = calls
+
+    return pipeline
+
+@pytest.fixture
+def emptyCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert server
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, (798358551230677042, '!', False))
+
+    return cache
+
+
+## unit tests ##
+@pytest.mark.asyncio
+async def testRun_Clean(samplePipeline: ModerationPipeline.ModerationPipeline):
+    result = await samplePipeline.run("hello")
+    assert (result is None) and (samplePipeline.calls == ["author", "attachment", "url", "words"])
+
+@pytest.mark.asyncio
+async def testRun_ExemptStopsPipeline(samplePipeline: ModerationPipeline.ModerationPipeline):
+    result = await samplePipeline.run("bot")
+    stats = samplePipeline.getStageStats()
+    assert (result is None) and (samplePipeline.calls == ["author"]) and (stats["author"]["stops"] == 1)
+
+@pytest.mark.asyncio
+async def testRun_InfractionStopsPipeline(samplePipeline: ModerationPipeline.ModerationPipeline):
+    result = await samplePipeline.run("darn http link")
+    assert (result.stage == "url") and (samplePipeline.calls == ["author", "attachment", "url"])
+
+@pytest.mark.asyncio
+async def testRun_DisabledStage(samplePipeline: ModerationPipeline.ModerationPipeline):
+    result = await samplePipeline.run("darn http link", {"url"})
+    stats = samplePipeline.getStageStats()
+    assert (result.stage == "words") and (stats["url"]["calls"] == 0) and (stats["words"]["calls"] == 1)
+
+@pytest.mark.asyncio
+async def testRun_SharedContext(samplePipeline: ModerationPipeline.ModerationPipeline):
+    context = {"classes": frozenset(["text"])}
+    await samplePipeline.run("clean message", (), context)
+    assert context == {"classes": frozenset(["text"]), "author": True, "attachment": True, "url": True, "words": True}
+
+@pytest.mark.asyncio
+async def testDisableModerationStage(emptyCache: NewBotCache.Cache):
+    await emptyCache.disableModerationStage(798358551230677042, "url")
+    await emptyCache.disableModerationStage(798358551230677042, "words")
+    await emptyCache.enableModerationStage(798358551230677042, "url")
+    results = await emptyCache.getServerDisabledModerationStages(798358551230677042)
+    assert results == ["words"]
+
+@pytest.mark.asyncio
+async def testDisableModerationStage_NonStr(emptyCache: NewBotCache.Cache):
+    with pytest.raises(TypeError):
+        await emptyCache.disableModerationStage(798358551230677042, 5)
@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+import pytest
+import NameIndex
+
+class FakeGuild():
+    def __init__(self, guildID: int, members: list, roles: list):
+        self.id = guildID
+        self.members = members
+        self.roles = roles
+
+    def get_member(self, memberID: int):
+        return next((member for member in self.members if member.id == memberID), None)
+
+    def get_role(self, roleID: int):
+        return next((role for role in self.roles if role.id == roleID), None)
+
+def fakeMember(guild: FakeGuild, memberID: int, name: str, nick: str = None):
+    member = SimpleNamespace(id=memberID, name=name, nick=nick, guild=guild)
+    guild.members.append(member)
+    return member
+
+def fakeRole(guild: FakeGuild, roleID: int, name: str):
+    role = SimpleNamespace(id=roleID, name=name, guild=guild)
+    guild.roles.append(role)
+    return role
+
+## fixtures ##
+@pytest.fixture
+def sampleGuild():
+    guild = FakeGuild(798358551230677042, [], [])
+    fakeMember(guild, 1, "student1", "Alice")
+    fakeMember(guild, 2, "student2")
+    fakeMember(guild, 3, "teacher", "Prof. Smith")
+    fakeMember(guild, 4, "studying.bot", "Helper (bot)")
+    fakeRole(guild, 10, "@everyone")
+    fakeRole(guild, 11, "Group 1")
+    fakeRole(guild, 12, "Group 2")
+    fakeRole(guild, 13, "Teachers")
+    return guild
+
+@pytest.fixture
+def indexes():
+    return NameIndex.GuildNameIndexes()
+
+
+## unit tests ##
+def testCompileWildcard_EscapesRegexCharacters():
+    regex = NameIndex.compileWildcard("Prof. (S*)")
+    assert (regex.fullmatch("Prof. (Smith)") is not None) and (regex.fullmatch("Profx (Smith)") is None)
+
+def testCompileWildcard_Cached():
+    assert NameIndex.compileWildcard("student*") is NameIndex.compileWildcard("student*")
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("student*", [1, 2]),
+    ("stud*", [1, 2, 4]),
+    ("*bot*", [4]),
+    ("s*1", [1]),
+    ("A*", [1]),
+    ("*", [1, 2, 3, 4]),
+    ("Prof. *", [3]),
+    ("*(bot)", [4]),
+    ("N*", [])
+])
+def testMatchMembers(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes, pattern: str, expected: list):
+    assert [member.id for member in indexes.matchMembers(sampleGuild, pattern)] == expected
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("Group *", [11, 12]),
+    ("*2", [12]),
+    ("group*", []),
+    ("*e*", [10, 13])
+])
+def testMatchRoles(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes, pattern: str, expected: list):
+    assert [role.id for role in indexes.matchRoles(sampleGuild, pattern)] == expected
+
+def testUpdateMember_NickChange(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes):
+    indexes.matchMembers(sampleGuild, "*")
+    member = sampleGuild.get_member(2)
+    member.nick = "Bob"
+    indexes.updateMember(member)
+
+    assert [member.id for member in indexes.matchMembers(sampleGuild, "B*")] == [2]
+
+def testUpdateMember_Join(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes):
+    indexes.matchMembers(sampleGuild, "*")
+    indexes.updateMember(fakeMember(sampleGuild, 5, "student3"))
+
+    assert [member.id for member in indexes.matchMembers(sampleGuild, "student*")] == [1, 2, 5]
+
+def testRemoveMember(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes):
+    indexes.matchMembers(sampleGuild, "*")
+    member = sampleGuild.get_member(1)
+    sampleGuild.members.remove(member)
+    indexes.removeMember(member)
+
+    index = indexes.getMemberIndex(sampleGuild)
+    assert ([member.id for member in indexes.matchMembers(sampleGuild, "student*")] == [2]) and ("Alice" not in index.sortedNames)
+
+def testRemoveMember_SharedNameKept(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes):
+    indexes.updateMember(fakeMember(sampleGuild, 5, "student2"))
+    indexes.matchMembers(sampleGuild, "*")
+    indexes.removeMember(sampleGuild.get_member(2))
+
+    assert indexes.getMemberIndex(sampleGuild).match("student2") == {5}
+
+def testUpdateRole_Rename(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes):
+    indexes.matchRoles(sampleGuild, "*")
+    role = sampleGuild.get_role(13)
+    role.name = "Group Leaders"
+    indexes.updateRole(role)
+
+    assert [role.id for role in indexes.matchRoles(sampleGuild, "Group *")] == [11, 12, 13]
+
+def testRemoveRole(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes):
+    indexes.matchRoles(sampleGuild, "*")
+    indexes.removeRole(sampleGuild.get_role(11))
+
+    assert [role.id for role in indexes.matchRoles(sampleGuild, "Group *")] == [12]
+
+def testMatchMembers_StaleIndexChecked(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes):
+    # a rename that was never passed to the index isn't returned under its old name
+    indexes.matchMembers(sampleGuild, "*")
+    sampleGuild.get_member(1).name = "graduate"
+
+    assert [member.id for member in indexes.matchMembers(sampleGuild, "student*")] == [2]
+
+def testRemoveGuild(sampleGuild: FakeGuild, indexes: NameIndex.GuildNameIndexes):
+    indexes.matchMembers(sampleGuild, "*")
+    indexes.matchRoles(sampleGuild, "*")
+    indexes.removeGuild(sampleGuild.id)
+
+    assert (indexes.memberIndexes == {}) and (indexes.roleIndexes == {})
+
+def testNameIndex_CandidatesNarrowed():
+    index = NameIndex.NameIndex()
+    for i in range(1000):
+        index.update(i, (f"user{i:04d}",))
+
+    assert (len(index.candidateNames("user09*")) == 100) and (len(index.candidateNames("*0999")) == 1)
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+import pytest
+import HistoryScanner
+import MessageDispatcher
+import NewBotCache
+import ProfanityFilter
+import StartupWarmup
+import UrlBlocklist
+from NewContentModCog import ContentModeration
+
+GUILD_ID = 798358551230677042
+INFRACTION_CHANNEL_ID = 799027610283819029
+BOT_USER = SimpleNamespace(name="EduBot", bot=True)
+
+class FakeChannel():
+    def __init__(self, channelID: int):
+        self.id = channelID
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+    def __str__(self):
+        return f"channel {self.id}"
+
+class FakeMessage():
+    def __init__(self, content: str, channel: FakeChannel):
+        self.content = content
+        self.channel = channel
+        self.guild = SimpleNamespace(id=GUILD_ID)
+        self.author = SimpleNamespace(name="student", bot=False, nick=None)
+        self.attachments = []
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+## fixtures ##
+@pytest.fixture
+def sampleCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert a server with an infraction channel
+    insertStatement = """INSERT INTO servers(id, command_prefix, infraction_channel, is_locked) VALUES(?,?,?,?)"""
+    cache.createCursor().execute(insertStatement, (GUILD_ID, '!', INFRACTION_CHANNEL_ID, False))
+    return cache
+
+@pytest.fixture
+def sampleCog(sampleCache: NewBotCache.Cache):
+    infractionChannel = FakeChannel(INFRACTION_CHANNEL_ID)
+    bot = SimpleNamespace(user=BOT_USER, get_channel=lambda channelID: infractionChannel if (channelID == INFRACTION_CHANNEL_ID) else None)
+    dispatcher = MessageDispatcher.MessageDispatcher(lambda message: "!", lambda: BOT_USER)
+    warmup = StartupWarmup.StartupWarmup(sampleCache)
+    warmup.ready.set()
+
+    cog = ContentModeration(bot, sampleCache, HistoryScanner.HistoryScanner(bot, sampleCache), warmup, dispatcher)
+    cog.urlBlocklist.index = UrlBlocklist.UrlBlocklist.compileIndex({"url": [{"link": "https://www.malware.com/", "type": "Malware", "threat": "Virus"}]})
+    cog.profanityMatcher = ProfanityFilter.ProfanityMatcher(["darn"])
+    cog.infractionChannel = infractionChannel
+    return cog
+
+
+## moderation tests ##
+@pytest.mark.asyncio
+async def testModerateMessage_CommandWithBlockedUrl(sampleCog: ContentModeration):
+    message = FakeMessage("!x https://www.malware.com/free", FakeChannel(2))
+    await sampleCog.messageDispatcher.dispatch(message)
+
+    assert message.deleted and sampleCog.infractionChannel.sent[0].endswith("Link sent: <https://www.malware.com/free>")
+
+@pytest.mark.asyncio
+async def testModerateMessage_CommandExemptFromWords(sampleCog: ContentModeration):
+    message = FakeMessage("!poll darn", FakeChannel(2))
+    await sampleCog.messageDispatcher.dispatch(message)
+
+    assert (not message.deleted) and (sampleCog.infractionChannel.sent == [])
+
+@pytest.mark.asyncio
+async def testModerateMessage_EditedIntoCommand(sampleCog: ContentModeration):
+    message = FakeMessage("!poll darn", FakeChannel(2))
+    await sampleCog.on_message_edit(None, message)
+
+    assert message.deleted and "Language Infraction Noted" in sampleCog.infractionChannel.sent[0]
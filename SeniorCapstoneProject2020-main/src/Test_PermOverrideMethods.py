@@ -8,7 +8,7 @@ def emptyCache():
 
     # insert server
     insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
-    cache.dbConnection.execute(insertStatement, ("798358551230677042",'!',False))
+    cache.dbConnection.execute(insertStatement, (798358551230677042,'!',False))
 
     return cache
 
@@ -18,17 +18,17 @@ def sampleCache():
     # insert server
     insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
     parameters = [
-        ("798358551230677042",'!',False),
-        ("820724374268149771",'!',False)
+        (798358551230677042,'!',False),
+        (820724374268149771,'!',False)
     ]
     cache.dbConnection.executemany(insertStatement, parameters)
 
     # insert roles
     insertStatement = """INSERT INTO perm_overwrites(channel_id, modified_id, server_id, allow_value, deny_value) VALUES(?,?,?,?,?)"""
     parameters = [
-        ("808765968746283048", "798359230183636994", "798358551230677042", "871890001", "0"),
-        ("808765968746283048", "805602260993310752", "798358551230677042", "0", "2048"),
-        ("808765968746283047", "805602260993310752", "820724374268149771", "0", "2048")
+        (808765968746283048, 798359230183636994, 798358551230677042, "871890001", "0"),
+        (808765968746283048, 805602260993310752, 798358551230677042, "0", "2048"),
+        (808765968746283047, 805602260993310752, 820724374268149771, "0", "2048")
     ]
     cache.dbConnection.executemany(insertStatement, parameters)
 
@@ -88,7 +88,7 @@ async def testRemPermOverwrite_Guild(sampleCache: NewBotCache.Cache): # !!! #
     selectStatement = """SELECT * FROM perm_overwrites"""
 
     expectedResult = [
-        ("808765968746283047", "805602260993310752", "820724374268149771", "0", "2048")
+        (808765968746283047, 805602260993310752, 820724374268149771, "0", "2048")
     ]
 
     cursor.execute(selectStatement)
@@ -111,7 +111,7 @@ async def testRemPermOverwrite_Channel(sampleCache: NewBotCache.Cache): # !!! #
     selectStatement = """SELECT * FROM perm_overwrites"""
 
     expectedResult = [
-        ("808765968746283047", "805602260993310752", "820724374268149771", "0", "2048")
+        (808765968746283047, 805602260993310752, 820724374268149771, "0", "2048")
     ]
 
     cursor.execute(selectStatement)
@@ -130,8 +130,8 @@ async def testRemPermOverwrite_RoleUser(sampleCache: NewBotCache.Cache): # !!! #
     selectStatement = """SELECT * FROM perm_overwrites"""
 
     expectedResult = [
-        ("808765968746283048", "805602260993310752", "798358551230677042", "0", "2048"),
-        ("808765968746283047", "805602260993310752", "820724374268149771", "0", "2048")
+        (808765968746283048, 805602260993310752, 798358551230677042, "0", "2048"),
+        (808765968746283047, 805602260993310752, 820724374268149771, "0", "2048")
     ]
 
     cursor.execute(selectStatement)
@@ -220,9 +220,9 @@ async def testUpdateOverwriteChannel_CorrectInput(sampleCache: NewBotCache.Cache
     await sampleCache.updateOverwriteChannel(798358551230677042, 808765968746283048, 808765968746286969)
 
     expectedResult = [
-        ("808765968746286969", "798359230183636994", "798358551230677042", "871890001", "0"),
-        ("808765968746286969", "805602260993310752", "798358551230677042", "0", "2048"),
-        ("808765968746283047", "805602260993310752", "820724374268149771", "0", "2048")
+        (808765968746286969, 798359230183636994, 798358551230677042, "871890001", "0"),
+        (808765968746286969, 805602260993310752, 798358551230677042, "0", "2048"),
+        (808765968746283047, 805602260993310752, 820724374268149771, "0", "2048")
     ]
 
     selectStatement = """SELECT * FROM perm_overwrites"""
@@ -233,4 +233,33 @@ async def testUpdateOverwriteChannel_CorrectInput(sampleCache: NewBotCache.Cache
 
 @pytest.mark.asyncio
 async def testUpdateOverwriteChannel_NonExistant(sampleCache: NewBotCache.Cache):
-    pass
\ No newline at end of file
+    pass
+
+@pytest.mark.asyncio
+async def testAddPermOverwrites_ReplacesExisting(sampleCache: NewBotCache.Cache, sampleOverwrite: discord.PermissionOverwrite):
+    emptyOverwrite = discord.PermissionOverwrite()
+    await sampleCache.addPermOverwrites(798358551230677042, [
+        (808765968746283048, 798359230183636994, sampleOverwrite),
+        (808765968746283049, 798358551230677042, emptyOverwrite)
+    ])
+
+    result = await sampleCache.getServerOverwritesDict(798358551230677042)
+    assert result == {
+        808765968746283048: [(805602260993310752, sampleOverwrite), (798359230183636994, sampleOverwrite)],
+        808765968746283049: [(798358551230677042, emptyOverwrite)]
+    }
+
+@pytest.mark.asyncio
+async def testAddPermOverwrites_TypeError(emptyCache: NewBotCache.Cache, sampleOverwrite: discord.PermissionOverwrite):
+    with pytest.raises(TypeError):
+        await emptyCache.addPermOverwrites(798358551230677042, [(808765968746283048, "798359230183636994", sampleOverwrite)])
+
+@pytest.mark.asyncio
+async def testGetServerOverwritesDict(sampleCache: NewBotCache.Cache, sampleOverwrite: discord.PermissionOverwrite):
+    result = await sampleCache.getServerOverwritesDict(820724374268149771)
+    assert result == {808765968746283047: [(805602260993310752, sampleOverwrite)]}
+
+@pytest.mark.asyncio
+async def testGetServerOverwritesDict_Empty(emptyCache: NewBotCache.Cache):
+    result = await emptyCache.getServerOverwritesDict(798358551230677042)
+    assert result == {}
@@ -0,0 +1,137 @@
+import pytest
+import discord
+import PermissionPlanner
+
+# overwrite applied by the lock command
+LOCKED = PermissionPlanner.LOCK_OVERWRITE
+
+class FakeChannel():
+    def __init__(self, channelID: int, overwrites: dict, category: "FakeChannel" = None):
+        self.id = channelID
+        self.overwrites = overwrites
+        self.category = category
+
+class FakeGuild():
+    def __init__(self, channels: list, roles: list, members: list = ()):
+        self.channels = channels
+        self.roles = {role.id: role for role in roles}
+        self.members = {member.id: member for member in members}
+        self.default_role = self.roles[1]
+
+    def get_role(self, roleID: int):
+        return self.roles.get(roleID)
+
+    def get_member(self, memberID: int):
+        return self.members.get(memberID)
+
+def applyPlan(plan: PermissionPlanner.PermissionPlan):
+    for channel, overwrites in plan.edits:
+        channel.overwrites = overwrites
+
+def snapshotDict(plan: PermissionPlanner.PermissionPlan) -> dict:
+    snapshot = {}
+    for channelID, modifiedID, overwrite in plan.snapshot:
+        snapshot.setdefault(channelID, []).append((modifiedID, overwrite))
+    return snapshot
+
+## fixtures ##
+@pytest.fixture
+def sampleGuild():
+    everyone, student, teacher = discord.Object(1), discord.Object(2), discord.Object(3)
+    member = discord.Object(50)
+    category = FakeChannel(200, {student: discord.PermissionOverwrite(send_messages=True), teacher: discord.PermissionOverwrite(manage_messages=True)})
+    channels = [
+        FakeChannel(100, {}),
+        FakeChannel(101, dict(category.overwrites), category),
+        FakeChannel(102, {everyone: LOCKED, teacher: discord.PermissionOverwrite(view_channel=True)}),
+        FakeChannel(103, {student: discord.PermissionOverwrite(view_channel=True)}, category),
+        FakeChannel(104, {member: discord.PermissionOverwrite(read_messages=True)}),
+        category
+    ]
+    return FakeGuild(channels, [everyone, student, teacher], [member])
+
+
+## unit tests ##
+def testPlanLock(sampleGuild: FakeGuild):
+    plan = PermissionPlanner.planLock(sampleGuild, frozenset([3]), LOCKED)
+    editedChannels = {channel.id: overwrites for channel, overwrites in plan.edits}
+
+    assert [channel.id for channel, _ in plan.edits] == [100, 200, 101, 103, 104]
+    assert editedChannels[100] == {sampleGuild.default_role: LOCKED}
+    assert editedChannels[200] == {sampleGuild.get_role(2): LOCKED, sampleGuild.get_role(3): discord.PermissionOverwrite(manage_messages=True)}
+    assert editedChannels[104] == {sampleGuild.get_member(50): LOCKED}
+    assert (plan.syncedChannelEdits == 1) and (plan.unchangedChannels == 1)
+
+def testPlanLock_SyncedChannelStaysSynced(sampleGuild: FakeGuild):
+    plan = PermissionPlanner.planLock(sampleGuild, frozenset([3]), LOCKED)
+    applyPlan(plan)
+
+    category, syncedChannel = sampleGuild.channels[5], sampleGuild.channels[1]
+    assert syncedChannel.overwrites == category.overwrites
+
+def testPlanLock_Snapshot(sampleGuild: FakeGuild):
+    plan = PermissionPlanner.planLock(sampleGuild, frozenset([3]), LOCKED)
+    assert plan.snapshot == [
+        (100, 1, discord.PermissionOverwrite()),
+        (200, 2, discord.PermissionOverwrite(send_messages=True)),
+        (101, 2, discord.PermissionOverwrite(send_messages=True)),
+        (103, 2, discord.PermissionOverwrite(view_channel=True)),
+        (104, 50, discord.PermissionOverwrite(read_messages=True))
+    ]
+
+def testPlanLock_AlreadyLocked(sampleGuild: FakeGuild):
+    applyPlan(PermissionPlanner.planLock(sampleGuild, frozenset([3]), LOCKED))
+
+    relockPlan = PermissionPlanner.planLock(sampleGuild, frozenset([3]), LOCKED)
+    assert (relockPlan.apiCallCount == 0) and (relockPlan.unchangedChannels == 6)
+
+def testPlanUnlock_RestoresSnapshot(sampleGuild: FakeGuild):
+    originalOverwrites = {channel.id: dict(channel.overwrites) for channel in sampleGuild.channels}
+    lockPlan = PermissionPlanner.planLock(sampleGuild, frozenset([3]), LOCKED)
+    applyPlan(lockPlan)
+
+    unlockPlan = PermissionPlanner.planUnlock(sampleGuild, snapshotDict(lockPlan))
+    applyPlan(unlockPlan)
+
+    assert (unlockPlan.apiCallCount == 5) and ({channel.id: channel.overwrites for channel in sampleGuild.channels} == originalOverwrites)
+
+def testPlanUnlock_ChannelMatchingCategoryOnlyWhileLocked():
+    everyone = discord.Object(1)
+    category = FakeChannel(200, {everyone: discord.PermissionOverwrite(send_messages=True)})
+    channel = FakeChannel(101, {everyone: discord.PermissionOverwrite(view_channel=True)}, category)
+    guild = FakeGuild([category, channel], [everyone])
+
+    lockPlan = PermissionPlanner.planLock(guild, frozenset(), LOCKED)
+    applyPlan(lockPlan)
+    applyPlan(PermissionPlanner.planUnlock(guild, snapshotDict(lockPlan)))
+
+    assert channel.overwrites == {everyone: discord.PermissionOverwrite(view_channel=True)}
+
+def testPlanUnlock_SkipsMissingTargets(sampleGuild: FakeGuild):
+    snapshot = {
+        103: [(2, discord.PermissionOverwrite(view_channel=True)), (999, discord.PermissionOverwrite(view_channel=True))],
+        105: [(2, discord.PermissionOverwrite())]
+    }
+    plan = PermissionPlanner.planUnlock(sampleGuild, snapshot)
+    assert plan.apiCallCount == 0
+
+def testPlanRoleOverwrite(sampleGuild: FakeGuild):
+    muteRole = discord.Object(4)
+    plan = PermissionPlanner.planRoleOverwrite(sampleGuild, muteRole, PermissionPlanner.TEXT_MUTE_OVERWRITE, lambda channel: channel.id != 104)
+    applyPlan(plan)
+
+    category, syncedChannel = sampleGuild.channels[5], sampleGuild.channels[1]
+    assert [channel.id for channel, _ in plan.edits] == [100, 200, 101, 102, 103]
+    assert (syncedChannel.overwrites == category.overwrites) and (category.overwrites[muteRole] == PermissionPlanner.TEXT_MUTE_OVERWRITE)
+    assert muteRole not in sampleGuild.channels[4].overwrites
+
+def testPlanRoleOverwrite_AlreadyConfigured(sampleGuild: FakeGuild):
+    muteRole = discord.Object(4)
+    applyPlan(PermissionPlanner.planRoleOverwrite(sampleGuild, muteRole, PermissionPlanner.TEXT_MUTE_OVERWRITE))
+
+    plan = PermissionPlanner.planRoleOverwrite(sampleGuild, muteRole, PermissionPlanner.TEXT_MUTE_OVERWRITE)
+    assert plan.apiCallCount == 0
+
+def testDescribe(sampleGuild: FakeGuild):
+    plan = PermissionPlanner.planLock(sampleGuild, frozenset([3]), LOCKED)
+    assert plan.describe().startswith("5 API call(s)")
@@ -0,0 +1,257 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+import discord
+import pytest
+import BulkOperations
+import NewBotCache
+import PollTallies
+
+GUILD_ID = 798358551230677042
+CHANNEL_ID = 799027610283819029
+MESSAGE_ID = 823990342717980692
+
+def fakeMessage(messageID: int, channelID: int = CHANNEL_ID):
+    return SimpleNamespace(id=messageID, channel=SimpleNamespace(id=channelID))
+
+def answerEmoji(answerIndex: int) -> discord.PartialEmoji:
+    return discord.PartialEmoji(name=chr(PollTallies.POLL_FIRST_ANSWER_EMOJI + answerIndex))
+
+## fixtures ##
+@pytest.fixture(autouse=True)
+def noFlushInterval(monkeypatch):
+    monkeypatch.setattr(PollTallies, "POLL_VOTE_FLUSH_INTERVAL", 0)
+
+@pytest.fixture
+def emptyCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert servers
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, (GUILD_ID, '!', False))
+    return cache
+
+@pytest.fixture
+def pollCache(emptyCache: NewBotCache.Cache):
+    cursor = emptyCache.createCursor()
+
+    # insert polls, with a zero vote count for each answer
+    insertStatement = """INSERT INTO polls(poll_id, server_id, channel_id, message_id, questions, question) VALUES(?,?,?,?,?,?)"""
+    cursor.execute(insertStatement, ("00042", GUILD_ID, CHANNEL_ID, MESSAGE_ID, chr(1).join(["yes", "no", "maybe"]), "Is this a poll?"))
+    insertStatement = """INSERT INTO poll_tallies(message_id, answer_index, vote_count) VALUES(?,?,0)"""
+    cursor.executemany(insertStatement, [(MESSAGE_ID, i) for i in range(3)])
+    return emptyCache
+
+
+## cache method tests ##
+@pytest.mark.asyncio
+async def testAddPoll_CreatesZeroTallies(emptyCache: NewBotCache.Cache):
+    pollID = await emptyCache.addPoll(GUILD_ID, fakeMessage(MESSAGE_ID), ["yes", "no"], "Is this a poll?")
+    assert (await emptyCache.getPoll(GUILD_ID, pollID) == (CHANNEL_ID, MESSAGE_ID, "Is this a poll?", ["yes", "no"]))
+    assert await emptyCache.getPollTalliesDict() == {MESSAGE_ID: {0: 0, 1: 0}}
+
+@pytest.mark.asyncio
+async def testAddPoll_ManyPollsGetUniqueIDs(emptyCache: NewBotCache.Cache):
+    # every message gives the same derived ID, the worst case for collisions
+    messages = [fakeMessage(messageID, channelID=NewBotCache.POLL_ID_SPACE) for messageID in range(1, 20001)]
+    pollIDs = await asyncio.gather(*[emptyCache.addPoll(GUILD_ID, message, ["yes", "no"]) for message in messages])
+
+    assert (len(set(pollIDs)) == 20000) and all(len(pollID) == 5 and pollID.isnumeric() for pollID in pollIDs)
+    assert sorted(pollIDs) == sorted(row[0] for row in await emptyCache.getPollsList(GUILD_ID))
+
+@pytest.mark.asyncio
+async def testAddPoll_LastFreeID(emptyCache: NewBotCache.Cache):
+    insertStatement = """INSERT INTO polls(poll_id, server_id, channel_id, message_id, questions) VALUES(?,?,?,?,?)"""
+    emptyCache.createCursor().executemany(insertStatement, [(str(i).zfill(5), GUILD_ID, CHANNEL_ID, i, "yes") for i in range(NewBotCache.POLL_ID_SPACE) if i != 31337])
+
+    assert await emptyCache.addPoll(GUILD_ID, fakeMessage(MESSAGE_ID), ["yes", "no"]) == "31337"
+    with pytest.raises(sqlite3.IntegrityError):
+        await emptyCache.addPoll(GUILD_ID, fakeMessage(MESSAGE_ID + 1), ["yes", "no"])
+
+@pytest.mark.asyncio
+async def testGetPoll(pollCache: NewBotCache.Cache):
+    assert await pollCache.getPoll(GUILD_ID, "00042") == (CHANNEL_ID, MESSAGE_ID, "Is this a poll?", ["yes", "no", "maybe"])
+    assert await pollCache.getPoll(GUILD_ID, "00043") is None
+    with pytest.raises(ValueError):
+        await pollCache.getPoll(GUILD_ID, "abc")
+
+@pytest.mark.asyncio
+async def testGetPollsList(pollCache: NewBotCache.Cache):
+    result = await pollCache.getPollsList(GUILD_ID)
+    assert result == [("00042", GUILD_ID, CHANNEL_ID, MESSAGE_ID, "Is this a poll?", ["yes", "no", "maybe"])]
+    assert await pollCache.getPollsList(1234) == []
+    with pytest.raises(TypeError):
+        await pollCache.getPollsList(str(GUILD_ID))
+
+@pytest.mark.asyncio
+async def testAddPollVotes_ClampsAtZero(pollCache: NewBotCache.Cache):
+    await pollCache.addPollVotes([(MESSAGE_ID, 0, 3), (MESSAGE_ID, 1, -2), (MESSAGE_ID, 0, -1)])
+    assert await pollCache.getPollTalliesDict() == {MESSAGE_ID: {0: 2, 1: 0, 2: 0}}
+
+@pytest.mark.asyncio
+async def testAddPollVotes_TypeErrors(pollCache: NewBotCache.Cache):
+    with pytest.raises(TypeError):
+        await pollCache.addPollVotes([(str(MESSAGE_ID), 0, 1)])
+
+@pytest.mark.asyncio
+async def testRemPoll_CascadesTallies(pollCache: NewBotCache.Cache):
+    await pollCache.remPoll(GUILD_ID, "00042")
+    assert (await pollCache.getPollsList() == []) and (await pollCache.getPollTalliesDict() == {})
+
+@pytest.mark.asyncio
+async def testRemPollMessages(pollCache: NewBotCache.Cache):
+    await pollCache.remPollMessages(GUILD_ID, [1234, MESSAGE_ID])
+    assert (await pollCache.getPollsList() == []) and (await pollCache.getPollTalliesDict() == {})
+
+
+## PollTallies tests ##
+@pytest.mark.asyncio
+async def testLoad(pollCache: NewBotCache.Cache):
+    await pollCache.addPollVotes([(MESSAGE_ID, 2, 4)])
+    tallies = PollTallies.PollTallies(pollCache)
+    await tallies.load()
+
+    assert tallies.isPoll(MESSAGE_ID) and (tallies.getTally(MESSAGE_ID) == [0, 0, 4])
+
+@pytest.mark.asyncio
+async def testLoad_LegacyPollHasNoTally(pollCache: NewBotCache.Cache):
+    # a poll created before vote counts were kept has no poll_tallies rows
+    pollCache.createCursor().execute("DELETE FROM poll_tallies")
+    tallies = PollTallies.PollTallies(pollCache)
+    await tallies.load()
+
+    assert tallies.isPoll(MESSAGE_ID) and (tallies.getTally(MESSAGE_ID) is None)
+
+@pytest.mark.asyncio
+async def testRecordVote_FlushesInOneBatch(pollCache: NewBotCache.Cache, monkeypatch):
+    tallies = PollTallies.PollTallies(pollCache)
+    await tallies.load()
+
+    batches = []
+    addPollVotes = pollCache.addPollVotes
+    async def recordBatch(votes):
+        batches.append(sorted(votes))
+        await addPollVotes(votes)
+    monkeypatch.setattr(pollCache, "addPollVotes", recordBatch)
+
+    for answerIndex in [0, 0, 1, 0, 2]:
+        tallies.recordVote(MESSAGE_ID, answerIndex, 1)
+    tallies.recordVote(MESSAGE_ID, 2, -1)
+    await asyncio.sleep(0.01)
+
+    assert tallies.getTally(MESSAGE_ID) == [3, 1, 0]
+    assert batches == [[(MESSAGE_ID, 0, 3), (MESSAGE_ID, 1, 1)]]
+    await pollCache.flushWrites()
+    assert await pollCache.getPollTalliesDict() == {MESSAGE_ID: {0: 3, 1: 1, 2: 0}}
+
+@pytest.mark.asyncio
+async def testRecordVote_ClampsAtZero(pollCache: NewBotCache.Cache):
+    tallies = PollTallies.PollTallies(pollCache)
+    await tallies.load()
+
+    tallies.recordVote(MESSAGE_ID, 1, -1)
+    assert (tallies.getTally(MESSAGE_ID) == [0, 0, 0]) and (tallies.pendingVotes == {}) and (tallies.flushHandle is None)
+
+@pytest.mark.asyncio
+async def testClearVotes(pollCache: NewBotCache.Cache):
+    tallies = PollTallies.PollTallies(pollCache)
+    await tallies.load()
+
+    for answerIndex in [0, 1, 1, 2]:
+        tallies.recordVote(MESSAGE_ID, answerIndex, 1)
+    tallies.clearVotes(MESSAGE_ID, [1])
+    assert tallies.getTally(MESSAGE_ID) == [1, 0, 1]
+
+    tallies.clearVotes(MESSAGE_ID)
+    await tallies.flush()
+    assert await pollCache.getPollTalliesDict() == {MESSAGE_ID: {0: 0, 1: 0, 2: 0}}
+
+@pytest.mark.asyncio
+async def testFlush_RemovedPollKeepsOtherVotes(pollCache: NewBotCache.Cache):
+    tallies = PollTallies.PollTallies(pollCache)
+    await tallies.load()
+    await pollCache.addPoll(GUILD_ID, fakeMessage(MESSAGE_ID + 1), ["yes", "no"])
+    tallies.addPoll(GUILD_ID, CHANNEL_ID, MESSAGE_ID + 1, 2)
+
+    # the second poll is removed from the local cache before it stops being counted
+    await pollCache.remPollMessages(GUILD_ID, [MESSAGE_ID + 1])
+    for answerIndex in [0, 0, 1]:
+        tallies.recordVote(MESSAGE_ID, answerIndex, 1)
+    tallies.recordVote(MESSAGE_ID + 1, 0, 1)
+
+    await tallies.flush()
+    await pollCache.flushWrites()
+    assert await pollCache.getPollTalliesDict() == {MESSAGE_ID: {0: 2, 1: 1, 2: 0}}
+    assert tallies.pendingVotes == {}
+
+@pytest.mark.asyncio
+async def testFlush_FailedVotesKept(pollCache: NewBotCache.Cache, monkeypatch):
+    tallies = PollTallies.PollTallies(pollCache)
+    await tallies.load()
+    addPollVotes = pollCache.addPollVotes
+    async def lockedDatabase(votes):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(pollCache, "addPollVotes", lockedDatabase)
+
+    tallies.recordVote(MESSAGE_ID, 1, 1)
+    await tallies.flush()
+    assert (tallies.pendingVotes == {(MESSAGE_ID, 1): 1}) and (tallies.flushHandle is not None)
+
+    monkeypatch.setattr(pollCache, "addPollVotes", addPollVotes)
+    await tallies.flush()
+    await pollCache.flushWrites()
+    assert await pollCache.getPollTalliesDict() == {MESSAGE_ID: {0: 0, 1: 1, 2: 0}}
+
+@pytest.mark.asyncio
+async def testAnswerIndex(emptyCache: NewBotCache.Cache):
+    tallies = PollTallies.PollTallies(emptyCache)
+    tallies.addPoll(GUILD_ID, CHANNEL_ID, MESSAGE_ID, 3)
+
+    assert [tallies.answerIndex(MESSAGE_ID, answerEmoji(i)) for i in range(4)] == [0, 1, 2, None]
+    assert tallies.answerIndex(MESSAGE_ID, discord.PartialEmoji(name="\U0001F44D")) is None
+    assert tallies.answerIndex(MESSAGE_ID, discord.PartialEmoji(name="a", id=1234)) is None
+    assert tallies.answerIndex(1234, answerEmoji(0)) is None
+
+@pytest.mark.asyncio
+async def testRemoveChannelPolls(emptyCache: NewBotCache.Cache):
+    tallies = PollTallies.PollTallies(emptyCache)
+    tallies.addPoll(GUILD_ID, CHANNEL_ID, MESSAGE_ID, 3)
+    tallies.addPoll(GUILD_ID, 1234, MESSAGE_ID + 1, 2)
+    tallies.recordVote(MESSAGE_ID, 0, 1)
+
+    assert tallies.removeChannelPolls(CHANNEL_ID) == [MESSAGE_ID]
+    assert (not tallies.isPoll(MESSAGE_ID)) and tallies.isPoll(MESSAGE_ID + 1) and (tallies.pendingVotes == {})
+
+@pytest.mark.asyncio
+async def testFindDeletedPolls_CachesExistingMessages(emptyCache: NewBotCache.Cache, monkeypatch):
+    monkeypatch.setattr(PollTallies, "POLL_EXISTENCE_TTL", 60)
+    fetched = []
+    async def fetchMessage(messageID: int):
+        fetched.append(messageID)
+        if (messageID % 2 == 1):
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+    async def failingFetch(messageID: int):
+        raise discord.HTTPException(SimpleNamespace(status=403, reason="Forbidden"), "Missing Access")
+    channels = {CHANNEL_ID: SimpleNamespace(fetch_message=fetchMessage), 1234: SimpleNamespace(fetch_message=failingFetch)}
+    guild = SimpleNamespace(get_channel=channels.get)
+
+    tallies = PollTallies.PollTallies(emptyCache)
+    polls = [(CHANNEL_ID, messageID) for messageID in range(10, 20)] + [(1234, 20), (4321, 21)]
+    executor = BulkOperations.BulkOperationExecutor(maxRetries=0)
+
+    # deleted messages, polls in deleted channels, and nothing for messages that failed to fetch
+    assert sorted(await tallies.findDeletedPolls(guild, polls, executor)) == [11, 13, 15, 17, 19, 21]
+    assert sorted(fetched) == list(range(10, 20))
+
+    # messages found to exist aren't fetched again within the TTL
+    fetched.clear()
+    await tallies.findDeletedPolls(guild, polls, executor)
+    assert sorted(fetched) == [11, 13, 15, 17, 19]
+
+@pytest.mark.asyncio
+async def testFindDeletedPolls_NewPollNotFetched(emptyCache: NewBotCache.Cache):
+    guild = SimpleNamespace(get_channel=lambda channelID: None)
+    tallies = PollTallies.PollTallies(emptyCache)
+    tallies.addPoll(GUILD_ID, CHANNEL_ID, MESSAGE_ID, 3)
+
+    assert await tallies.findDeletedPolls(guild, [(CHANNEL_ID, MESSAGE_ID)], BulkOperations.sharedExecutor) == []
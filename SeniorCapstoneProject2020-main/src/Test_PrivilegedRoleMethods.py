@@ -208,3 +208,33 @@ async def testRemPrivilegedRole_Incorrect_RoleID(sampleCache: NewBotCache.Cache)
         await sampleCache.remPrivilegedRole(798358551230677042, "Value")
         await sampleCache.remPrivilegedRole(798358551230677042, ["Value", "Value2", "Value3"])
 
+
+@pytest.mark.asyncio
+async def testGetServerPrivilegedRolesSet_Cached(sampleCache: NewBotCache.Cache):
+    await sampleCache.getServerPrivilegedRolesSet(798358551230677042)
+
+    # rows changed behind the cache's back are not seen once the guild's roles are cached
+    sampleCache.createCursor().execute("""DELETE FROM privileged_roles""")
+    results = await sampleCache.getServerPrivilegedRolesSet(798358551230677042)
+    assert results == frozenset([805602260993310752, 805892126675697686, 806302209130102815])
+
+@pytest.mark.asyncio
+async def testGetServerPrivilegedRolesSet_UpdatedByAddAndRem(sampleCache: NewBotCache.Cache):
+    await sampleCache.getServerPrivilegedRolesSet(798358551230677042)
+    await sampleCache.addPrivilegedRole(798358551230677042, [798359230183636994])
+    await sampleCache.remPrivilegedRole(798358551230677042, 805602260993310752)
+    results = await sampleCache.getServerPrivilegedRolesSet(798358551230677042)
+    assert results == frozenset([805892126675697686, 806302209130102815, 798359230183636994])
+
+@pytest.mark.asyncio
+async def testIsPrivilegedRole_Cached(sampleCache: NewBotCache.Cache):
+    await sampleCache.remPrivilegedRole(798358551230677042, 805602260993310752)
+    removed = await sampleCache.isPrivilegedRole(798358551230677042, 805602260993310752)
+    present = await sampleCache.isPrivilegedRole(798358551230677042, 805892126675697686)
+    assert (not removed) and present
+
+@pytest.mark.asyncio
+async def testRemServer_ClearsPrivilegedRolesCache(sampleCache: NewBotCache.Cache):
+    await sampleCache.getServerPrivilegedRolesSet(798358551230677042)
+    await sampleCache.remServer(798358551230677042)
+    assert 798358551230677042 not in sampleCache.privilegedRolesCache
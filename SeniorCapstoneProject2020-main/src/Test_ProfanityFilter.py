@@ -0,0 +1,50 @@
+import pytest
+import ProfanityFilter
+from better_profanity import profanity
+
+## fixtures ##
+@pytest.fixture(scope="module")
+def defaultMatcher():
+    profanity.load_censor_words(ProfanityFilter.loadDefaultWords())
+    return ProfanityFilter.ProfanityMatcher(ProfanityFilter.loadDefaultWords())
+
+
+## unit tests ##
+@pytest.mark.parametrize("content", [
+    "does anyone have the notes from today's lecture?",
+    "the assignment is due at 5pm",
+    "you are an ass",
+    "BITCH!!",
+    "$h1t happens",
+    "f*ck this homework",
+    "that's bull shit",
+    "f.u.c.k off",
+    "sh it, I forgot",
+    "Scunthorpe is a town",
+    "shit's broken",
+    "cock-a-doodle-doo",
+    "check https://example.com/assets/classic.png"
+])
+def testContainsProfanity_MatchesBetterProfanity(defaultMatcher: ProfanityFilter.ProfanityMatcher, content):
+    assert defaultMatcher.containsProfanity(content) == profanity.contains_profanity(content)
+
+def testContainsProfanity_WordFilterFile(defaultMatcher: ProfanityFilter.ProfanityMatcher):
+    assert all(defaultMatcher.containsProfanity(word) for word in ProfanityFilter.readWordList(ProfanityFilter.WORD_FILTER_FILE))
+
+def testContainsProfanity_SpelledOutAtEnd(defaultMatcher: ProfanityFilter.ProfanityMatcher):
+    # better_profanity ignores a single letter word at the end of a message, missing this spelling
+    assert defaultMatcher.containsProfanity("what the f u c k")
+
+def testFindProfanity_CustomWords():
+    matcher = ProfanityFilter.ProfanityMatcher(["Homework", "pop quiz"])
+
+    result_one = matcher.findProfanity("no more h0mew0rk please")
+    result_two = matcher.findProfanity("surprise POP QUIZ today")
+    result_three = matcher.findProfanity("homeworks are graded")
+
+    assert (result_one == "h0mew0rk") and (result_two == "pop quiz") and (result_three is None)
+
+def testContainsProfanity_EmptyWordList():
+    matcher = ProfanityFilter.ProfanityMatcher([])
+
+    assert not matcher.containsProfanity("anything at all")
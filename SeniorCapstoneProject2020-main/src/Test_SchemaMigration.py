@@ -0,0 +1,114 @@
+import sqlite3
+import pytest
+import NewBotCache
+
+## fixtures ##
+@pytest.fixture
+def legacyDBFile(tmp_path):
+    """Creates a db file using the original text keyed schema, without a schema version
+    """
+    dbFile = str(tmp_path / "LegacyCache.db")
+    connection = sqlite3.connect(dbFile)
+
+    connection.execute("""CREATE TABLE servers (
+        id text PRIMARY KEY ON CONFLICT IGNORE,
+        command_prefix text NOT NULL,
+        infraction_channel text,
+        notification_channel text,
+        is_locked int NOT NULL
+    );""")
+    connection.execute("""CREATE TABLE groups (
+        role_id text PRIMARY KEY ON CONFLICT IGNORE,
+        server_id text NOT NULL,
+        category_id text NOT NULL,
+        FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
+    );""")
+    connection.execute("""CREATE TABLE perm_overwrites (
+        channel_id text NOT NULL,
+        modified_id text NOT NULL,
+        server_id text NOT NULL,
+        allow_value text NOT NULL,
+        deny_value text NOT NULL,
+        CONSTRAINT PK_PermOverwrite PRIMARY KEY (channel_id,modified_id) ON CONFLICT REPLACE
+        FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
+    );""")
+
+    connection.executemany("""INSERT INTO servers VALUES(?,?,?,?,?)""", [
+        ("798358551230677042", '!', "None", "None", 0),
+        ("394215266986491904", '.', "394215266986491906", "739359547025522740", 1)
+    ])
+    connection.execute("""INSERT INTO groups VALUES(?,?,?)""", ("810258706178408480", "798358551230677042", "810258706178408482"))
+    connection.execute("""INSERT INTO perm_overwrites VALUES(?,?,?,?,?)""",
+        ("808765968746283048", "805602260993310752", "798358551230677042", "0", "2048"))
+    connection.commit()
+    connection.close()
+
+    return dbFile
+
+
+## unit tests ##
+def testInitializeDatabase_NewFile():
+    cache = NewBotCache.Cache(':memory:')
+
+    cursor = cache.createCursor()
+    cursor.execute("PRAGMA user_version")
+    result, = cursor.fetchone()
+
+    assert result == 7
+
+def testInitializeDatabase_MigratesLegacyRows(legacyDBFile):
+    cache = NewBotCache.Cache(legacyDBFile)
+
+    cursor = cache.createCursor()
+    cursor.execute("""SELECT * FROM servers ORDER BY id""")
+    servers = cursor.fetchall()
+    cursor.execute("""SELECT * FROM groups""")
+    groups = cursor.fetchall()
+    cursor.execute("""SELECT * FROM perm_overwrites""")
+    overwrites = cursor.fetchall()
+    cache.dbConnection.close()
+
+    assert servers == [
+        (394215266986491904, '.', 394215266986491906, 739359547025522740, 1),
+        (798358551230677042, '!', None, None, 0)
+    ]
+    assert groups == [(810258706178408480, 798358551230677042, 810258706178408482)]
+    assert overwrites == [(808765968746283048, 805602260993310752, 798358551230677042, "0", "2048")]
+
+def testInitializeDatabase_CreatesIndexes(legacyDBFile):
+    cache = NewBotCache.Cache(legacyDBFile)
+
+    cursor = cache.createCursor()
+    cursor.execute("""SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'""")
+    indexes = {row[0] for row in cursor.fetchall()}
+    cache.dbConnection.close()
+
+    assert {"idx_groups_server", "idx_perm_overwrites_server_channel", "idx_polls_server_channel"} <= indexes
+
+@pytest.mark.asyncio
+async def testInitializeDatabase_MigratedForeignKeys(legacyDBFile):
+    cache = NewBotCache.Cache(legacyDBFile)
+    await cache.remServer(798358551230677042)
+
+    cursor = cache.createCursor()
+    cursor.execute("""SELECT COUNT(1) FROM groups""")
+    groupCount, = cursor.fetchone()
+    cursor.execute("""SELECT COUNT(1) FROM perm_overwrites""")
+    overwriteCount, = cursor.fetchone()
+    cache.dbConnection.close()
+
+    assert (groupCount == 0) and (overwriteCount == 0)
+
+def testInitializeDatabase_AlreadyMigrated(legacyDBFile):
+    cache = NewBotCache.Cache(legacyDBFile)
+    cache.dbConnection.execute("""INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)""", (123, '!', 0))
+    cache.dbConnection.commit()
+    cache.dbConnection.close()
+
+    cache = NewBotCache.Cache(legacyDBFile)
+    cursor = cache.createCursor()
+    cursor.execute("""SELECT COUNT(1) FROM servers""")
+    result, = cursor.fetchone()
+    cache.dbConnection.close()
+
+    assert result == 3
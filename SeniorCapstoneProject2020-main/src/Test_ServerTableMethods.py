@@ -11,8 +11,8 @@ def sampleCache():
 
     insertStatement = """INSERT INTO servers(id, command_prefix, is_locked, infraction_channel, notification_channel) VALUES(?,?,?,?,?)"""
     parameters = [
-        ("798358551230677042",'!',0,None,None),
-        ("394215266986491904",'.',1,"394215266986491906","739359547025522740")
+        (798358551230677042,'!',0,None,None),
+        (394215266986491904,'.',1,394215266986491906,739359547025522740)
     ]
     cache.dbConnection.executemany(insertStatement, parameters)
 
@@ -27,7 +27,7 @@ async def testAddServer_CorrectInput():
     await cache.addServer(798358551230677042)
 
     expectedResult = [
-        ("798358551230677042", "!", None, None, 0)
+        (798358551230677042, "!", None, None, 0)
     ]
     cursor = cache.createCursor()
     selectStatement = """SELECT * FROM servers"""
@@ -36,6 +36,14 @@ async def testAddServer_CorrectInput():
 
     assert result == expectedResult
 
+@pytest.mark.asyncio
+async def testAddServer_ExistingServerKeepsPrefix(sampleCache: NewBotCache.Cache):
+    await sampleCache.setServerCommandPrefix(798358551230677042, "$")
+    await sampleCache.addServer(798358551230677042)
+
+    assert sampleCache.getCachedCommandPrefix(798358551230677042) == "$"
+    assert await sampleCache.getServerCommandPrefix(798358551230677042) == "$"
+
 @pytest.mark.asyncio
 async def testAddServer_NonInt():
     cache = NewBotCache.Cache(':memory:')
@@ -55,7 +63,7 @@ async def testRemServer_CorrectInput(sampleCache: NewBotCache.Cache):
     await sampleCache.remServer(798358551230677042)
 
     expectedResult = [
-        ("394215266986491904",'.',"394215266986491906","739359547025522740",1)
+        (394215266986491904,'.',394215266986491906,739359547025522740,1)
     ]
     cursor = sampleCache.createCursor()
     selectStatement = """SELECT * FROM servers"""
@@ -73,9 +81,9 @@ async def testRemServer_NonInt(sampleCache: NewBotCache.Cache):
 async def testRemServer_NonExistant(sampleCache: NewBotCache.Cache):
     await sampleCache.remServer(798358551230677041)
 
-    expectedResult = ("798358551230677042", "!", None, None, 0)
+    expectedResult = (798358551230677042, "!", None, None, 0)
     cursor = sampleCache.createCursor()
-    selectStatement = """SELECT * FROM servers"""
+    selectStatement = """SELECT * FROM servers WHERE id = 798358551230677042"""
     cursor.execute(selectStatement)
     result = cursor.fetchone()
 
@@ -349,3 +357,62 @@ async def testSetServerNotificationChannelID_NoneChannelID(sampleCache: NewBotCa
     result = await sampleCache.getServerNotificationChannelID(798358551230677042)
     assert result == expectedResult
 
+
+##########################################################################################################
+
+@pytest.mark.asyncio
+async def testServerSettingsCache_HitAfterFirstLookup(sampleCache: NewBotCache.Cache):
+    await sampleCache.getServerCommandPrefix(394215266986491904)
+    await sampleCache.getServerInfractionChannelID(394215266986491904)
+    await sampleCache.getServerLockStatus(394215266986491904)
+
+    stats = sampleCache.getSettingsCacheStats()
+    assert (stats["misses"] == 1) and (stats["hits"] == 2) and (stats["size"] == 1)
+
+@pytest.mark.asyncio
+async def testServerSettingsCache_WriteThrough(sampleCache: NewBotCache.Cache):
+    await sampleCache.getServerCommandPrefix(394215266986491904)
+    await sampleCache.setServerCommandPrefix(394215266986491904, "?")
+    await sampleCache.setServerNotificationChannelID(394215266986491904, None)
+
+    prefix = await sampleCache.getServerCommandPrefix(394215266986491904)
+    notificationChannel = await sampleCache.getServerNotificationChannelID(394215266986491904)
+    assert (prefix == "?") and (notificationChannel is None) and (sampleCache.settingsCacheMisses == 1)
+
+@pytest.mark.asyncio
+async def testServerSettingsCache_RemServerInvalidates(sampleCache: NewBotCache.Cache):
+    await sampleCache.getServerLockStatus(394215266986491904)
+    await sampleCache.remServer(394215266986491904)
+
+    result = await sampleCache.getServerLockStatus(394215266986491904)
+    assert (result is None) and (394215266986491904 not in sampleCache.guildSettingsCache)
+
+##########################################################################################################
+
+@pytest.mark.asyncio
+async def testLoadPrefixMap(sampleCache: NewBotCache.Cache):
+    await sampleCache.loadPrefixMap()
+    assert sampleCache.prefixMap == {798358551230677042: "!", 394215266986491904: "."}
+    assert (sampleCache.getCachedCommandPrefix(394215266986491904) == ".") and (sampleCache.settingsCacheMisses == 0)
+
+@pytest.mark.asyncio
+async def testGetCachedCommandPrefix_MissingServerNotAdded(sampleCache: NewBotCache.Cache):
+    await sampleCache.loadPrefixMap()
+    assert sampleCache.getCachedCommandPrefix(798358551230677041) == NewBotCache.DEFAULT_COMMAND_PREFIX
+
+    cursor = sampleCache.createCursor()
+    cursor.execute("""SELECT COUNT(1) FROM servers""")
+    assert cursor.fetchone() == (2,)
+
+@pytest.mark.asyncio
+async def testPrefixMap_KeptCurrent(sampleCache: NewBotCache.Cache):
+    await sampleCache.loadPrefixMap()
+    await sampleCache.setServerCommandPrefix(798358551230677042, "?")
+    await sampleCache.addServer(798358551230677041)
+    await sampleCache.remServer(394215266986491904)
+
+    assert sampleCache.prefixMap == {798358551230677042: "?", 798358551230677041: "!"}
+
+    # prefix changes for servers not in the database aren't added to the map
+    await sampleCache.setServerCommandPrefix(394215266986491904, "$")
+    assert sampleCache.getCachedCommandPrefix(394215266986491904) == "!"
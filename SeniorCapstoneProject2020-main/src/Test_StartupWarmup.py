@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+import pytest
+import NewBotCache
+import StartupWarmup
+
+GUILD_ID = 798358551230677042
+OTHER_GUILD_ID = 394215266986491904
+NEW_GUILD_ID = 798358551230677041
+ADMIN_ROLE_ID = 805602260993310752
+GROUP_ROLE_ID = 805892126675697686
+CATEGORY_ID = 805892126675697600
+
+## fixtures ##
+@pytest.fixture
+def sampleCache():
+    cache = NewBotCache.Cache(':memory:')
+    cursor = cache.createCursor()
+
+    # insert servers
+    insertStatement = """INSERT INTO servers(id, command_prefix, infraction_channel, is_locked) VALUES(?,?,?,?)"""
+    cursor.executemany(insertStatement, [(GUILD_ID, '!', 799027610283819029, False), (OTHER_GUILD_ID, '.', None, True)])
+
+    # insert privileged roles, groups, excluded roles, and role react messages
+    cursor.execute("""INSERT INTO privileged_roles(role_id, server_id) VALUES(?,?)""", (ADMIN_ROLE_ID, GUILD_ID))
+    cursor.execute("""INSERT INTO groups(role_id, server_id, category_id) VALUES(?,?,?)""", (GROUP_ROLE_ID, GUILD_ID, CATEGORY_ID))
+    cursor.execute("""INSERT INTO excluded_roles(role_id, server_id) VALUES(?,?)""", (ADMIN_ROLE_ID, OTHER_GUILD_ID))
+    cursor.execute("""INSERT INTO role_react_msgs(message_id, channel_id, server_id, role_id) VALUES(?,?,?,?)""", (1, 2, GUILD_ID, GROUP_ROLE_ID))
+    return cache
+
+def fakeGuilds(*guildIDs: int):
+    return [SimpleNamespace(id=guildID) for guildID in guildIDs]
+
+
+## cache method tests ##
+@pytest.mark.asyncio
+async def testWarmGuildState(sampleCache: NewBotCache.Cache):
+    rowCounts = await sampleCache.warmGuildState()
+    assert rowCounts == {"servers": 2, "privileged_roles": 1, "groups": 1, "excluded_roles": 1, "role_react_msgs": 1}
+
+    assert sampleCache.prefixMap == {GUILD_ID: "!", OTHER_GUILD_ID: "."}
+    assert sampleCache.privilegedRolesCache == {GUILD_ID: frozenset([ADMIN_ROLE_ID]), OTHER_GUILD_ID: frozenset()}
+    assert sampleCache.groupCategoriesCache == {GUILD_ID: {GROUP_ROLE_ID: CATEGORY_ID}, OTHER_GUILD_ID: {}}
+
+    # lookups after the warm-up are served from memory
+    assert await sampleCache.getServerInfractionChannelID(GUILD_ID) == 799027610283819029
+    assert await sampleCache.getServerLockStatus(OTHER_GUILD_ID) == True
+    assert sampleCache.settingsCacheMisses == 0
+
+@pytest.mark.asyncio
+async def testWarmGuildState_KeepsNewerSettings(sampleCache: NewBotCache.Cache):
+    await sampleCache.getServerSettings(GUILD_ID)
+    sampleCache.guildSettingsCache[GUILD_ID]["command_prefix"] = "?"
+
+    await sampleCache.warmGuildState()
+    assert sampleCache.guildSettingsCache[GUILD_ID]["command_prefix"] == "?"
+
+@pytest.mark.asyncio
+async def testGroupCategoriesCache_KeptCurrent(sampleCache: NewBotCache.Cache):
+    await sampleCache.warmGuildState()
+    await sampleCache.addGroupRole(OTHER_GUILD_ID, GROUP_ROLE_ID + 1, CATEGORY_ID + 1)
+    await sampleCache.remGroupRole(GUILD_ID, GROUP_ROLE_ID)
+    await sampleCache.flushWrites()
+
+    assert await sampleCache.getGroupCategoriesDict(OTHER_GUILD_ID) == {GROUP_ROLE_ID + 1: CATEGORY_ID + 1}
+    assert await sampleCache.getGroupCategoriesDict(GUILD_ID) == {}
+
+
+## warm-up tests ##
+@pytest.mark.asyncio
+async def testRun_ReconcilesGuilds(sampleCache: NewBotCache.Cache):
+    warmup = StartupWarmup.StartupWarmup(sampleCache)
+
+    # the bot joined one server and left another while offline
+    await warmup.run(fakeGuilds(GUILD_ID, NEW_GUILD_ID))
+    await sampleCache.flushWrites()
+    assert (warmup.joinedGuildIDs == [NEW_GUILD_ID]) and (warmup.leftGuildIDs == [OTHER_GUILD_ID])
+    assert sampleCache.prefixMap == {GUILD_ID: "!", NEW_GUILD_ID: "!"}
+
+    cursor = sampleCache.createCursor()
+    cursor.execute("""SELECT id FROM servers ORDER BY id""")
+    assert cursor.fetchall() == [(NEW_GUILD_ID,), (GUILD_ID,)]
+
+@pytest.mark.asyncio
+async def testRun_BackgroundLoads(sampleCache: NewBotCache.Cache):
+    warmup = StartupWarmup.StartupWarmup(sampleCache)
+    loadThreads = []
+    warmup.registerBackgroundLoad("index", lambda: loadThreads.append(threading.current_thread()))
+
+    waiter = asyncio.ensure_future(warmup.waitUntilReady())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await warmup.run(fakeGuilds(GUILD_ID, OTHER_GUILD_ID))
+    await waiter
+    assert (len(loadThreads) == 1) and (loadThreads[0] != threading.current_thread())
+    assert set(warmup.timings) == {"guild state", "reconcile", "index", "total"}
+
+    # the warm-up only runs once
+    await warmup.run(fakeGuilds(GUILD_ID, OTHER_GUILD_ID))
+    assert len(loadThreads) == 1
+
+@pytest.mark.asyncio
+async def testRun_FailedLoadStillReady(sampleCache: NewBotCache.Cache):
+    warmup = StartupWarmup.StartupWarmup(sampleCache)
+
+    def failingLoad():
+        raise OSError("missing word list")
+
+    warmup.registerBackgroundLoad("words", failingLoad)
+    await warmup.run(fakeGuilds(GUILD_ID, OTHER_GUILD_ID))
+    assert warmup.ready.is_set() and ("words" not in warmup.timings)
@@ -0,0 +1,83 @@
+import json
+import os
+import pytest
+import UrlBlocklist
+
+## fixtures ##
+@pytest.fixture
+def blocklistFile(tmp_path):
+    filePath = str(tmp_path / "urlCheck.json")
+    data = {"url": [
+        {"link": ["https://i.imgur.com/p6OjerZ.jpg", "https://i.imgur.com/BcNjr3n.jpg?1", "http://example.org/private/"], "type": "Pornography", "threat": "NSFW"},
+        {"link": "https://www.malware.com/", "type": "Malware", "threat": "Virus"}
+    ]}
+    with open(filePath, "w") as f:
+        json.dump(data, f)
+
+    return filePath
+
+@pytest.fixture
+def sampleBlocklist(blocklistFile):
+    blocklist = UrlBlocklist.UrlBlocklist(blocklistFile)
+    blocklist.load()
+
+    return blocklist
+
+
+## unit tests ##
+def testMatch_ExactUrl(sampleBlocklist: UrlBlocklist.UrlBlocklist):
+    result_one = sampleBlocklist.match("https://i.imgur.com/p6OjerZ.jpg")
+    result_two = sampleBlocklist.match("HTTP://I.IMGUR.COM:80/p6OjerZ.jpg#top")
+    result_three = sampleBlocklist.match("https://i.imgur.com/other.jpg")
+
+    assert (result_one["threat"] == "NSFW") and (result_two == result_one) and (result_three is None)
+
+def testMatch_Query(sampleBlocklist: UrlBlocklist.UrlBlocklist):
+    result_one = sampleBlocklist.match("https://i.imgur.com/BcNjr3n.jpg?1")
+    result_two = sampleBlocklist.match("https://i.imgur.com/p6OjerZ.jpg?size=large")
+    result_three = sampleBlocklist.match("https://i.imgur.com/BcNjr3n.jpg")
+
+    assert (result_one is not None) and (result_two is not None) and (result_three is None)
+
+def testMatch_PathPrefix(sampleBlocklist: UrlBlocklist.UrlBlocklist):
+    result_one = sampleBlocklist.match("http://example.org/private/photos/1.png")
+    result_two = sampleBlocklist.match("http://example.org/public/1.png")
+
+    assert (result_one["type"] == "Pornography") and (result_two is None)
+
+def testMatch_Host(sampleBlocklist: UrlBlocklist.UrlBlocklist):
+    result_one = sampleBlocklist.match("https://malware.com/download.exe")
+    result_two = sampleBlocklist.match("http://files.malware.com/")
+    result_three = sampleBlocklist.match("https://notmalware.com/")
+
+    assert (result_one["threat"] == "Virus") and (result_two["threat"] == "Virus") and (result_three is None)
+
+def testFindBlockedUrl_MessageContent(sampleBlocklist: UrlBlocklist.UrlBlocklist):
+    result_one = sampleBlocklist.findBlockedUrl("check this out www.malware.com/free please")
+    result_two = sampleBlocklist.findBlockedUrl("no links in this message")
+    result_three = sampleBlocklist.findBlockedUrl("https://discord.com/channels/1 is fine")
+
+    assert (result_one[0] == "www.malware.com/free") and (result_two is None) and (result_three is None)
+
+def testContainsUrl():
+    assert UrlBlocklist.containsUrl("see https://discord.com/channels/1") and UrlBlocklist.containsUrl("WWW.example.com")
+    assert (not UrlBlocklist.containsUrl("no links in this message")) and (not UrlBlocklist.containsUrl("a :// b"))
+
+def testReloadIfChanged(blocklistFile, sampleBlocklist: UrlBlocklist.UrlBlocklist):
+    result_one = sampleBlocklist.reloadIfChanged()
+
+    with open(blocklistFile, "w") as f:
+        json.dump({"url": [{"link": ["https://phishing.net/"], "type": "Malware", "threat": "Phishing"}]}, f)
+    os.utime(blocklistFile, ns=(0, 0))
+    result_two = sampleBlocklist.reloadIfChanged()
+
+    assert (not result_one) and result_two
+    assert (sampleBlocklist.match("https://phishing.net/login") is not None) and (sampleBlocklist.match("https://malware.com/") is None)
+
+def testReloadIfChanged_InvalidFile(blocklistFile, sampleBlocklist: UrlBlocklist.UrlBlocklist):
+    with open(blocklistFile, "w") as f:
+        f.write("{ not json")
+    os.utime(blocklistFile, ns=(0, 0))
+    result = sampleBlocklist.reloadIfChanged()
+
+    assert (not result) and (sampleBlocklist.match("https://malware.com/") is not None)
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+import NewBotCache
+import discord
+from sqlite3.dbapi2 import IntegrityError
+
+## fixtures ##
+@pytest.fixture
+def emptyCache():
+    cache = NewBotCache.Cache(':memory:')
+
+    # insert server
+    insertStatement = """INSERT INTO servers(id, command_prefix, is_locked) VALUES(?,?,?)"""
+    cache.createCursor().execute(insertStatement, ("798358551230677042", '!', False))
+    cache.dbConnection.commit()
+
+    return cache
+
+
+## unit tests ##
+@pytest.mark.asyncio
+async def testQueueDBWrite_ConcurrentWritesShareBatch(emptyCache: NewBotCache.Cache):
+    overwrite = discord.PermissionOverwrite.from_pair(discord.Permissions.none(), discord.Permissions(send_messages=True))
+    commitCount = 0
+    commitWriteBatch = emptyCache.commitWriteBatch
+
+    def countingCommitWriteBatch(operations):
+        nonlocal commitCount
+        commitCount += 1
+        return commitWriteBatch(operations)
+    emptyCache.commitWriteBatch = countingCommitWriteBatch
+
+    await asyncio.gather(*[emptyCache.addPermOverwrite(798358551230677042, 808765968746283048, modifiedID, overwrite)
+        for modifiedID in range(200)])
+
+    cursor = emptyCache.createCursor()
+    cursor.execute("""SELECT COUNT(1) FROM perm_overwrites""")
+    result, = cursor.fetchone()
+
+    assert (result == 200) and (commitCount == 1) and (not emptyCache.dbConnection.in_transaction)
+
+@pytest.mark.asyncio
+async def testQueueDBWrite_MaxBatchSize(emptyCache: NewBotCache.Cache):
+    emptyCache.maxWriteBatchSize = 10
+
+    await asyncio.gather(*[emptyCache.addExcludedRole(798358551230677042, roleID) for roleID in range(25)])
+    results = await emptyCache.getServerExcludedRolesList(798358551230677042)
+
+    assert sorted(results) == list(range(25))
+
+@pytest.mark.asyncio
+async def testQueueDBWrite_FailedWriteIsolated(emptyCache: NewBotCache.Cache):
+    results = await asyncio.gather(
+        emptyCache.addGroupRole(820724374268149771, 805602260993310752, 834165166769307678),
+        emptyCache.addPrivilegedRole(798358551230677042, 805892126675697686),
+        return_exceptions=True
+    )
+    privilegedRoles = await emptyCache.getServerPrivilegedRolesList(798358551230677042)
+    groupRoles = await emptyCache.getServerGroupRolesList(820724374268149771)
+
+    assert isinstance(results[0], IntegrityError) and (privilegedRoles == [805892126675697686]) and (groupRoles == [])
+
+@pytest.mark.asyncio
+async def testFlushWrites_CommitsPendingWrites(emptyCache: NewBotCache.Cache):
+    emptyCache.writeBatchWindow = 60
+    writeTask = asyncio.ensure_future(emptyCache.setServerCommandPrefix(798358551230677042, "?"))
+    await asyncio.sleep(0)
+
+    await emptyCache.flushWrites()
+    result = await writeTask
+
+    assert result and (await emptyCache.getServerCommandPrefix(798358551230677042) == "?")
@@ -0,0 +1,179 @@
+"""Module contains UrlBlocklist class for matching urls against the restricted urls file."""
+
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# pattern used to find the urls contained in a message; urls must start with a scheme or "www."
+URL_PATTERN = re.compile(r"(?:https?://|www\.)[^\s<>]+", re.IGNORECASE)
+
+# default ports that are dropped from a url's host when it is normalized
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def containsUrl(content: str) -> bool:
+    """Returns whether the given message content contains a url.
+    """
+    # quick rejection of messages that can't contain a url before running the url pattern
+    if (("://" not in content) and ("www." not in content.lower())):
+        return False
+
+    return URL_PATTERN.search(content) is not None
+
+class UrlBlocklist():
+    """UrlBlocklist object compiles the entries of the restricted urls file into a hashed index so that a url
+    can be checked against the blocklist in time independent of the number of entries. Each entry is indexed
+    by its normalized form, which is one of:
+    \n- a full url, matching that url with or without its query string
+    \n- a path prefix ending in "/", matching every url under that path on the same host
+    \n- a host (an entry with an empty path), matching every url on that host and its subdomains
+    """
+    def __init__(self, filePath: str):
+        self.filePath = filePath
+
+        # index maps the normalized key of each blocklist entry to the dict holding the entry's 'type' and
+        # 'threat', with fileSignature storing the modification time and size of the file the index was built from
+        self.index = {}
+        self.fileSignature = None
+
+    def load(self):
+        """Builds a new index from the restricted urls file and replaces the current index with it.
+        """
+        with open(self.filePath) as f:
+            signature = self.getFileSignature()
+            data = json.load(f)
+
+        self.index = self.compileIndex(data)
+        self.fileSignature = signature
+
+    def reloadIfChanged(self) -> bool:
+        """Rebuilds the index if the restricted urls file has changed on disk since it was last loaded,
+        returning whether the index was rebuilt. The current index is kept if the file can't be read.
+        """
+        try:
+            if (self.getFileSignature() == self.fileSignature):
+                return False
+            self.load()
+        except (OSError, ValueError) as e:
+            print(e)
+            print(f"Failed to reload url blocklist '{self.filePath}', keeping current blocklist")
+            return False
+
+        return True
+
+    def getFileSignature(self) -> Tuple[int, int]:
+        """Returns the modification time and size of the restricted urls file.
+        """
+        fileStat = os.stat(self.filePath)
+        return (fileStat.st_mtime_ns, fileStat.st_size)
+
+    @staticmethod
+    def compileIndex(data: dict) -> Dict[str, dict]:
+        """Compiles the data loaded from a restricted urls file into a dict mapping normalized entry keys
+        to the entry's category. Entries that can't be parsed as urls are skipped.
+        """
+        index = {}
+        for category in data["url"]:
+            categoryInfo = {"type": category["type"], "threat": category["threat"]}
+
+            # categories may store a single link instead of a list of links
+            links = category["link"]
+            if (isinstance(links, str)):
+                links = [links]
+
+            for link in links:
+                normalized = UrlBlocklist.normalizeUrl(link)
+                if (normalized is None):
+                    continue
+
+                host, path, query = normalized
+                key = host + path
+                if (query):
+                    key += "?" + query
+                index.setdefault(key, categoryInfo)
+
+        return index
+
+    @staticmethod
+    def normalizeUrl(url: str) -> Optional[Tuple[str, str, str]]:
+        """Splits a url into its normalized host, path, and query string. Hosts are lowercased with any
+        "www." prefix, trailing dot, and default port removed; the path of a url on the host root is "/".
+        Returns None if the url has no host.
+        """
+        url = url.strip()
+        if ("://" not in url):
+            url = "http://" + url
+
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return None
+
+        host = (parts.hostname or "").rstrip(".")
+        if (host.startswith("www.")):
+            host = host[4:]
+        if (not host):
+            return None
+        if (port is not None and port != DEFAULT_PORTS.get(parts.scheme.lower())):
+            host += f":{port}"
+
+        return (host, parts.path or "/", parts.query)
+
+    def candidateKeys(self, url: str) -> List[str]:
+        """Returns the index keys that would match the given url: the full url with and without its
+        query string, each path prefix of the url, and the url's host and parent domains.
+        """
+        normalized = self.normalizeUrl(url)
+        if (normalized is None):
+            return []
+
+        host, path, query = normalized
+        keys = []
+        if (query):
+            keys.append(f"{host}{path}?{query}")
+        keys.append(host + path)
+
+        # path prefixes, from the longest directory down to the host root
+        slashIndex = path.rfind("/", 0, len(path) - 1)
+        while (slashIndex >= 0):
+            keys.append(host + path[:slashIndex + 1])
+            slashIndex = path.rfind("/", 0, slashIndex)
+
+        # parent domains of the host match entries blocking a whole domain
+        labels = host.split(".")
+        for i in range(1, len(labels) - 1):
+            keys.append(".".join(labels[i:]) + "/")
+
+        return keys
+
+    def match(self, url: str) -> Optional[dict]:
+        """Returns the category dict of the blocklist entry matching the given url, or None if the url
+        is not blocked.
+        """
+        index = self.index
+        for key in self.candidateKeys(url):
+            category = index.get(key)
+            if (category is not None):
+                return category
+
+        return None
+
+    def findBlockedUrl(self, content: str) -> Optional[Tuple[str, dict]]:
+        """Checks each url contained in the given message content against the blocklist, returning a tuple
+        of the first blocked url and its category dict, or None if no blocked url is found.
+        """
+        # quick rejection of messages that can't contain a url before running the url pattern
+        if (("://" not in content) and ("www." not in content.lower())):
+            return None
+
+        for url in URL_PATTERN.findall(content):
+            category = self.match(url)
+            if (category is not None):
+                return (url, category)
+
+        return None
+
+    def __len__(self):
+        return len(self.index)
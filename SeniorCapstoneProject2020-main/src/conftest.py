@@ -0,0 +1,9 @@
+import pytest
+import NewBotCache
+
+# run every cache test once with database work done inline on the event loop and once with it done
+# on the cache's dedicated database thread
+@pytest.fixture(autouse=True, params=[False, True], ids=["inline", "executor"])
+def dbExecutionMode(request, monkeypatch):
+    monkeypatch.setattr(NewBotCache, "USE_DB_EXECUTOR", request.param)
+    return request.param